@@ -17,6 +17,7 @@ from .ensemble_models import (
 from .neural_networks import MLPModel, DeepMLPModel, WideMLPModel
 from .time_series import ARIMAModel, VARModel
 from .synergy_analysis import SynergyAnalysis
+from .shapley import ShapleyEngine
 from .threshold_analysis import ThresholdAnalysis
 from .lag_analysis import LagAnalysis
 from .advanced_relationships import AdvancedRelationships
@@ -45,6 +46,7 @@ __all__ = [
     "VARModel",
     # 高级分析
     "SynergyAnalysis",
+    "ShapleyEngine",
     "ThresholdAnalysis",
     "LagAnalysis",
     "AdvancedRelationships",
@@ -8,13 +8,374 @@ from typing import Dict, Any, List, Optional, Tuple
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
-from scipy import stats
+from scipy import fft, stats
 import logging
 from ..logging_config import get_logger
 
 logger = get_logger("lag_analysis")
 
 
+def _lagged_cross_products(X: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    计算全部特征在0..max_lag滞后下的交叉乘积和 C[L, j] = Σ_t X[t, j] * y[t + L]
+
+    滞后数较少时逐滞后做矩阵-向量乘法，较多时用FFT一次求出全部滞后。
+    """
+    n = len(y)
+    if max_lag + 1 <= 2 * np.log2(max(n, 2)):
+        return np.array([X[: n - lag].T @ y[lag:] for lag in range(max_lag + 1)])
+
+    # 补零到n + max_lag以上避免循环相关的回绕
+    size = fft.next_fast_len(n + max_lag, real=True)
+    spectrum = np.conj(fft.rfft(X, size, axis=0)) * fft.rfft(y, size)[:, None]
+    return fft.irfft(spectrum, size, axis=0)[: max_lag + 1]
+
+
+def _correlation_from_moments(
+    s_xx: np.ndarray, s_yy: np.ndarray, s_xy: np.ndarray
+) -> np.ndarray:
+    """由离差平方和与离差积和计算皮尔逊相关系数，方差为0时为NaN"""
+    denom = np.sqrt(s_xx * s_yy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, s_xy / denom, np.nan)
+
+
+def _regression_from_moments(
+    n: np.ndarray, s_xx: np.ndarray, s_yy: np.ndarray, s_xy: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """由离差平方和与离差积和计算单变量回归y ~ x的系数、R²与MSE"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coef = np.where(s_xx > 0, s_xy / s_xx, 0.0)
+        sse = np.maximum(s_yy - coef * s_xy, 0.0)
+        r2 = np.where(s_yy > 0, 1 - sse / s_yy, np.where(sse == 0, 1.0, 0.0))
+        return {"coefficient": coef, "r2": r2, "mse": sse / n}
+
+
+def _granger_from_moments(
+    m: np.ndarray,
+    s_xx: np.ndarray,
+    s_zz: np.ndarray,
+    s_yy: np.ndarray,
+    s_xz: np.ndarray,
+    s_xy: np.ndarray,
+    s_yz: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    由离差矩阵计算格兰杰检验：y ~ x + z（无约束）对比 y ~ z（约束），
+    其中x为滞后特征、z为y的一阶滞后；各参数按广播规则对齐
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        explained_r = np.where(s_zz > 0, s_yz**2 / s_zz, 0.0)
+        det = s_xx * s_zz - s_xz**2
+        explained_u = np.where(
+            det > 1e-12 * np.maximum(s_xx * s_zz, 1e-300),
+            (s_zz * s_xy**2 - 2 * s_xz * s_xy * s_yz + s_xx * s_yz**2) / det,
+            explained_r,
+        )
+        r2_restricted = np.where(s_yy > 0, explained_r / s_yy, 1.0)
+        r2_unrestricted = np.where(s_yy > 0, explained_u / s_yy, 1.0)
+        r2_restricted = np.broadcast_to(r2_restricted, r2_unrestricted.shape)
+
+        dof = m - 2
+        f_stat = (r2_unrestricted - r2_restricted) / ((1 - r2_unrestricted) / dof)
+        p_value = 1 - stats.f.cdf(f_stat, 1, dof)
+
+    return {
+        "f_statistic": f_stat,
+        "p_value": p_value,
+        "r2_unrestricted": r2_unrestricted,
+        "r2_restricted": np.array(r2_restricted),
+    }
+
+
+class LagMatrix:
+    """
+    滞后矩统计矩阵
+
+    对(滞后 × 特征)网格一次性计算样本数、均值、方差与协方差：
+    特征前缀和、目标后缀和与交叉乘积（_lagged_cross_products）均只计算一次，
+    交叉相关、单变量滞后回归、AIC与格兰杰检验都由这些矩以闭式得到，无需切片或重新拟合。
+    数据先整体中心化以减小方差计算中的数值抵消。
+    """
+
+    def __init__(self, X: pd.DataFrame, y: pd.Series, max_lag: int):
+        values = np.asarray(X, dtype=float)
+        target = np.asarray(y, dtype=float)
+        n = len(target)
+
+        self.columns = list(X.columns)
+        self.max_lag = min(max_lag, n - 1)
+        self.x_mean = values.mean(axis=0)
+        self.y_mean = target.mean()
+        self.X = values - self.x_mean
+        self.y = target - self.y_mean
+
+        lags = np.arange(self.max_lag + 1)
+        self.lags = lags
+        self.n_obs = n - lags
+
+        # 滞后L时样本对为(X[:n-L], y[L:])
+        x_prefix = np.vstack([np.zeros(self.X.shape[1]), np.cumsum(self.X, axis=0)])
+        xx_prefix = np.vstack([np.zeros(self.X.shape[1]), np.cumsum(self.X**2, axis=0)])
+        y_suffix = np.concatenate([np.cumsum(self.y[::-1])[::-1], [0.0]])
+        yy_suffix = np.concatenate([np.cumsum(self.y[::-1] ** 2)[::-1], [0.0]])
+
+        self.sum_x = x_prefix[self.n_obs]
+        self.sum_xx = xx_prefix[self.n_obs]
+        self.sum_y = y_suffix[lags]
+        self.sum_yy = yy_suffix[lags]
+        self.sum_xy = _lagged_cross_products(self.X, self.y, self.max_lag)
+
+        self._y_suffix = y_suffix
+        self._yy_suffix = yy_suffix
+
+        m = self.n_obs.astype(float)
+        self.var_x = self.sum_xx - self.sum_x**2 / m[:, None]
+        self.var_y = self.sum_yy - self.sum_y**2 / m
+        self.cov_xy = self.sum_xy - self.sum_x * (self.sum_y / m)[:, None]
+
+    def correlation(self) -> np.ndarray:
+        """(滞后, 特征)皮尔逊相关系数，方差为0时为NaN"""
+        return _correlation_from_moments(self.var_x, self.var_y[:, None], self.cov_xy)
+
+    def regression(self) -> Dict[str, np.ndarray]:
+        """(滞后, 特征)单变量回归y[L:] ~ X[:n-L]的系数、截距、R²与MSE"""
+        m = self.n_obs.astype(float)[:, None]
+        result = _regression_from_moments(
+            m, self.var_x, self.var_y[:, None], self.cov_xy
+        )
+
+        x_bar = self.sum_x / m + self.x_mean
+        y_bar = self.sum_y[:, None] / m + self.y_mean
+        result["intercept"] = y_bar - result["coefficient"] * x_bar
+        return result
+
+    def granger(self) -> Dict[str, np.ndarray]:
+        """
+        (滞后, 特征)格兰杰检验：y[t] ~ X[t-L] + y[t-1] 对比 y[t] ~ y[t-1]
+
+        第0行（滞后0）无意义，保留以便与其它矩阵按滞后对齐。
+        """
+        n = len(self.y)
+        lags = self.lags[1:]
+        m = (n - lags).astype(float)
+
+        # 目标y[t]与自回归项y[t-1]，t = L..n-1
+        yz_suffix = np.concatenate(
+            [np.cumsum((self.y[1:] * self.y[:-1])[::-1])[::-1], [0.0]]
+        )
+        sum_y = self.sum_y[1:]
+        sum_yy = self.sum_yy[1:]
+        sum_z = self._y_suffix[lags - 1] - self.y[-1]
+        sum_zz = self._yy_suffix[lags - 1] - self.y[-1] ** 2
+        sum_yz = yz_suffix[lags - 1]
+
+        # 滞后特征X[t-L]，即X[:n-L]
+        sum_x = self.sum_x[1:]
+        sum_xx = self.sum_xx[1:]
+        sum_xy = self.sum_xy[1:]
+        sum_xz = self.sum_xy[:-1] - self.X[n - lags] * self.y[-1]
+
+        # 滞后接近样本数时m可能为0，这些滞后由调用方按样本数过滤
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = _granger_from_moments(
+                m[:, None],
+                s_xx=sum_xx - sum_x**2 / m[:, None],
+                s_zz=(sum_zz - sum_z**2 / m)[:, None],
+                s_yy=(sum_yy - sum_y**2 / m)[:, None],
+                s_xz=sum_xz - sum_x * (sum_z / m)[:, None],
+                s_xy=sum_xy - sum_x * (sum_y / m)[:, None],
+                s_yz=(sum_yz - sum_y * sum_z / m)[:, None],
+            )
+
+        pad = np.full((1, self.X.shape[1]), np.nan)
+        result = {key: np.vstack([pad, value]) for key, value in result.items()}
+        result["n_obs"] = np.concatenate([[0], m.astype(int)])
+        return result
+
+
+class IncrementalLagStatistics:
+    """
+    在线滞后统计（单个原因指标 -> 结果指标）
+
+    为每个滞后维护Welford式运行均值与离差矩阵：
+    - 滞后对(x[t-L], y[t])，L = 0..max_lag，用于相关、回归与AIC选滞后；
+    - 三元组(x[t-L], y[t-1], y[t])，L = 1..max_lag，用于格兰杰检验，
+      相当于每个滞后一个带截距的递推最小二乘状态。
+    每追加一个观测只需O(max_lag)次常数规模的更新，结果与对全部历史调用LagMatrix一致；
+    状态可通过to_dict/from_dict序列化持久化，重启后无需回放历史。
+    """
+
+    def __init__(self, max_lag: int = 12):
+        if max_lag < 1:
+            raise ValueError("max_lag必须大于0")
+
+        self.max_lag = max_lag
+        self.n_observations = 0
+        # 最近max_lag + 1个原因指标值（最新在前）与上一个结果指标值
+        self.x_history: List[float] = []
+        self.last_y: Optional[float] = None
+
+        self.pair_count = np.zeros(max_lag + 1)
+        self.pair_mean = np.zeros((max_lag + 1, 2))
+        self.pair_comoment = np.zeros((max_lag + 1, 2, 2))
+
+        self.granger_count = np.zeros(max_lag)
+        self.granger_mean = np.zeros((max_lag, 3))
+        self.granger_comoment = np.zeros((max_lag, 3, 3))
+
+    @staticmethod
+    def _welford_update(
+        count: np.ndarray, mean: np.ndarray, comoment: np.ndarray, values: np.ndarray
+    ):
+        """按行原地更新运行均值与离差矩阵"""
+        count += 1
+        delta = values - mean
+        mean += delta / count[:, None]
+        comoment += delta[:, :, None] * (values - mean)[:, None, :]
+
+    def update(self, x: float, y: float):
+        """追加一个观测(原因指标值, 结果指标值)"""
+        x, y = float(x), float(y)
+        self.x_history.insert(0, x)
+        del self.x_history[self.max_lag + 1 :]
+        lagged_x = np.array(self.x_history)
+        available = len(lagged_x)
+
+        self._welford_update(
+            self.pair_count[:available],
+            self.pair_mean[:available],
+            self.pair_comoment[:available],
+            np.column_stack([lagged_x, np.full(available, y)]),
+        )
+
+        if self.last_y is not None and available > 1:
+            lags = available - 1
+            self._welford_update(
+                self.granger_count[:lags],
+                self.granger_mean[:lags],
+                self.granger_comoment[:lags],
+                np.column_stack(
+                    [lagged_x[1:], np.full(lags, self.last_y), np.full(lags, y)]
+                ),
+            )
+
+        self.last_y = y
+        self.n_observations += 1
+
+    def extend(self, x_values, y_values):
+        """按时间顺序追加多个观测"""
+        for x, y in zip(x_values, y_values):
+            self.update(x, y)
+
+    def lag_statistics(self, min_samples: int = 10) -> Dict[str, Any]:
+        """各滞后的相关系数、回归指标与AIC，以及按AIC选出的最优滞后"""
+        n = self.pair_count
+        valid = n > min_samples
+        s_xx = self.pair_comoment[:, 0, 0]
+        s_yy = self.pair_comoment[:, 1, 1]
+        s_xy = self.pair_comoment[:, 0, 1]
+
+        correlation = _correlation_from_moments(s_xx, s_yy, s_xy)
+        regression = _regression_from_moments(np.maximum(n, 1), s_xx, s_yy, s_xy)
+        with np.errstate(divide="ignore"):
+            aic = n * np.log(regression["mse"]) + 2 * 2
+
+        lags = np.flatnonzero(valid)
+        optimal_lag = None
+        if lags.size and not np.isnan(aic[lags]).all():
+            optimal_lag = int(lags[np.nanargmin(aic[lags])])
+
+        return {
+            "optimal_lag": optimal_lag,
+            "lags": {
+                int(lag): {
+                    "n_obs": int(n[lag]),
+                    "correlation": float(correlation[lag]),
+                    "r2": float(regression["r2"][lag]),
+                    "mse": float(regression["mse"][lag]),
+                    "coefficient": float(regression["coefficient"][lag]),
+                    "aic": float(aic[lag]),
+                }
+                for lag in lags
+            },
+        }
+
+    def granger_causality(
+        self, min_samples: int = 20, significance: float = 0.05
+    ) -> Dict[str, Any]:
+        """各滞后的格兰杰F统计量与p值"""
+        m = self.granger_count
+        c = self.granger_comoment
+        result = _granger_from_moments(
+            m,
+            s_xx=c[:, 0, 0],
+            s_zz=c[:, 1, 1],
+            s_yy=c[:, 2, 2],
+            s_xz=c[:, 0, 1],
+            s_xy=c[:, 0, 2],
+            s_yz=c[:, 1, 2],
+        )
+
+        # 与批量检验相同的样本要求：滞后对数 > min_samples 且回归样本数 > 10
+        valid = (self.pair_count[1:] > min_samples) & (m > 10)
+        tests = {
+            int(i + 1): {
+                "f_statistic": float(result["f_statistic"][i]),
+                "p_value": float(result["p_value"][i]),
+                "r2_unrestricted": float(result["r2_unrestricted"][i]),
+                "r2_restricted": float(result["r2_restricted"][i]),
+                "causality": bool(result["p_value"][i] < significance),
+            }
+            for i in np.flatnonzero(valid)
+        }
+
+        significant = {lag: t for lag, t in tests.items() if t["causality"]}
+        best_lag = (
+            min(significant, key=lambda lag: significant[lag]["p_value"])
+            if significant
+            else None
+        )
+        return {
+            "causality_tests": tests,
+            "best_lag": best_lag,
+            "causality": best_lag is not None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可JSON存储的状态"""
+        return {
+            "max_lag": self.max_lag,
+            "n_observations": self.n_observations,
+            "x_history": self.x_history,
+            "last_y": self.last_y,
+            "pair_count": self.pair_count.tolist(),
+            "pair_mean": self.pair_mean.tolist(),
+            "pair_comoment": self.pair_comoment.tolist(),
+            "granger_count": self.granger_count.tolist(),
+            "granger_mean": self.granger_mean.tolist(),
+            "granger_comoment": self.granger_comoment.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "IncrementalLagStatistics":
+        """从to_dict的结果恢复"""
+        statistics = cls(max_lag=state["max_lag"])
+        statistics.n_observations = state["n_observations"]
+        statistics.x_history = list(state["x_history"])
+        statistics.last_y = state["last_y"]
+        for key in (
+            "pair_count",
+            "pair_mean",
+            "pair_comoment",
+            "granger_count",
+            "granger_mean",
+            "granger_comoment",
+        ):
+            setattr(statistics, key, np.array(state[key], dtype=float))
+        return statistics
+
+
 class LagAnalysis:
     """时间滞后分析"""
 
@@ -22,6 +383,23 @@ class LagAnalysis:
         self.lag_effects = {}
         self.optimal_lags = {}
         self.lag_models = {}
+        # 最近一次使用的(X, y, max_lag, 滞后矩阵)，同一次分析的各步骤共享
+        self._lag_matrix: Optional[Tuple[Any, Any, int, LagMatrix]] = None
+
+    def _get_lag_matrix(self, X: pd.DataFrame, y: pd.Series, max_lag: int) -> LagMatrix:
+        """获取数据对应的滞后矩阵"""
+        cached = self._lag_matrix
+        if (
+            cached is not None
+            and cached[0] is X
+            and cached[1] is y
+            and cached[2] == max_lag
+        ):
+            return cached[3]
+
+        matrix = LagMatrix(X, y, max_lag)
+        self._lag_matrix = (X, y, max_lag, matrix)
+        return matrix
 
     def detect_lag_effects(
         self,
@@ -72,34 +450,20 @@ class LagAnalysis:
         try:
             cross_corr_results = {}
 
-            for feature in X.columns:
-                feature_values = X[feature].values
-                y_values = y.values
-
-                # 计算不同滞后的相关系数
-                correlations = []
-                lags = []
-
-                for lag in range(0, max_lag + 1):
-                    if len(feature_values) > lag:
-                        # 滞后特征值
-                        lagged_feature = (
-                            feature_values[:-lag] if lag > 0 else feature_values
-                        )
-                        # 对应的目标值
-                        corresponding_y = y_values[lag:] if lag > 0 else y_values
-
-                        if len(lagged_feature) > 10:  # 确保有足够的样本
-                            correlation = np.corrcoef(lagged_feature, corresponding_y)[
-                                0, 1
-                            ]
-
-                            if (
-                                not np.isnan(correlation)
-                                and abs(correlation) >= min_correlation
-                            ):
-                                correlations.append(correlation)
-                                lags.append(lag)
+            # 一次计算全部特征、全部滞后的相关系数
+            matrix = self._get_lag_matrix(X, y, max_lag)
+            correlation_matrix = matrix.correlation()
+            enough_samples = matrix.n_obs > 10  # 确保有足够的样本
+
+            for j, feature in enumerate(X.columns):
+                column = correlation_matrix[:, j]
+                keep = (
+                    enough_samples
+                    & ~np.isnan(column)
+                    & (np.abs(column) >= min_correlation)
+                )
+                lags = matrix.lags[keep].tolist()
+                correlations = column[keep].tolist()
 
                 if correlations:
                     # 找到最大相关系数对应的滞后
@@ -111,8 +475,8 @@ class LagAnalysis:
                         "correlations": dict(zip(lags, correlations)),
                         "optimal_lag": optimal_lag,
                         "max_correlation": max_correlation,
-                        "lag_significance": self._calculate_lag_significance(
-                            feature_values, y_values, optimal_lag
+                        "lag_significance": self._correlation_significance(
+                            max_correlation, int(matrix.n_obs[optimal_lag]), optimal_lag
                         ),
                     }
 
@@ -132,38 +496,26 @@ class LagAnalysis:
         try:
             lag_regression_results = {}
 
-            for feature in X.columns:
-                feature_values = X[feature].values
-                y_values = y.values
+            # 全部特征、全部滞后的单变量回归由滞后矩阵闭式求得
+            matrix = self._get_lag_matrix(X, y, max_lag)
+            regression = matrix.regression()
+            valid_lags = [
+                (i, int(lag))
+                for i, lag in enumerate(matrix.lags)
+                if matrix.n_obs[i] > 10
+            ]
 
+            for j, feature in enumerate(X.columns):
                 # 测试不同滞后的回归性能
-                lag_performance = {}
-
-                for lag in range(0, max_lag + 1):
-                    if len(feature_values) > lag:
-                        # 准备滞后数据
-                        lagged_feature = (
-                            feature_values[:-lag] if lag > 0 else feature_values
-                        )
-                        corresponding_y = y_values[lag:] if lag > 0 else y_values
-
-                        if len(lagged_feature) > 10:
-                            # 训练回归模型
-                            X_lag = lagged_feature.reshape(-1, 1)
-                            model = LinearRegression()
-                            model.fit(X_lag, corresponding_y)
-
-                            # 计算性能指标
-                            y_pred = model.predict(X_lag)
-                            r2 = r2_score(corresponding_y, y_pred)
-                            mse = mean_squared_error(corresponding_y, y_pred)
-
-                            lag_performance[lag] = {
-                                "r2": r2,
-                                "mse": mse,
-                                "coefficient": model.coef_[0],
-                                "intercept": model.intercept_,
-                            }
+                lag_performance = {
+                    lag: {
+                        "r2": regression["r2"][i, j],
+                        "mse": regression["mse"][i, j],
+                        "coefficient": regression["coefficient"][i, j],
+                        "intercept": regression["intercept"][i, j],
+                    }
+                    for i, lag in valid_lags
+                }
 
                 if lag_performance:
                     # 找到最佳滞后
@@ -196,82 +548,28 @@ class LagAnalysis:
         try:
             granger_results = {}
 
-            for feature in X.columns:
-                feature_values = X[feature].values
-                y_values = y.values
-
-                # 简化的格兰杰因果性检验
-                causality_tests = {}
-
-                for lag in range(1, max_lag + 1):
-                    if len(feature_values) > lag:
-                        # 准备数据
-                        lagged_feature = feature_values[:-lag]
-                        corresponding_y = y_values[lag:]
-
-                        if len(lagged_feature) > 20:  # 确保有足够的样本
-                            # 无约束模型（包含滞后特征）
-                            X_unrestricted = np.column_stack(
-                                [
-                                    lagged_feature,
-                                    (
-                                        corresponding_y[:-1]
-                                        if len(corresponding_y) > 1
-                                        else lagged_feature[:-1]
-                                    ),
-                                ]
-                            )
-                            y_unrestricted = (
-                                corresponding_y[1:]
-                                if len(corresponding_y) > 1
-                                else corresponding_y[1:]
-                            )
-
-                            if len(X_unrestricted) > 10:
-                                model_unrestricted = LinearRegression()
-                                model_unrestricted.fit(X_unrestricted, y_unrestricted)
-                                r2_unrestricted = model_unrestricted.score(
-                                    X_unrestricted, y_unrestricted
-                                )
-
-                                # 约束模型（不包含滞后特征）
-                                X_restricted = (
-                                    corresponding_y[:-1].reshape(-1, 1)
-                                    if len(corresponding_y) > 1
-                                    else lagged_feature[:-1].reshape(-1, 1)
-                                )
-                                y_restricted = (
-                                    corresponding_y[1:]
-                                    if len(corresponding_y) > 1
-                                    else corresponding_y[1:]
-                                )
-
-                                if len(X_restricted) > 10:
-                                    model_restricted = LinearRegression()
-                                    model_restricted.fit(X_restricted, y_restricted)
-                                    r2_restricted = model_restricted.score(
-                                        X_restricted, y_restricted
-                                    )
-
-                                    # F统计量
-                                    n = len(y_unrestricted)
-                                    k = X_unrestricted.shape[1]
-                                    f_stat = ((r2_unrestricted - r2_restricted) / 1) / (
-                                        (1 - r2_unrestricted) / (n - k)
-                                    )
-
-                                    # 简化的p值计算
-                                    p_value = self._calculate_f_p_value(
-                                        f_stat, 1, n - k
-                                    )
-
-                                    causality_tests[lag] = {
-                                        "f_statistic": f_stat,
-                                        "p_value": p_value,
-                                        "r2_unrestricted": r2_unrestricted,
-                                        "r2_restricted": r2_restricted,
-                                        "causality": p_value < 0.05,
-                                    }
+            # 简化的格兰杰因果性检验：y[t] ~ X[t-L] + y[t-1] 对比 y[t] ~ y[t-1]，
+            # 全部特征、全部滞后一次求得
+            matrix = self._get_lag_matrix(X, y, max_lag)
+            granger = matrix.granger()
+            valid_lags = [
+                int(lag)
+                for lag in matrix.lags[1:]
+                # 确保有足够的样本
+                if matrix.n_obs[lag] > 20 and granger["n_obs"][lag] > 10
+            ]
+
+            for j, feature in enumerate(X.columns):
+                causality_tests = {
+                    lag: {
+                        "f_statistic": granger["f_statistic"][lag, j],
+                        "p_value": granger["p_value"][lag, j],
+                        "r2_unrestricted": granger["r2_unrestricted"][lag, j],
+                        "r2_restricted": granger["r2_restricted"][lag, j],
+                        "causality": bool(granger["p_value"][lag, j] < 0.05),
+                    }
+                    for lag in valid_lags
+                }
 
                 if causality_tests:
                     # 找到最显著的滞后
@@ -319,38 +617,22 @@ class LagAnalysis:
         try:
             optimal_lags = {}
 
-            for feature in X.columns:
-                feature_values = X[feature].values
-                y_values = y.values
-
-                # 使用AIC准则选择最优滞后
-                aic_scores = {}
-
-                for lag in range(0, max_lag + 1):
-                    if len(feature_values) > lag:
-                        lagged_feature = (
-                            feature_values[:-lag] if lag > 0 else feature_values
+            # 使用AIC准则选择最优滞后
+            matrix = self._get_lag_matrix(X, y, max_lag)
+            mse = matrix.regression()["mse"]
+            n = matrix.n_obs[:, None]
+            k = 2  # 截距 + 系数
+            with np.errstate(divide="ignore"):
+                aic = n * np.log(mse) + 2 * k
+            valid = matrix.n_obs > 10
+
+            if valid.any():
+                for j, feature in enumerate(X.columns):
+                    aic_scores = aic[valid, j]
+                    if not np.isnan(aic_scores).all():
+                        optimal_lags[feature] = int(
+                            matrix.lags[valid][np.nanargmin(aic_scores)]
                         )
-                        corresponding_y = y_values[lag:] if lag > 0 else y_values
-
-                        if len(lagged_feature) > 10:
-                            # 训练模型
-                            X_lag = lagged_feature.reshape(-1, 1)
-                            model = LinearRegression()
-                            model.fit(X_lag, corresponding_y)
-
-                            # 计算AIC
-                            y_pred = model.predict(X_lag)
-                            mse = mean_squared_error(corresponding_y, y_pred)
-                            n = len(corresponding_y)
-                            k = 2  # 截距 + 系数
-
-                            aic = n * np.log(mse) + 2 * k
-                            aic_scores[lag] = aic
-
-                if aic_scores:
-                    optimal_lag = min(aic_scores.keys(), key=lambda k: aic_scores[k])
-                    optimal_lags[feature] = optimal_lag
 
             logger.info(
                 f"最优滞后选择完成，为 {len(optimal_lags)} 个特征选择了最优滞后"
@@ -378,22 +660,27 @@ class LagAnalysis:
             # 计算相关系数
             correlation = np.corrcoef(lagged_feature, corresponding_y)[0, 1]
 
-            if np.isnan(correlation):
-                return 0.0
-
-            # 计算t统计量
-            n = len(lagged_feature)
-            t_stat = correlation * np.sqrt((n - 2) / (1 - correlation**2))
-
-            # 计算p值
-            p_value = 2 * (1 - stats.t.cdf(abs(t_stat), n - 2))
-
-            return 1 - p_value  # 返回显著性水平
+            return self._correlation_significance(correlation, len(lagged_feature), lag)
 
         except Exception as e:
             logger.error(f"滞后显著性计算失败: {e}")
             return 0.0
 
+    def _correlation_significance(self, correlation: float, n: int, lag: int) -> float:
+        """由相关系数与样本数计算滞后显著性"""
+        if lag == 0:
+            return 1.0
+        if n < 10 or np.isnan(correlation):
+            return 0.0
+
+        # 计算t统计量
+        t_stat = correlation * np.sqrt((n - 2) / (1 - correlation**2))
+
+        # 计算p值
+        p_value = 2 * (1 - stats.t.cdf(abs(t_stat), n - 2))
+
+        return 1 - p_value  # 返回显著性水平
+
     def _calculate_f_p_value(self, f_stat: float, df1: int, df2: int) -> float:
         """计算F统计量的p值"""
         try:
@@ -457,19 +744,30 @@ class LagAnalysis:
     ) -> pd.DataFrame:
         """创建滞后特征"""
         try:
-            X_enhanced = X.copy()
+            new_features = {}
+            lagged_cache = {}
+
+            def lagged(feature: str, lag: int) -> np.ndarray:
+                # 各来源常选中同一(特征, 滞后)，每个组合只平移一次
+                key = (feature, lag)
+                if key not in lagged_cache:
+                    values = X[feature].to_numpy(dtype=float)
+                    shifted = np.full(len(values), np.nan)
+                    shifted[lag:] = values[: len(values) - lag]
+                    lagged_cache[key] = shifted
+                return lagged_cache[key]
 
             # 使用最优滞后创建特征
             if "optimal_lags" in self.lag_effects:
                 for feature, optimal_lag in self.lag_effects["optimal_lags"].items():
                     if optimal_lag > 0:
                         # 创建滞后特征
-                        lagged_values = X[feature].shift(optimal_lag)
-                        X_enhanced[f"{feature}_lag_{optimal_lag}"] = lagged_values
+                        lagged_values = lagged(feature, optimal_lag)
+                        new_features[f"{feature}_lag_{optimal_lag}"] = lagged_values
 
                         # 创建滞后交互特征
-                        X_enhanced[f"{feature}_lag_interaction"] = (
-                            X[feature] * lagged_values
+                        new_features[f"{feature}_lag_interaction"] = (
+                            X[feature].to_numpy(dtype=float) * lagged_values
                         )
 
             # 使用交叉相关结果创建特征
@@ -479,8 +777,9 @@ class LagAnalysis:
                     max_correlation = data["max_correlation"]
 
                     if optimal_lag > 0 and abs(max_correlation) > lag_threshold:
-                        lagged_values = X[feature].shift(optimal_lag)
-                        X_enhanced[f"{feature}_corr_lag_{optimal_lag}"] = lagged_values
+                        new_features[f"{feature}_corr_lag_{optimal_lag}"] = lagged(
+                            feature, optimal_lag
+                        )
 
             # 使用滞后回归结果创建特征
             if "lag_regression" in self.lag_effects:
@@ -489,8 +788,17 @@ class LagAnalysis:
                     best_r2 = data["best_r2"]
 
                     if best_lag > 0 and best_r2 > lag_threshold:
-                        lagged_values = X[feature].shift(best_lag)
-                        X_enhanced[f"{feature}_reg_lag_{best_lag}"] = lagged_values
+                        new_features[f"{feature}_reg_lag_{best_lag}"] = lagged(
+                            feature, best_lag
+                        )
+
+            # 一次性拼接所有新特征，避免逐列插入造成DataFrame碎片化
+            X_enhanced = X.copy()
+            for name in [name for name in new_features if name in X.columns]:
+                X_enhanced[name] = new_features.pop(name)
+            X_enhanced = pd.concat(
+                [X_enhanced, pd.DataFrame(new_features, index=X.index)], axis=1
+            )
 
             logger.info(
                 f"滞后特征创建完成，新增 {len(X_enhanced.columns) - len(X.columns)} 个特征"
@@ -0,0 +1,387 @@
+"""
+Shapley值计算引擎
+以"在特征子集上重新训练模型的R²"作为合作博弈的联盟价值，提供精确枚举、
+置换采样与KernelSHAP估计，以及树模型的TreeSHAP快速路径
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+
+from ..logging_config import get_logger
+
+logger = get_logger("shapley")
+
+
+def _coalition_score(estimator: Any, X_sub: np.ndarray, y: np.ndarray) -> float:
+    """在特征子集上训练模型并返回训练集R²（在工作进程中执行）"""
+    model = clone(estimator)
+    model.fit(X_sub, y)
+    return float(model.score(X_sub, y))
+
+
+class ShapleyEngine:
+    """
+    Shapley值计算引擎
+
+    联盟以位掩码表示，每个联盟的价值只计算一次并缓存，所有估计方法共享缓存；
+    同一轮中待计算的联盟在多个进程中并行训练。
+    """
+
+    def __init__(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        estimator: Any = None,
+        n_jobs: Optional[int] = -1,
+        min_parallel_fits: int = 8,
+        random_state: Optional[int] = 42,
+    ):
+        self.feature_names: List[str] = X.columns.tolist()
+        self.n_features = len(self.feature_names)
+        self.X = X.to_numpy(dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.estimator = estimator or RandomForestRegressor(
+            n_estimators=50, random_state=42
+        )
+        self.n_jobs = n_jobs
+        self.min_parallel_fits = min_parallel_fits
+        self.rng = np.random.default_rng(random_state)
+
+        # 空联盟价值为0
+        self._values: Dict[int, float] = {0: 0.0}
+        self.fits = 0
+
+    @property
+    def full_mask(self) -> int:
+        return (1 << self.n_features) - 1
+
+    @property
+    def is_complete(self) -> bool:
+        """是否已缓存全部联盟的价值"""
+        return len(self._values) > self.full_mask
+
+    def _columns(self, mask: int) -> List[int]:
+        return [j for j in range(self.n_features) if mask >> j & 1]
+
+    def evaluate(self, masks: Iterable[int]) -> Dict[int, float]:
+        """计算一批联盟的价值，未缓存的联盟并行训练"""
+        masks = list(dict.fromkeys(masks))
+        pending = [mask for mask in masks if mask not in self._values]
+
+        if pending:
+            subsets = [self.X[:, self._columns(mask)] for mask in pending]
+            if self.n_jobs == 1 or len(pending) < self.min_parallel_fits:
+                scores = [
+                    _coalition_score(self.estimator, X_sub, self.y) for X_sub in subsets
+                ]
+            else:
+                scores = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_coalition_score)(self.estimator, X_sub, self.y)
+                    for X_sub in subsets
+                )
+
+            self._values.update(zip(pending, scores))
+            self.fits += len(pending)
+
+        return {mask: self._values[mask] for mask in masks}
+
+    def exact(self) -> Dict[str, Any]:
+        """精确Shapley值：每个联盟训练一次，共2^n个联盟"""
+        n = self.n_features
+        values = self.evaluate(range(self.full_mask + 1))
+
+        # 权重 |S|!(n-|S|-1)!/n! 只依赖联盟大小
+        weights = [
+            math.factorial(size) * math.factorial(n - size - 1) / math.factorial(n)
+            for size in range(n)
+        ]
+        phi = np.zeros(n)
+        for mask, value in values.items():
+            size = bin(mask).count("1")
+            for j in range(n):
+                if not mask >> j & 1:
+                    phi[j] += weights[size] * (values[mask | 1 << j] - value)
+
+        return self._result(phi, "exact", converged=True)
+
+    def permutation(
+        self,
+        max_permutations: int = 1000,
+        min_permutations: int = 20,
+        tolerance: float = 0.005,
+        batch_size: int = 8,
+    ) -> Dict[str, Any]:
+        """
+        置换采样估计
+
+        成对使用正序与逆序置换（对偶采样）降低方差，每批结束后检查
+        各特征估计的标准误，全部低于tolerance时停止。
+        """
+        n = self.n_features
+        count = 0
+        mean = np.zeros(n)
+        m2 = np.zeros(n)
+        converged = False
+
+        while count < max_permutations:
+            # 所有联盟均已缓存时精确值不需要再训练模型
+            if self.is_complete:
+                return self.exact()
+
+            permutations = []
+            for _ in range(max(1, batch_size // 2)):
+                order = self.rng.permutation(n)
+                permutations.extend([order, order[::-1]])
+
+            prefixes = [self._prefix_masks(order) for order in permutations]
+            values = self.evaluate(mask for masks in prefixes for mask in masks)
+
+            for order, masks in zip(permutations, prefixes):
+                contributions = np.empty(n)
+                for position, j in enumerate(order):
+                    contributions[j] = (
+                        values[masks[position + 1]] - values[masks[position]]
+                    )
+
+                # Welford在线更新均值与方差
+                count += 1
+                delta = contributions - mean
+                mean += delta / count
+                m2 += delta * (contributions - mean)
+
+            standard_errors = np.sqrt(m2 / max(count - 1, 1) / count)
+            if count >= min_permutations and standard_errors.max() < tolerance:
+                converged = True
+                break
+
+        result = self._result(mean, "permutation", converged)
+        result["permutations"] = count
+        result["standard_errors"] = dict(zip(self.feature_names, standard_errors))
+        return result
+
+    @staticmethod
+    def _prefix_masks(order: np.ndarray) -> List[int]:
+        masks = [0]
+        for j in order:
+            masks.append(masks[-1] | 1 << int(j))
+        return masks
+
+    def kernel(
+        self,
+        max_samples: int = 2048,
+        batch_size: int = 64,
+        tolerance: float = 0.001,
+    ) -> Dict[str, Any]:
+        """
+        KernelSHAP估计
+
+        按Shapley核的大小分布抽样联盟，在效率约束 Σφ = v(N) - v(∅) 下做最小二乘；
+        相邻两批估计的最大变化低于tolerance时停止。可枚举的联盟数不超过
+        max_samples时直接返回精确值。
+        """
+        n = self.n_features
+        if n <= 2 or (1 << n) - 2 <= max_samples:
+            return self.exact()
+
+        total = self.evaluate([self.full_mask])[self.full_mask]
+        sizes = np.arange(1, n)
+        size_probs = (n - 1) / (sizes * (n - sizes))
+        size_probs /= size_probs.sum()
+
+        rows: List[np.ndarray] = []
+        targets: List[float] = []
+        phi = np.zeros(n)
+        converged = False
+
+        while len(rows) < max_samples:
+            masks = []
+            for size in self.rng.choice(sizes, size=batch_size, p=size_probs):
+                members = self.rng.choice(n, size=size, replace=False)
+                masks.append(int(sum(1 << int(j) for j in members)))
+
+            if self.is_complete:
+                return self.exact()
+
+            values = self.evaluate(masks)
+            for mask in masks:
+                z = np.array([mask >> j & 1 for j in range(n)], dtype=float)
+                # 消去最后一个特征：φ_n = total - Σ_{j<n} φ_j
+                rows.append(z[:-1] - z[-1])
+                targets.append(values[mask] - z[-1] * total)
+
+            coef, *_ = np.linalg.lstsq(np.array(rows), np.array(targets), rcond=None)
+            estimate = np.append(coef, total - coef.sum())
+
+            change = np.abs(estimate - phi).max()
+            phi = estimate
+            if len(rows) >= 2 * n and change < tolerance:
+                converged = True
+                break
+
+        result = self._result(phi, "kernel", converged)
+        result["samples"] = len(rows)
+        return result
+
+    def _result(self, phi: np.ndarray, method: str, converged: bool) -> Dict[str, Any]:
+        return {
+            "shapley_values": dict(zip(self.feature_names, map(float, phi))),
+            "method": method,
+            "converged": converged,
+            "coalitions_evaluated": len(self._values) - 1,
+            "model_fits": self.fits,
+        }
+
+
+# ==================== TreeSHAP ====================
+
+
+def _tree_components(model: Any) -> List[tuple]:
+    """拆分sklearn树模型为(树, 缩放系数)列表"""
+    if hasattr(model, "tree_"):
+        return [(model.tree_, 1.0)]
+
+    estimators = getattr(model, "estimators_", None)
+    if estimators is None:
+        raise ValueError(f"TreeSHAP不支持的模型类型: {type(model).__name__}")
+
+    if isinstance(estimators, np.ndarray):
+        # GradientBoostingRegressor: 预测 = 初始值 + 学习率 × Σ树
+        return [(tree.tree_, model.learning_rate) for tree in estimators[:, 0]]
+
+    # 随机森林/极端随机树: 预测 = 各树平均
+    return [(tree.tree_, 1.0 / len(estimators)) for tree in estimators]
+
+
+def _tree_shap_single(tree: Any, X: np.ndarray, phi: np.ndarray, scale: float):
+    """
+    单棵树的路径依赖TreeSHAP（Lundberg et al. 2018, Algorithm 2）
+
+    对所有样本同时递归：路径上的"零比例"只依赖树结构，"一比例"与权重按样本向量化。
+    """
+    n_samples = X.shape[0]
+    left, right = tree.children_left, tree.children_right
+    feature, threshold = tree.feature, tree.threshold
+    cover = tree.weighted_n_node_samples
+    value = tree.value[:, 0, 0] * scale
+
+    def extend(path, zero, one, index):
+        depth = len(path)
+        path = [list(entry) for entry in path]
+        path.append([index, zero, one, np.full(n_samples, 1.0 if depth == 0 else 0.0)])
+        for i in range(depth - 1, -1, -1):
+            path[i + 1][3] = path[i + 1][3] + one * path[i][3] * (i + 1) / (depth + 1)
+            path[i][3] = zero * path[i][3] * (depth - i) / (depth + 1)
+        return path
+
+    def unwind(path, i):
+        depth = len(path) - 1
+        zero, one = path[i][1], path[i][2]
+        next_one = path[depth][3]
+        path = [list(entry) for entry in path]
+        hot = one != 0
+        for j in range(depth - 1, -1, -1):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                hot_w = next_one * (depth + 1) / ((j + 1) * one)
+                cold_w = path[j][3] * (depth + 1) / (zero * (depth - j))
+            weight = np.where(hot, hot_w, cold_w)
+            next_one = np.where(
+                hot, path[j][3] - weight * zero * (depth - j) / (depth + 1), next_one
+            )
+            path[j][3] = weight
+        for j in range(i, depth):
+            path[j][:3] = path[j + 1][:3]
+        return path[:depth]
+
+    def recurse(node, path, zero, one, index):
+        path = extend(path, zero, one, index)
+
+        if left[node] == right[node]:
+            for i in range(1, len(path)):
+                weight = sum(entry[3] for entry in unwind(path, i))
+                phi[:, path[i][0]] += weight * (path[i][2] - path[i][1]) * value[node]
+            return
+
+        split = feature[node]
+        goes_left = X[:, split] <= threshold[node]
+        incoming_zero, incoming_one = 1.0, np.ones(n_samples)
+        for k in range(1, len(path)):
+            if path[k][0] == split:
+                incoming_zero, incoming_one = path[k][1], path[k][2]
+                path = unwind(path, k)
+                break
+
+        for child, follows in ((left[node], goes_left), (right[node], ~goes_left)):
+            recurse(
+                child,
+                path,
+                incoming_zero * cover[child] / cover[node],
+                incoming_one * follows,
+                split,
+            )
+
+    recurse(0, [], 1.0, np.ones(n_samples), -1)
+    return float(value[0])
+
+
+def tree_shap_values(model: Any, X: pd.DataFrame) -> Dict[str, Any]:
+    """
+    计算sklearn树模型（决策树、随机森林、梯度提升）每个样本的SHAP值
+
+    Returns:
+        {"values": (样本数, 特征数)矩阵, "expected_value": 基准值}，
+        满足 expected_value + values.sum(axis=1) = model.predict(X)
+    """
+    data = X.to_numpy(dtype=np.float32).astype(float)
+    phi = np.zeros(data.shape)
+    expected_value = 0.0
+    for tree, scale in _tree_components(model):
+        expected_value += _tree_shap_single(tree, data, phi, scale)
+
+    # 梯度提升的初始预测值计入基准值
+    init = getattr(model, "init_", None)
+    if hasattr(init, "predict"):
+        expected_value += float(init.predict(data[:1])[0])
+
+    return {"values": phi, "expected_value": expected_value}
+
+
+def tree_shap_r2_attribution(
+    model: Any, X: pd.DataFrame, y: pd.Series, max_samples: Optional[int] = 500
+) -> Dict[str, Any]:
+    """
+    基于TreeSHAP的R²分解
+
+    Var(ŷ) = Σ_j Cov(φ_j, ŷ)，因此 Cov(φ_j, ŷ)/Var(y) 把模型解释的方差分配给各特征，
+    与联盟价值取R²时的口径一致，且无需重新训练模型。
+    """
+    if max_samples is not None and len(X) > max_samples:
+        X = X.sample(n=max_samples, random_state=42)
+        y = y.loc[X.index]
+
+    shap = tree_shap_values(model, X)
+    prediction = shap["expected_value"] + shap["values"].sum(axis=1)
+    variance = float(np.var(np.asarray(y, dtype=float)))
+
+    centered = prediction - prediction.mean()
+    contributions = (
+        (shap["values"] - shap["values"].mean(axis=0)).T @ centered / len(centered)
+    )
+    attribution = contributions / variance if variance > 0 else np.zeros(X.shape[1])
+
+    return {
+        "shapley_values": dict(zip(X.columns, map(float, attribution))),
+        "method": "tree",
+        "converged": True,
+        "coalitions_evaluated": 0,
+        "model_fits": 0,
+        "expected_value": shap["expected_value"],
+        "mean_abs_shap": dict(
+            zip(X.columns, map(float, np.abs(shap["values"]).mean(axis=0)))
+        ),
+    }
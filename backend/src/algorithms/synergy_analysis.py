@@ -9,10 +9,10 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.metrics import mean_squared_error, r2_score
-import itertools
 import logging
 from datetime import datetime
 from ..logging_config import get_logger
+from .shapley import ShapleyEngine, tree_shap_r2_attribution
 
 logger = get_logger("synergy_analysis")
 
@@ -465,7 +465,14 @@ class SynergyAnalysis:
 
     # 新增核心方法
     def calculate_shapley_values(
-        self, X: pd.DataFrame, y: pd.Series, model: Any = None
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        model: Any = None,
+        method: str = "auto",
+        max_exact_features: int = 10,
+        tolerance: float = 0.005,
+        n_jobs: Optional[int] = -1,
     ) -> Dict[str, Any]:
         """
         计算Shapley值来量化协同效应
@@ -473,66 +480,45 @@ class SynergyAnalysis:
         Args:
             X: 特征数据
             y: 目标变量
-            model: 训练好的模型
+            model: 训练好的树模型，仅method为"tree"时使用
+            method: 计算方法
+                - "auto": 特征数不超过max_exact_features时精确计算，否则置换采样
+                - "exact": 枚举全部联盟，每个联盟只训练一次
+                - "permutation": 置换采样，标准误低于tolerance时停止
+                - "kernel": KernelSHAP，估计变化低于tolerance时停止
+                - "tree": 对model做TreeSHAP，无需重新训练
+            max_exact_features: auto模式下精确计算的最大特征数
+            tolerance: 采样方法的收敛阈值
+            n_jobs: 联盟模型并行训练的进程数
 
         Returns:
             Shapley值分析结果
         """
         try:
-            if model is None:
-                model = RandomForestRegressor(n_estimators=100, random_state=42)
-                model.fit(X, y)
-
-            shapley_values = {}
-            feature_names = X.columns.tolist()
-
-            # 计算每个特征的边际贡献
-            for feature in feature_names:
-                marginal_contributions = []
-
-                # 计算所有可能的特征组合
-                other_features = [f for f in feature_names if f != feature]
-
-                for subset_size in range(len(other_features) + 1):
-                    for subset in itertools.combinations(other_features, subset_size):
-                        # 计算有该特征时的性能
-                        features_with = list(subset) + [feature]
-                        X_with = X[features_with]
-
-                        # 计算无该特征时的性能
-                        features_without = list(subset)
-                        X_without = (
-                            X[features_without]
-                            if features_without
-                            else X[[feature]].iloc[:, :0]
-                        )
-
-                        # 训练模型并计算性能
-                        if len(features_with) > 0:
-                            model_with = RandomForestRegressor(
-                                n_estimators=50, random_state=42
-                            )
-                            model_with.fit(X_with, y)
-                            score_with = model_with.score(X_with, y)
-                        else:
-                            score_with = 0
-
-                        if len(features_without) > 0:
-                            model_without = RandomForestRegressor(
-                                n_estimators=50, random_state=42
-                            )
-                            model_without.fit(X_without, y)
-                            score_without = model_without.score(X_without, y)
-                        else:
-                            score_without = 0
-
-                        # 计算边际贡献
-                        marginal_contribution = score_with - score_without
-                        weight = 1.0 / (len(other_features) + 1)  # 权重
-                        marginal_contributions.append(marginal_contribution * weight)
+            if method == "auto":
+                method = "exact" if X.shape[1] <= max_exact_features else "permutation"
+
+            if method == "tree":
+                if model is None:
+                    model = RandomForestRegressor(n_estimators=100, random_state=42)
+                    model.fit(X, y)
+                shapley = tree_shap_r2_attribution(model, X, y)
+            else:
+                engine = ShapleyEngine(X, y, n_jobs=n_jobs)
+                if method == "exact":
+                    shapley = engine.exact()
+                elif method == "permutation":
+                    shapley = engine.permutation(tolerance=tolerance)
+                elif method == "kernel":
+                    shapley = engine.kernel(tolerance=tolerance)
+                else:
+                    raise ValueError(f"不支持的Shapley计算方法: {method}")
 
-                # Shapley值是所有边际贡献的加权平均
-                shapley_values[feature] = sum(marginal_contributions)
+            shapley_values = shapley["shapley_values"]
+            logger.info(
+                f"Shapley值计算完成，方法: {shapley['method']}，"
+                f"训练模型 {shapley['model_fits']} 次"
+            )
 
             # 计算协同效应
             synergy_effects = self._calculate_synergy_from_shapley(shapley_values, X, y)
@@ -543,6 +529,10 @@ class SynergyAnalysis:
                 "feature_ranking": sorted(
                     shapley_values.items(), key=lambda x: x[1], reverse=True
                 ),
+                "method": shapley["method"],
+                "converged": shapley["converged"],
+                "coalitions_evaluated": shapley["coalitions_evaluated"],
+                "model_fits": shapley["model_fits"],
             }
 
         except Exception as e:
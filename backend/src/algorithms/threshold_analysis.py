@@ -17,6 +17,23 @@ from ..logging_config import get_logger
 logger = get_logger("threshold_analysis")
 
 
+def _segment_sse(counts: np.ndarray, sums: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    由分段内的[Σx, Σy, Σx², Σxy, Σy²]计算单变量线性回归的残差平方和
+
+    x在分段内为常数时退化为只含截距的模型
+    """
+    sx, sy, sxx, sxy, syy = sums
+    counts = np.maximum(counts, 1)
+    syy_c = syy - sy * sy / counts
+    sxx_c = sxx - sx * sx / counts
+    sxy_c = sxy - sx * sy / counts
+    explained = np.divide(
+        sxy_c * sxy_c, sxx_c, out=np.zeros_like(sxx_c), where=sxx_c > tolerance
+    )
+    return np.maximum(syy_c - explained, 0.0)
+
+
 class ThresholdAnalysis:
     """阈值效应分析"""
 
@@ -192,11 +209,11 @@ class ThresholdAnalysis:
         try:
             piecewise_results = {}
 
+            # 一次性搜索所有特征的最优分割点
+            searches = self.find_optimal_thresholds(X, y, min_samples)
+
             for feature in X.columns:
-                # 寻找最优分割点
-                optimal_threshold = self._find_optimal_threshold(
-                    X, y, feature, min_samples
-                )
+                optimal_threshold = searches[feature]["threshold"]
 
                 if optimal_threshold is not None:
                     # 创建分段模型
@@ -225,19 +242,181 @@ class ThresholdAnalysis:
             return {}
 
     def _find_optimal_threshold(
-        self, X: pd.DataFrame, y: pd.Series, feature: str, min_samples: int
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        feature: str,
+        min_samples: int,
+        n_candidates: Optional[int] = 20,
     ) -> Optional[float]:
         """寻找最优阈值"""
         try:
-            feature_values = X[feature].values
-            sorted_values = np.sort(feature_values)
+            search = self.find_optimal_thresholds(
+                X, y, min_samples, n_candidates, features=[feature]
+            )
+            return search[feature]["threshold"]
+
+        except Exception as e:
+            logger.error(f"最优阈值搜索失败: {e}")
+            return None
+
+    def find_optimal_thresholds(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        min_samples: int = 30,
+        n_candidates: Optional[int] = 20,
+        features: Optional[List[str]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        批量搜索各特征的最优分段阈值
+
+        所有特征一起排序一次，借助x、y、x²、xy、y²的前缀和在O(1)内得到任一分割点
+        两侧线性回归的残差平方和，每个特征的全部候选阈值只需O(n)即可打分。
+        分段模型与_calculate_piecewise_score相同（阈值两侧斜率与截距均可变化），
+        因此在同一候选网格上与逐个拟合得到相同的阈值。
+
+        Args:
+            X: 特征数据
+            y: 目标变量
+            min_samples: 每个分段的最少样本数
+            n_candidates: 候选阈值数量（在搜索范围内等距），为None时以每个样本值作为候选
+            features: 要搜索的特征，默认全部特征
+
+        Returns:
+            {特征: {"threshold": 最优阈值, "score": 分段模型R²}}，无可用阈值时为None
+        """
+        features = list(X.columns if features is None else features)
+        results = {feature: {"threshold": None, "score": None} for feature in features}
+        if not features or len(X) == 0:
+            return results
+
+        # 非数值转为NaN；含缺失或非有限值的特征走逐个拟合路径
+        values = X[features].apply(pd.to_numeric, errors="coerce").to_numpy(float)
+        target = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy(float)
+        finite = np.isfinite(values).all(axis=0) & bool(np.isfinite(target).all())
+
+        for j in np.flatnonzero(~finite):
+            feature = features[j]
+            threshold, score = self._scan_threshold_candidates(
+                X, y, feature, min_samples, n_candidates
+            )
+            results[feature] = {"threshold": threshold, "score": score}
+
+        columns = np.flatnonzero(finite)
+        if columns.size:
+            results.update(
+                self._prefix_sum_threshold_search(
+                    values[:, columns],
+                    target,
+                    [features[j] for j in columns],
+                    min_samples,
+                    n_candidates,
+                )
+            )
+
+        return results
+
+    @staticmethod
+    def _threshold_candidates(
+        sorted_values: np.ndarray, min_samples: int, n_candidates: Optional[int]
+    ) -> np.ndarray:
+        """在排序后的样本值上生成候选阈值"""
+        # 在合理范围内搜索阈值
+        min_val = sorted_values[min_samples]
+        max_val = sorted_values[-min_samples]
+
+        if n_candidates is None:
+            in_range = sorted_values[
+                (sorted_values >= min_val) & (sorted_values <= max_val)
+            ]
+            return np.unique(in_range)
+
+        return np.linspace(min_val, max_val, n_candidates)
+
+    def _prefix_sum_threshold_search(
+        self,
+        values: np.ndarray,
+        target: np.ndarray,
+        features: List[str],
+        min_samples: int,
+        n_candidates: Optional[int],
+    ) -> Dict[str, Dict[str, Any]]:
+        """基于前缀和的分段阈值搜索，values为(n, p)矩阵"""
+        n, p = values.shape
+        results = {}
+
+        order = np.argsort(values, axis=0, kind="stable")
+        sorted_x = np.take_along_axis(values, order, axis=0)
+
+        # 中心化以减小前缀和的舍入误差
+        xc = sorted_x - sorted_x.mean(axis=0)
+        yc = target[order] - target.mean()
+
+        # 前缀和: [x, y, x², xy, y²]，首行为0，prefix[:, k]为前k个样本之和
+        stacked = np.stack([xc, yc, xc * xc, xc * yc, yc * yc])
+        prefix = np.concatenate(
+            [np.zeros((5, 1, p)), np.cumsum(stacked, axis=1)], axis=1
+        )
+        totals = prefix[:, n, :]
+        sst = totals[4]
+
+        for j, feature in enumerate(features):
+            try:
+                candidates = self._threshold_candidates(
+                    sorted_x[:, j], min_samples, n_candidates
+                )
+            except IndexError:
+                # 样本不足以留出两侧分段
+                results[feature] = {"threshold": None, "score": None}
+                continue
+
+            # 每个候选阈值对应的"<=阈值"样本数即分割位置
+            below_counts = np.searchsorted(sorted_x[:, j], candidates, side="right")
+            above_counts = n - below_counts
+            valid = (below_counts >= min_samples) & (above_counts >= min_samples)
+            if not valid.any():
+                results[feature] = {"threshold": None, "score": None}
+                continue
+
+            below = prefix[:, below_counts, j]
+            above = totals[:, j, None] - below
+            tolerance = 1e-12 * max(totals[2, j], np.finfo(float).tiny)
+            sse = _segment_sse(below_counts, below, tolerance) + _segment_sse(
+                above_counts, above, tolerance
+            )
+
+            if sst[j] > 0:
+                scores = 1.0 - sse / sst[j]
+            else:
+                # 目标为常数时分段模型完全拟合
+                scores = np.ones(len(candidates))
+
+            scores = np.where(valid, scores, -np.inf)
+            best = int(np.argmax(scores))
+            results[feature] = {
+                "threshold": float(candidates[best]),
+                "score": float(scores[best]),
+            }
 
-            # 在合理范围内搜索阈值
-            min_val = sorted_values[min_samples]
-            max_val = sorted_values[-min_samples]
+        return results
+
+    def _scan_threshold_candidates(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        feature: str,
+        min_samples: int,
+        n_candidates: Optional[int],
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """逐个候选阈值拟合分段模型（前缀和无法处理缺失值时使用）"""
+        try:
+            sorted_values = np.sort(X[feature].values)
 
             # 生成候选阈值
-            candidate_thresholds = np.linspace(min_val, max_val, 20)
+            candidate_thresholds = self._threshold_candidates(
+                sorted_values, min_samples, n_candidates
+            )
 
             best_threshold = None
             best_score = -np.inf
@@ -258,11 +437,13 @@ class ThresholdAnalysis:
                         best_score = score
                         best_threshold = threshold
 
-            return best_threshold
+            if best_threshold is None:
+                return None, None
+            return float(best_threshold), float(best_score)
 
         except Exception as e:
             logger.error(f"最优阈值搜索失败: {e}")
-            return None
+            return None, None
 
     def _calculate_piecewise_score(
         self, X: pd.DataFrame, y: pd.Series, feature: str, threshold: float
@@ -830,19 +1011,17 @@ class ThresholdAnalysis:
                 X_sample = X.iloc[sample_indices]
                 y_sample = y.iloc[sample_indices]
 
-                # 重新计算最优阈值
-                optimal_threshold = self._find_optimal_threshold(
-                    X_sample, y_sample, feature, 20
-                )
+                # 重新计算最优阈值，搜索同时给出该阈值下的分段模型R²
+                search = self.find_optimal_thresholds(
+                    X_sample, y_sample, 20, features=[feature]
+                )[feature]
+                optimal_threshold = search["threshold"]
 
                 if optimal_threshold is not None:
                     stability_results["threshold_stability"].append(optimal_threshold)
 
                     # 计算性能
-                    performance = self._calculate_piecewise_score(
-                        X_sample, y_sample, feature, optimal_threshold
-                    )
-                    stability_results["performance_stability"].append(performance)
+                    stability_results["performance_stability"].append(search["score"])
 
                     # 计算系数
                     model = self._create_piecewise_model(
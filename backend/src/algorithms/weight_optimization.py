@@ -2,9 +2,14 @@
 权重优化算法
 """
 
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
 from sklearn.neural_network import MLPRegressor
@@ -18,6 +23,199 @@ from ..logging_config import get_logger
 
 logger = get_logger("weight_optimization")
 
+# 目标函数名称 -> (基础指标, L1惩罚系数)
+OBJECTIVE_SPECS = {
+    "mse": ("mse", 0.0),
+    "mae": ("mae", 0.0),
+    "r2": ("neg_r2", 0.0),
+    "custom": ("mse", 0.1),  # MSE + 权重稀疏性惩罚
+}
+
+
+class WeightObjective:
+    """
+    加权最小二乘目标函数
+
+    目标值等价于在 X * weights 上拟合带截距的线性回归后计算的误差。一次性预计算
+    中心化后的 XᵀX 与 Xᵀy，拟合只需在对应子矩阵上求解正规方程。
+    由于线性回归会吸收列缩放，拟合结果只取决于哪些权重非零（支撑集），
+    因此按支撑集缓存误差，相同支撑集的候选权重只求解一次；
+    梯度解析给出：误差项在支撑集内为常数，只有惩罚项贡献梯度。
+    """
+
+    def __init__(self, X: pd.DataFrame, y: pd.Series, cache_size: int = 1024):
+        values = np.asarray(X, dtype=float)
+        target = np.asarray(y, dtype=float)
+
+        self.n_samples, self.n_features = values.shape
+        self.X_centered = values - values.mean(axis=0)
+        self.y_centered = target - target.mean()
+        self.gram = self.X_centered.T @ self.X_centered
+        self.xty = self.X_centered.T @ self.y_centered
+        self.syy = float(self.y_centered @ self.y_centered)
+
+        self.cache_size = cache_size
+        self._support_cache: Dict[bytes, Dict[str, float]] = {}
+        self.solves = 0
+
+    @staticmethod
+    def _spec(objective: str) -> Tuple[str, float]:
+        return OBJECTIVE_SPECS.get(objective, OBJECTIVE_SPECS["mse"])
+
+    def _support_metrics(self, support: np.ndarray, metric: str) -> float:
+        """计算（或读取缓存的）某支撑集上的拟合误差"""
+        key = support.tobytes()
+        metrics = self._support_cache.get(key)
+        if metrics is None:
+            if len(self._support_cache) >= self.cache_size:
+                self._support_cache.clear()
+            metrics = self._support_cache[key] = {}
+
+        if metric in metrics:
+            return metrics[metric]
+
+        if "sse" not in metrics:
+            columns = np.flatnonzero(support)
+            if columns.size:
+                coef, *_ = np.linalg.lstsq(
+                    self.gram[np.ix_(columns, columns)],
+                    self.xty[columns],
+                    rcond=None,
+                )
+                sse = self.syy - float(self.xty[columns] @ coef)
+            else:
+                coef = np.zeros(0)
+                sse = self.syy
+            metrics["sse"] = max(sse, 0.0)
+            metrics["_coef"] = coef
+            self.solves += 1
+
+        sse = metrics["sse"]
+        if metric == "mse":
+            value = sse / self.n_samples
+        elif metric == "neg_r2":
+            if self.syy > 0:
+                value = -(1.0 - sse / self.syy)
+            else:
+                value = -1.0 if sse == 0 else 0.0
+        elif metric == "mae":
+            columns = np.flatnonzero(support)
+            residuals = self.y_centered - self.X_centered[:, columns] @ metrics["_coef"]
+            value = float(np.mean(np.abs(residuals)))
+        else:
+            raise ValueError(f"未知的目标指标: {metric}")
+
+        metrics[metric] = value
+        return value
+
+    def evaluate(
+        self,
+        weights: np.ndarray,
+        objective: str = "mse",
+        l1_penalty: float = 0.0,
+        l2_penalty: float = 0.0,
+    ) -> float:
+        """计算单个权重向量的目标值"""
+        weights = np.asarray(weights, dtype=float)
+        metric, objective_l1 = self._spec(objective)
+        value = self._support_metrics(weights != 0, metric)
+        l1 = l1_penalty + objective_l1
+        if l1:
+            value += l1 * float(np.sum(np.abs(weights)))
+        if l2_penalty:
+            value += l2_penalty * float(np.sum(weights**2))
+        return value
+
+    def gradient(
+        self,
+        weights: np.ndarray,
+        objective: str = "mse",
+        l1_penalty: float = 0.0,
+        l2_penalty: float = 0.0,
+    ) -> np.ndarray:
+        """目标值对权重的解析梯度"""
+        weights = np.asarray(weights, dtype=float)
+        _, objective_l1 = self._spec(objective)
+        return (l1_penalty + objective_l1) * np.sign(weights) + 2 * l2_penalty * weights
+
+    def value_and_grad(
+        self,
+        weights: np.ndarray,
+        objective: str = "mse",
+        l1_penalty: float = 0.0,
+        l2_penalty: float = 0.0,
+    ) -> Tuple[float, np.ndarray]:
+        """同时返回目标值与梯度（用于minimize(jac=True)）"""
+        return (
+            self.evaluate(weights, objective, l1_penalty, l2_penalty),
+            self.gradient(weights, objective, l1_penalty, l2_penalty),
+        )
+
+    def evaluate_population(
+        self,
+        population: np.ndarray,
+        objective: str = "mse",
+        l1_penalty: float = 0.0,
+        l2_penalty: float = 0.0,
+    ) -> np.ndarray:
+        """
+        批量计算候选权重的目标值
+
+        Args:
+            population: (候选数, 特征数)矩阵
+        """
+        population = np.atleast_2d(np.asarray(population, dtype=float))
+        metric, objective_l1 = self._spec(objective)
+
+        supports, inverse = np.unique(population != 0, axis=0, return_inverse=True)
+        base = np.array(
+            [self._support_metrics(support, metric) for support in supports]
+        )
+        values = base[np.ravel(inverse)]
+
+        l1 = l1_penalty + objective_l1
+        if l1:
+            values = values + l1 * np.abs(population).sum(axis=1)
+        if l2_penalty:
+            values = values + l2_penalty * (population**2).sum(axis=1)
+        return values
+
+
+# 优化方法名称 -> WeightOptimization上的实现
+OPTIMIZATION_METHODS = {
+    "gradient_descent": "_gradient_descent_optimization",
+    "genetic_algorithm": "_genetic_algorithm_optimization",
+    "bayesian": "_bayesian_optimization",
+    "grid_search": "_grid_search_optimization",
+}
+
+# 进程池工作进程状态：共享内存上的特征矩阵与复用目标函数引擎的优化器
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_optimization_worker(
+    shm_name: str, shape: Tuple[int, int], columns: List[str], constraints: Dict
+):
+    """工作进程初始化：挂载共享内存中的[X | y]矩阵，每个进程只挂载一次"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+    optimizer = WeightOptimization()
+    optimizer.constraints = constraints
+    _worker_state.update(
+        shm=shm,
+        X=pd.DataFrame(data[:, :-1], columns=columns, copy=False),
+        y=pd.Series(data[:, -1], copy=False),
+        optimizer=optimizer,
+    )
+
+
+def _run_optimization_job(method: str, objective: str) -> Dict[str, Any]:
+    """在工作进程中执行单个(方法, 目标函数)组合"""
+    optimizer = _worker_state["optimizer"]
+    run = getattr(optimizer, OPTIMIZATION_METHODS[method])
+    return run(_worker_state["X"], _worker_state["y"], [objective]).get(objective)
+
 
 class WeightOptimization:
     """权重优化算法"""
@@ -28,6 +226,18 @@ class WeightOptimization:
         self.optimization_history = []
         self.constraints = {}
         self.objective_functions = {}
+        # 最近一次使用的(X, y, 目标函数引擎)，同一数据上的重复调用复用预计算结果
+        self._objective_engine: Optional[Tuple[Any, Any, WeightObjective]] = None
+
+    def _get_objective_engine(self, X: pd.DataFrame, y: pd.Series) -> WeightObjective:
+        """获取数据对应的目标函数引擎"""
+        cached = self._objective_engine
+        if cached is not None and cached[0] is X and cached[1] is y:
+            return cached[2]
+
+        engine = WeightObjective(X, y)
+        self._objective_engine = (X, y, engine)
+        return engine
 
     def optimize_weights(
         self,
@@ -36,8 +246,20 @@ class WeightOptimization:
         optimization_methods: List[str] = None,
         objective_functions: List[str] = None,
         constraints: Dict[str, Any] = None,
+        n_jobs: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        on_result: Optional[Callable[[str, str, Dict[str, Any]], Any]] = None,
+        min_results: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """优化权重"""
+        """
+        优化权重
+
+        Args:
+            n_jobs: 并行进程数，为None或1且未设置time_budget、min_results时串行执行，-1使用全部CPU
+            time_budget: 墙钟时间预算（秒），到期后放弃未完成的组合，用已有结果集成
+            on_result: 每个(方法, 目标函数)组合完成时的回调
+            min_results: 完成的组合数达到该值即集成，取消或终止其余组合
+        """
         try:
             if optimization_methods is None:
                 optimization_methods = [
@@ -59,6 +281,22 @@ class WeightOptimization:
 
             self.constraints = constraints
 
+            if (
+                n_jobs not in (None, 1)
+                or time_budget is not None
+                or min_results is not None
+            ):
+                return self._optimize_weights_parallel(
+                    X,
+                    y,
+                    optimization_methods,
+                    objective_functions,
+                    n_jobs,
+                    time_budget,
+                    on_result,
+                    min_results,
+                )
+
             results = {}
 
             # 1. 梯度下降优化
@@ -110,21 +348,171 @@ class WeightOptimization:
             logger.error(f"权重优化失败: {e}")
             raise
 
+    def iter_optimization_results(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        optimization_methods: List[str],
+        objective_functions: List[str],
+        n_jobs: Optional[int] = None,
+        time_budget: Optional[float] = None,
+    ) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        在进程池中并行执行(方法 × 目标函数)网格，按完成顺序产出(方法, 目标函数, 结果)
+
+        X与y只写入一次共享内存，工作进程初始化时挂载，不随每个任务序列化。
+        预算到期或提前关闭生成器时，取消排队任务并终止仍在运行的工作进程。
+        """
+        jobs = [
+            (method, objective)
+            for method in optimization_methods
+            if method in OPTIMIZATION_METHODS
+            for objective in objective_functions
+        ]
+        if not jobs:
+            return
+
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+
+        data = np.column_stack(
+            [np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)]
+        )
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        pool = None
+        pending = {}
+        try:
+            np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+
+            pool = ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(jobs)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_optimization_worker,
+                initargs=(shm.name, data.shape, list(X.columns), self.constraints),
+            )
+            pending = {
+                pool.submit(_run_optimization_job, method, objective): (
+                    method,
+                    objective,
+                )
+                for method, objective in jobs
+            }
+
+            while pending:
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    method, objective = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"{method}/{objective} 优化失败: {e}")
+                        continue
+                    if result is not None:
+                        yield method, objective, result
+
+            if pending:
+                logger.warning(
+                    f"超出时间预算 {time_budget}s，放弃 {len(pending)} 个未完成的优化组合"
+                )
+
+        finally:
+            if pool is not None:
+                if pending:
+                    # 已在运行的任务无法取消，只能终止工作进程
+                    for process in list((pool._processes or {}).values()):
+                        if process.is_alive():
+                            process.terminate()
+                pool.shutdown(wait=True, cancel_futures=True)
+            shm.close()
+            shm.unlink()
+
+    def _optimize_weights_parallel(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        optimization_methods: List[str],
+        objective_functions: List[str],
+        n_jobs: Optional[int],
+        time_budget: Optional[float],
+        on_result: Optional[Callable[[str, str, Dict[str, Any]], Any]],
+        min_results: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        并行优化权重，结果结构与串行执行一致
+
+        完成的组合数达到min_results时关闭结果生成器，排队的组合被取消、
+        运行中的工作进程被终止，只用已完成的结果集成。
+        """
+        results = {
+            method: {}
+            for method in optimization_methods
+            if method in OPTIMIZATION_METHODS
+        }
+
+        completed = 0
+        stream = self.iter_optimization_results(
+            X, y, optimization_methods, objective_functions, n_jobs, time_budget
+        )
+        try:
+            for method, objective, result in stream:
+                results[method][objective] = result
+                completed += 1
+                if on_result is not None:
+                    on_result(method, objective, result)
+                if min_results is not None and completed >= min_results:
+                    logger.info(f"已完成 {completed} 个优化组合，提前集成")
+                    break
+        finally:
+            # 立即触发生成器的清理，不等待垃圾回收
+            stream.close()
+
+        results["ensemble"] = self._ensemble_optimization_results(
+            {method: r for method, r in results.items() if r}
+        )
+
+        self.optimization_history.append(
+            {
+                "timestamp": pd.Timestamp.now(),
+                "methods": optimization_methods,
+                "objectives": objective_functions,
+                "results": results,
+                "completed_jobs": completed,
+                "time_budget": time_budget,
+                "min_results": min_results,
+            }
+        )
+
+        self.optimization_results = results
+        logger.info(
+            f"并行权重优化完成，完成 {completed}/"
+            f"{(len(results) - 1) * len(objective_functions)} 个优化组合"
+        )
+
+        return results
+
     def _gradient_descent_optimization(
         self, X: pd.DataFrame, y: pd.Series, objective_functions: List[str]
     ) -> Dict[str, Any]:
         """梯度下降优化"""
         try:
             gd_results = {}
+            engine = self._get_objective_engine(X, y)
 
             for objective in objective_functions:
                 # 初始化权重
                 n_features = len(X.columns)
                 initial_weights = np.ones(n_features) / n_features
 
-                # 定义目标函数
+                # 定义目标函数（同时返回解析梯度）
                 def objective_func(weights):
-                    return self._calculate_objective(X, y, weights, objective)
+                    return engine.value_and_grad(weights, objective)
 
                 # 定义约束
                 constraints = []
@@ -142,6 +530,7 @@ class WeightOptimization:
                     objective_func,
                     initial_weights,
                     method="SLSQP",
+                    jac=True,
                     bounds=bounds,
                     constraints=constraints,
                     options={"maxiter": 1000},
@@ -168,13 +557,14 @@ class WeightOptimization:
         """遗传算法优化"""
         try:
             ga_results = {}
+            engine = self._get_objective_engine(X, y)
 
             for objective in objective_functions:
                 n_features = len(X.columns)
 
-                # 定义目标函数
-                def objective_func(weights):
-                    return self._calculate_objective(X, y, weights, objective)
+                # 定义目标函数：一次评估整个种群，输入为(特征数, 种群大小)
+                def objective_func(population):
+                    return engine.evaluate_population(population.T, objective)
 
                 # 定义边界
                 bounds = []
@@ -186,7 +576,13 @@ class WeightOptimization:
 
                 # 执行遗传算法优化
                 result = differential_evolution(
-                    objective_func, bounds, maxiter=1000, popsize=15, seed=42
+                    objective_func,
+                    bounds,
+                    maxiter=1000,
+                    popsize=15,
+                    seed=42,
+                    vectorized=True,
+                    updating="deferred",
                 )
 
                 # 归一化权重（如果需要）
@@ -215,13 +611,14 @@ class WeightOptimization:
         """贝叶斯优化"""
         try:
             bayesian_results = {}
+            engine = self._get_objective_engine(X, y)
 
             for objective in objective_functions:
                 n_features = len(X.columns)
 
-                # 定义目标函数
+                # 定义目标函数（同时返回解析梯度）
                 def objective_func(weights):
-                    return self._calculate_objective(X, y, weights, objective)
+                    return engine.value_and_grad(weights, objective)
 
                 # 使用basinhopping进行全局优化
                 initial_weights = np.ones(n_features) / n_features
@@ -232,6 +629,7 @@ class WeightOptimization:
                     niter=100,
                     minimizer_kwargs={
                         "method": "L-BFGS-B",
+                        "jac": True,
                         "bounds": [(0, 1) for _ in range(n_features)],
                     },
                 )
@@ -274,23 +672,20 @@ class WeightOptimization:
 
                 # 由于网格搜索在高维空间中计算量巨大，这里使用简化的方法
                 # 使用随机搜索代替完整网格搜索
-                best_weights = None
-                best_score = float("inf")
-
-                for _ in range(1000):  # 随机搜索1000次
-                    # 生成随机权重
-                    weights = np.random.random(n_features)
-
-                    # 归一化权重
-                    if self.constraints.get("sum_to_one", True):
-                        weights = weights / np.sum(weights)
+                # 随机搜索1000次，一次生成全部候选并批量评估
+                candidates = np.random.random((1000, n_features))
 
-                    # 计算目标函数值
-                    score = self._calculate_objective(X, y, weights, objective)
+                # 归一化权重
+                if self.constraints.get("sum_to_one", True):
+                    candidates = candidates / candidates.sum(axis=1, keepdims=True)
 
-                    if score < best_score:
-                        best_score = score
-                        best_weights = weights
+                # 计算目标函数值
+                scores = self._get_objective_engine(X, y).evaluate_population(
+                    candidates, objective
+                )
+                best_index = int(np.argmin(scores))
+                best_weights = candidates[best_index]
+                best_score = float(scores[best_index])
 
                 grid_results[objective] = {
                     "optimal_weights": dict(zip(X.columns, best_weights)),
@@ -381,34 +776,13 @@ class WeightOptimization:
     ) -> float:
         """计算目标函数值"""
         try:
+            weights = np.asarray(weights, dtype=float)
             if len(X) == 0 or len(y) == 0:
                 # 如果没有数据，返回权重分布的熵
                 return -np.sum(weights * np.log(weights + 1e-8))
 
-            # 应用权重到特征
-            X_weighted = X * weights
-
-            # 训练模型
-            model = LinearRegression()
-            model.fit(X_weighted, y)
-
-            # 预测
-            y_pred = model.predict(X_weighted)
-
-            # 计算目标函数
-            if objective == "mse":
-                return mean_squared_error(y, y_pred)
-            elif objective == "mae":
-                return mean_absolute_error(y, y_pred)
-            elif objective == "r2":
-                return -r2_score(y, y_pred)  # 负号因为我们要最小化
-            elif objective == "custom":
-                # 自定义目标函数：MSE + 权重稀疏性惩罚
-                mse = mean_squared_error(y, y_pred)
-                sparsity_penalty = 0.1 * np.sum(np.abs(weights))
-                return mse + sparsity_penalty
-            else:
-                return mean_squared_error(y, y_pred)
+            # mse/mae/r2(取负，因为要最小化)/custom(MSE + 权重稀疏性惩罚)
+            return self._get_objective_engine(X, y).evaluate(weights, objective)
 
         except Exception as e:
             logger.error(f"目标函数计算失败: {e}")
@@ -605,15 +979,11 @@ class WeightOptimization:
             n_features = len(X.columns)
             initial_weights = np.ones(n_features) / n_features
 
+            engine = self._get_objective_engine(X, y)
+
             def objective_func(weights):
                 # MSE + L1惩罚
-                X_weighted = X * weights
-                model = LinearRegression()
-                model.fit(X_weighted, y)
-                y_pred = model.predict(X_weighted)
-                mse = mean_squared_error(y, y_pred)
-                l1_penalty_term = l1_penalty * np.sum(np.abs(weights))
-                return mse + l1_penalty_term
+                return engine.value_and_grad(weights, "mse", l1_penalty=l1_penalty)
 
             # 约束
             constraints = []
@@ -626,6 +996,7 @@ class WeightOptimization:
                 objective_func,
                 initial_weights,
                 method="SLSQP",
+                jac=True,
                 bounds=bounds,
                 constraints=constraints,
                 options={"maxiter": 1000},
@@ -650,15 +1021,11 @@ class WeightOptimization:
             n_features = len(X.columns)
             initial_weights = np.ones(n_features) / n_features
 
+            engine = self._get_objective_engine(X, y)
+
             def objective_func(weights):
                 # MSE + L2惩罚
-                X_weighted = X * weights
-                model = LinearRegression()
-                model.fit(X_weighted, y)
-                y_pred = model.predict(X_weighted)
-                mse = mean_squared_error(y, y_pred)
-                l2_penalty_term = l2_penalty * np.sum(weights**2)
-                return mse + l2_penalty_term
+                return engine.value_and_grad(weights, "mse", l2_penalty=l2_penalty)
 
             # 约束
             constraints = []
@@ -671,6 +1038,7 @@ class WeightOptimization:
                 objective_func,
                 initial_weights,
                 method="SLSQP",
+                jac=True,
                 bounds=bounds,
                 constraints=constraints,
                 options={"maxiter": 1000},
@@ -695,18 +1063,16 @@ class WeightOptimization:
             n_features = len(X.columns)
             initial_weights = np.ones(n_features) / n_features
 
+            engine = self._get_objective_engine(X, y)
+
             def objective_func(weights):
                 # MSE + Elastic Net惩罚
-                X_weighted = X * weights
-                model = LinearRegression()
-                model.fit(X_weighted, y)
-                y_pred = model.predict(X_weighted)
-                mse = mean_squared_error(y, y_pred)
-
-                l1_term = l1_penalty * elastic_ratio * np.sum(np.abs(weights))
-                l2_term = l1_penalty * (1 - elastic_ratio) * np.sum(weights**2)
-
-                return mse + l1_term + l2_term
+                return engine.value_and_grad(
+                    weights,
+                    "mse",
+                    l1_penalty=l1_penalty * elastic_ratio,
+                    l2_penalty=l1_penalty * (1 - elastic_ratio),
+                )
 
             # 约束
             constraints = []
@@ -719,6 +1085,7 @@ class WeightOptimization:
                 objective_func,
                 initial_weights,
                 method="SLSQP",
+                jac=True,
                 bounds=bounds,
                 constraints=constraints,
                 options={"maxiter": 1000},
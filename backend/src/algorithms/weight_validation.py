@@ -19,6 +19,114 @@ from ..logging_config import get_logger
 logger = get_logger("weight_validation")
 
 
+class ResamplingEngine:
+    """
+    批量重抽样线性回归
+
+    将每次重抽样表示为样本权重向量（Bootstrap为抽中次数，交叉验证为0/1掩码），
+    用加权正规方程一次性求解一批带截距的最小二乘问题，不复制任何行。
+    结果与在重抽样数据上逐次拟合LinearRegression一致；批次按内存上限分块，
+    耗时随重抽样次数近似线性增长。
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, max_batch_elements: int = 1 << 22):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+
+        # 先整体中心化，减小加权中心化时的数值抵消
+        self.x_mean = X.mean(axis=0)
+        self.y_mean = y.mean()
+        self.X = X - self.x_mean
+        self.y = y - self.y_mean
+        self.n_samples, self.n_features = X.shape
+        self.batch_size = max(
+            1, max_batch_elements // max(self.n_samples * max(self.n_features, 1), 1)
+        )
+
+    def fit(self, sample_weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按样本权重批量拟合
+
+        Args:
+            sample_weights: (批次, 样本数)权重矩阵
+
+        Returns:
+            (系数矩阵(批次, 特征数), 中心化坐标下的截距(批次,))
+        """
+        w = np.asarray(sample_weights, dtype=float)
+        total = w.sum(axis=1)
+
+        x_bar = (w @ self.X) / total[:, None]
+        y_bar = (w @ self.y) / total
+
+        weighted_X = w[:, :, None] * self.X[None, :, :]
+        sxx = weighted_X.transpose(0, 2, 1) @ self.X
+        sxx -= total[:, None, None] * x_bar[:, :, None] * x_bar[:, None, :]
+        sxy = (w * self.y) @ self.X - total[:, None] * x_bar * y_bar[:, None]
+
+        # 伪逆对零方差列（权重为0的特征）给出0系数，与最小范数最小二乘解一致
+        coef = np.einsum(
+            "bij,bj->bi", np.linalg.pinv(sxx, rcond=1e-12, hermitian=True), sxy
+        )
+        intercept = y_bar - np.einsum("bi,bi->b", x_bar, coef)
+        return coef, intercept
+
+    def score(
+        self, coef: np.ndarray, intercept: np.ndarray, sample_weights: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """按样本权重批量计算MSE、R²与MAE"""
+        w = np.asarray(sample_weights, dtype=float)
+        total = w.sum(axis=1)
+
+        residuals = self.y[None, :] - intercept[:, None] - coef @ self.X.T
+        sse = np.einsum("bn,bn->b", w, residuals**2)
+
+        y_bar = (w @ self.y) / total
+        sst = np.einsum("bn,bn->b", w, (self.y[None, :] - y_bar[:, None]) ** 2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(sst > 0, 1 - sse / sst, np.where(sse == 0, 1.0, 0.0))
+
+        return {
+            "mse": sse / total,
+            "r2": r2,
+            "mae": np.einsum("bn,bn->b", w, np.abs(residuals)) / total,
+        }
+
+    def bootstrap(self, n_bootstrap: int) -> Dict[str, np.ndarray]:
+        """
+        Bootstrap重抽样并在各自样本上评估
+
+        抽样序列与逐次调用np.random.choice(n, n)相同，固定随机种子时结果可复现。
+        """
+        n = self.n_samples
+        batches = []
+        for start in range(0, n_bootstrap, self.batch_size):
+            size = min(self.batch_size, n_bootstrap - start)
+            indices = np.random.choice(n, size=(size, n), replace=True)
+            counts = np.bincount(
+                (indices + n * np.arange(size)[:, None]).ravel(), minlength=size * n
+            ).reshape(size, n)
+
+            coef, intercept = self.fit(counts)
+            metrics = self.score(coef, intercept, counts)
+            metrics["coef"] = coef
+            batches.append(metrics)
+
+        return {
+            key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]
+        }
+
+    def cross_validate(self, n_splits: int = 5) -> Dict[str, np.ndarray]:
+        """K折交叉验证（与cross_val_score默认的不打乱KFold划分一致）"""
+        fold_sizes = np.full(n_splits, self.n_samples // n_splits)
+        fold_sizes[: self.n_samples % n_splits] += 1
+        fold_ids = np.repeat(np.arange(n_splits), fold_sizes)
+
+        test_masks = (fold_ids[None, :] == np.arange(n_splits)[:, None]).astype(float)
+        coef, intercept = self.fit(1 - test_masks)
+        return self.score(coef, intercept, test_masks)
+
+
 class WeightValidation:
     """权重验证算法"""
 
@@ -100,43 +208,25 @@ class WeightValidation:
 
             # 应用权重
             weights_array = np.array([weights.get(feature, 0) for feature in X.columns])
-            X_weighted = X * weights_array
+            X_weighted = X.to_numpy(dtype=float) * weights_array
 
-            # 交叉验证
-            cv_scores = cross_val_score(
-                LinearRegression(),
-                X_weighted,
-                y,
-                cv=5,
-                scoring="neg_mean_squared_error",
-            )
+            # 5折交叉验证，一次求解全部折
+            scores = ResamplingEngine(X_weighted, y).cross_validate(n_splits=5)
 
-            cv_results["cv_scores"] = -cv_scores.tolist()  # 转换为正数
-            cv_results["mean_cv_score"] = -cv_scores.mean()
-            cv_results["std_cv_score"] = cv_scores.std()
-            cv_results["cv_score_range"] = [cv_scores.min(), cv_scores.max()]
+            cv_results["cv_scores"] = scores["mse"].tolist()
+            cv_results["mean_cv_score"] = scores["mse"].mean()
+            cv_results["std_cv_score"] = scores["mse"].std()
+            cv_results["cv_score_range"] = [scores["mse"].min(), scores["mse"].max()]
 
             # 计算R²交叉验证
-            cv_r2_scores = cross_val_score(
-                LinearRegression(), X_weighted, y, cv=5, scoring="r2"
-            )
-
-            cv_results["cv_r2_scores"] = cv_r2_scores.tolist()
-            cv_results["mean_cv_r2"] = cv_r2_scores.mean()
-            cv_results["std_cv_r2"] = cv_r2_scores.std()
+            cv_results["cv_r2_scores"] = scores["r2"].tolist()
+            cv_results["mean_cv_r2"] = scores["r2"].mean()
+            cv_results["std_cv_r2"] = scores["r2"].std()
 
             # 计算MAE交叉验证
-            cv_mae_scores = cross_val_score(
-                LinearRegression(),
-                X_weighted,
-                y,
-                cv=5,
-                scoring="neg_mean_absolute_error",
-            )
-
-            cv_results["cv_mae_scores"] = -cv_mae_scores.tolist()
-            cv_results["mean_cv_mae"] = -cv_mae_scores.mean()
-            cv_results["std_cv_mae"] = cv_mae_scores.std()
+            cv_results["cv_mae_scores"] = scores["mae"].tolist()
+            cv_results["mean_cv_mae"] = scores["mae"].mean()
+            cv_results["std_cv_mae"] = scores["mae"].std()
 
             logger.info("交叉验证验证完成")
             return cv_results
@@ -146,46 +236,25 @@ class WeightValidation:
             return {}
 
     def _bootstrap_validation(
-        self, X: pd.DataFrame, y: pd.Series, weights: Dict[str, float]
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        weights: Dict[str, float],
+        n_bootstrap: int = 100,
     ) -> Dict[str, Any]:
         """Bootstrap验证"""
         try:
             bootstrap_results = {}
 
-            # Bootstrap参数
-            n_bootstrap = 100
-            bootstrap_scores = []
-            bootstrap_r2_scores = []
-            bootstrap_mae_scores = []
-
             # 应用权重
             weights_array = np.array([weights.get(feature, 0) for feature in X.columns])
+            X_weighted = X.to_numpy(dtype=float) * weights_array
 
-            for i in range(n_bootstrap):
-                # 生成Bootstrap样本
-                bootstrap_indices = np.random.choice(len(X), size=len(X), replace=True)
-
-                X_bootstrap = X.iloc[bootstrap_indices]
-                y_bootstrap = y.iloc[bootstrap_indices]
-
-                # 应用权重
-                X_weighted = X_bootstrap * weights_array
-
-                # 训练模型
-                model = LinearRegression()
-                model.fit(X_weighted, y_bootstrap)
-
-                # 预测
-                y_pred = model.predict(X_weighted)
-
-                # 计算指标
-                mse = mean_squared_error(y_bootstrap, y_pred)
-                r2 = r2_score(y_bootstrap, y_pred)
-                mae = mean_absolute_error(y_bootstrap, y_pred)
-
-                bootstrap_scores.append(mse)
-                bootstrap_r2_scores.append(r2)
-                bootstrap_mae_scores.append(mae)
+            # 一次抽取全部Bootstrap样本并批量求解
+            scores = ResamplingEngine(X_weighted, y).bootstrap(n_bootstrap)
+            bootstrap_scores = scores["mse"].tolist()
+            bootstrap_r2_scores = scores["r2"].tolist()
+            bootstrap_mae_scores = scores["mae"].tolist()
 
             bootstrap_results["bootstrap_scores"] = bootstrap_scores
             bootstrap_results["mean_bootstrap_score"] = np.mean(bootstrap_scores)
@@ -567,36 +636,24 @@ class WeightValidation:
             return {"is_normal": False, "normality_score": 0}
 
     def _test_weight_stability(
-        self, X: pd.DataFrame, y: pd.Series, weights: Dict[str, float]
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        weights: Dict[str, float],
+        n_bootstrap: int = 50,
     ) -> Dict[str, Any]:
         """测试权重稳定性"""
         try:
             weight_stability = {}
 
             # 使用Bootstrap测试权重稳定性
-            n_bootstrap = 50
-            bootstrap_weights = {feature: [] for feature in X.columns}
-
-            for i in range(n_bootstrap):
-                # 生成Bootstrap样本
-                bootstrap_indices = np.random.choice(len(X), size=len(X), replace=True)
-
-                X_bootstrap = X.iloc[bootstrap_indices]
-                y_bootstrap = y.iloc[bootstrap_indices]
-
-                # 应用权重
-                weights_array = np.array(
-                    [weights.get(feature, 0) for feature in X.columns]
-                )
-                X_weighted = X_bootstrap * weights_array
-
-                # 训练模型
-                model = LinearRegression()
-                model.fit(X_weighted, y_bootstrap)
+            weights_array = np.array([weights.get(feature, 0) for feature in X.columns])
+            X_weighted = X.to_numpy(dtype=float) * weights_array
+            coef = ResamplingEngine(X_weighted, y).bootstrap(n_bootstrap)["coef"]
 
-                # 记录权重
-                for j, feature in enumerate(X.columns):
-                    bootstrap_weights[feature].append(model.coef_[j])
+            bootstrap_weights = {
+                feature: coef[:, j].tolist() for j, feature in enumerate(X.columns)
+            }
 
             # 计算权重稳定性指标
             for feature in X.columns:
@@ -53,6 +53,9 @@ class MetricMonitoringRequest(BaseModel):
     session_id: str = Field(..., description="复盘会话ID")
     metric_id: str = Field(..., description="指标ID")
     time_range: Optional[Dict[str, str]] = Field(None, description="时间范围")
+    related_metric_ids: Optional[List[str]] = Field(
+        None, description="相关指标ID（增量分析其对该指标的滞后效应）"
+    )
 
 
 class AnomalyDetectionRequest(BaseModel):
@@ -212,6 +215,7 @@ async def monitor_metric(
             metric_id=request.metric_id,
             session_id=request.session_id,
             time_range=time_range,
+            related_metric_ids=request.related_metric_ids,
         )
 
         if result.get("success"):
@@ -221,6 +225,7 @@ async def monitor_metric(
                 "quality_score": result.get("quality_score"),
                 "trend_analysis": result.get("trend_analysis"),
                 "anomalies_detected": result.get("anomalies_detected", 0),
+                "lag_effects": result.get("lag_effects", {}),
             }
         else:
             raise HTTPException(
@@ -11,7 +11,9 @@ from enum import Enum
 import hashlib
 import json
 
+from .memory_cache import MemoryCache, MISSING
 from .redis_cache import RedisCache
+from .single_flight import RedisSingleFlight, StampedeGuard
 from ..error_handling.unified import handle_errors, BusinessError
 from ..logging_config import get_logger
 
@@ -40,9 +42,26 @@ class CacheLevel(Enum):
 class CacheManager:
     """缓存管理器"""
 
-    def __init__(self, redis_cache: RedisCache):
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        memory_max_size: int = 1000,
+        memory_max_bytes: Optional[int] = None,
+        memory_strategy: CacheStrategy = CacheStrategy.LRU,
+    ):
         self.redis_cache = redis_cache
-        self.memory_cache: Dict[str, Any] = {}
+        # L1缓存淘汰策略在创建时确定，写策略（WRITE_*）不影响L1淘汰
+        if memory_strategy not in (
+            CacheStrategy.LRU,
+            CacheStrategy.LFU,
+            CacheStrategy.TTL,
+        ):
+            memory_strategy = CacheStrategy.LRU
+        self.memory_cache = MemoryCache(
+            max_size=memory_max_size,
+            max_bytes=memory_max_bytes,
+            strategy=memory_strategy.value,
+        )
         self.cache_stats: Dict[str, Dict[str, int]] = {}
         self.cache_policies: Dict[str, Dict[str, Any]] = {}
 
@@ -103,10 +122,11 @@ class CacheManager:
 
         # L1缓存（内存）
         if use_memory and policy["level"] in [CacheLevel.L1, CacheLevel.L2]:
-            if key in self.memory_cache:
+            value = self.memory_cache.get(key, MISSING)
+            if value is not MISSING:
                 self._update_cache_stats(key, "hits")
                 logger.debug(f"L1缓存命中: {key}")
-                return self.memory_cache[key]
+                return value
 
         # L2缓存（Redis）
         if policy["level"] in [CacheLevel.L2, CacheLevel.L3]:
@@ -116,7 +136,7 @@ class CacheManager:
 
                 # 更新L1缓存
                 if use_memory and policy["level"] == CacheLevel.L2:
-                    self.memory_cache[key] = value
+                    self.memory_cache.set(key, value, policy["ttl"])
 
                 logger.debug(f"L2缓存命中: {key}")
                 return value
@@ -133,27 +153,23 @@ class CacheManager:
         value: Any,
         ttl: Optional[int] = None,
         strategy: Optional[CacheStrategy] = None,
+        tags: Optional[List[str]] = None,
     ) -> bool:
-        """设置缓存值"""
+        """设置缓存值，tags用于按标签/命名空间批量失效"""
         policy = self._get_cache_policy(key)
 
         # 使用策略或默认TTL
         cache_ttl = ttl or policy["ttl"]
-        cache_strategy = strategy or policy["strategy"]
 
         success = True
 
-        # L1缓存（内存）
+        # L1缓存（内存），容量超限时由存储自身按策略O(1)淘汰
         if policy["level"] in [CacheLevel.L1, CacheLevel.L2]:
-            self.memory_cache[key] = value
-
-            # 检查内存缓存大小限制
-            if len(self.memory_cache) > policy["max_size"]:
-                await self._evict_memory_cache(cache_strategy)
+            self.memory_cache.set(key, value, cache_ttl)
 
         # L2缓存（Redis）
         if policy["level"] in [CacheLevel.L2, CacheLevel.L3]:
-            success = await self.redis_cache.set(key, value, cache_ttl)
+            success = await self.redis_cache.set(key, value, cache_ttl, tags=tags)
 
         if success:
             self._update_cache_stats(key, "sets")
@@ -167,8 +183,7 @@ class CacheManager:
         success = True
 
         # 删除L1缓存
-        if key in self.memory_cache:
-            del self.memory_cache[key]
+        self.memory_cache.delete(key)
 
         # 删除L2缓存
         redis_success = await self.redis_cache.delete(key)
@@ -197,26 +212,37 @@ class CacheManager:
 
         # 清空L1缓存
         if pattern == "*":
-            self.memory_cache.clear()
-            cleared_count += len(self.memory_cache)
+            cleared_count += self.memory_cache.clear()
         else:
             # 按模式清空L1缓存
             keys_to_remove = [
                 k for k in self.memory_cache.keys() if self._match_pattern(k, pattern)
             ]
             for key in keys_to_remove:
-                del self.memory_cache[key]
+                self.memory_cache.delete(key)
             cleared_count += len(keys_to_remove)
 
-        # 清空L2缓存
-        redis_keys = await self.redis_cache.keys(pattern)
-        for key in redis_keys:
-            await self.redis_cache.delete(key)
-        cleared_count += len(redis_keys)
+        # 清空L2缓存（SCAN + UNLINK分批删除，不阻塞Redis）
+        progress = await self.redis_cache.delete_pattern(pattern)
+        cleared_count += progress["deleted"]
 
         logger.info(f"清空缓存完成: {cleared_count} 个键")
         return cleared_count
 
+    @handle_errors
+    async def invalidate_tags(self, tags: List[str]) -> Dict[str, int]:
+        """按标签/命名空间失效缓存，同时清理L1中对应的键"""
+
+        def _evict_from_memory(keys: List[str]):
+            for key in keys:
+                self.memory_cache.delete(key)
+
+        progress = await self.redis_cache.invalidate_tags(
+            tags, on_batch=_evict_from_memory
+        )
+        logger.info(f"按标签失效缓存完成: {tags} -> {progress}")
+        return progress
+
     def _match_pattern(self, key: str, pattern: str) -> bool:
         """匹配键模式"""
         if pattern == "*":
@@ -230,27 +256,6 @@ class CacheManager:
 
         return key == pattern
 
-    @handle_errors
-    async def _evict_memory_cache(self, strategy: CacheStrategy):
-        """内存缓存淘汰"""
-        if strategy == CacheStrategy.LRU:
-            # 最近最少使用
-            oldest_key = min(
-                self.memory_cache.keys(),
-                key=lambda k: self.cache_stats.get(k, {}).get("last_access", 0),
-            )
-            del self.memory_cache[oldest_key]
-            logger.debug(f"LRU淘汰: {oldest_key}")
-
-        elif strategy == CacheStrategy.LFU:
-            # 最少频率使用
-            least_frequent_key = min(
-                self.memory_cache.keys(),
-                key=lambda k: self.cache_stats.get(k, {}).get("hits", 0),
-            )
-            del self.memory_cache[least_frequent_key]
-            logger.debug(f"LFU淘汰: {least_frequent_key}")
-
     @handle_errors
     async def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
@@ -271,6 +276,7 @@ class CacheManager:
 
         return {
             "memory_cache_size": len(self.memory_cache),
+            "memory_cache": self.memory_cache.get_stats(),
             "total_keys": len(self.cache_stats),
             "total_hits": total_hits,
             "total_misses": total_misses,
@@ -297,21 +303,38 @@ class CacheManager:
         logger.info(f"缓存预热完成: {len(warm_up_data)} 个键")
 
 
+# 装饰器共享的击穿防护（进程内合并与提前刷新）
+_stampede_guard = StampedeGuard()
+
+
+def _distributed_single_flight(redis_cache: RedisCache) -> Optional[RedisSingleFlight]:
+    """Redis可用时返回跨进程合并器"""
+    if redis_cache.is_connected and redis_cache.redis_client is not None:
+        return RedisSingleFlight(redis_cache.redis_client)
+    return None
+
+
 # 缓存装饰器
 def cached(
     ttl: int = 3600,
     key_prefix: str = "",
     strategy: CacheStrategy = CacheStrategy.TTL,
     level: CacheLevel = CacheLevel.L2,
+    distributed: bool = False,
+    early_refresh_beta: float = 0.0,
 ):
     """
     缓存装饰器
 
+    未命中时同一键的并发调用只执行一次函数，其余调用者共享结果。
+
     Args:
         ttl: 缓存过期时间（秒）
         key_prefix: 键前缀
         strategy: 缓存策略
         level: 缓存级别
+        distributed: 是否通过Redis锁跨进程合并重算
+        early_refresh_beta: 提前刷新系数，大于0时临近过期的键在后台刷新
     """
 
     def decorator(func: Callable):
@@ -328,21 +351,37 @@ def cached(
                 {"strategy": strategy, "ttl": ttl, "level": level, "max_size": 1000},
             )
 
+            async def compute():
+                return await func(*args, **kwargs)
+
+            async def store(result):
+                await cache_manager.set(cache_key, result, ttl, strategy)
+                logger.debug(f"缓存存储: {cache_key}")
+
             # 尝试从缓存获取
             cached_result = await cache_manager.get(cache_key)
 
             if cached_result is not None:
                 logger.debug(f"缓存命中: {cache_key}")
+                if _stampede_guard.should_refresh(cache_key, early_refresh_beta):
+                    _stampede_guard.refresh_in_background(
+                        cache_key, compute, store, ttl
+                    )
                 return cached_result
 
-            # 执行函数
-            result = await func(*args, **kwargs)
-
-            # 存储到缓存
-            await cache_manager.set(cache_key, result, ttl, strategy)
-            logger.debug(f"缓存存储: {cache_key}")
-
-            return result
+            # 合并执行函数并存储到缓存
+            return await _stampede_guard.load(
+                cache_key,
+                compute,
+                store,
+                ttl,
+                distributed=(
+                    _distributed_single_flight(cache_manager.redis_cache)
+                    if distributed
+                    else None
+                ),
+                fetch=lambda: cache_manager.get(cache_key),
+            )
 
         return wrapper
 
@@ -385,15 +424,11 @@ def cache_refresh(
     """
     缓存刷新装饰器
 
-    执行函数后刷新缓存
+    执行函数后刷新缓存，同一键的并发刷新只执行一次函数
     """
 
     def decorator(func: Callable):
         async def wrapper(*args, **kwargs):
-            # 执行函数
-            result = await func(*args, **kwargs)
-
-            # 刷新缓存
             cache_manager = CacheManager(RedisCache("redis://localhost:6379/0"))
             cache_key = cache_manager._generate_cache_key(
                 f"{key_prefix}:{func.__name__}", *args, **kwargs
@@ -405,11 +440,15 @@ def cache_refresh(
                 {"strategy": strategy, "ttl": ttl, "level": level, "max_size": 1000},
             )
 
-            # 存储到缓存
-            await cache_manager.set(cache_key, result, ttl, strategy)
-            logger.debug(f"缓存刷新: {cache_key}")
+            async def compute():
+                return await func(*args, **kwargs)
 
-            return result
+            async def store(result):
+                await cache_manager.set(cache_key, result, ttl, strategy)
+                logger.debug(f"缓存刷新: {cache_key}")
+
+            # 执行函数并刷新缓存，同一键的并发刷新合并为一次
+            return await _stampede_guard.load(cache_key, compute, store, ttl)
 
         return wrapper
 
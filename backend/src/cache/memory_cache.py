@@ -0,0 +1,322 @@
+"""
+内存缓存存储
+提供有界的L1内存缓存，支持LRU/LFU/TTL淘汰策略
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from ..logging_config import get_logger
+
+logger = get_logger("memory_cache")
+
+# 缺省值哨兵，用于区分"未命中"与"缓存值为None"
+MISSING = object()
+
+
+class _Entry:
+    """缓存条目"""
+
+    __slots__ = ("value", "expire_at", "size", "freq")
+
+    def __init__(self, value: Any, expire_at: Optional[float], size: int):
+        self.value = value
+        self.expire_at = expire_at
+        self.size = size
+        self.freq = 1
+
+
+class MemoryCache:
+    """
+    有界内存缓存
+
+    - LRU: OrderedDict维护访问顺序，淘汰队首元素
+    - LFU: 按访问频率分桶（频率 -> OrderedDict），维护最小频率指针
+    - TTL: 按写入顺序淘汰（统一TTL下即最早过期的条目）
+
+    所有策略均支持按条目过期，过期条目由按秒分槽的时间轮批量清理。
+    get/set/delete/淘汰均为O(1)（时间轮清理为均摊O(1)）。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_bytes: Optional[int] = None,
+        strategy: str = "lru",
+        default_ttl: Optional[int] = None,
+        size_estimator: Optional[Callable[[Any], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size必须大于0")
+        if strategy not in ("lru", "lfu", "ttl"):
+            raise ValueError(f"不支持的淘汰策略: {strategy}")
+
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.strategy = strategy
+        self.default_ttl = default_ttl
+        self._size_of = size_estimator or sys.getsizeof
+        self._clock = clock
+
+        # 主存储，LRU/TTL策略下同时维护淘汰顺序
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # LFU频率桶
+        self._freq_buckets: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min_freq = 0
+        # 时间轮：过期秒 -> 键集合
+        self._wheel: Dict[int, Set[str]] = {}
+        self._wheel_cursor = int(self._clock())
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ------------------------------------------------------------------
+    # 容器协议
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if self._is_expired(entry):
+            self._expire(key)
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries.keys()))
+
+    def keys(self) -> List[str]:
+        """返回当前未过期的键"""
+        self.purge_expired()
+        now = self._clock()
+        return [
+            key
+            for key, entry in self._entries.items()
+            if not self._is_expired(entry, now)
+        ]
+
+    # ------------------------------------------------------------------
+    # 读写接口
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取缓存值，未命中或已过期返回default"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        if self._is_expired(entry):
+            self._expire(key)
+            self.misses += 1
+            return default
+
+        self._touch(key, entry)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """设置缓存值，超出容量时按策略淘汰"""
+        self.purge_expired()
+
+        ttl = ttl if ttl is not None else self.default_ttl
+        expire_at = self._clock() + ttl if ttl else None
+        size = self._estimate_size(value)
+
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._unschedule(key, existing)
+            self.current_bytes += size - existing.size
+            existing.value = value
+            existing.expire_at = expire_at
+            existing.size = size
+            self._touch(key, existing)
+            if self.strategy == "ttl":
+                self._entries.move_to_end(key)
+        else:
+            entry = _Entry(value, expire_at, size)
+            self._entries[key] = entry
+            self.current_bytes += size
+            if self.strategy == "lfu":
+                self._freq_buckets.setdefault(1, OrderedDict())[key] = None
+                self._min_freq = 1
+
+        self._schedule(key, self._entries[key])
+        self.sets += 1
+
+        while len(self._entries) > self.max_size or (
+            self.max_bytes is not None
+            and self.current_bytes > self.max_bytes
+            and len(self._entries) > 1
+        ):
+            self._evict_one(protect=key)
+
+    def delete(self, key: str) -> bool:
+        """删除缓存条目"""
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        self.deletes += 1
+        return True
+
+    def clear(self) -> int:
+        """清空缓存，返回清除的条目数"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._freq_buckets.clear()
+        self._wheel.clear()
+        self._min_freq = 0
+        self.current_bytes = 0
+        return count
+
+    def purge_expired(self) -> int:
+        """推进时间轮，清理所有已到期条目"""
+        now = self._clock()
+        now_slot = int(now)
+        if not self._wheel or now_slot < self._wheel_cursor:
+            self._wheel_cursor = max(self._wheel_cursor, now_slot)
+            return 0
+
+        purged = 0
+        # 只推进已完整流逝的秒槽，槽内条目必然已过期；当前秒内的过期由读取时惰性处理
+        if now_slot - self._wheel_cursor > len(self._wheel):
+            # 槽位稀疏时直接遍历到期槽位，避免长时间空闲后逐秒推进
+            due_slots = [slot for slot in self._wheel if slot < now_slot]
+        else:
+            due_slots = [
+                slot
+                for slot in range(self._wheel_cursor, now_slot)
+                if slot in self._wheel
+            ]
+
+        for slot in due_slots:
+            for key in self._wheel.pop(slot):
+                if key in self._entries:
+                    self._remove(key, unschedule=False)
+                    self.expirations += 1
+                    purged += 1
+
+        self._wheel_cursor = now_slot
+        return purged
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            "strategy": self.strategy,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "deletes": self.deletes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups > 0 else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+
+    def _estimate_size(self, value: Any) -> int:
+        try:
+            return int(self._size_of(value))
+        except Exception:
+            return 0
+
+    def _is_expired(self, entry: _Entry, now: Optional[float] = None) -> bool:
+        if entry.expire_at is None:
+            return False
+        return (now if now is not None else self._clock()) >= entry.expire_at
+
+    def _touch(self, key: str, entry: _Entry):
+        """记录一次访问，更新淘汰顺序"""
+        if self.strategy == "lru":
+            self._entries.move_to_end(key)
+        elif self.strategy == "lfu":
+            bucket = self._freq_buckets[entry.freq]
+            del bucket[key]
+            if not bucket:
+                del self._freq_buckets[entry.freq]
+                if self._min_freq == entry.freq:
+                    self._min_freq = entry.freq + 1
+            entry.freq += 1
+            self._freq_buckets.setdefault(entry.freq, OrderedDict())[key] = None
+
+    def _schedule(self, key: str, entry: _Entry):
+        if entry.expire_at is not None:
+            self._wheel.setdefault(int(entry.expire_at), set()).add(key)
+
+    def _unschedule(self, key: str, entry: _Entry):
+        if entry.expire_at is None:
+            return
+        slot = int(entry.expire_at)
+        keys = self._wheel.get(slot)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._wheel[slot]
+
+    def _remove(self, key: str, unschedule: bool = True):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+        if unschedule:
+            self._unschedule(key, entry)
+        if self.strategy == "lfu":
+            bucket = self._freq_buckets.get(entry.freq)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    # 最小频率指针在淘汰时惰性修正
+                    del self._freq_buckets[entry.freq]
+
+    def _expire(self, key: str):
+        self._remove(key)
+        self.expirations += 1
+
+    def _evict_one(self, protect: Optional[str] = None):
+        """按策略淘汰一个条目，protect为刚写入的键"""
+        victim = None
+        if self.strategy == "lfu":
+            bucket = self._freq_buckets.get(self._min_freq)
+            if not bucket:
+                self._min_freq = min(self._freq_buckets)
+                bucket = self._freq_buckets[self._min_freq]
+            for candidate in bucket:
+                if candidate != protect:
+                    victim = candidate
+                    break
+            if victim is None:
+                # 最小频率桶中只有刚写入的键，取次小频率桶
+                for freq in sorted(self._freq_buckets):
+                    if freq == self._min_freq:
+                        continue
+                    victim = next(iter(self._freq_buckets[freq]))
+                    break
+        else:
+            for candidate in self._entries:
+                if candidate != protect:
+                    victim = candidate
+                    break
+
+        if victim is None:
+            return
+
+        self._remove(victim)
+        self.evictions += 1
+        logger.debug(f"{self.strategy.upper()}淘汰: {victim}")
@@ -7,16 +7,161 @@ import redis.asyncio as redis
 import json
 import pickle
 import logging
-from typing import Any, Optional, Union, List, Dict
+from typing import Any, AsyncIterator, Callable, Optional, Union, List, Dict
 from datetime import datetime, timedelta
 import asyncio
 from functools import wraps
 
+from .single_flight import RedisSingleFlight, StampedeGuard
 from ..error_handling.unified import handle_errors, BMOSError, BusinessError
 from ..logging_config import get_logger
 
 logger = get_logger("redis_cache")
 
+# 标签索引集合的键前缀，集合成员为打上该标签的缓存键
+TAG_KEY_PREFIX = "cache:tag:"
+
+# 批量失效时每批扫描/删除的键数量
+DEFAULT_INVALIDATION_BATCH_SIZE = 500
+
+# 每写入该数量的索引成员后，在后台抽样清理一次本轮写入过的索引集合
+DEFAULT_INDEX_PRUNE_INTERVAL = 1000
+
+# 写入索引集合并维护其过期时间（KEYS[1]=索引键，ARGV[1]=成员TTL，0表示不过期，
+# ARGV[2..]=成员）：索引的剩余时间不短于任一成员的TTL，含不过期成员的索引也不过期
+INDEX_ADD_SCRIPT = """
+local current = redis.call('TTL', KEYS[1])
+redis.call('SADD', KEYS[1], unpack(ARGV, 2))
+local ttl = tonumber(ARGV[1])
+if ttl <= 0 then
+    redis.call('PERSIST', KEYS[1])
+elseif current == -2 or (current >= 0 and current < ttl) then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return current
+"""
+
+
+def add_to_index(pipe: Any, index_key: str, ttl: Optional[int], *members: str):
+    """在流水线中把成员加入索引集合（见 INDEX_ADD_SCRIPT）"""
+    pipe.eval(INDEX_ADD_SCRIPT, 1, index_key, int(ttl or 0), *members)
+
+
+async def unlink_index_members(
+    client: Any,
+    index_key: str,
+    batch_size: int = DEFAULT_INVALIDATION_BATCH_SIZE,
+    on_batch: Optional[Callable[[List[str]], Any]] = None,
+) -> Dict[str, int]:
+    """
+    删除索引集合中的全部成员键
+
+    SSCAN分批读取成员，每批UNLINK成员键并从索引中SREM，中途失败时已删除的成员
+    不会留在索引中；失效期间新写入的成员保留在索引中。
+
+    Returns:
+        进度统计: scanned/deleted/batches
+    """
+    progress = {"scanned": 0, "deleted": 0, "batches": 0}
+    cursor = 0
+    while True:
+        cursor, members = await client.sscan(index_key, cursor=cursor, count=batch_size)
+        if members:
+            members = list(members)
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.unlink(*members)
+                pipe.srem(index_key, *members)
+                deleted, _ = await pipe.execute()
+            progress["scanned"] += len(members)
+            progress["deleted"] += int(deleted or 0)
+            progress["batches"] += 1
+            if on_batch:
+                on_batch(members)
+        if cursor == 0:
+            break
+    return progress
+
+
+async def prune_index(
+    client: Any, index_key: str, batch_size: int = DEFAULT_INVALIDATION_BATCH_SIZE
+) -> int:
+    """从索引集合中移除已过期或已删除的成员，返回移除的数量"""
+    removed = 0
+    cursor = 0
+    while True:
+        cursor, members = await client.sscan(index_key, cursor=cursor, count=batch_size)
+        if members:
+            removed += await _remove_missing_members(client, index_key, list(members))
+        if cursor == 0:
+            break
+    return removed
+
+
+async def _remove_missing_members(
+    client: Any, index_key: str, members: List[str]
+) -> int:
+    async with client.pipeline(transaction=False) as pipe:
+        for member in members:
+            pipe.exists(member)
+        exists = await pipe.execute()
+    missing = [member for member, found in zip(members, exists) if not found]
+    if not missing:
+        return 0
+    return await client.srem(index_key, *missing)
+
+
+class IndexPruner:
+    """
+    索引集合后台清理
+
+    索引成员过期时Redis不会自动从集合中移除。每记录 interval 次写入后，对本轮
+    写入过的索引抽样检查成员（与Redis过期键的抽样清理相同）：每次抽取 sample 个，
+    移除已不存在的成员，失效比例超过1/4时继续抽样。索引中失效成员的比例因此保持
+    在较低水平，持续写入的索引也不会无限增长。
+    """
+
+    def __init__(
+        self,
+        interval: int = DEFAULT_INDEX_PRUNE_INTERVAL,
+        sample: int = 20,
+        max_rounds: int = 50,
+    ):
+        self.interval = interval
+        self.sample = sample
+        self.max_rounds = max_rounds
+        self.pruned = 0
+        self._writes = 0
+        self._pending: set = set()
+        self._tasks: set = set()
+
+    def record(self, client: Any, index_keys: List[str]):
+        """记录一次写入，达到间隔时在后台清理本轮写入过的索引"""
+        self._pending.update(index_keys)
+        self._writes += 1
+        if self._writes < self.interval:
+            return
+
+        index_keys, self._pending, self._writes = self._pending, set(), 0
+        task = asyncio.ensure_future(self._prune(client, index_keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _prune(self, client: Any, index_keys: set):
+        for index_key in index_keys:
+            try:
+                for _ in range(self.max_rounds):
+                    members = await client.srandmember(index_key, self.sample)
+                    if not members:
+                        break
+                    removed = await _remove_missing_members(
+                        client, index_key, list(members)
+                    )
+                    self.pruned += removed
+                    if removed * 4 <= len(members):
+                        break
+            except Exception as e:
+                logger.warning(f"清理索引集合失败: {index_key}: {e}")
+
 
 class RedisCache:
     """Redis缓存服务"""
@@ -26,6 +171,7 @@ class RedisCache:
         self.password = password
         self.redis_client: Optional[redis.Redis] = None
         self.is_connected = False
+        self.index_pruner = IndexPruner()
 
     @handle_errors
     async def connect(self):
@@ -83,7 +229,12 @@ class RedisCache:
 
     @handle_errors
     async def set(
-        self, key: str, value: Any, ttl: Optional[int] = None, serialize: bool = True
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        serialize: bool = True,
+        tags: Optional[List[str]] = None,
     ) -> bool:
         """
         设置缓存值
@@ -93,6 +244,7 @@ class RedisCache:
             value: 缓存值
             ttl: 过期时间（秒）
             serialize: 是否序列化
+            tags: 标签/命名空间列表，写入对应索引集合以支持按标签失效
         """
         if not self.is_connected:
             raise BusinessError(code="REDIS_NOT_CONNECTED", message="Redis未连接")
@@ -107,8 +259,20 @@ class RedisCache:
             else:
                 serialized_value = value
 
-            # 设置缓存
-            if ttl:
+            # 设置缓存，带标签时与索引写入合并为一次往返
+            if tags:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    if ttl:
+                        pipe.setex(key, ttl, serialized_value)
+                    else:
+                        pipe.set(key, serialized_value)
+                    for tag in tags:
+                        add_to_index(pipe, self._tag_key(tag), ttl, key)
+                    await pipe.execute()
+                self.index_pruner.record(
+                    self.redis_client, [self._tag_key(tag) for tag in tags]
+                )
+            elif ttl:
                 await self.redis_client.setex(key, ttl, serialized_value)
             else:
                 await self.redis_client.set(key, serialized_value)
@@ -157,13 +321,20 @@ class RedisCache:
             return default
 
     @handle_errors
-    async def delete(self, key: str) -> bool:
-        """删除缓存"""
+    async def delete(self, key: str, tags: Optional[List[str]] = None) -> bool:
+        """删除缓存，并从给定标签的索引集合中移除该键"""
         if not self.is_connected:
             return False
 
         try:
-            result = await self.redis_client.delete(key)
+            if tags:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.delete(key)
+                    for tag in tags:
+                        pipe.srem(self._tag_key(tag), key)
+                    result = (await pipe.execute())[0]
+            else:
+                result = await self.redis_client.delete(key)
             logger.debug(f"删除缓存: {key}")
             return result > 0
         except Exception as e:
@@ -221,6 +392,162 @@ class RedisCache:
             logger.error(f"获取键列表失败: {e}")
             return []
 
+    async def iter_keys(
+        self, pattern: str = "*", count: int = DEFAULT_INVALIDATION_BATCH_SIZE
+    ) -> AsyncIterator[List[str]]:
+        """
+        基于SCAN游标分批迭代匹配的键，不阻塞Redis
+
+        Args:
+            pattern: 键模式
+            count: 每次SCAN的建议返回数量
+        """
+        if not self.is_connected:
+            return
+
+        cursor = 0
+        while True:
+            cursor, keys = await self.redis_client.scan(
+                cursor=cursor, match=pattern, count=count
+            )
+            if keys:
+                yield keys
+            if cursor == 0:
+                break
+
+    async def _unlink_keys(self, keys: List[str], batch_size: int) -> int:
+        """分批流水线执行UNLINK，由Redis后台线程回收内存"""
+        if not keys:
+            return 0
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(keys), batch_size):
+                pipe.unlink(*keys[start : start + batch_size])
+            results = await pipe.execute()
+        return sum(int(result or 0) for result in results)
+
+    @handle_errors
+    async def delete_pattern(
+        self,
+        pattern: str,
+        batch_size: int = DEFAULT_INVALIDATION_BATCH_SIZE,
+        on_batch: Optional[Callable[[List[str]], Any]] = None,
+    ) -> Dict[str, int]:
+        """
+        按模式批量删除缓存（SCAN + UNLINK）
+
+        Args:
+            pattern: 键模式
+            batch_size: 每批处理的键数量
+            on_batch: 每批删除后的回调，参数为本批的键列表
+
+        Returns:
+            进度统计: scanned/deleted/batches
+        """
+        progress = {"scanned": 0, "deleted": 0, "batches": 0}
+        if not self.is_connected:
+            return progress
+
+        try:
+            async for keys in self.iter_keys(pattern, count=batch_size):
+                progress["scanned"] += len(keys)
+                progress["deleted"] += await self._unlink_keys(keys, batch_size)
+                progress["batches"] += 1
+                if on_batch:
+                    on_batch(keys)
+
+            logger.debug(f"按模式删除缓存: {pattern} -> {progress}")
+            return progress
+        except Exception as e:
+            logger.error(f"按模式删除缓存失败: {e}")
+            return progress
+
+    def _tag_key(self, tag: str) -> str:
+        """获取标签索引集合的键"""
+        return f"{TAG_KEY_PREFIX}{tag}"
+
+    @handle_errors
+    async def add_tags(self, key: str, tags: List[str]) -> bool:
+        """将已有缓存键加入标签索引（索引过期时间按键的剩余时间延长）"""
+        if not self.is_connected or not tags:
+            return False
+
+        try:
+            remaining = await self.redis_client.ttl(key)
+            if remaining == -2:
+                return False
+
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    add_to_index(pipe, self._tag_key(tag), max(remaining, 0), key)
+                await pipe.execute()
+            self.index_pruner.record(
+                self.redis_client, [self._tag_key(tag) for tag in tags]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"添加缓存标签失败: {e}")
+            return False
+
+    @handle_errors
+    async def invalidate_tags(
+        self,
+        tags: List[str],
+        batch_size: int = DEFAULT_INVALIDATION_BATCH_SIZE,
+        on_batch: Optional[Callable[[List[str]], Any]] = None,
+    ) -> Dict[str, int]:
+        """
+        按标签/命名空间失效缓存
+
+        通过SSCAN遍历标签索引集合获取成员键，分批UNLINK并从索引中移除，
+        无需遍历整个键空间。索引集合中已过期的成员删除时自动忽略。
+
+        Args:
+            tags: 标签列表
+            batch_size: 每批处理的键数量
+            on_batch: 每批删除后的回调，参数为本批的键列表
+
+        Returns:
+            进度统计: tags/scanned/deleted/batches
+        """
+        progress = {"tags": 0, "scanned": 0, "deleted": 0, "batches": 0}
+        if not self.is_connected:
+            return progress
+
+        try:
+            for tag in tags:
+                tag_progress = await unlink_index_members(
+                    self.redis_client, self._tag_key(tag), batch_size, on_batch
+                )
+                for name, value in tag_progress.items():
+                    progress[name] += value
+                progress["tags"] += 1
+
+            logger.debug(f"按标签失效缓存: {tags} -> {progress}")
+            return progress
+        except Exception as e:
+            logger.error(f"按标签失效缓存失败: {e}")
+            return progress
+
+    @handle_errors
+    async def prune_tags(
+        self, tags: List[str], batch_size: int = DEFAULT_INVALIDATION_BATCH_SIZE
+    ) -> int:
+        """从标签索引中移除已过期或已删除的键，返回移除的数量"""
+        if not self.is_connected:
+            return 0
+
+        try:
+            removed = 0
+            for tag in tags:
+                removed += await prune_index(
+                    self.redis_client, self._tag_key(tag), batch_size
+                )
+            return removed
+        except Exception as e:
+            logger.error(f"清理标签索引失败: {e}")
+            return 0
+
     @handle_errors
     async def flushdb(self) -> bool:
         """清空当前数据库"""
@@ -270,12 +597,13 @@ class RedisCache:
                 else:
                     serialized_mapping[key] = str(value)
 
-            await self.redis_client.mset(serialized_mapping)
-
-            # 设置过期时间
-            if ttl:
-                for key in mapping.keys():
-                    await self.redis_client.expire(key, ttl)
+            # 写入与过期时间设置合并为一次流水线往返
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.mset(serialized_mapping)
+                if ttl:
+                    for key in mapping.keys():
+                        pipe.expire(key, ttl)
+                await pipe.execute()
 
             logger.debug(f"批量设置缓存: {len(mapping)} 个键")
             return True
@@ -441,14 +769,24 @@ class RedisCache:
 
 
 # 缓存装饰器
-def cache_result(ttl: int = 3600, key_prefix: str = ""):
+def cache_result(
+    ttl: int = 3600,
+    key_prefix: str = "",
+    distributed: bool = False,
+    early_refresh_beta: float = 0.0,
+):
     """
     缓存函数结果的装饰器
 
+    未命中时同一键的并发调用只执行一次函数，其余调用者共享结果。
+
     Args:
         ttl: 缓存过期时间（秒）
         key_prefix: 键前缀
+        distributed: 是否通过Redis锁跨进程合并重算
+        early_refresh_beta: 提前刷新系数，大于0时临近过期的键在后台刷新
     """
+    guard = StampedeGuard()
 
     def decorator(func):
         @wraps(func)
@@ -456,22 +794,36 @@ def cache_result(ttl: int = 3600, key_prefix: str = ""):
             # 生成缓存键
             cache_key = f"{key_prefix}:{func.__name__}:{hash(str(args) + str(kwargs))}"
 
-            # 尝试从缓存获取
             cache_service = RedisCache("redis://localhost:6379/0")
+
+            async def compute():
+                return await func(*args, **kwargs)
+
+            async def store(result):
+                await cache_service.set(cache_key, result, ttl)
+                logger.debug(f"缓存存储: {cache_key}")
+
+            # 尝试从缓存获取
             cached_result = await cache_service.get(cache_key)
 
             if cached_result is not None:
                 logger.debug(f"缓存命中: {cache_key}")
+                if guard.should_refresh(cache_key, early_refresh_beta):
+                    guard.refresh_in_background(cache_key, compute, store, ttl)
                 return cached_result
 
-            # 执行函数
-            result = await func(*args, **kwargs)
-
-            # 存储到缓存
-            await cache_service.set(cache_key, result, ttl)
-            logger.debug(f"缓存存储: {cache_key}")
-
-            return result
+            # 合并执行函数并存储到缓存
+            single_flight = None
+            if distributed and cache_service.is_connected:
+                single_flight = RedisSingleFlight(cache_service.redis_client)
+            return await guard.load(
+                cache_key,
+                compute,
+                store,
+                ttl,
+                distributed=single_flight,
+                fetch=lambda: cache_service.get(cache_key),
+            )
 
         return wrapper
 
@@ -495,9 +847,7 @@ def invalidate_cache(pattern: str):
 
             # 失效缓存
             cache_service = RedisCache("redis://localhost:6379/0")
-            keys = await cache_service.keys(pattern)
-            for key in keys:
-                await cache_service.delete(key)
+            await cache_service.delete_pattern(pattern)
 
             logger.debug(f"缓存失效: {pattern}")
             return result
@@ -0,0 +1,253 @@
+"""
+缓存击穿防护
+提供按键合并并发请求（single-flight）、基于Redis锁的跨进程合并以及概率提前刷新
+"""
+
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from .memory_cache import MemoryCache, MISSING
+from ..logging_config import get_logger
+
+logger = get_logger("single_flight")
+
+# 仅当锁仍由自己持有时才释放
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+else
+    return 0
+end
+"""
+
+
+def should_refresh_early(
+    expires_at: Optional[float],
+    delta: float,
+    beta: float = 1.0,
+    now: Optional[float] = None,
+) -> bool:
+    """
+    概率提前刷新判断（XFetch算法）
+
+    离过期越近、重算耗时越长，越可能触发刷新，使热点键在过期前由单个请求重算。
+
+    Args:
+        expires_at: 过期时间戳
+        delta: 最近一次重算耗时（秒）
+        beta: 提前程度，越大越早刷新，0表示关闭
+        now: 当前时间戳
+    """
+    if beta <= 0 or expires_at is None:
+        return False
+    now = time.time() if now is None else now
+    # 1 - random() 取值(0, 1]，避免log(0)
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+class SingleFlight:
+    """
+    进程内请求合并：同一键同一时刻只执行一次，其余调用者等待并共享结果
+
+    计算作为独立任务运行，所有调用者（包括发起者）都通过shield等待；
+    某个调用者被取消（如客户端断开）只会使其自身退出，计算继续进行，
+    结果或异常照常传递给其余等待者。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        """键是否正在计算"""
+        future = self._inflight.get(key)
+        return future is not None and not future.done()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行或等待同一键的计算"""
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is not None and not future.done() and future.get_loop() is loop:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(func())
+        self._inflight[key] = future
+        self.executions += 1
+        future.add_done_callback(lambda done: self._release(key, done))
+        return await asyncio.shield(future)
+
+    def _release(self, key: str, future: asyncio.Future):
+        """计算结束后移除键"""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # 没有等待者时避免"异常未被获取"的告警
+        if not future.cancelled():
+            future.exception()
+
+
+class RedisSingleFlight:
+    """
+    基于Redis锁的跨进程请求合并
+
+    获得锁的进程执行计算并写入缓存，其余进程轮询缓存直到结果出现；
+    持锁进程崩溃时锁按lock_ttl自动过期，等待者随后自行计算。
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        lock_ttl: float = 30.0,
+        poll_interval: float = 0.05,
+        wait_timeout: Optional[float] = None,
+        lock_prefix: str = "lock:single_flight:",
+    ):
+        self.redis_client = redis_client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout if wait_timeout is not None else lock_ttl
+        self.lock_prefix = lock_prefix
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        执行或等待其他进程的计算
+
+        Args:
+            key: 缓存键
+            func: 计算并写入缓存的函数
+            fetch: 读取缓存的函数，未命中返回None
+        """
+        lock_key = f"{self.lock_prefix}{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            acquired = await self.redis_client.set(
+                lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+            if acquired:
+                try:
+                    return await func()
+                finally:
+                    try:
+                        await self.redis_client.eval(
+                            _RELEASE_LOCK_SCRIPT, 1, lock_key, token
+                        )
+                    except Exception as e:
+                        logger.warning(f"释放合并锁失败: {lock_key}: {e}")
+
+            # 其他进程正在计算，等待其写入缓存
+            while await self.redis_client.exists(lock_key):
+                if time.monotonic() >= deadline:
+                    logger.warning(f"等待合并锁超时，直接计算: {key}")
+                    return await func()
+                await asyncio.sleep(self.poll_interval)
+
+            value = await fetch()
+            if value is not None:
+                return value
+            # 持锁方失败或结果不可缓存，重新竞争锁
+
+
+class StampedeGuard:
+    """
+    缓存击穿防护
+
+    组合进程内合并、可选的跨进程合并以及提前刷新：
+    - 未命中时同一键只重算一次
+    - 命中但临近过期时，按XFetch概率在后台刷新并立即返回旧值
+    """
+
+    def __init__(self, metadata_size: int = 10000):
+        self.single_flight = SingleFlight()
+        # 记录每个键的重算耗时与过期时间，用于提前刷新判断
+        self._metadata = MemoryCache(max_size=metadata_size, size_estimator=lambda v: 0)
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.early_refreshes = 0
+
+    async def load(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        store: Callable[[Any], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        distributed: Optional[RedisSingleFlight] = None,
+        fetch: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        合并加载：计算并写入缓存
+
+        Args:
+            key: 缓存键
+            compute: 计算函数
+            store: 写入缓存的函数
+            ttl: 缓存过期时间（秒），用于提前刷新
+            distributed: 跨进程合并器，为None时仅进程内合并
+            fetch: 读取缓存的函数，跨进程合并时必需
+        """
+
+        async def _compute_and_store():
+            started = time.time()
+            value = await compute()
+            finished = time.time()
+            await store(value)
+            if ttl:
+                self._metadata.set(key, (finished - started, finished + ttl), ttl)
+            return value
+
+        if distributed is not None and fetch is not None:
+            return await self.single_flight.do(
+                key, lambda: distributed.do(key, _compute_and_store, fetch)
+            )
+        return await self.single_flight.do(key, _compute_and_store)
+
+    def should_refresh(self, key: str, beta: float = 1.0) -> bool:
+        """命中时判断是否需要提前刷新"""
+        if beta <= 0 or self.single_flight.in_flight(key):
+            return False
+        metadata = self._metadata.get(key, MISSING)
+        if metadata is MISSING:
+            return False
+        delta, expires_at = metadata
+        return should_refresh_early(expires_at, delta, beta)
+
+    def refresh_in_background(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        store: Callable[[Any], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ):
+        """后台刷新（stale-while-revalidate），调用方直接返回旧值"""
+        if self.single_flight.in_flight(key):
+            return
+
+        async def _refresh():
+            try:
+                await self.load(key, compute, store, ttl)
+            except Exception as e:
+                logger.warning(f"后台刷新缓存失败: {key}: {e}")
+
+        self.early_refreshes += 1
+        task = asyncio.ensure_future(_refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计"""
+        return {
+            "executions": self.single_flight.executions,
+            "coalesced": self.single_flight.coalesced,
+            "early_refreshes": self.early_refreshes,
+            "background_tasks": len(self._background_tasks),
+        }
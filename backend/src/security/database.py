@@ -4,7 +4,8 @@ BMOS系统 - 安全数据库操作
 """
 
 import asyncpg
-from typing import Any, List, Dict, Optional, Union
+from itertools import islice
+from typing import Any, Iterable, List, Dict, Optional, Tuple, Union
 import logging
 from ..security.config import sanitize_sql_input
 from ..exceptions import DatabaseError, ValidationError
@@ -134,6 +135,50 @@ class SecureDatabaseService:
             logger.error(f"批量插入失败: {e}")
             raise DatabaseError(f"批量插入失败: {e}")
 
+    async def copy_records(
+        self,
+        table: str,
+        columns: List[str],
+        records: Iterable[Tuple[Any, ...]],
+        schema_name: Optional[str] = None,
+        chunk_size: int = 10000,
+    ) -> int:
+        """
+        使用COPY批量写入数据
+
+        记录按chunk_size分块通过COPY FROM STDIN（二进制格式）写入，全部分块在同一事务中，
+        任一分块失败时整体回滚。
+
+        Returns:
+            写入的行数
+        """
+        if not self.pool:
+            raise DatabaseError("数据库连接池未初始化")
+
+        iterator = iter(records)
+        total = 0
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    while True:
+                        chunk = list(islice(iterator, chunk_size))
+                        if not chunk:
+                            break
+                        await conn.copy_records_to_table(
+                            table,
+                            records=chunk,
+                            columns=columns,
+                            schema_name=schema_name,
+                        )
+                        total += len(chunk)
+
+            logger.info(f"COPY写入成功: {table}，{total}行")
+            return total
+
+        except Exception as e:
+            logger.error(f"COPY写入失败: {e}")
+            raise DatabaseError(f"COPY写入失败: {e}")
+
     async def safe_select(
         self,
         table: str,
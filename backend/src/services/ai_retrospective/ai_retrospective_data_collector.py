@@ -5,13 +5,14 @@ AI复盘数据收集服务
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 import pandas as pd
 import numpy as np
 from uuid import uuid4
 
+from ...algorithms.lag_analysis import IncrementalLagStatistics
 from ...algorithms.threshold_analysis import ThresholdAnalysis
 from ..database_service import DatabaseService
 from ..enhanced_enterprise_memory import EnterpriseMemoryService
@@ -104,6 +105,7 @@ class AIRetrospectiveDataCollector:
         metric_id: str,
         session_id: str,
         time_range: Optional[Dict[str, datetime]] = None,
+        related_metric_ids: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         监控关键指标变化
@@ -112,6 +114,7 @@ class AIRetrospectiveDataCollector:
             metric_id: 指标ID
             session_id: 复盘会话ID
             time_range: 时间范围 (start, end)
+            related_metric_ids: 可能影响该指标的相关指标ID，增量更新其滞后效应统计
 
         Returns:
             监控结果
@@ -149,7 +152,16 @@ class AIRetrospectiveDataCollector:
             # 4. 检测异常变化
             anomaly_detection = await self._detect_metric_anomalies(df)
 
-            # 5. 构建数据内容
+            # 5. 增量更新相关指标的滞后效应
+            lag_effects = {}
+            for related_metric_id in related_metric_ids or []:
+                lag_effects[related_metric_id] = (
+                    await self.update_metric_lag_statistics(
+                        related_metric_id, metric_id
+                    )
+                )
+
+            # 6. 构建数据内容
             data_content = {
                 "metric_id": metric_id,
                 "time_range": {
@@ -160,11 +172,13 @@ class AIRetrospectiveDataCollector:
                 "anomaly_detection": anomaly_detection,
                 "data_points": len(df),
             }
+            if lag_effects:
+                data_content["lag_effects"] = lag_effects
 
-            # 6. 评估数据质量
+            # 7. 评估数据质量
             quality_score = self._evaluate_data_quality(data_content)
 
-            # 7. 保存到数据库
+            # 8. 保存到数据库
             data_id = await self._save_retrospective_data(
                 session_id=session_id,
                 data_type="metric_change",
@@ -180,12 +194,65 @@ class AIRetrospectiveDataCollector:
                 "quality_score": quality_score,
                 "trend_analysis": trend_analysis,
                 "anomalies_detected": len(anomaly_detection.get("anomalies", [])),
+                "lag_effects": lag_effects,
             }
 
         except Exception as e:
             logger.error(f"监控指标变化失败: {e}")
             return {"success": False, "error": str(e)}
 
+    async def update_metric_lag_statistics(
+        self, cause_metric_id: str, effect_metric_id: str, max_lag: int = 12
+    ) -> Dict[str, Any]:
+        """
+        增量更新指标对的滞后效应统计
+
+        只读取上次水位线之后的新观测追加到持久化的在线统计状态中，
+        每个新观测的更新代价为O(max_lag)，服务重启后直接从数据库恢复状态。
+
+        Args:
+            cause_metric_id: 原因指标ID
+            effect_metric_id: 结果指标ID
+            max_lag: 最大滞后期数
+
+        Returns:
+            最优滞后与格兰杰检验结果
+        """
+        try:
+            statistics, watermark = await self._load_lag_state(
+                cause_metric_id, effect_metric_id, max_lag
+            )
+
+            observations = await self._get_paired_metric_history(
+                cause_metric_id, effect_metric_id, watermark
+            )
+            if observations:
+                statistics.extend(
+                    [row["cause_value"] for row in observations],
+                    [row["effect_value"] for row in observations],
+                )
+                watermark = observations[-1]["timestamp"]
+                await self._save_lag_state(
+                    cause_metric_id, effect_metric_id, statistics, watermark
+                )
+
+            lag_statistics = statistics.lag_statistics()
+            granger = statistics.granger_causality()
+            return {
+                "cause_metric_id": cause_metric_id,
+                "effect_metric_id": effect_metric_id,
+                "observations": statistics.n_observations,
+                "new_observations": len(observations),
+                "optimal_lag": lag_statistics["optimal_lag"],
+                "granger_causality": granger["causality"],
+                "granger_best_lag": granger["best_lag"],
+                "granger_tests": granger["causality_tests"],
+            }
+
+        except Exception as e:
+            logger.error(f"更新指标滞后统计失败: {e}")
+            return {"error": str(e)}
+
     async def detect_anomalies(
         self,
         data: List[Dict[str, Any]],
@@ -406,6 +473,85 @@ class AIRetrospectiveDataCollector:
             logger.warning(f"获取指标历史数据失败: {e}")
             return []
 
+    async def _get_paired_metric_history(
+        self, cause_metric_id: str, effect_metric_id: str, since: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """获取两个指标在同一时间点的观测（晚于水位线）"""
+        try:
+            if not self.db_service:
+                return []
+
+            query = """
+                SELECT c.recorded_at as timestamp,
+                       c.metric_value as cause_value,
+                       e.metric_value as effect_value
+                FROM north_star_metric_values c
+                JOIN north_star_metric_values e
+                  ON e.recorded_at = c.recorded_at AND e.metric_id = $2
+                WHERE c.metric_id = $1
+                AND c.metric_value IS NOT NULL AND e.metric_value IS NOT NULL
+                AND ($3::timestamptz IS NULL OR c.recorded_at > $3)
+                ORDER BY c.recorded_at ASC
+            """
+            return await self.db_service.execute_query(
+                query, [cause_metric_id, effect_metric_id, since]
+            )
+        except Exception as e:
+            logger.warning(f"获取指标对历史数据失败: {e}")
+            return []
+
+    async def _load_lag_state(
+        self, cause_metric_id: str, effect_metric_id: str, max_lag: int
+    ) -> Tuple[IncrementalLagStatistics, Optional[datetime]]:
+        """加载持久化的滞后统计状态，不存在时返回空状态"""
+        if self.db_service:
+            query = """
+                SELECT state, watermark FROM metric_lag_statistics
+                WHERE cause_metric_id = $1 AND effect_metric_id = $2 AND max_lag = $3
+            """
+            rows = await self.db_service.execute_query(
+                query, [cause_metric_id, effect_metric_id, max_lag]
+            )
+            if rows:
+                state = rows[0]["state"]
+                if isinstance(state, str):
+                    state = json.loads(state)
+                return IncrementalLagStatistics.from_dict(state), rows[0]["watermark"]
+
+        return IncrementalLagStatistics(max_lag=max_lag), None
+
+    async def _save_lag_state(
+        self,
+        cause_metric_id: str,
+        effect_metric_id: str,
+        statistics: IncrementalLagStatistics,
+        watermark: datetime,
+    ):
+        """持久化滞后统计状态与水位线"""
+        if not self.db_service:
+            return
+
+        query = """
+            INSERT INTO metric_lag_statistics (
+                cause_metric_id, effect_metric_id, max_lag, state, watermark, updated_at
+            ) VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (cause_metric_id, effect_metric_id, max_lag) DO UPDATE
+            SET state = EXCLUDED.state,
+                watermark = EXCLUDED.watermark,
+                updated_at = EXCLUDED.updated_at
+        """
+        await self.db_service.execute_query(
+            query,
+            [
+                cause_metric_id,
+                effect_metric_id,
+                statistics.max_lag,
+                json.dumps(statistics.to_dict()),
+                watermark,
+                datetime.now(),
+            ],
+        )
+
     def _analyze_metric_trend(self, df: pd.DataFrame) -> Dict[str, Any]:
         """分析指标趋势"""
         if len(df) < 2:
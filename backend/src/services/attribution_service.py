@@ -3,26 +3,74 @@ Shapley归因服务
 实现多触点归因的Shapley值计算
 """
 
+import itertools
+import math
+import multiprocessing
+import os
 import numpy as np
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 联盟价值函数：(联盟中触点的索引集合, 触点列表, 转化金额) -> 联盟价值
+ValueFunction = Callable[[set, List[Dict], float], float]
+
+# 价值函数类型
+ADDITIVE = "additive"  # v(S) = Σ v({i})，Shapley值即单触点价值
+SYMMETRIC = "symmetric"  # v(S)只依赖|S|，Shapley值平均分配
+GENERAL = "general"  # 一般价值函数，需要精确枚举或采样
+AUTO = "auto"  # 通过探测联盟自动判断
+
 
 class ShapleyAttributionService:
     """Shapley值归因服务"""
 
-    def __init__(self, n_samples: int = 10000, random_seed: Optional[int] = None):
+    def __init__(
+        self,
+        n_samples: int = 10000,
+        random_seed: Optional[int] = None,
+        value_function: Optional[ValueFunction] = None,
+        value_function_type: str = AUTO,
+        tolerance: float = 0.001,
+        confidence: float = 0.95,
+        batch_size: int = 128,
+        signature_fields: Tuple[str, ...] = ("type", "cost"),
+        channel_field: str = "type",
+        signature_cache_size: int = 100000,
+    ):
         """
         初始化Shapley归因服务
 
         Args:
-            n_samples: 蒙特卡洛采样次数，默认10000次
+            n_samples: 蒙特卡洛采样次数上限，默认10000次
             random_seed: 随机种子，用于结果可重现
+            value_function: 自定义联盟价值函数，默认按成本比例分配（可加）
+            value_function_type: 价值函数类型，additive/symmetric/general，
+                auto时对自定义价值函数做探测
+            tolerance: 采样提前停止阈值，各触点置信区间半宽不超过总价值的该比例
+            confidence: 置信区间的置信水平
+            batch_size: 每批采样的置换数
+            signature_fields: 批量归因时构成旅程签名的触点字段，
+                价值函数只能依赖这些字段
+            channel_field: 渠道级汇总所用的触点字段
+            signature_cache_size: 签名缓存的最大条目数
         """
         self.n_samples = n_samples
+        self.value_function = value_function
+        self.value_function_type = value_function_type
+        self.tolerance = tolerance
+        self.z_score = _normal_quantile(0.5 + confidence / 2)
+        self.batch_size = batch_size
+        self.signature_fields = tuple(signature_fields)
+        self.channel_field = channel_field
+        self.signature_cache_size = signature_cache_size
+        self._signature_cache: OrderedDict = OrderedDict()
+        self.signature_hits = 0
+        self.signature_misses = 0
         if random_seed is not None:
             np.random.seed(random_seed)
         logger.info(f"Shapley归因服务初始化完成，采样次数: {n_samples}")
@@ -36,6 +84,8 @@ class ShapleyAttributionService:
         """
         计算Shapley归因权重
 
+        可加或对称的价值函数直接使用闭式解；其余价值函数按method精确枚举或采样。
+
         Args:
             touchpoints: 触点列表，格式: [
                 {'id': 'touchpoint1', 'type': 'media', 'timestamp': '2024-01-01', 'cost': 100},
@@ -50,88 +100,161 @@ class ShapleyAttributionService:
         if not touchpoints:
             return {}
 
-        n = len(touchpoints)
-        if n == 1:
+        if len(touchpoints) == 1:
             # 单触点直接返回100%
             return {touchpoints[0]["id"]: 1.0}
 
-        # 如果触点数量较少，使用完全枚举；否则使用蒙特卡洛
-        if method == "exact" and n <= 10:
-            return self._calculate_exact_shapley(touchpoints, conversion_value)
+        phi = self._shapley_values(touchpoints, conversion_value, method)
+        return self._normalize(touchpoints, phi)
+
+    def _shapley_values(
+        self, touchpoints: List[Dict], conversion_value: float, method: str
+    ) -> np.ndarray:
+        """按触点位置计算未归一化的Shapley值"""
+        n = len(touchpoints)
+        game = _CoalitionGame(
+            touchpoints, conversion_value, self.value_function or self._coalition_value
+        )
+        value_type = self._value_function_type(game)
+
+        if value_type == ADDITIVE:
+            phi = self._calculate_additive_shapley(game)
+        elif value_type == SYMMETRIC:
+            phi = np.full(n, (game.value_of(game.full) - game.value_of(game.empty)) / n)
+        elif method == "exact" and n <= 10:
+            # 如果触点数量较少，使用完全枚举；否则使用蒙特卡洛
+            phi = self._calculate_exact_shapley(game)
         else:
-            return self._calculate_monte_carlo_shapley(touchpoints, conversion_value)
+            phi = self._calculate_monte_carlo_shapley(game)
 
-    def _calculate_exact_shapley(
-        self, touchpoints: List[Dict], conversion_value: float
-    ) -> Dict[str, float]:
-        """
-        使用完全枚举方法计算Shapley值（适用于n <= 10）
+        return phi
+
+    def _value_function_type(self, game: "_CoalitionGame") -> str:
+        """判断价值函数类型，内置的成本比例价值函数是可加的"""
+        if self.value_function is None:
+            return ADDITIVE
+        if self.value_function_type != AUTO:
+            return self.value_function_type
+        return game.probe_type()
 
-        时间复杂度: O(n! * n)
+    def _calculate_additive_shapley(self, game: "_CoalitionGame") -> np.ndarray:
         """
-        from itertools import permutations
+        可加价值函数的闭式Shapley值：φ_i = v({i}) - v(∅)
 
-        n = len(touchpoints)
-        contributions = {tp["id"]: 0.0 for tp in touchpoints}
+        时间复杂度: O(n)
+        """
+        singletons = np.eye(game.n, dtype=bool)
+        return game.values(singletons) - game.value_of(game.empty)
 
-        logger.debug(f"使用完全枚举方法计算Shapley值，触点数量: {n}")
+    def _calculate_exact_shapley(self, game: "_CoalitionGame") -> np.ndarray:
+        """
+        使用完全枚举方法计算Shapley值（适用于n <= 10）
 
-        # 生成所有可能的排列
-        for perm in permutations(range(n)):
-            # 计算每个触点的边际贡献
-            for i, idx in enumerate(perm):
-                coalition_before = set(perm[:i])
-                coalition_after = coalition_before | {idx}
-
-                # 计算边际价值
-                marginal_value = self._coalition_value(
-                    coalition_after, touchpoints, conversion_value
-                ) - self._coalition_value(
-                    coalition_before, touchpoints, conversion_value
-                )
+        按子集而非排列枚举，每个联盟价值只计算一次：
+        φ_i = Σ_{S ⊆ N\\{i}} |S|!(n-|S|-1)!/n! · (v(S ∪ {i}) - v(S))
 
-                contributions[touchpoints[idx]["id"]] += marginal_value
+        时间复杂度: O(2^n * n)
+        """
+        n = game.n
+        logger.debug(f"使用完全枚举方法计算Shapley值，触点数量: {n}")
 
-        # 归一化
-        total = sum(contributions.values())
-        if total > 0:
-            contributions = {k: v / total for k, v in contributions.items()}
+        masks = np.arange(1 << n)
+        members = (masks[:, None] >> np.arange(n)) & 1
+        values = game.values(members.astype(bool))
+        sizes = members.sum(axis=1)
+        weights = np.array(
+            [
+                math.factorial(size) * math.factorial(n - size - 1) / math.factorial(n)
+                for size in range(n)
+            ]
+        )
 
-        return contributions
+        phi = np.zeros(n)
+        for j in range(n):
+            without = masks[members[:, j] == 0]
+            phi[j] = np.sum(
+                weights[sizes[without]] * (values[without | 1 << j] - values[without])
+            )
+        return phi
 
-    def _calculate_monte_carlo_shapley(
-        self, touchpoints: List[Dict], conversion_value: float
-    ) -> Dict[str, float]:
+    def _calculate_monte_carlo_shapley(self, game: "_CoalitionGame") -> np.ndarray:
         """
         使用蒙特卡洛采样方法计算Shapley值（适用于n > 10）
 
-        时间复杂度: O(k * n)，k为采样次数
-        """
-        n = len(touchpoints)
-        contributions = {tp["id"]: 0.0 for tp in touchpoints}
+        每批生成一组随机置换及其逆序（对偶采样），一次性构造全部前缀联盟并批量求值；
+        各触点边际贡献的置信区间半宽均不超过 tolerance·|v(N) - v(∅)| 时提前停止。
 
+        时间复杂度: O(k * n)，k为实际采样次数
+        """
+        n = game.n
         logger.debug(
-            f"使用蒙特卡洛方法计算Shapley值，触点数量: {n}，采样次数: {self.n_samples}"
+            f"使用蒙特卡洛方法计算Shapley值，触点数量: {n}，采样次数上限: {self.n_samples}"
         )
 
-        # 蒙特卡洛采样
-        for _ in range(self.n_samples):
-            # 随机排列触点顺序
-            perm = np.random.permutation(n)
-
-            # 计算每个触点的边际贡献
-            for i, idx in enumerate(perm):
-                coalition_before = set(perm[:i])
-                coalition_after = coalition_before | {idx}
-
-                # 计算边际价值
-                marginal_value = self._coalition_value(
-                    coalition_after, touchpoints, conversion_value
-                ) - self._coalition_value(
-                    coalition_before, touchpoints, conversion_value
-                )
+        empty_value = game.value_of(game.empty)
+        threshold = self.tolerance * abs(game.value_of(game.full) - empty_value)
+        min_samples = min(self.n_samples, 2 * self.batch_size)
+
+        count = 0
+        mean = np.zeros(n)
+        m2 = np.zeros(n)
+        half_width = np.inf
+
+        while count < self.n_samples:
+            batch = min(self.batch_size, self.n_samples - count)
+            orders = np.argsort(np.random.random((batch, n)), axis=1)
+
+            # 正序与逆序置换的边际贡献取平均，作为一个独立样本
+            contributions = (
+                self._permutation_contributions(game, orders, empty_value)
+                + self._permutation_contributions(game, orders[:, ::-1], empty_value)
+            ) / 2
+
+            # 按批合并均值与离差平方和
+            batch_mean = contributions.mean(axis=0)
+            batch_m2 = ((contributions - batch_mean) ** 2).sum(axis=0)
+            delta = batch_mean - mean
+            total = count + batch
+            mean += delta * batch / total
+            m2 += batch_m2 + delta**2 * count * batch / total
+            count = total
+
+            half_width = self.z_score * np.sqrt(m2 / max(count - 1, 1) / count).max()
+            if count >= min_samples and half_width <= threshold:
+                break
+
+        logger.debug(
+            f"蒙特卡洛采样完成，置换数: {count}，最大置信区间半宽: {half_width:.6f}，"
+            f"联盟求值: {game.evaluations}"
+        )
+        return mean
+
+    @staticmethod
+    def _permutation_contributions(
+        game: "_CoalitionGame", orders: np.ndarray, empty_value: float
+    ) -> np.ndarray:
+        """批量计算一组置换中每个触点的边际贡献，返回(置换数, 触点数)"""
+        batch, n = orders.shape
+        rows = np.arange(batch)[:, None]
+
+        # prefixes[b, k]为置换b前k+1个触点组成的联盟
+        steps = np.zeros((batch, n, n), dtype=bool)
+        steps[rows, np.arange(n), orders] = True
+        prefixes = np.logical_or.accumulate(steps, axis=1)
+
+        values = game.values(prefixes.reshape(-1, n)).reshape(batch, n)
+        marginal = np.diff(values, axis=1, prepend=empty_value)
+
+        contributions = np.empty((batch, n))
+        contributions[rows, orders] = marginal
+        return contributions
 
-                contributions[touchpoints[idx]["id"]] += marginal_value
+    @staticmethod
+    def _normalize(touchpoints: List[Dict], phi: np.ndarray) -> Dict[str, float]:
+        """按触点ID汇总Shapley值并归一化"""
+        contributions = {tp["id"]: 0.0 for tp in touchpoints}
+        for tp, value in zip(touchpoints, phi):
+            contributions[tp["id"]] += float(value)
 
         # 归一化
         total = sum(contributions.values())
@@ -175,6 +298,8 @@ class ShapleyAttributionService:
         """
         批量计算订单归因
 
+        触点签名相同的旅程共享同一次Shapley计算。
+
         Args:
             orders: 订单列表，格式: [
                 {'order_id': 'order1', 'customer_id': 'cust1', 'amount': 1000},
@@ -196,11 +321,357 @@ class ShapleyAttributionService:
             conversion_value = order.get("amount", 0)
 
             if touchpoints:
-                attribution = self.calculate_shapley_attribution(
-                    touchpoints, conversion_value
-                )
-                results[order_id] = attribution
+                phi = self._journey_shapley(touchpoints, conversion_value)
+                results[order_id] = self._normalize(touchpoints, phi)
             else:
                 results[order_id] = {}
 
+        logger.info(
+            f"批量归因完成，订单数: {len(orders)}，签名缓存命中: {self.signature_hits}，"
+            f"未命中: {self.signature_misses}"
+        )
         return results
+
+    def iter_channel_attribution(
+        self,
+        journeys: Any,
+        chunk_size: int = 10000,
+        n_jobs: Optional[int] = None,
+        method: str = "monte_carlo",
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式计算渠道级归因
+
+        旅程按块读取，每完成一块即产出一次累计结果；多进程时最多保留2 * n_jobs个块在途，
+        内存占用与旅程总数无关。
+
+        Args:
+            journeys: 旅程迭代器，格式: {'order_id': 'o1', 'amount': 1000,
+                'touchpoints': [{'id': 'tp1', 'type': 'media', 'cost': 100}, ...]}；
+                也可以是Parquet文件路径，见read_parquet_journeys
+            chunk_size: 每块旅程数
+            n_jobs: 工作进程数，None或1时在当前进程中计算
+            method: 一般价值函数的计算方法
+
+        Yields:
+            累计归因结果: {'journeys': n, 'unattributed_journeys': n,
+                'conversion_value': x, 'channels': {channel: {
+                'attributed_value': x, 'attributed_conversions': x}}}
+        """
+        if isinstance(journeys, (str, os.PathLike)):
+            journeys = read_parquet_journeys(journeys)
+
+        totals = _empty_channel_attribution()
+        chunks = _chunked(journeys, chunk_size)
+
+        if not n_jobs or n_jobs <= 1:
+            for chunk in chunks:
+                _merge_channel_attribution(
+                    totals, self._attribute_journeys(chunk, method)
+                )
+                yield _copy_channel_attribution(totals)
+            return
+
+        pool = ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_attribution_worker,
+            initargs=(self,),
+        )
+        pending = set()
+        try:
+            for chunk in chunks:
+                pending.add(pool.submit(_attribute_journey_chunk, chunk, method))
+                if len(pending) < 2 * n_jobs:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge_channel_attribution(totals, future.result())
+                    yield _copy_channel_attribution(totals)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge_channel_attribution(totals, future.result())
+                    yield _copy_channel_attribution(totals)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def calculate_channel_attribution(
+        self,
+        journeys: Any,
+        chunk_size: int = 10000,
+        n_jobs: Optional[int] = None,
+        method: str = "monte_carlo",
+    ) -> Dict[str, Any]:
+        """流式计算渠道级归因并返回最终汇总结果，参数见iter_channel_attribution"""
+        result = _empty_channel_attribution()
+        for result in self.iter_channel_attribution(
+            journeys, chunk_size=chunk_size, n_jobs=n_jobs, method=method
+        ):
+            pass
+        logger.info(
+            f"渠道归因完成，旅程数: {result['journeys']}，渠道数: {len(result['channels'])}"
+        )
+        return result
+
+    def _attribute_journeys(
+        self, journeys: List[Dict], method: str = "monte_carlo"
+    ) -> Dict[str, Any]:
+        """计算一块旅程的渠道级归因"""
+        result = _empty_channel_attribution()
+        channels = result["channels"]
+
+        for journey in journeys:
+            touchpoints = journey.get("touchpoints") or []
+            conversion_value = float(journey.get("amount", 0) or 0)
+            result["journeys"] += 1
+            result["conversion_value"] += conversion_value
+
+            phi = (
+                self._journey_shapley(touchpoints, conversion_value, method)
+                if touchpoints
+                else None
+            )
+            total = 0.0 if phi is None else float(phi.sum())
+            if total <= 0:
+                # 没有可分配的正价值
+                result["unattributed_journeys"] += 1
+                continue
+
+            for tp, weight in zip(touchpoints, (phi / total).tolist()):
+                channel = channels.setdefault(
+                    tp.get(self.channel_field),
+                    {"attributed_value": 0.0, "attributed_conversions": 0.0},
+                )
+                channel["attributed_value"] += conversion_value * weight
+                channel["attributed_conversions"] += weight
+
+        return result
+
+    def _journey_shapley(
+        self,
+        touchpoints: List[Dict],
+        conversion_value: float,
+        method: str = "monte_carlo",
+    ) -> np.ndarray:
+        """
+        按触点签名缓存计算旅程的Shapley值
+
+        签名是触点signature_fields取值的有序多重集合。Shapley值对触点重新编号不变，
+        因此签名相同的旅程只需按规范顺序计算一次。内置价值函数关于转化金额是线性的，
+        缓存单位金额下的结果后按金额缩放；自定义价值函数的签名还包含转化金额。
+        """
+        n = len(touchpoints)
+        if n == 1:
+            return np.array([1.0])
+
+        keys = [tuple(tp.get(f) for f in self.signature_fields) for tp in touchpoints]
+        order = sorted(range(n), key=lambda i: repr(keys[i]))
+        custom = self.value_function is not None
+        signature = (
+            tuple(keys[i] for i in order),
+            conversion_value if custom else None,
+            method,
+        )
+
+        canonical = self._signature_cache.get(signature)
+        if canonical is None:
+            self.signature_misses += 1
+            canonical = self._shapley_values(
+                [touchpoints[i] for i in order],
+                conversion_value if custom else 1.0,
+                method,
+            )
+            self._signature_cache[signature] = canonical
+            if len(self._signature_cache) > self.signature_cache_size:
+                self._signature_cache.popitem(last=False)
+        else:
+            self.signature_hits += 1
+            self._signature_cache.move_to_end(signature)
+
+        phi = np.empty(n)
+        phi[order] = canonical if custom else canonical * conversion_value
+        return phi
+
+    def __getstate__(self):
+        # 传给工作进程时不携带签名缓存
+        state = self.__dict__.copy()
+        state["_signature_cache"] = OrderedDict()
+        return state
+
+
+class _CoalitionGame:
+    """
+    单次归因的合作博弈
+
+    联盟以布尔掩码表示，按位打包后作为缓存键，每个联盟的价值只计算一次。
+    """
+
+    def __init__(
+        self,
+        touchpoints: List[Dict],
+        conversion_value: float,
+        value_function: ValueFunction,
+        max_probes: int = 16,
+    ):
+        self.touchpoints = touchpoints
+        self.conversion_value = conversion_value
+        self.value_function = value_function
+        self.n = len(touchpoints)
+        self.max_probes = max_probes
+        self.empty = np.zeros(self.n, dtype=bool)
+        self.full = np.ones(self.n, dtype=bool)
+        self._cache: Dict[bytes, float] = {}
+        self.evaluations = 0
+
+    def values(self, masks: np.ndarray) -> np.ndarray:
+        """批量计算联盟价值，相同联盟只求值一次"""
+        packed = np.packbits(masks, axis=1)
+        unique, inverse = np.unique(packed, axis=0, return_inverse=True)
+
+        unique_values = np.empty(len(unique))
+        for k, row in enumerate(unique):
+            key = row.tobytes()
+            value = self._cache.get(key)
+            if value is None:
+                members = np.unpackbits(row, count=self.n).nonzero()[0]
+                value = float(
+                    self.value_function(
+                        set(members.tolist()), self.touchpoints, self.conversion_value
+                    )
+                )
+                self._cache[key] = value
+                self.evaluations += 1
+            unique_values[k] = value
+
+        return unique_values[np.ravel(inverse)]
+
+    def value_of(self, mask: np.ndarray) -> float:
+        return float(self.values(mask[None, :])[0])
+
+    def probe_type(self) -> str:
+        """
+        用单触点联盟与随机联盟探测价值函数类型
+
+        探测只能否定而不能证明可加性或对称性，结构已知时应显式声明value_function_type。
+        """
+        n = self.n
+        empty_value = self.value_of(self.empty)
+        singles = self.values(np.eye(n, dtype=bool)) - empty_value
+
+        probes = np.random.random((self.max_probes, n)) < 0.5
+        probes = np.vstack([probes, self.full])
+        # 与每个探测联盟大小相同的另一个随机联盟，用于检验对称性
+        twins = np.zeros_like(probes)
+        for row, size in enumerate(probes.sum(axis=1)):
+            twins[row, np.random.permutation(n)[:size]] = True
+
+        probe_values = self.values(probes) - empty_value
+        twin_values = self.values(twins) - empty_value
+
+        scale = max(1.0, np.abs(probe_values).max(), np.abs(singles).max())
+        atol = 1e-9 * scale
+        if np.allclose(probe_values, probes @ singles, rtol=0, atol=atol):
+            return ADDITIVE
+        if np.allclose(singles, singles[0], rtol=0, atol=atol) and np.allclose(
+            probe_values, twin_values, rtol=0, atol=atol
+        ):
+            return SYMMETRIC
+        return GENERAL
+
+
+def _normal_quantile(p: float) -> float:
+    """标准正态分布分位数"""
+    from scipy.stats import norm
+
+    return float(norm.ppf(p))
+
+
+# 工作进程状态：初始化时传入一次服务实例，签名缓存在同一进程处理的各块之间复用
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_attribution_worker(service: ShapleyAttributionService):
+    _worker_state["service"] = service
+
+
+def _attribute_journey_chunk(journeys: List[Dict], method: str) -> Dict[str, Any]:
+    return _worker_state["service"]._attribute_journeys(journeys, method)
+
+
+def _empty_channel_attribution() -> Dict[str, Any]:
+    return {
+        "journeys": 0,
+        "unattributed_journeys": 0,
+        "conversion_value": 0.0,
+        "channels": {},
+    }
+
+
+def _merge_channel_attribution(totals: Dict[str, Any], partial: Dict[str, Any]):
+    for key in ["journeys", "unattributed_journeys", "conversion_value"]:
+        totals[key] += partial[key]
+    for channel, stats in partial["channels"].items():
+        target = totals["channels"].setdefault(
+            channel, {"attributed_value": 0.0, "attributed_conversions": 0.0}
+        )
+        for key, value in stats.items():
+            target[key] += value
+
+
+def _copy_channel_attribution(totals: Dict[str, Any]) -> Dict[str, Any]:
+    result = dict(totals)
+    result["channels"] = {
+        channel: dict(stats) for channel, stats in totals["channels"].items()
+    }
+    return result
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_parquet_journeys(
+    path: Any, batch_size: int = 65536
+) -> Iterator[Dict[str, Any]]:
+    """
+    从Parquet文件按批读取转化旅程
+
+    文件为每行一个触点的长表，包含order_id、amount列及任意触点字段
+    （touchpoint_id列映射为触点id）；同一订单的行必须相邻，例如按order_id排序。
+    每次只读入batch_size行。
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("读取Parquet旅程数据需要安装pyarrow") from e
+
+    parquet_file = pq.ParquetFile(path)
+    fields = [
+        name
+        for name in parquet_file.schema_arrow.names
+        if name not in ("order_id", "amount")
+    ]
+    keys = ["id" if name == "touchpoint_id" else name for name in fields]
+
+    journey = None
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = batch.to_pydict()
+        touchpoint_rows = zip(*(columns[name] for name in fields))
+        for order_id, amount, row in zip(
+            columns["order_id"], columns["amount"], touchpoint_rows
+        ):
+            if journey is None or order_id != journey["order_id"]:
+                if journey is not None:
+                    yield journey
+                journey = {"order_id": order_id, "amount": amount, "touchpoints": []}
+            journey["touchpoints"].append(dict(zip(keys, row)))
+
+    if journey is not None:
+        yield journey
@@ -11,6 +11,14 @@ from typing import Optional, Dict, Any, Union
 import hashlib
 from datetime import datetime, timedelta
 
+from ..cache.redis_cache import (
+    IndexPruner,
+    add_to_index,
+    prune_index,
+    unlink_index_members,
+)
+from ..cache.single_flight import RedisSingleFlight, StampedeGuard
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +35,8 @@ class CacheService:
             "prediction": 300,  # 5分钟
             "memory": 1800,  # 30分钟
         }
+        self._stampede_guard = StampedeGuard()
+        self._index_pruner = IndexPruner()
 
     async def initialize(self):
         """初始化缓存服务"""
@@ -54,6 +64,10 @@ class CacheService:
         key_string = f"{prefix}:{':'.join(str(arg) for arg in args)}"
         return hashlib.md5(key_string.encode()).hexdigest()
 
+    def _namespace_index_key(self, cache_type: str) -> str:
+        """获取缓存类型的命名空间索引集合键"""
+        return f"cache:ns:{cache_type}"
+
     async def get(self, cache_type: str, *args) -> Optional[Any]:
         """获取缓存"""
         if not self.redis_client:
@@ -82,9 +96,13 @@ class CacheService:
             cache_key = self._generate_cache_key(cache_type, *args)
             cache_ttl = ttl or self.cache_ttl.get(cache_type, 60)
 
-            await self.redis_client.setex(
-                cache_key, cache_ttl, json.dumps(data, default=str)
-            )
+            # 写入值并登记到命名空间索引，一次流水线往返
+            index_key = self._namespace_index_key(cache_type)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(cache_key, cache_ttl, json.dumps(data, default=str))
+                add_to_index(pipe, index_key, cache_ttl, cache_key)
+                await pipe.execute()
+            self._index_pruner.record(self.redis_client, [index_key])
             return True
 
         except Exception as e:
@@ -98,7 +116,10 @@ class CacheService:
 
         try:
             cache_key = self._generate_cache_key(cache_type, *args)
-            await self.redis_client.delete(cache_key)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(cache_key)
+                pipe.srem(self._namespace_index_key(cache_type), cache_key)
+                await pipe.execute()
             return True
 
         except Exception as e:
@@ -119,35 +140,103 @@ class CacheService:
             return False
 
     async def get_or_set(
-        self, cache_type: str, fetch_func, *args, ttl: Optional[int] = None
+        self,
+        cache_type: str,
+        fetch_func,
+        *args,
+        ttl: Optional[int] = None,
+        distributed: bool = False,
+        early_refresh_beta: float = 0.0,
     ) -> Any:
-        """获取缓存，如果不存在则设置"""
+        """
+        获取缓存，如果不存在则设置
+
+        同一键的并发未命中只执行一次fetch_func；distributed为True时通过Redis锁
+        跨进程合并；early_refresh_beta大于0时临近过期的键在后台提前刷新。
+        """
+        cache_key = self._generate_cache_key(cache_type, *args)
+        cache_ttl = ttl or self.cache_ttl.get(cache_type, 60)
+
+        async def store(data):
+            await self.set(cache_type, data, *args, ttl=ttl)
+
         cached_data = await self.get(cache_type, *args)
 
         if cached_data is not None:
+            if self._stampede_guard.should_refresh(cache_key, early_refresh_beta):
+                self._stampede_guard.refresh_in_background(
+                    cache_key, fetch_func, store, cache_ttl
+                )
             return cached_data
 
-        # 缓存不存在，执行获取函数
-        data = await fetch_func()
+        # 缓存不存在，合并执行获取函数并设置缓存
+        single_flight = None
+        if distributed and self.redis_client:
+            single_flight = RedisSingleFlight(self.redis_client)
+        return await self._stampede_guard.load(
+            cache_key,
+            fetch_func,
+            store,
+            cache_ttl,
+            distributed=single_flight,
+            fetch=lambda: self.get(cache_type, *args),
+        )
+
+    async def invalidate_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """按模式删除缓存（SCAN游标 + 流水线UNLINK，避免KEYS阻塞）"""
+        if not self.redis_client:
+            return 0
 
-        # 设置缓存
-        await self.set(cache_type, data, *args, ttl=ttl)
+        try:
+            deleted = 0
+            batch = []
+            async for key in self.redis_client.scan_iter(
+                match=pattern, count=batch_size
+            ):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis_client.unlink(*batch)
+
+            logger.debug(f"Cache pattern invalidated: {pattern} ({deleted} keys)")
+            return deleted
 
-        return data
+        except Exception as e:
+            logger.warning(f"Cache pattern invalidation failed: {e}")
+            return 0
 
-    async def invalidate_pattern(self, pattern: str) -> int:
-        """按模式删除缓存"""
+    async def invalidate_namespace(self, cache_type: str, batch_size: int = 500) -> int:
+        """按缓存类型失效缓存，通过命名空间索引集合定位键，无需遍历键空间"""
         if not self.redis_client:
             return 0
 
         try:
-            keys = await self.redis_client.keys(pattern)
-            if keys:
-                return await self.redis_client.delete(*keys)
+            progress = await unlink_index_members(
+                self.redis_client, self._namespace_index_key(cache_type), batch_size
+            )
+            deleted = progress["deleted"]
+
+            logger.debug(f"Cache namespace invalidated: {cache_type} ({deleted} keys)")
+            return deleted
+
+        except Exception as e:
+            logger.warning(f"Cache namespace invalidation failed: {e}")
             return 0
 
+    async def prune_namespace(self, cache_type: str, batch_size: int = 500) -> int:
+        """从命名空间索引中移除已过期或已删除的键，返回移除的数量"""
+        if not self.redis_client:
+            return 0
+
+        try:
+            return await prune_index(
+                self.redis_client, self._namespace_index_key(cache_type), batch_size
+            )
+
         except Exception as e:
-            logger.warning(f"Cache pattern invalidation failed: {e}")
+            logger.warning(f"Cache namespace prune failed: {e}")
             return 0
 
     async def get_cache_stats(self) -> Dict[str, Any]:
@@ -0,0 +1,383 @@
+"""
+数据导入列式数据块
+ETL各阶段之间以Arrow表传递数据，大批量数据溢写为Parquet文件并支持断点续传
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    raise ImportError("请安装依赖: pip install pyarrow")
+
+logger = logging.getLogger(__name__)
+
+
+def to_arrow_array(values: List[Any]) -> pa.Array:
+    """
+    Python值列表转换为Arrow数组
+
+    Arrow列只能有一种类型，类型混杂的列（例如数值与文本混排）按字符串保存。
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array(
+            [None if value is None else str(value) for value in values], pa.string()
+        )
+
+
+def is_string_type(data_type: pa.DataType) -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def blank_mask(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """缺失值掩码：空值或去除空白后为空的字符串"""
+    mask = pc.is_null(column)
+    if is_string_type(column.type):
+        trimmed = pc.utf8_trim_whitespace(column)
+        mask = pc.or_(mask, pc.fill_null(pc.equal(trimmed, ""), False))
+    return mask
+
+
+class ColumnarBatch:
+    """
+    列式数据块
+
+    对应一个工作表（CSV/JSON为None）中一段连续的数据行。列按位置命名（c0, c1, ...），
+    表头可以重复或为空，与格式、表头行数等信息一起保存在meta中。
+    """
+
+    def __init__(
+        self,
+        table: pa.Table,
+        meta: Dict[str, Any],
+        sheet_name: Optional[str] = None,
+        data_type: str = "parsed_csv",
+    ):
+        self.table = table
+        self.meta = meta
+        self.sheet_name = sheet_name
+        self.data_type = data_type
+
+    @property
+    def headers(self) -> List[Any]:
+        return self.meta.get("headers", [])
+
+    @property
+    def row_offset(self) -> int:
+        return self.meta.get("row_offset", 0)
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def num_columns(self) -> int:
+        return self.table.num_columns
+
+    @staticmethod
+    def column_name(index: int) -> str:
+        return f"c{index}"
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: List[List[Any]],
+        meta: Dict[str, Any],
+        sheet_name: Optional[str] = None,
+        data_type: str = "parsed_csv",
+    ) -> "ColumnarBatch":
+        """由数据行构建，列数不足的行以空值补齐"""
+        width = max([len(meta.get("headers", []))] + [len(row) for row in rows])
+        if all(len(row) == width for row in rows):
+            columns = [list(values) for values in zip(*rows)] or [[]] * width
+        else:
+            columns = [
+                [row[index] if index < len(row) else None for row in rows]
+                for index in range(width)
+            ]
+
+        table = pa.Table.from_arrays(
+            [to_arrow_array(values) for values in columns],
+            names=[cls.column_name(index) for index in range(width)],
+        )
+        return cls(table, meta, sheet_name, data_type)
+
+    @classmethod
+    def from_parsed(cls, parsed_data: Dict[str, Any]) -> List["ColumnarBatch"]:
+        """由 _parse_document_structure 结构的数据构建，每个工作表一个数据块"""
+        data_type = parsed_data.get("type", "parsed_csv")
+        if "sheets" in parsed_data:
+            return [
+                cls.from_rows(
+                    sheet_data.get("rows", []),
+                    {k: v for k, v in sheet_data.items() if k != "rows"},
+                    sheet_name,
+                    data_type,
+                )
+                for sheet_name, sheet_data in parsed_data["sheets"].items()
+            ]
+
+        meta = {k: v for k, v in parsed_data.items() if k not in ("rows", "type")}
+        return [cls.from_rows(parsed_data.get("rows", []), meta, None, data_type)]
+
+    def column(self, index: int) -> pa.ChunkedArray:
+        return self.table.column(index)
+
+    def field_index(self, field_name: str) -> Optional[int]:
+        """字段在表头中的位置（不存在时为None）"""
+        headers = self.headers
+        if field_name in headers:
+            return headers.index(field_name)
+        return None
+
+    def column_labels(self) -> List[str]:
+        """列标签：有表头的列使用表头，其余列使用位置名"""
+        headers = self.headers
+        return [
+            (
+                str(headers[index])
+                if index < len(headers) and headers[index] is not None
+                else self.column_name(index)
+            )
+            for index in range(self.num_columns)
+        ]
+
+    def to_pandas(self, zero_copy: bool = True) -> pd.DataFrame:
+        """
+        转换为DataFrame（供DataQualityChecker、SmartValueImputer等使用）
+
+        zero_copy为True时使用Arrow扩展类型，列数据直接引用Arrow缓冲区而不复制。
+        """
+        if zero_copy:
+            df = self.table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            df = self.table.to_pandas()
+        df.columns = self.column_labels()
+        return df
+
+    def to_rows(self) -> List[List[Any]]:
+        columns = [self.column(index).to_pylist() for index in range(self.num_columns)]
+        return [list(row) for row in zip(*columns)]
+
+    def to_parsed(self) -> Dict[str, Any]:
+        """转换回按行保存的字典结构"""
+        sheet_data = dict(self.meta, rows=self.to_rows())
+        if self.sheet_name is not None:
+            return {"type": self.data_type, "sheets": {self.sheet_name: sheet_data}}
+        return dict(sheet_data, type=self.data_type)
+
+    def replace(self, table: Optional[pa.Table] = None, **meta: Any) -> "ColumnarBatch":
+        """返回替换了表或元信息的新数据块"""
+        return ColumnarBatch(
+            self.table if table is None else table,
+            dict(self.meta, **meta),
+            self.sheet_name,
+            self.data_type,
+        )
+
+
+class ParquetSpill:
+    """
+    数据块溢写文件
+
+    目录下每个分片为一个Parquet文件，每个数据块写为一个行组；工作表切换或列类型
+    变化时开启新分片。manifest.json记录导入参数、分片元信息和已加载的行组，
+    加载过程中断后可从下一个未加载的行组继续。
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._writer_key: Optional[Tuple[Optional[str], pa.Schema]] = None
+
+    @classmethod
+    def create(
+        cls,
+        parent_dir: Optional[str],
+        prefix: str,
+        import_info: Dict[str, Any],
+    ) -> "ParquetSpill":
+        """在parent_dir（默认系统临时目录）下创建新的溢写目录"""
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix=f"{prefix}_", dir=parent_dir)
+        spill = cls(
+            directory,
+            {
+                "import": import_info,
+                "complete": False,
+                "parts": [],
+                "progress": {},
+            },
+        )
+        spill.save_manifest()
+        return spill
+
+    @classmethod
+    def open(cls, directory: str) -> "ParquetSpill":
+        """打开已有的溢写目录"""
+        with open(os.path.join(directory, cls.MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return cls(directory, manifest)
+
+    @property
+    def import_info(self) -> Dict[str, Any]:
+        return self.manifest["import"]
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        return self.manifest["progress"]
+
+    @property
+    def total_rows(self) -> int:
+        return sum(
+            row_group["rows"]
+            for part in self.manifest["parts"]
+            for row_group in part["row_groups"]
+        )
+
+    def write(self, batch: ColumnarBatch):
+        """追加数据块"""
+        if batch.num_rows == 0:
+            return
+
+        key = (batch.sheet_name, batch.table.schema)
+        if self._writer is None or self._writer_key != key:
+            self._close_writer()
+            file_name = f"part-{len(self.manifest['parts']):05d}.parquet"
+            self._writer = pq.ParquetWriter(
+                os.path.join(self.directory, file_name), batch.table.schema
+            )
+            self._writer_key = key
+            self.manifest["parts"].append(
+                {
+                    "file": file_name,
+                    "sheet_name": batch.sheet_name,
+                    "data_type": batch.data_type,
+                    "meta": {k: v for k, v in batch.meta.items() if k != "row_offset"},
+                    "row_groups": [],
+                }
+            )
+
+        self._writer.write_table(batch.table, row_group_size=batch.num_rows)
+        self.manifest["parts"][-1]["row_groups"].append(
+            {"row_offset": batch.row_offset, "rows": batch.num_rows}
+        )
+
+    def finish(self):
+        """写入完成，之后可以读取和续传"""
+        self._close_writer()
+        self.manifest["complete"] = True
+        self.save_manifest()
+
+    def iter_batches(
+        self, skip_loaded: bool = True
+    ) -> Iterator[Tuple[Tuple[int, int], ColumnarBatch]]:
+        """按写入顺序读取数据块，产出 ((分片序号, 行组序号), 数据块)"""
+        if not self.manifest["complete"]:
+            raise ValueError(f"溢写文件不完整，需要重新导入: {self.directory}")
+
+        loaded = self.progress.get("loaded", [0, 0]) if skip_loaded else [0, 0]
+        for part_index, part in enumerate(self.manifest["parts"]):
+            if part_index < loaded[0]:
+                continue
+            parquet_file = pq.ParquetFile(os.path.join(self.directory, part["file"]))
+            start = loaded[1] if part_index == loaded[0] else 0
+            for row_group_index in range(start, parquet_file.num_row_groups):
+                row_group = part["row_groups"][row_group_index]
+                batch = ColumnarBatch(
+                    parquet_file.read_row_group(row_group_index),
+                    dict(part["meta"], row_offset=row_group["row_offset"]),
+                    part["sheet_name"],
+                    part["data_type"],
+                )
+                yield (part_index, row_group_index), batch
+
+    def mark_loaded(self, position: Tuple[int, int], state: Dict[str, Any]):
+        """
+        记录数据块已加载及当前的导入统计
+
+        统计中的列表（错误、警告等）只把新增部分追加到 progress-<键>.jsonl，
+        manifest中记录条数，避免每个数据块都重写全部消息。
+        """
+        part_index, row_group_index = position
+        row_groups = len(self.manifest["parts"][part_index]["row_groups"])
+        if row_group_index + 1 < row_groups:
+            loaded = [part_index, row_group_index + 1]
+        else:
+            loaded = [part_index + 1, 0]
+
+        progress = {"loaded": loaded, "lists": {}}
+        saved_lists = self.progress.get("lists", {})
+        for key, value in state.items():
+            if not isinstance(value, list):
+                progress[key] = value
+                continue
+            saved = saved_lists.get(key, 0)
+            if len(value) > saved:
+                with open(self._list_path(key), "a", encoding="utf-8") as f:
+                    for item in value[saved:]:
+                        f.write(json.dumps(item, ensure_ascii=False, default=str))
+                        f.write("\n")
+            progress["lists"][key] = len(value)
+
+        self.manifest["progress"] = progress
+        self.save_manifest()
+
+    def restore_state(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """按已保存的进度恢复导入统计"""
+        for key, value in self.progress.items():
+            if key in state and key not in ("loaded", "lists"):
+                state[key] = value
+
+        for key, count in self.progress.get("lists", {}).items():
+            items = []
+            path = self._list_path(key)
+            if count and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if len(items) == count:
+                            break
+                        items.append(json.loads(line))
+            # 丢弃中断时已追加但未记入manifest的部分
+            with open(path, "w", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False, default=str))
+                    f.write("\n")
+            state[key] = items
+        return state
+
+    def _list_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"progress-{key}.jsonl")
+
+    def save_manifest(self):
+        """原子写入manifest，中断时不会留下半个文件"""
+        path = os.path.join(self.directory, self.MANIFEST)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, default=str)
+        os.replace(temp_path, path)
+
+    def remove(self):
+        self._close_writer()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._writer_key = None
@@ -4,7 +4,7 @@
 
 功能：
 - 解析字段定义中的计算公式（例如："金额 = 数量 × 单价"）
-- 表达式求值引擎（支持 +, -, ×, ÷, 括号）
+- 表达式求值引擎（支持 +, -, ×, ÷, 括号），公式解析一次后按列向量化求值
 - 浮点数容差比较（使用 decimal 库，精度0.01）
 - 级联冲突检测（使用图算法BFS检测依赖链）
 """
@@ -13,7 +13,7 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple, Set
 import pandas as pd
 import numpy as np
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR, ROUND_HALF_UP
 from datetime import datetime
 import re
 from collections import deque
@@ -50,6 +50,11 @@ class CalculationConflictDetector(BaseService):
             "/": lambda x, y: x / y if y != 0 else float("inf"),
         }
 
+        # 已解析的公式缓存 {公式: 解析结果}
+        self._parsed_formulas: Dict[str, Dict[str, Any]] = {}
+        # 依赖索引缓存 {规则集公式元组: 依赖索引}
+        self._dependency_indexes: Dict[Tuple[str, ...], "DependencyIndex"] = {}
+
     def parse_formula(self, formula: str) -> Dict[str, Any]:
         """
         解析计算公式
@@ -69,17 +74,17 @@ class CalculationConflictDetector(BaseService):
             left = left.strip()
             right = right.strip()
 
-            # 解析右侧表达式
-            # 支持的操作符: +, -, ×, *, ÷, /
+            # 解析右侧表达式为语法树
+            # 支持的操作符: +, -, ×, *, ÷, /，以及括号和数值常量
             # 支持的字段引用: [字段名] 或 字段名
+            tokens = _tokenize(right)
+            ast = _FormulaParser(tokens, right).parse()
 
-            # 提取字段引用
-            field_pattern = r"\[?(\w+)\]?"
-            fields = re.findall(field_pattern, right)
+            # 提取字段引用（按出现顺序）
+            fields = [value for kind, value in tokens if kind == "field"]
 
             # 提取运算符
-            operator_pattern = r"[+\-×*÷/]"
-            operators = re.findall(operator_pattern, right)
+            operators = [value for kind, value in tokens if kind == "op"]
 
             return {
                 "target_field": left,
@@ -87,12 +92,21 @@ class CalculationConflictDetector(BaseService):
                 "referenced_fields": fields,
                 "operators": operators,
                 "formula": formula,
+                "ast": ast,
             }
 
         except Exception as e:
             logger.error(f"公式解析失败: {e}")
             raise CalculationConflictError(f"公式解析失败: {e}")
 
+    def get_parsed_formula(self, formula: str) -> Dict[str, Any]:
+        """获取解析后的公式（同一公式只解析一次）"""
+        parsed = self._parsed_formulas.get(formula)
+        if parsed is None:
+            parsed = self.parse_formula(formula)
+            self._parsed_formulas[formula] = parsed
+        return parsed
+
     def evaluate_expression(self, expression: str, record: Dict[str, Any]) -> Decimal:
         """
         计算表达式值
@@ -102,37 +116,32 @@ class CalculationConflictDetector(BaseService):
             record: 数据记录
 
         Returns:
-            计算结果
+            计算结果（保留两位小数，计算失败时为0）
         """
         try:
-            # 替换字段引用为实际值
-            def replace_field(match):
-                field_name = match.group(1)
-                value = record.get(field_name, 0)
-                try:
-                    return str(float(value))
-                except (ValueError, TypeError):
-                    return "0"
-
-            # 替换字段引用
-            pattern = r"\[?(\w+)\]?"
-            numeric_expression = re.sub(pattern, replace_field, expression)
-
-            # 标准化运算符
-            numeric_expression = numeric_expression.replace("×", "*").replace("÷", "/")
-
-            # 计算表达式（使用eval，注意安全性）
-            # 在生产环境中应该使用更安全的表达式解析库
-            result = eval(numeric_expression, {"__builtins__": {}})
-
-            return Decimal(str(result)).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
+            parsed = self.get_parsed_formula(f"_ = {expression}")
+            values, invalid = _evaluate_ast(
+                parsed["ast"], FormulaColumns([record]).numeric
             )
+            return _quantize_expected(values[0], invalid[0])
 
         except Exception as e:
             logger.warning(f"表达式计算失败: {expression}, 错误: {e}")
             return Decimal("0")
 
+    def evaluate_formula_columns(
+        self, parsed: Dict[str, Any], columns: "FormulaColumns"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        按列计算公式右侧表达式
+
+        Returns:
+            (浮点计算结果, 计算失败掩码)；计算失败（字段为NaN/无穷、除数为0、溢出）的行
+            期望值按0处理
+        """
+        values, invalid = _evaluate_ast(parsed["ast"], columns.numeric)
+        return values, invalid | ~np.isfinite(values)
+
     def compare_values(
         self, expected: Decimal, actual: Decimal, tolerance: Decimal
     ) -> Tuple[bool, Decimal]:
@@ -171,87 +180,150 @@ class CalculationConflictDetector(BaseService):
         Returns:
             冲突列表
         """
-        conflicts = []
+        record = dict(record, row_index=row_index)
+        return self.detect_conflicts_in_records([record], calculation_rules, tolerance)
 
-        for rule in calculation_rules:
+    def detect_conflicts_in_records(
+        self,
+        records: List[Dict[str, Any]],
+        calculation_rules: List[Dict[str, Any]],
+        tolerance: Decimal,
+    ) -> List[Dict[str, Any]]:
+        """
+        按列批量检测计算冲突
+
+        每条规则在全部记录上做一次列运算：期望值和实际值先按列舍入到分，
+        差值明确在容差内的行直接通过；只有可能超出容差、或舍入落在半分边界附近的行
+        才按Decimal精确舍入后比较。
+
+        Args:
+            records: 数据记录列表（含row_index）
+            calculation_rules: 计算规则列表
+            tolerance: 容差阈值
+
+        Returns:
+            冲突列表（按记录顺序、规则顺序排列）
+        """
+        columns = FormulaColumns(records)
+        # 差值（分）不超过该整数即在容差内
+        tolerance_cents = float(
+            (tolerance * 100).to_integral_value(rounding=ROUND_FLOOR)
+        )
+
+        # 按拓扑顺序检测：上游字段的规则先于依赖它的规则
+        rule_order = self.get_dependency_index(calculation_rules).rule_order
+
+        found = []
+        for rule_position in rule_order:
+            rule = calculation_rules[rule_position]
             try:
                 formula = rule.get("formula", "")
                 if not formula:
                     continue
 
                 # 解析公式
-                parsed = self.parse_formula(formula)
+                parsed = self.get_parsed_formula(formula)
                 target_field = parsed["target_field"]
 
-                # 检查目标字段是否存在
-                if target_field not in record:
-                    continue
-
-                # 获取实际值
-                actual_value = record.get(target_field)
-                if actual_value is None or pd.isna(actual_value):
-                    continue
-
-                try:
-                    actual_decimal = Decimal(str(actual_value)).quantize(
-                        Decimal("0.01"), rounding=ROUND_HALF_UP
-                    )
-                except (ValueError, TypeError):
+                # 获取实际值（目标字段缺失、为空或不是有效数值的行跳过）
+                actual_valid, actual_values = columns.actual(target_field)
+                if not actual_valid.any():
                     continue
 
                 # 计算期望值
-                expected_decimal = self.evaluate_expression(
-                    parsed["expression"], record
+                expected_values, invalid = self.evaluate_formula_columns(
+                    parsed, columns
                 )
-
-                # 比较值
-                is_match, difference = self.compare_values(
-                    expected_decimal, actual_decimal, tolerance
+                expected_values = np.where(invalid, 0.0, expected_values)
+
+                expected_cents, expected_uncertain = _round_cents(expected_values)
+                actual_cents, actual_uncertain = _round_cents(actual_values)
+                maybe_conflict = actual_valid & (
+                    expected_uncertain
+                    | actual_uncertain
+                    | (np.abs(expected_cents - actual_cents) > tolerance_cents)
                 )
 
-                if not is_match:
-                    # 判断严重程度
-                    relative_diff = (
-                        abs(difference) / abs(expected_decimal)
-                        if expected_decimal != 0
-                        else float("inf")
+                for position in np.flatnonzero(maybe_conflict):
+                    record = records[position]
+                    row_index = record.get("row_index", 0)
+                    try:
+                        actual_decimal = Decimal(str(record[target_field])).quantize(
+                            Decimal("0.01"), rounding=ROUND_HALF_UP
+                        )
+                    except InvalidOperation:
+                        # 实际值超出Decimal精度，跳过该行
+                        continue
+                    expected_decimal = _quantize_expected(
+                        expected_values[position], invalid[position]
                     )
-
-                    if relative_diff > 0.1:
-                        severity = "high"
-                    elif relative_diff > 0.05:
-                        severity = "medium"
-                    else:
-                        severity = "low"
-
-                    # 判断是否可自动修复
-                    auto_fixable = relative_diff < 0.2  # 差异小于20%时可自动修复
-
-                    # 生成修复建议
-                    suggested_fix = (
-                        "use_calculated_value" if auto_fixable else "manual_review"
+                    conflict = self._build_conflict(
+                        row_index,
+                        target_field,
+                        expected_decimal,
+                        actual_decimal,
+                        formula,
+                        tolerance,
                     )
-
-                    conflict = {
-                        "row_index": row_index,
-                        "field": target_field,
-                        "expected_value": float(expected_decimal),
-                        "actual_value": float(actual_decimal),
-                        "difference": float(difference),
-                        "relative_difference": relative_diff,
-                        "formula": formula,
-                        "severity": severity,
-                        "auto_fixable": auto_fixable,
-                        "suggested_fix": suggested_fix,
-                    }
-
-                    conflicts.append(conflict)
+                    if conflict:
+                        found.append((position, rule_position, conflict))
 
             except Exception as e:
-                logger.warning(f"检测计算冲突失败 (行{row_index}): {e}")
+                logger.warning(f"检测计算冲突失败 (规则{formula}): {e}")
                 continue
 
-        return conflicts
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [conflict for _, _, conflict in found]
+
+    def _build_conflict(
+        self,
+        row_index: int,
+        target_field: str,
+        expected_decimal: Decimal,
+        actual_decimal: Decimal,
+        formula: str,
+        tolerance: Decimal,
+    ) -> Optional[Dict[str, Any]]:
+        """比较期望值与实际值，超出容差时生成冲突"""
+        # 比较值
+        is_match, difference = self.compare_values(
+            expected_decimal, actual_decimal, tolerance
+        )
+        if is_match:
+            return None
+
+        # 判断严重程度
+        relative_diff = (
+            abs(difference) / abs(expected_decimal)
+            if expected_decimal != 0
+            else float("inf")
+        )
+
+        if relative_diff > 0.1:
+            severity = "high"
+        elif relative_diff > 0.05:
+            severity = "medium"
+        else:
+            severity = "low"
+
+        # 判断是否可自动修复
+        auto_fixable = relative_diff < 0.2  # 差异小于20%时可自动修复
+
+        # 生成修复建议
+        suggested_fix = "use_calculated_value" if auto_fixable else "manual_review"
+
+        return {
+            "row_index": row_index,
+            "field": target_field,
+            "expected_value": float(expected_decimal),
+            "actual_value": float(actual_decimal),
+            "difference": float(difference),
+            "relative_difference": relative_diff,
+            "formula": formula,
+            "severity": severity,
+            "auto_fixable": auto_fixable,
+            "suggested_fix": suggested_fix,
+        }
 
     def build_dependency_graph(
         self, calculation_rules: List[Dict[str, Any]]
@@ -265,6 +337,33 @@ class CalculationConflictDetector(BaseService):
         Returns:
             依赖关系图 {字段: {依赖字段集合}}
         """
+        return self.get_dependency_index(calculation_rules).graph
+
+    def get_dependency_index(
+        self, calculation_rules: List[Dict[str, Any]]
+    ) -> "DependencyIndex":
+        """
+        获取规则集的依赖索引（同一规则集只构建一次）
+
+        Args:
+            calculation_rules: 计算规则列表
+
+        Returns:
+            依赖索引（依赖图、反向依赖、传递闭包和拓扑顺序）
+        """
+        key = tuple(rule.get("formula", "") for rule in calculation_rules)
+        index = self._dependency_indexes.get(key)
+        if index is None:
+            index = DependencyIndex(
+                self._build_dependency_graph(calculation_rules), key
+            )
+            self._dependency_indexes[key] = index
+        return index
+
+    def _build_dependency_graph(
+        self, calculation_rules: List[Dict[str, Any]]
+    ) -> Dict[str, Set[str]]:
+        """按公式构建 {目标字段: {引用字段集合}}"""
         graph = {}
 
         for rule in calculation_rules:
@@ -273,7 +372,7 @@ class CalculationConflictDetector(BaseService):
                 if not formula:
                     continue
 
-                parsed = self.parse_formula(formula)
+                parsed = self.get_parsed_formula(formula)
                 target_field = parsed["target_field"]
                 referenced_fields = parsed["referenced_fields"]
 
@@ -293,48 +392,44 @@ class CalculationConflictDetector(BaseService):
         records: List[Dict[str, Any]],
         calculation_rules: List[Dict[str, Any]],
         tolerance: Decimal,
+        conflicts: Optional[List[Dict[str, Any]]] = None,
     ) -> List[Dict[str, Any]]:
         """
         检测级联冲突（使用BFS算法）
 
+        冲突字段的全部直接和间接依赖字段（依赖图传递闭包）记为级联影响字段。
+
         Args:
             records: 数据记录列表
             calculation_rules: 计算规则列表
             tolerance: 容差阈值
+            conflicts: 已检测出的冲突（可选，提供时不再重复检测）
 
         Returns:
             级联冲突列表
         """
-        # 构建依赖图
-        dependency_graph = self.build_dependency_graph(calculation_rules)
-
-        cascade_conflicts = []
+        # 构建依赖索引
+        dependency_index = self.get_dependency_index(calculation_rules)
 
-        for record in records:
-            row_index = record.get("row_index", 0)
-            conflicts = self.detect_conflicts_in_record(
-                record, row_index, calculation_rules, tolerance
+        if conflicts is None:
+            cascade_conflicts = self.detect_conflicts_in_records(
+                records, calculation_rules, tolerance
             )
+        else:
+            cascade_conflicts = [dict(conflict) for conflict in conflicts]
 
-            if not conflicts:
-                continue
-
-            # 使用BFS检测级联冲突
-            for conflict in conflicts:
-                conflict_field = conflict["field"]
-
-                # 查找依赖该字段的其他字段
-                dependent_fields = [
-                    field
-                    for field, deps in dependency_graph.items()
-                    if conflict_field in deps
-                ]
+        # 级联字段只取决于冲突字段，按字段分组后整体赋值
+        conflicts_by_field: Dict[str, List[Dict[str, Any]]] = {}
+        for conflict in cascade_conflicts:
+            conflicts_by_field.setdefault(conflict["field"], []).append(conflict)
 
-                if dependent_fields:
-                    conflict["cascade_fields"] = dependent_fields
-                    conflict["cascade_impact"] = len(dependent_fields)
-
-            cascade_conflicts.extend(conflicts)
+        for conflict_field, field_conflicts in conflicts_by_field.items():
+            dependent_fields = dependency_index.closure.get(conflict_field)
+            if not dependent_fields:
+                continue
+            for conflict in field_conflicts:
+                conflict["cascade_fields"] = list(dependent_fields)
+                conflict["cascade_impact"] = len(dependent_fields)
 
         return cascade_conflicts
 
@@ -378,16 +473,13 @@ class CalculationConflictDetector(BaseService):
                         record["row_index"] = i
 
             # 检测冲突
-            all_conflicts = []
-            for record in records_list:
-                conflicts = self.detect_conflicts_in_record(
-                    record, record["row_index"], calculation_rules, tolerance
-                )
-                all_conflicts.extend(conflicts)
+            all_conflicts = self.detect_conflicts_in_records(
+                records_list, calculation_rules, tolerance
+            )
 
             # 检测级联冲突
             cascade_conflicts = self.detect_cascade_conflicts(
-                records_list, calculation_rules, tolerance
+                records_list, calculation_rules, tolerance, conflicts=all_conflicts
             )
 
             # 统计信息
@@ -426,3 +518,301 @@ class CalculationConflictDetector(BaseService):
         except Exception as e:
             logger.error(f"计算冲突检测失败: {e}")
             raise CalculationConflictError(f"计算冲突检测失败: {e}")
+
+
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<number>\d+(?:\.\d+)?(?![\w.]))|\[(?P<bracket>[^\]]+)\]"
+    r"|(?P<field>\w+)|(?P<op>[+\-×*÷/])|(?P<paren>[()]))"
+)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, Any]]:
+    """把表达式切分为 (类型, 值) 记号"""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise ValueError(f"无法识别的字符: {expression[position:]}")
+        position = match.end()
+        if match.group("number") is not None:
+            tokens.append(("number", float(match.group("number"))))
+        elif match.group("bracket") is not None:
+            tokens.append(("field", match.group("bracket").strip()))
+        elif match.group("field") is not None:
+            tokens.append(("field", match.group("field")))
+        elif match.group("op") is not None:
+            tokens.append(("op", match.group("op")))
+        else:
+            tokens.append(("paren", match.group("paren")))
+    return tokens
+
+
+class _FormulaParser:
+    """
+    递归下降解析器
+
+    语法树节点: ("number", 值) | ("field", 字段名) | ("neg", 子节点) |
+    ("op", 运算符, 左子节点, 右子节点)，运算符统一为 + - * /
+    """
+
+    _normalize = {"×": "*", "÷": "/"}
+
+    def __init__(self, tokens: List[Tuple[str, Any]], expression: str):
+        self.tokens = tokens
+        self.expression = expression
+        self.position = 0
+
+    def parse(self) -> tuple:
+        node = self._sum()
+        if self.position != len(self.tokens):
+            raise ValueError(f"无效的表达式: {self.expression}")
+        return node
+
+    def _peek(self) -> Optional[Tuple[str, Any]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self) -> Tuple[str, Any]:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"表达式不完整: {self.expression}")
+        self.position += 1
+        return token
+
+    def _binary(self, operand, operators: str) -> tuple:
+        node = operand()
+        while True:
+            token = self._peek()
+            if token is None or token[0] != "op" or token[1] not in operators:
+                return node
+            self.position += 1
+            op = self._normalize.get(token[1], token[1])
+            node = ("op", op, node, operand())
+
+    def _sum(self) -> tuple:
+        return self._binary(self._product, "+-")
+
+    def _product(self) -> tuple:
+        return self._binary(self._unary, "×*÷/")
+
+    def _unary(self) -> tuple:
+        token = self._peek()
+        if token is not None and token[0] == "op" and token[1] in "+-":
+            self.position += 1
+            operand = self._unary()
+            return ("neg", operand) if token[1] == "-" else operand
+        return self._atom()
+
+    def _atom(self) -> tuple:
+        kind, value = self._next()
+        if kind == "number":
+            return ("number", value)
+        if kind == "field":
+            return ("field", value)
+        if kind == "paren" and value == "(":
+            node = self._sum()
+            if self._next() != ("paren", ")"):
+                raise ValueError(f"括号不匹配: {self.expression}")
+            return node
+        raise ValueError(f"无效的表达式: {self.expression}")
+
+
+class DependencyIndex:
+    """
+    规则集的字段依赖索引
+
+    - graph: {目标字段: {引用字段集合}}
+    - dependents: 反向依赖 {字段: [直接依赖它的目标字段]}
+    - closure: 传递闭包 {字段: [直接或间接依赖它的目标字段]}，按拓扑顺序排列
+    - field_order: 字段拓扑顺序（被引用字段在前）
+    - rule_order: 规则的检测顺序（规则下标，上游目标字段在前）
+    - cycles: 存在循环依赖的字段
+    """
+
+    def __init__(self, graph: Dict[str, Set[str]], formulas: Tuple[str, ...] = ()):
+        self.graph = graph
+
+        dependents: Dict[str, List[str]] = {}
+        for target, references in graph.items():
+            for field in references:
+                dependents.setdefault(field, []).append(target)
+        self.dependents = dependents
+
+        self.field_order, self.cycles = self._topological_order()
+        position = {field: i for i, field in enumerate(self.field_order)}
+
+        # BFS求每个字段的全部下游字段
+        self.closure: Dict[str, List[str]] = {}
+        for field in dependents:
+            visited = set()
+            queue = deque(dependents[field])
+            while queue:
+                current = queue.popleft()
+                if current in visited or current == field:
+                    continue
+                visited.add(current)
+                queue.extend(dependents.get(current, ()))
+            self.closure[field] = sorted(visited, key=position.__getitem__)
+
+        # 规则按目标字段的拓扑位置稳定排序，无法解析的规则放在最后
+        targets = []
+        for formula in formulas:
+            target = formula.split("=", 1)[0].strip() if "=" in formula else None
+            targets.append(position.get(target, len(position)))
+        self.rule_order = sorted(range(len(formulas)), key=targets.__getitem__)
+
+    def _topological_order(self) -> Tuple[List[str], List[str]]:
+        """Kahn算法求字段拓扑顺序，循环依赖的字段按出现顺序追加在最后"""
+        fields: Dict[str, None] = {}
+        for target, references in self.graph.items():
+            for field in sorted(references):
+                fields.setdefault(field)
+            fields.setdefault(target)
+
+        in_degree = {field: len(self.graph.get(field, ())) for field in fields}
+        queue = deque(field for field in fields if in_degree[field] == 0)
+        order = []
+        while queue:
+            field = queue.popleft()
+            order.append(field)
+            for dependent in self.dependents.get(field, ()):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        cycles = [field for field in fields if in_degree[field] > 0]
+        if cycles:
+            logger.warning(f"计算规则存在循环依赖: {cycles}")
+        return order + cycles, cycles
+
+
+def _to_float(value: Any) -> float:
+    """字段取值转换为浮点数，无法转换时按0处理"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _is_plain_number_column(values: List[Any]) -> bool:
+    """列中的值是否全部为非布尔数值（可直接整体转换为浮点数组）"""
+    return all(
+        issubclass(value_type, (int, float, np.number))
+        and not issubclass(value_type, (bool, np.bool_))
+        for value_type in set(map(type, values))
+    )
+
+
+def _round_cents(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按列舍入到分
+
+    Returns:
+        (舍入后的分值, 不确定掩码)；小数部分接近半分或数值过大时，浮点舍入可能与
+        Decimal(str(值))的ROUND_HALF_UP结果不同，需要逐行精确计算
+    """
+    scaled = values * 100
+    with np.errstate(invalid="ignore"):
+        fraction = scaled - np.floor(scaled)
+        uncertain = ~(np.abs(fraction - 0.5) > 1e-6) | ~(np.abs(scaled) < 1e9)
+    return np.floor(scaled + 0.5), uncertain
+
+
+class FormulaColumns:
+    """公式求值所需的数值列（按字段惰性构建并在规则之间复用）"""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._actual: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def numeric(self, field: str) -> np.ndarray:
+        """表达式中引用的字段值，缺失或无法转换时为0"""
+        column = self._numeric.get(field)
+        if column is None:
+            values = [record.get(field, 0) for record in self.records]
+            if not _is_plain_number_column(values):
+                values = [_to_float(value) for value in values]
+            column = np.array(values, dtype=float)
+            self._numeric[field] = column
+        return column
+
+    def actual(self, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        目标字段的实际值
+
+        Returns:
+            (有效掩码, 浮点值)；字段缺失、为空、不是有限数值的行无效
+        """
+        cached = self._actual.get(field)
+        if cached is None:
+            raw_values = [record.get(field) for record in self.records]
+            if _is_plain_number_column(raw_values):
+                values = np.array(raw_values, dtype=float)
+                valid = np.isfinite(values)
+                values[~valid] = 0.0
+            else:
+                values = np.zeros(len(self.records))
+                valid = np.zeros(len(self.records), dtype=bool)
+                for position, value in enumerate(raw_values):
+                    if value is None or isinstance(value, (bool, np.bool_)):
+                        continue
+                    try:
+                        number = float(value)
+                    except (ValueError, TypeError):
+                        continue
+                    if np.isfinite(number):
+                        values[position] = number
+                        valid[position] = True
+            cached = (valid, values)
+            self._actual[field] = cached
+        return cached
+
+
+def _evaluate_ast(node: tuple, column) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按列计算语法树
+
+    Returns:
+        (计算结果, 失败掩码)；字段为NaN/无穷或除数为0的行标记为失败
+    """
+    kind = node[0]
+    if kind == "number":
+        return np.float64(node[1]), np.False_
+    if kind == "field":
+        values = column(node[1])
+        return values, ~np.isfinite(values)
+    if kind == "neg":
+        values, invalid = _evaluate_ast(node[1], column)
+        return -values, invalid
+
+    _, op, left, right = node
+    left_values, left_invalid = _evaluate_ast(left, column)
+    right_values, right_invalid = _evaluate_ast(right, column)
+    invalid = left_invalid | right_invalid
+    with np.errstate(all="ignore"):
+        if op == "+":
+            values = left_values + right_values
+        elif op == "-":
+            values = left_values - right_values
+        elif op == "*":
+            values = left_values * right_values
+        else:
+            invalid = invalid | (right_values == 0)
+            values = left_values / right_values
+    return values, invalid
+
+
+def _quantize_expected(value: float, invalid: bool) -> Decimal:
+    """期望值按Decimal舍入到0.01，计算失败或超出Decimal精度时为0"""
+    if invalid or not np.isfinite(value):
+        return Decimal("0")
+    try:
+        return Decimal(str(float(value))).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+    except InvalidOperation:
+        return Decimal("0")
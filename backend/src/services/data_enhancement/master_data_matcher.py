@@ -8,9 +8,15 @@
 - 企业名称标准化（去除括号、"有限公司"等）
 - 统一社会信用代码校验和匹配
 - 多维度加权评分（名称相似度60% + 信用代码40%）
+- 候选索引（名称哈希、信用代码索引、n-gram倒排索引），只对少量候选打分
 """
 
+import asyncio
 import logging
+import math
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
@@ -33,6 +39,7 @@ except ImportError:
 from ...security.database import SecureDatabaseService
 from ...error_handling.unified import BMOSError, BusinessError
 from ...services.base import BaseService, ServiceConfig
+from .master_data_snapshot import MasterDataSnapshot, snapshot_cache
 
 logger = logging.getLogger(__name__)
 
@@ -96,6 +103,17 @@ class MasterDataMatcher(BaseService):
             (r"[A-Za-z]+", ""),  # 去除英文
         ]
 
+        # 名称解析与拼音缓存（同一名称在多次比较中只解析一次）
+        self._company_info_cache: Dict[str, Dict[str, Any]] = {}
+        self._pinyin_cache: Dict[str, List[str]] = {}
+        self._cache_limit = 200000
+        # 主数据快照中预处理好的名称信息与拼音（只读）
+        self._shared_company_info: Dict[str, Dict[str, Any]] = {}
+        self._shared_pinyin: Dict[str, List[str]] = {}
+
+        # 主数据候选索引（按主数据DataFrame对象缓存）
+        self._master_index: Optional[Tuple[pd.DataFrame, str, "MasterDataIndex"]] = None
+
     def extract_company_info(self, name: str) -> Dict[str, Any]:
         """
         提取企业名称信息（总公司名称、是否分公司/办事处等）
@@ -127,6 +145,12 @@ class MasterDataMatcher(BaseService):
             }
 
         full_name = str(name).strip()
+        cached = self._company_info_cache.get(full_name)
+        if cached is None:
+            cached = self._shared_company_info.get(full_name)
+        if cached is not None:
+            return cached
+
         headquarter_name = full_name
         branch_name = ""
         is_branch = False
@@ -170,7 +194,7 @@ class MasterDataMatcher(BaseService):
         # 标准化总公司名称（去除后缀等）
         standardized_name = self.standardize_company_name(headquarter_name)
 
-        return {
+        info = {
             "full_name": full_name,
             "headquarter_name": headquarter_name,
             "branch_name": branch_name,
@@ -179,6 +203,10 @@ class MasterDataMatcher(BaseService):
             "branch_type": branch_type,
             "standardized_name": standardized_name,
         }
+        if len(self._company_info_cache) >= self._cache_limit:
+            self._company_info_cache.clear()
+        self._company_info_cache[full_name] = info
+        return info
 
     def standardize_company_name(self, name: str) -> str:
         """
@@ -377,8 +405,8 @@ class MasterDataMatcher(BaseService):
     def _calculate_pinyin_similarity(self, name1: str, name2: str) -> float:
         """计算拼音相似度"""
         try:
-            pinyin1 = "".join(lazy_pinyin(name1))
-            pinyin2 = "".join(lazy_pinyin(name2))
+            pinyin1 = "".join(self._get_pinyin_syllables(name1))
+            pinyin2 = "".join(self._get_pinyin_syllables(name2))
 
             if not pinyin1 or not pinyin2:
                 return 0.0
@@ -388,6 +416,18 @@ class MasterDataMatcher(BaseService):
             logger.warning(f"拼音匹配失败: {e}")
             return 0.0
 
+    def _get_pinyin_syllables(self, name: str) -> List[str]:
+        """获取名称拼音音节（带缓存）"""
+        syllables = self._pinyin_cache.get(name)
+        if syllables is None:
+            syllables = self._shared_pinyin.get(name)
+        if syllables is None:
+            syllables = lazy_pinyin(name)
+            if len(self._pinyin_cache) >= self._cache_limit:
+                self._pinyin_cache.clear()
+            self._pinyin_cache[name] = syllables
+        return syllables
+
     def validate_credit_code(self, code: str) -> bool:
         """
         验证统一社会信用代码格式
@@ -514,19 +554,168 @@ class MasterDataMatcher(BaseService):
             logger.error(f"获取主数据失败: {e}")
             raise MasterDataMatchError(f"获取主数据失败: {e}")
 
+    async def fetch_master_data_changes(
+        self, master_data_table: str, tenant_id: str, since: Any
+    ) -> pd.DataFrame:
+        """
+        获取updated_at水位之后变更的主数据
+
+        Args:
+            master_data_table: 主数据表名
+            tenant_id: 租户ID
+            since: 上次同步的updated_at水位
+
+        Returns:
+            变更的主数据DataFrame（含updated_at列）
+        """
+        try:
+            query = f"""
+                SELECT 
+                    id,
+                    name,
+                    credit_code,
+                    alias_name,
+                    tenant_id,
+                    updated_at
+                FROM {master_data_table}
+                WHERE tenant_id = $1 AND updated_at > $2
+                ORDER BY updated_at
+            """
+
+            results = await self.db_service.execute_query(
+                query, params=[tenant_id, since], fetch_all=True
+            )
+            return pd.DataFrame(results or [])
+
+        except Exception as e:
+            logger.error(f"获取主数据变更失败: {e}")
+            raise MasterDataMatchError(f"获取主数据变更失败: {e}")
+
+    async def _fetch_master_data_state(
+        self, master_data_table: str, tenant_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """获取主数据行数与updated_at水位，表没有updated_at列时返回None"""
+        query = f"""
+            SELECT COUNT(*) AS row_count, MAX(updated_at) AS watermark
+            FROM {master_data_table}
+            WHERE tenant_id = $1
+        """
+        try:
+            return await self.db_service.execute_query(
+                query, params=[tenant_id], fetch_one=True
+            )
+        except Exception as e:
+            logger.warning(f"主数据表 {master_data_table} 不支持增量刷新: {e}")
+            return None
+
+    async def get_master_data_snapshot(
+        self, master_data_table: str, tenant_id: str
+    ) -> MasterDataSnapshot:
+        """
+        获取租户主数据快照
+
+        快照跨请求缓存：水位与行数都未变化时直接复用；updated_at水位前进时只拉取变更行并
+        预处理；行数对不上（有删除）时整体重新加载。表没有updated_at列时快照保留到
+        缓存过期或被写入失效。
+        """
+
+        async def refresh(
+            snapshot: Optional[MasterDataSnapshot],
+        ) -> MasterDataSnapshot:
+            state = await self._fetch_master_data_state(master_data_table, tenant_id)
+
+            if snapshot is not None:
+                if state is None:
+                    return snapshot
+                if (
+                    state["watermark"] == snapshot.watermark
+                    and state["row_count"] == snapshot.size
+                ):
+                    return snapshot
+                if snapshot.watermark is not None:
+                    changes = await self.fetch_master_data_changes(
+                        master_data_table, tenant_id, snapshot.watermark
+                    )
+                    rows = self._prepare_snapshot_rows(snapshot, changes)
+                    snapshot.upsert(rows)
+                    if snapshot.size == state["row_count"]:
+                        snapshot.watermark = state["watermark"]
+                        logger.info(
+                            f"主数据快照增量刷新: {master_data_table}，"
+                            f"租户 {tenant_id}，变更 {len(rows)} 条"
+                        )
+                        return snapshot
+
+            # 首次加载或存在删除时整体加载，水位取加载前的值，加载期间的变更下次再合并
+            snapshot = MasterDataSnapshot(tenant_id, master_data_table)
+            master_data = await self.fetch_master_data("", master_data_table, tenant_id)
+            snapshot.replace(self._prepare_snapshot_rows(snapshot, master_data))
+            snapshot.watermark = state["watermark"] if state else None
+            logger.info(
+                f"主数据快照加载完成: {master_data_table}，租户 {tenant_id}，"
+                f"{snapshot.size} 条"
+            )
+            return snapshot
+
+        return await snapshot_cache.get(tenant_id, master_data_table, refresh)
+
+    def _prepare_snapshot_rows(
+        self, snapshot: MasterDataSnapshot, master_data: pd.DataFrame
+    ) -> List[Dict[str, Any]]:
+        """预处理主数据行：解析企业名称并计算拼音，结果保存在快照中"""
+        if snapshot.preprocessor is None:
+            preprocessor = MasterDataMatcher(None)
+            preprocessor._company_info_cache = snapshot.company_info
+            preprocessor._pinyin_cache = snapshot.pinyin
+            preprocessor._cache_limit = math.inf
+            snapshot.preprocessor = preprocessor
+        preprocessor = snapshot.preprocessor
+
+        rows = master_data.drop(columns=["updated_at"], errors="ignore").to_dict(
+            "records"
+        )
+        for row in rows:
+            for name in (row.get("name"), row.get("alias_name")):
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                info = preprocessor.extract_company_info(name)
+                for part in (info["standardized_name"], info["branch_name"]):
+                    if part:
+                        preprocessor._get_pinyin_syllables(part)
+        return rows
+
+    def get_snapshot_index(
+        self, snapshot: MasterDataSnapshot, data_type: str
+    ) -> "MasterDataIndex":
+        """获取快照的候选索引，并让本匹配器复用快照的预处理结果"""
+        self._shared_company_info = snapshot.company_info
+        self._shared_pinyin = snapshot.pinyin
+
+        index = snapshot.indexes.get(data_type)
+        if index is None:
+            index = MasterDataIndex(
+                snapshot.preprocessor, snapshot.master_data, data_type
+            )
+            snapshot.indexes[data_type] = index
+        return index
+
     def match_single_record(
         self,
         record: Dict[str, Any],
         master_data: pd.DataFrame,
         data_type: str = "order",
+        index: Optional["MasterDataIndex"] = None,
     ) -> Dict[str, Any]:
         """
         匹配单条记录
 
+        先通过候选索引筛选少量主数据，再对候选批量打分。
+
         Args:
             record: 待匹配记录
             master_data: 主数据DataFrame
             data_type: 数据类型（order/production/expense/product）
+            index: 主数据候选索引，默认按master_data构建并缓存
 
         Returns:
             匹配结果
@@ -537,15 +726,7 @@ class MasterDataMatcher(BaseService):
         # 产品匹配特殊字段：规格型号
         record_specification = None
         if data_type == "product":
-            # 尝试多个可能的字段名
-            record_specification = (
-                record.get("specification")
-                or record.get("spec")
-                or record.get("model")
-                or record.get("model_number")
-                or record.get("规格型号")
-                or record.get("型号规格")
-            )
+            record_specification = self._get_specification(record)
 
         row_index = record.get("row_index", 0)
 
@@ -558,180 +739,52 @@ class MasterDataMatcher(BaseService):
                 "alternatives": [],
             }
 
-        best_match = None
-        best_score = 0.0
-        alternatives = []
+        if index is None:
+            index = self.get_master_index(master_data, data_type)
 
-        # 遍历所有主数据记录
-        for _, master_row in master_data.iterrows():
-            master_id = master_row.get("id")
-            master_name = master_row.get("name", "")
-            master_code = master_row.get("credit_code", "")
-            master_alias = master_row.get("alias_name", "")
+        # 候选按主数据原始顺序排列，同分时与逐条扫描选出同一条记录
+        candidates = index.candidates(
+            record_name, record_code, record_specification, matcher=self
+        )
+        candidate_rows = [index.rows[i] for i in candidates]
+        scores, name_sims, name_details, code_sims = self._score_candidates(
+            record_name, record_code, record_specification, candidate_rows, data_type
+        )
+
+        def build_match(k: int) -> Dict[str, Any]:
+            master_row = candidate_rows[k]
+            match_info = {
+                "master_id": master_row.get("id"),
+                "master_name": master_row.get("name", ""),
+                "confidence": float(scores[k]),
+                "name_similarity": float(name_sims[k]),
+                "code_similarity": float(code_sims[k]),
+                "name_match_type": name_details[k].get("match_type", "unknown"),
+                "name_match_details": name_details[k],
+            }
 
-            # 产品匹配特殊字段：规格型号
-            master_specification = None
+            # 添加规格型号匹配信息（产品匹配）
             if data_type == "product":
-                master_specification = (
-                    master_row.get("specification")
-                    or master_row.get("spec")
-                    or master_row.get("model")
-                    or master_row.get("model_number")
-                    or master_row.get("规格型号")
-                    or master_row.get("型号规格")
+                master_specification = index.specifications[candidates[k]]
+                match_info["specification_matched"] = bool(
+                    record_specification and master_specification
                 )
+                match_info["record_specification"] = record_specification
+                match_info["master_specification"] = master_specification
 
-            # 计算名称相似度（考虑总公司和分公司/办事处）
-            name_sim, name_match_details = self.calculate_name_similarity(
-                record_name, master_name
-            )
-
-            # 如果有别名，也计算相似度
-            if master_alias:
-                alias_sim, alias_match_details = self.calculate_name_similarity(
-                    record_name, master_alias
-                )
-                if alias_sim > name_sim:
-                    name_sim = alias_sim
-                    name_match_details = alias_match_details
+            return match_info
 
-            # 产品匹配特殊逻辑：检查规格型号
-            specification_matched = False
-            if data_type == "product":
-                # 规则：如果存在规格型号，必须规格型号完全一致 + 名称至少大致相似
-                # 如果不存在规格型号，仅名称匹配即可
-                if record_specification and master_specification:
-                    # 两者都有规格型号：必须完全一致
-                    record_spec_clean = str(record_specification).strip().upper()
-                    master_spec_clean = str(master_specification).strip().upper()
-                    specification_matched = record_spec_clean == master_spec_clean
-
-                    if not specification_matched:
-                        # 规格型号不一致，直接跳过（不匹配）
-                        continue
-
-                    # 规格型号一致，检查名称是否大致相似（阈值0.7）
-                    if name_sim < 0.7:
-                        # 规格型号一致但名称不够相似，降低置信度但不完全拒绝
-                        # 可能是同型号不同名称
-                        pass
-                elif record_specification and not master_specification:
-                    # 记录有规格型号但主数据没有：不匹配（可能是不同产品）
-                    continue
-                elif not record_specification and master_specification:
-                    # 记录没有规格型号但主数据有：不匹配（可能是不完整的数据）
-                    continue
-                # 两者都没有规格型号：仅依赖名称匹配
-                # specification_matched 保持 False，但这是允许的
+        best_match = None
+        best_score = 0.0
+        if len(scores) and scores.max() > 0:
+            best = int(np.argmax(scores))
+            best_score = float(scores[best])
+            best_match = build_match(best)
 
-            # 计算代码相似度
-            code_sim = 0.0
-            code_fully_matched = False
-            if record_code and master_code:
-                code_sim = self.calculate_code_similarity(record_code, master_code)
-                code_fully_matched = code_sim >= 1.0
-
-            # 综合评分（改进逻辑）
-            # 产品匹配特殊规则：规格型号必须匹配（如果存在）
-            if data_type == "product" and record_specification and master_specification:
-                if not specification_matched:
-                    continue  # 规格型号不一致，跳过此记录
-                # 规格型号一致 + 名称至少大致相似（>0.7）= 100%置信度
-                if name_sim >= 0.7:
-                    final_score = 1.0
-                elif name_sim >= 0.5:
-                    # 规格型号一致但名称不够相似，降低置信度
-                    final_score = 0.85 + name_sim * 0.15  # 85-100%之间
-                else:
-                    # 规格型号一致但名称差异较大，可能不是同一产品
-                    final_score = name_sim * 0.7  # 降低权重
-            # 产品匹配：无规格型号时，仅依赖名称匹配
-            elif (
-                data_type == "product"
-                and not record_specification
-                and not master_specification
-            ):
-                final_score = name_sim
-            # 非产品匹配：使用原有逻辑
-            # 规则1：代码完全一致 + 名称大致类似（>0.7）= 100%置信度
-            elif code_fully_matched and name_sim >= 0.7:
-                final_score = 1.0
-            # 规则2：代码完全一致但名称不匹配 = 高置信度（可能是输入错误，但代码是唯一标识）
-            elif code_fully_matched and name_sim >= 0.5:
-                # 代码完全一致时，即使名称不完全匹配，也给予高置信度
-                # 但名称匹配度仍然会影响最终分数
-                final_score = 0.85 + name_sim * 0.15  # 85-100%之间
-            # 规则3：代码有细微差异（0.3-1.0）+ 名称大致类似 = 置信度大打折扣
-            elif code_sim >= 0.3 and name_sim >= 0.7:
-                # 代码有细微差异时，即使名称匹配，也大幅降低置信度
-                # 可能是输入错误，但也可能是不匹配
-                final_score = code_sim * 0.6 + name_sim * 0.4
-                # 进一步降低：代码细微差异的风险惩罚
-                if code_sim < 1.0:
-                    final_score *= 0.7  # 代码有差异时，再打7折
-            # 规则4：代码有较大差异（<0.3）+ 名称匹配 = 低置信度
-            elif code_sim < 0.3 and name_sim >= 0.7:
-                # 代码差异较大时，即使名称匹配，也认为可能不匹配
-                final_score = name_sim * 0.6  # 仅基于名称，且降低权重
-            # 规则5：有代码但差异大 + 名称也不匹配 = 低置信度
-            elif code_sim > 0 and code_sim < 0.3 and name_sim < 0.7:
-                final_score = code_sim * 0.3 + name_sim * 0.7
-            # 规则6：有代码且完全匹配，但名称完全不匹配（<0.5）= 中等置信度（代码优先）
-            elif code_fully_matched and name_sim < 0.5:
-                final_score = 0.75  # 代码完全匹配时，即使名称不匹配，仍给予中等置信度
-            # 规则7：无代码，仅依赖名称匹配
-            elif code_sim == 0:
-                final_score = name_sim
-            # 规则8：其他情况
-            else:
-                # 有代码但匹配度低，名称匹配度也低
-                final_score = code_sim * 0.4 + name_sim * 0.6
-
-            # 确保最终分数在0-1范围内
-            final_score = max(0.0, min(1.0, final_score))
-
-            # 记录候选匹配
-            if final_score >= 0.6:
-                match_info = {
-                    "master_id": master_id,
-                    "master_name": master_name,
-                    "confidence": final_score,
-                    "name_similarity": name_sim,
-                    "code_similarity": code_sim,
-                    "name_match_type": name_match_details.get("match_type", "unknown"),
-                    "name_match_details": name_match_details,
-                }
-
-                # 添加规格型号匹配信息（产品匹配）
-                if data_type == "product":
-                    match_info["specification_matched"] = specification_matched
-                    match_info["record_specification"] = record_specification
-                    match_info["master_specification"] = master_specification
-
-                alternatives.append(match_info)
-
-            # 更新最佳匹配
-            if final_score > best_score:
-                best_score = final_score
-                best_match = {
-                    "master_id": master_id,
-                    "master_name": master_name,
-                    "confidence": final_score,
-                    "name_similarity": name_sim,
-                    "code_similarity": code_sim,
-                    "name_match_type": name_match_details.get("match_type", "unknown"),
-                    "name_match_details": name_match_details,
-                }
-
-                # 添加规格型号匹配信息（产品匹配）
-                if data_type == "product":
-                    best_match["specification_matched"] = specification_matched
-                    best_match["record_specification"] = record_specification
-                    best_match["master_specification"] = master_specification
-
-        # 排序候选匹配（按置信度降序）
-        alternatives.sort(key=lambda x: x["confidence"], reverse=True)
-        alternatives = alternatives[:5]  # 只保留前5个候选
+        # 候选匹配（置信度>=0.6），按置信度降序保留前5个
+        qualified = np.flatnonzero(scores >= 0.6)
+        order = qualified[np.argsort(-scores[qualified], kind="stable")][:5]
+        alternatives = [build_match(int(k)) for k in order]
 
         # 生成匹配原因
         match_reason = self._generate_match_reason(best_match, record_name, record_code)
@@ -758,6 +811,127 @@ class MasterDataMatcher(BaseService):
             "alternatives": alternatives,
         }
 
+    def get_master_index(
+        self, master_data: pd.DataFrame, data_type: str = "order"
+    ) -> "MasterDataIndex":
+        """获取主数据候选索引，同一主数据DataFrame只构建一次"""
+        cached = self._master_index
+        if cached is not None and cached[0] is master_data and cached[1] == data_type:
+            return cached[2]
+
+        index = MasterDataIndex(self, master_data, data_type)
+        self._master_index = (master_data, data_type, index)
+        return index
+
+    @staticmethod
+    def _get_specification(row: Dict[str, Any]) -> Optional[Any]:
+        """获取规格型号（尝试多个可能的字段名）"""
+        return (
+            row.get("specification")
+            or row.get("spec")
+            or row.get("model")
+            or row.get("model_number")
+            or row.get("规格型号")
+            or row.get("型号规格")
+        )
+
+    def _score_candidates(
+        self,
+        record_name: str,
+        record_code: str,
+        record_specification: Optional[Any],
+        candidate_rows: List[Dict[str, Any]],
+        data_type: str,
+    ) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]], np.ndarray]:
+        """
+        对候选主数据批量打分
+
+        候选已按规格型号分块（产品匹配时规格型号完全一致，或两者都没有）。
+        逐对计算名称与代码相似度，再按匹配规则向量化合成最终分数。
+
+        Returns:
+            (最终分数, 名称相似度, 名称匹配详情, 代码相似度)
+        """
+        n = len(candidate_rows)
+        name_sims = np.zeros(n)
+        code_sims = np.zeros(n)
+        name_details = []
+
+        for k, master_row in enumerate(candidate_rows):
+            # 计算名称相似度（考虑总公司和分公司/办事处）
+            name_sim, details = self.calculate_name_similarity(
+                record_name, master_row.get("name", "")
+            )
+
+            # 如果有别名，也计算相似度
+            master_alias = master_row.get("alias_name", "")
+            if master_alias:
+                alias_sim, alias_details = self.calculate_name_similarity(
+                    record_name, master_alias
+                )
+                if alias_sim > name_sim:
+                    name_sim, details = alias_sim, alias_details
+
+            name_sims[k] = name_sim
+            name_details.append(details)
+
+            # 计算代码相似度
+            master_code = master_row.get("credit_code", "")
+            if record_code and master_code:
+                code_sims[k] = self.calculate_code_similarity(record_code, master_code)
+
+        if data_type == "product" and record_specification:
+            # 规格型号一致 + 名称至少大致相似（>0.7）= 100%置信度；
+            # 名称不够相似时降低置信度（85-100%）；名称差异较大时降低权重
+            scores = np.select(
+                [name_sims >= 0.7, name_sims >= 0.5],
+                [1.0, 0.85 + name_sims * 0.15],
+                name_sims * 0.7,
+            )
+        elif data_type == "product":
+            # 产品匹配：无规格型号时，仅依赖名称匹配
+            scores = name_sims.copy()
+        else:
+            scores = self._combine_code_and_name_scores(code_sims, name_sims)
+
+        # 确保最终分数在0-1范围内
+        return np.clip(scores, 0.0, 1.0), name_sims, name_details, code_sims
+
+    @staticmethod
+    def _combine_code_and_name_scores(
+        code_sims: np.ndarray, name_sims: np.ndarray
+    ) -> np.ndarray:
+        """按代码与名称匹配规则合成最终分数（规则按顺序优先）"""
+        code_full = code_sims >= 1.0
+        conditions = [
+            # 规则1：代码完全一致 + 名称大致类似（>0.7）= 100%置信度
+            code_full & (name_sims >= 0.7),
+            # 规则2：代码完全一致但名称不完全匹配 = 高置信度（85-100%之间）
+            code_full & (name_sims >= 0.5),
+            # 规则3：代码有细微差异（0.3-1.0）+ 名称大致类似 = 置信度大打折扣
+            (code_sims >= 0.3) & (name_sims >= 0.7),
+            # 规则4：代码有较大差异（<0.3）+ 名称匹配 = 低置信度
+            (code_sims < 0.3) & (name_sims >= 0.7),
+            # 规则5：有代码但差异大 + 名称也不匹配 = 低置信度
+            (code_sims > 0) & (code_sims < 0.3) & (name_sims < 0.7),
+            # 规则6：代码完全匹配，但名称完全不匹配（<0.5）= 中等置信度（代码优先）
+            code_full & (name_sims < 0.5),
+            # 规则7：无代码，仅依赖名称匹配
+            code_sims == 0,
+        ]
+        choices = [
+            1.0,
+            0.85 + name_sims * 0.15,
+            # 代码有差异时，再打7折
+            (code_sims * 0.6 + name_sims * 0.4) * np.where(code_full, 1.0, 0.7),
+            name_sims * 0.6,
+            code_sims * 0.3 + name_sims * 0.7,
+            0.75,
+            name_sims,
+        ]
+        # 规则8：有代码但匹配度低，名称匹配度也低
+        return np.select(conditions, choices, code_sims * 0.4 + name_sims * 0.6)
+
     def _generate_match_reason(
         self, match: Optional[Dict[str, Any]], record_name: str, record_code: str
     ) -> str:
@@ -848,6 +1022,8 @@ class MasterDataMatcher(BaseService):
         master_data_table: str,
         tenant_id: str,
         confidence_threshold: float = 0.8,
+        n_jobs: Optional[int] = None,
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """
         匹配主数据
@@ -858,6 +1034,8 @@ class MasterDataMatcher(BaseService):
             master_data_table: 主数据表名
             tenant_id: 租户ID
             confidence_threshold: 置信度阈值（默认0.8）
+            n_jobs: 工作进程数，None或1时在当前进程中匹配
+            use_cache: 是否使用租户主数据快照缓存
 
         Returns:
             匹配结果
@@ -865,18 +1043,37 @@ class MasterDataMatcher(BaseService):
         self.confidence_threshold = confidence_threshold
 
         try:
-            # 获取主数据
-            master_data = await self.fetch_master_data(
-                data_type, master_data_table, tenant_id
-            )
+            # 获取主数据（优先使用租户快照）
+            index = None
+            if use_cache:
+                snapshot = await self.get_master_data_snapshot(
+                    master_data_table, tenant_id
+                )
+                master_data = snapshot.master_data
+                if not master_data.empty:
+                    index = self.get_snapshot_index(snapshot, data_type)
+            else:
+                master_data = await self.fetch_master_data(
+                    data_type, master_data_table, tenant_id
+                )
 
             # 匹配每条记录
+            if n_jobs and n_jobs > 1 and len(records) > 1 and not master_data.empty:
+                match_results = await self._match_records_parallel(
+                    records, master_data, data_type, n_jobs
+                )
+            else:
+                if index is None and not master_data.empty:
+                    index = self.get_master_index(master_data, data_type)
+                match_results = [
+                    self.match_single_record(record, master_data, data_type, index)
+                    for record in records
+                ]
+
             matched_records = []
             unmatched_records = []
 
-            for record in records:
-                match_result = self.match_single_record(record, master_data, data_type)
-
+            for match_result in match_results:
                 if match_result["suggested_master_id"]:
                     matched_records.append(match_result)
                 else:
@@ -913,3 +1110,269 @@ class MasterDataMatcher(BaseService):
         except Exception as e:
             logger.error(f"主数据匹配失败: {e}")
             raise MasterDataMatchError(f"主数据匹配失败: {e}")
+
+    async def _match_records_parallel(
+        self,
+        records: List[Dict[str, Any]],
+        master_data: pd.DataFrame,
+        data_type: str,
+        n_jobs: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        多进程匹配记录
+
+        每个工作进程在初始化时接收一次主数据并构建候选索引，记录按块分发，结果保持原顺序。
+        """
+        chunk_size = max(1, math.ceil(len(records) / (n_jobs * 4)))
+        chunks = [
+            records[i : i + chunk_size] for i in range(0, len(records), chunk_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_match_worker,
+            initargs=(master_data, data_type, self.confidence_threshold),
+        ) as pool:
+            results = await asyncio.gather(
+                *[
+                    asyncio.wrap_future(pool.submit(_match_record_chunk, chunk))
+                    for chunk in chunks
+                ]
+            )
+
+        return [result for chunk_results in results for result in chunk_results]
+
+
+class MasterDataIndex:
+    """
+    主数据候选索引
+
+    为每条待匹配记录生成少量候选主数据，只对候选打分：
+    - 标准化总公司名称（含别名）精确哈希
+    - 信用代码精确索引与q-gram倒排索引：编辑距离不超过code_max_distance的代码
+      至少共享 len - q + 1 - code_max_distance * q 个q-gram，因此不会漏掉有相似度的代码
+    - 名称字符二元组与拼音音节二元组倒排索引，按IDF加权重叠度取前max_candidates个
+    - 产品匹配按规格型号分块（规格型号完全一致，或两者都没有）
+    主数据（产品匹配时为所在分块）不超过full_scan_threshold条时候选为全部记录，
+    结果与逐条扫描一致。
+    """
+
+    def __init__(
+        self,
+        matcher: MasterDataMatcher,
+        master_data: pd.DataFrame,
+        data_type: str = "order",
+        max_candidates: int = 50,
+        full_scan_threshold: int = 1000,
+        code_max_distance: int = 4,
+        code_gram: int = 3,
+    ):
+        self.matcher = matcher
+        self.data_type = data_type
+        self.rows = master_data.to_dict("records")
+        self.size = len(self.rows)
+        self.max_candidates = max_candidates
+        self.full_scan_threshold = full_scan_threshold
+        self.full_scan = self.size <= full_scan_threshold
+        self.code_max_distance = code_max_distance
+        self.code_gram = code_gram
+
+        # 规格型号分块
+        self.specifications: List[Optional[Any]] = [None] * self.size
+        self.spec_blocks: Dict[Optional[str], np.ndarray] = {}
+        if data_type == "product":
+            blocks = defaultdict(list)
+            for i, row in enumerate(self.rows):
+                self.specifications[i] = matcher._get_specification(row)
+                blocks[self._spec_key(self.specifications[i])].append(i)
+            self.spec_blocks = {
+                key: np.array(rows, dtype=np.int64) for key, rows in blocks.items()
+            }
+
+        self.name_index: Dict[str, List[int]] = defaultdict(list)
+        self.code_index: Dict[str, List[int]] = defaultdict(list)
+        self.name_postings: Dict[str, np.ndarray] = {}
+        self.name_weights: Dict[str, float] = {}
+        self.code_postings: Dict[str, np.ndarray] = {}
+        if not self.full_scan:
+            self._build()
+
+    def _build(self):
+        name_postings = defaultdict(list)
+        code_postings = defaultdict(list)
+
+        for i, row in enumerate(self.rows):
+            grams = set()
+            for name in (row.get("name"), row.get("alias_name")):
+                key = self._name_key(name, self.matcher)
+                if not key:
+                    continue
+                # 名称与别名标准化后相同时只记录一次
+                if i not in self.name_index[key][-1:]:
+                    self.name_index[key].append(i)
+                grams.update(self._name_grams(key, self.matcher))
+            for gram in grams:
+                name_postings[gram].append(i)
+
+            code = self._code_key(row.get("credit_code"))
+            if code:
+                self.code_index[code].append(i)
+                # 保留重复的q-gram，计数按多重集合计算
+                for gram in self._code_grams(code):
+                    code_postings[gram].append(i)
+
+        self.name_postings = {
+            gram: np.array(rows, dtype=np.int64) for gram, rows in name_postings.items()
+        }
+        self.name_weights = {
+            gram: math.log(1 + self.size / len(rows))
+            for gram, rows in name_postings.items()
+        }
+        self.code_postings = {
+            gram: np.array(rows, dtype=np.int64) for gram, rows in code_postings.items()
+        }
+        logger.info(
+            f"主数据候选索引构建完成: {self.size}条主数据，"
+            f"{len(self.name_postings)}个名称n-gram，{len(self.code_postings)}个代码q-gram"
+        )
+
+    def candidates(
+        self,
+        record_name: Any,
+        record_code: Any,
+        record_specification: Optional[Any] = None,
+        matcher: Optional[MasterDataMatcher] = None,
+    ) -> np.ndarray:
+        """
+        生成候选主数据位置（升序）
+
+        matcher用于解析记录名称，默认使用构建索引的匹配器。
+        """
+        matcher = matcher or self.matcher
+        block = None
+        if self.data_type == "product":
+            block = self.spec_blocks.get(
+                self._spec_key(record_specification), np.array([], dtype=np.int64)
+            )
+
+        if self.full_scan:
+            return block if block is not None else np.arange(self.size)
+        # 规格型号分块不超过full_scan_threshold条时整块打分，与逐条扫描一致
+        if block is not None and len(block) <= self.full_scan_threshold:
+            return block
+
+        found = []
+        name_key = self._name_key(record_name, matcher)
+        code_key = self._code_key(record_code)
+
+        # 精确哈希命中
+        if name_key in self.name_index:
+            found.append(np.array(self.name_index[name_key], dtype=np.int64))
+        if code_key in self.code_index:
+            found.append(np.array(self.code_index[code_key], dtype=np.int64))
+
+        # 代码q-gram计数过滤
+        if code_key:
+            postings = [
+                self.code_postings[gram]
+                for gram in self._code_grams(code_key)
+                if gram in self.code_postings
+            ]
+            if postings:
+                counts = np.bincount(np.concatenate(postings), minlength=self.size)
+                min_shared = max(
+                    1,
+                    len(code_key)
+                    - self.code_gram
+                    + 1
+                    - self.code_max_distance * self.code_gram,
+                )
+                found.append(np.flatnonzero(counts >= min_shared))
+
+        # 名称n-gram按IDF加权重叠度取前max_candidates个（产品匹配在规格型号分块内选取）
+        if name_key:
+            scores = np.zeros(self.size)
+            for gram in self._name_grams(name_key, matcher):
+                postings = self.name_postings.get(gram)
+                if postings is not None:
+                    scores[postings] += self.name_weights[gram]
+            if block is not None:
+                hits = block[scores[block] > 0]
+            else:
+                hits = np.flatnonzero(scores)
+            if len(hits) > self.max_candidates:
+                top = np.argpartition(-scores[hits], self.max_candidates)
+                hits = hits[top[: self.max_candidates]]
+            found.append(hits)
+
+        result = (
+            np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+        )
+        if block is not None:
+            result = np.intersect1d(result, block, assume_unique=True)
+        return result
+
+    @staticmethod
+    def _name_key(name: Any, matcher: MasterDataMatcher) -> str:
+        if not isinstance(name, str) or not name.strip():
+            return ""
+        return matcher.extract_company_info(name)["standardized_name"]
+
+    @staticmethod
+    def _name_grams(key: str, matcher: MasterDataMatcher) -> set:
+        grams = {key} if len(key) < 2 else {key[i : i + 2] for i in range(len(key) - 1)}
+        # 拼音音节二元组，覆盖同音字差异
+        syllables = [s for s in matcher._get_pinyin_syllables(key) if s]
+        if syllables:
+            grams.update(
+                "py:" + " ".join(syllables[i : i + 2])
+                for i in range(max(1, len(syllables) - 1))
+            )
+        return grams
+
+    @staticmethod
+    def _code_key(code: Any) -> str:
+        if not code or pd.isna(code):
+            return ""
+        return str(code).strip().upper()
+
+    def _code_grams(self, code: str) -> List[str]:
+        q = self.code_gram
+        if len(code) <= q:
+            return [code]
+        return [code[i : i + q] for i in range(len(code) - q + 1)]
+
+    @staticmethod
+    def _spec_key(specification: Any) -> Optional[str]:
+        if not specification:
+            return None
+        return str(specification).strip().upper()
+
+
+# 工作进程状态：初始化时构建一次匹配器与候选索引
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_match_worker(
+    master_data: pd.DataFrame, data_type: str, confidence_threshold: float
+):
+    matcher = MasterDataMatcher(None)
+    matcher.confidence_threshold = confidence_threshold
+    _worker_state["matcher"] = matcher
+    _worker_state["master_data"] = master_data
+    _worker_state["data_type"] = data_type
+    _worker_state["index"] = matcher.get_master_index(master_data, data_type)
+
+
+def _match_record_chunk(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    matcher = _worker_state["matcher"]
+    return [
+        matcher.match_single_record(
+            record,
+            _worker_state["master_data"],
+            _worker_state["data_type"],
+            _worker_state["index"],
+        )
+        for record in records
+    ]
@@ -0,0 +1,179 @@
+"""
+数据增强服务 - 主数据快照缓存
+按租户和主数据表缓存主数据及其预处理结果，避免每次匹配都重新加载和解析
+
+功能：
+- 主数据行按ID保存，支持按updated_at水位增量合并
+- 保存企业名称解析结果、拼音和按数据类型构建的候选索引
+- 同一快照的并发加载合并为一次
+- 主数据写入后按租户和表失效
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from ...cache.memory_cache import MemoryCache
+from ...cache.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class MasterDataSnapshot:
+    """租户主数据快照"""
+
+    def __init__(self, tenant_id: str, table: str):
+        self.tenant_id = tenant_id
+        self.table = table
+        self.rows: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        # 已合并变更中的最大updated_at，None表示主数据表不支持增量刷新
+        self.watermark: Optional[Any] = None
+        # 预处理结果：名称 -> 企业信息，名称 -> 拼音音节
+        self.company_info: Dict[str, Dict[str, Any]] = {}
+        self.pinyin: Dict[str, List[str]] = {}
+        # 预处理使用的匹配器，缓存即为上面两个字典
+        self.preprocessor: Optional[Any] = None
+        # 数据类型 -> 候选索引
+        self.indexes: Dict[str, Any] = {}
+        self.version = 0
+        self.refreshed_at = datetime.now()
+        self._master_data: Optional[pd.DataFrame] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    @property
+    def master_data(self) -> pd.DataFrame:
+        """主数据DataFrame（按需构建，快照变更后重建）"""
+        if self._master_data is None:
+            self._master_data = pd.DataFrame(list(self.rows.values()))
+        return self._master_data
+
+    def replace(self, rows: Iterable[Dict[str, Any]]):
+        """整体替换主数据行"""
+        self.rows.clear()
+        self.upsert(rows)
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """按ID合并变更行，返回合并的行数"""
+        count = 0
+        for row in rows:
+            self.rows[row.get("id")] = row
+            count += 1
+        if count or self._master_data is None:
+            self._master_data = None
+            self.indexes.clear()
+            self.version += 1
+        self.refreshed_at = datetime.now()
+        return count
+
+
+class MasterDataSnapshotCache:
+    """
+    主数据快照缓存
+
+    快照按"租户:表"存放在有界LRU内存缓存中，ttl到期后整体重新加载；
+    只有新建或替换的快照才写入缓存，原样复用或增量刷新的快照保持首次写入时的过期时间，
+    持续被使用的快照同样会到期。同一键的并发加载通过SingleFlight合并，只有一个请求访问数据库。
+    """
+
+    def __init__(
+        self,
+        max_snapshots: int = 64,
+        ttl: Optional[int] = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._cache = MemoryCache(
+            max_size=max_snapshots, strategy="lru", default_ttl=ttl, clock=clock
+        )
+        self._flight = SingleFlight()
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(tenant_id: str, table: str) -> str:
+        return f"{tenant_id}:{table}"
+
+    async def get(
+        self,
+        tenant_id: str,
+        table: str,
+        refresh: Callable[
+            [Optional[MasterDataSnapshot]], Awaitable[MasterDataSnapshot]
+        ],
+    ) -> MasterDataSnapshot:
+        """
+        获取快照
+
+        Args:
+            tenant_id: 租户ID
+            table: 主数据表名
+            refresh: 刷新函数，接收当前快照（可能为None），返回最新快照
+        """
+        key = self.make_key(tenant_id, table)
+
+        async def load() -> MasterDataSnapshot:
+            current = self._cache.get(key)
+            snapshot = await refresh(current)
+            if snapshot is not current:
+                self._cache.set(key, snapshot)
+            return snapshot
+
+        return await self._flight.do(key, load)
+
+    def invalidate(self, tenant_id: str, table: Optional[str] = None) -> int:
+        """
+        失效租户的快照
+
+        Args:
+            tenant_id: 租户ID
+            table: 主数据表名，带或不带schema前缀均可；None时失效该租户的全部快照
+
+        Returns:
+            失效的快照数
+        """
+        prefix = f"{tenant_id}:"
+        table_name = table.split(".")[-1] if table else None
+
+        removed = 0
+        for key in self._cache.keys():
+            if not key.startswith(prefix):
+                continue
+            if table_name and key[len(prefix) :].split(".")[-1] != table_name:
+                continue
+            self._cache.delete(key)
+            removed += 1
+
+        if removed:
+            self.invalidations += removed
+            logger.info(
+                f"主数据快照已失效: 租户 {tenant_id}，表 {table or '*'}，{removed}个"
+            )
+        return removed
+
+    def clear(self) -> int:
+        return self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        return {
+            "snapshots": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "evictions": self._cache.evictions,
+            "invalidations": self.invalidations,
+            "coalesced_loads": self._flight.coalesced,
+        }
+
+
+# 进程内共享的快照缓存（匹配服务按请求创建，快照需跨请求复用）
+snapshot_cache = MasterDataSnapshotCache()
+
+
+def invalidate_master_data_snapshot(tenant_id: str, table: Optional[str] = None) -> int:
+    """主数据写入后调用，失效对应租户和表的快照"""
+    return snapshot_cache.invalidate(tenant_id, table)
@@ -10,6 +10,7 @@
 """
 
 import logging
+import time
 from typing import List, Dict, Any, Optional
 import pandas as pd
 import uuid
@@ -18,6 +19,7 @@ from datetime import datetime, timedelta
 from ...security.database import SecureDatabaseService
 from ...error_handling.unified import BMOSError, BusinessError
 from ...services.base import BaseService, ServiceConfig
+from .master_data_snapshot import invalidate_master_data_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -199,23 +201,31 @@ class StagingTableManager(BaseService):
         schema_name: str,
         records: List[Dict[str, Any]],
         tenant_id: str,
+        chunk_size: int = 10000,
+        use_copy: bool = True,
     ) -> Dict[str, Any]:
         """
         插入数据到暂存表
 
+        优先使用COPY按块批量写入（同一事务），不可用或失败时回退为逐行INSERT。
+
         Args:
             staging_table_name: 暂存表名
             schema_name: Schema名
             records: 数据记录列表
             tenant_id: 租户ID
+            chunk_size: COPY每块行数
+            use_copy: 是否使用COPY批量写入
 
         Returns:
-            插入结果
+            插入结果（含写入方式和每秒行数）
         """
         try:
             if not records:
                 return {"row_count": 0, "status": "success"}
 
+            started = time.perf_counter()
+
             # 转换为DataFrame
             df = pd.DataFrame(records)
 
@@ -224,37 +234,74 @@ class StagingTableManager(BaseService):
             df["created_at"] = datetime.now()
             df["status"] = "pending"
 
-            # 插入数据（使用批量插入）
-            # 注意：这里简化处理，实际应该使用更安全的批量插入方法
-
-            inserted_count = 0
-            for record in df.to_dict("records"):
-                # 构建INSERT语句
-                columns = list(record.keys())
-                values = list(record.values())
-                placeholders = [f"${i+1}" for i in range(len(values))]
-
-                insert_sql = f"""
-                    INSERT INTO {schema_name}.{staging_table_name} 
-                    ({', '.join(f'"{col}"' for col in columns)})
-                    VALUES ({', '.join(placeholders)})
-                """
-
-                await self.db_service.execute_query(insert_sql, params=values)
-                inserted_count += 1
+            columns = [str(col) for col in df.columns]
+            method = "insert"
+            inserted_count = None
+
+            if use_copy and hasattr(self.db_service, "copy_records"):
+                # 缺失值统一为None；按列推断可空类型，避免整数列因缺失值变为浮点数
+                typed = df.convert_dtypes()
+                values = typed.astype(object).where(typed.notna(), None)
+                try:
+                    inserted_count = await self.db_service.copy_records(
+                        staging_table_name,
+                        columns,
+                        values.itertuples(index=False, name=None),
+                        schema_name=schema_name,
+                        chunk_size=chunk_size,
+                    )
+                    method = "copy"
+                except Exception as e:
+                    # COPY在事务中执行，失败时已整体回滚，可以安全回退
+                    logger.warning(f"COPY写入暂存表失败，回退为逐行插入: {e}")
+
+            if inserted_count is None:
+                inserted_count = await self._insert_rows(
+                    staging_table_name, schema_name, df
+                )
 
-            logger.info(f"插入 {inserted_count} 条记录到暂存表 {staging_table_name}")
+            elapsed = time.perf_counter() - started
+            rows_per_second = inserted_count / elapsed if elapsed > 0 else 0.0
+            logger.info(
+                f"插入 {inserted_count} 条记录到暂存表 {staging_table_name}"
+                f"（{method}，{elapsed:.2f}秒，{rows_per_second:.0f}行/秒）"
+            )
 
             return {
                 "row_count": inserted_count,
                 "status": "success",
                 "staging_table_name": staging_table_name,
+                "method": method,
+                "elapsed_seconds": elapsed,
+                "rows_per_second": rows_per_second,
             }
 
         except Exception as e:
             logger.error(f"插入暂存表失败: {e}")
             raise StagingTableError(f"插入暂存表失败: {e}")
 
+    async def _insert_rows(
+        self, staging_table_name: str, schema_name: str, df: pd.DataFrame
+    ) -> int:
+        """逐行INSERT写入暂存表（COPY不可用时的回退路径）"""
+        inserted_count = 0
+        for record in df.to_dict("records"):
+            # 构建INSERT语句
+            columns = list(record.keys())
+            values = list(record.values())
+            placeholders = [f"${i+1}" for i in range(len(values))]
+
+            insert_sql = f"""
+                INSERT INTO {schema_name}.{staging_table_name} 
+                ({', '.join(f'"{col}"' for col in columns)})
+                VALUES ({', '.join(placeholders)})
+            """
+
+            await self.db_service.execute_query(insert_sql, params=values)
+            inserted_count += 1
+
+        return inserted_count
+
     async def migrate_to_target(
         self,
         staging_table_name: str,
@@ -334,6 +381,9 @@ class StagingTableManager(BaseService):
                 logger.error(f"数据迁移事务失败: {e}")
                 raise
 
+            # 正式表可能是主数据表，失效该租户的主数据快照
+            invalidate_master_data_snapshot(tenant_id, target_table)
+
             logger.info(
                 f"从暂存表 {staging_table_name} 迁移 {row_count} 条记录到 {target_table}"
             )
@@ -469,6 +519,7 @@ class StagingTableManager(BaseService):
                         staging_table_name, schema_name, records, tenant_id
                     )
                     result["row_count"] = insert_result["row_count"]
+                    result["rows_per_second"] = insert_result["rows_per_second"]
 
                 return result
 
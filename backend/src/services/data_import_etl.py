@@ -6,11 +6,24 @@
 import asyncio
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Union, Tuple
-from datetime import datetime, timedelta
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Any,
+    Optional,
+    Union,
+    Tuple,
+)
+from datetime import date, datetime, timedelta
 import logging
 import json
 import re
+from itertools import chain, groupby, islice
+from operator import itemgetter
 from pathlib import Path
 import openpyxl
 import csv
@@ -18,6 +31,16 @@ import sqlite3
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from .columnar_batch import (
+    ColumnarBatch,
+    ParquetSpill,
+    blank_mask,
+    is_string_type,
+    to_arrow_array,
+)
+import pyarrow as pa
+import pyarrow.compute as pc
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +90,8 @@ class ImportResult:
     processing_time: float
     import_id: str
     timestamp: datetime
+    # 溢写目录（导入中断时保留，可用 resume_data_import 续传）
+    spill_path: Optional[str] = None
 
 
 @dataclass
@@ -86,18 +111,46 @@ class DataValidationRule:
     """数据验证规则"""
 
     field_name: str
-    rule_type: str  # 'range', 'format', 'enum', 'custom'
+    rule_type: str  # 'range', 'format', 'enum', 'required', 'type'
     rule_value: Any
-    error_message: str
+    error_message: Optional[str] = None
 
 
 class DataImportETL:
     """数据导入ETL处理器"""
 
-    def __init__(self, db_service, cache_service):
+    # 支持流式分块读取的数据源
+    STREAMING_SOURCES = (DataSourceType.EXCEL, DataSourceType.CSV)
+
+    def __init__(
+        self,
+        db_service,
+        cache_service,
+        chunk_size: int = 10000,
+        csv_sample_size: int = 64 * 1024,
+        spill_threshold: Optional[int] = 100000,
+        spill_dir: Optional[str] = None,
+        max_error_messages: Optional[int] = 1000,
+    ):
         self.db_service = db_service
         self.cache_service = cache_service
 
+        # 每个数据块的行数（可通过 import_config["chunk_size"] 覆盖）
+        self.chunk_size = chunk_size
+
+        # 检测CSV分隔符时读取的样本字符数
+        self.csv_sample_size = csv_sample_size
+
+        # 数据块边读边加载。加载中断时，数据行数超过该值的导入重新读取数据源溢写为
+        # Parquet，可用 resume_data_import 从失败的数据块续传（None表示不溢写），
+        # 可通过 import_config["spill_threshold"] 和 import_config["spill_dir"] 覆盖
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+
+        # 一次导入最多生成的验证错误消息数（None表示不限制），超出部分只统计违规行数，
+        # 可通过 import_config["max_error_messages"] 覆盖
+        self.max_error_messages = max_error_messages
+
         # 数据质量检查器
         self.quality_checker = DataQualityChecker()
 
@@ -107,8 +160,9 @@ class DataImportETL:
         # 数据转换器
         self.data_transformer = DataTransformer()
 
-        # 验证规则
+        # 验证规则及其编译器
         self.validation_rules = self._load_validation_rules()
+        self.rule_compiler = ValidationRuleCompiler()
 
     async def process_data_import(
         self,
@@ -123,58 +177,175 @@ class DataImportETL:
         start_time = datetime.now()
         import_id = f"import_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
+        spill_path = None
+
         try:
-            # 1. 读取原始数据
-            raw_data = await self._read_source_data(file_path, source_type)
+            chunk_size = import_config.get("chunk_size", self.chunk_size)
+            spill_threshold = import_config.get("spill_threshold", self.spill_threshold)
+
+            # 1. 读取原始数据（Excel/CSV只读取样本，数据在后续按块流式读取）
+            raw_data = None
+            if source_type in self.STREAMING_SOURCES:
+                sample_data = await self._read_source_sample(file_path, source_type)
+            else:
+                raw_data = await self._read_source_data(file_path, source_type)
+                sample_data = raw_data
 
             # 2. 检测文档格式
-            detected_format = await self._detect_document_format(raw_data)
+            detected_format = await self._detect_document_format(sample_data)
             if detected_format != document_format:
                 logger.warning(
                     f"检测到的格式 {detected_format} 与指定格式 {document_format} 不匹配"
                 )
 
-            # 3. 解析数据结构
-            parsed_data = await self._parse_document_structure(
-                raw_data, document_format
-            )
-
-            # 4. 数据质量检查
-            quality_report = await self._check_data_quality(parsed_data)
-
-            # 5. 字段映射和转换
-            mapped_data = await self._apply_field_mappings(parsed_data, field_mappings)
-
-            # 6. 数据验证
-            validation_result = await self._validate_data(mapped_data, field_mappings)
-
-            # 7. 数据清洗
-            cleaned_data = await self._clean_data(mapped_data, validation_result)
+            state = self._new_import_state()
+            seen_rows = {}
+            loaded_batches = 0
 
-            # 8. 数据加载
-            load_result = await self._load_data_to_target(
-                cleaned_data, target_table, import_config
-            )
+            try:
+                # 3. 解析数据结构并转换为列式数据块
+                async for parsed_data in self._iter_parsed_chunks(
+                    file_path, source_type, document_format, chunk_size, raw_data
+                ):
+                    for batch in ColumnarBatch.from_parsed(parsed_data):
+                        # 4-8. 逐块质量检查、字段映射、验证、清洗，处理完即加载
+                        await self._process_batch(
+                            batch,
+                            field_mappings,
+                            target_table,
+                            import_config,
+                            state,
+                            seen_rows,
+                        )
+                        if batch.num_rows:
+                            loaded_batches += 1
+
+            except Exception:
+                # 大批量数据加载中断：溢写为Parquet，可从失败的数据块续传
+                if spill_threshold is not None:
+                    spill_path = await self._spill_for_resume(
+                        file_path,
+                        source_type,
+                        document_format,
+                        field_mappings,
+                        target_table,
+                        import_config,
+                        import_id,
+                        raw_data,
+                        loaded_batches,
+                        state,
+                    )
+                raise
 
             # 9. 生成导入结果
+            return self._build_import_result(state, import_id, start_time)
+
+        except Exception as e:
+            logger.error(f"Data import failed: {str(e)}")
             processing_time = (datetime.now() - start_time).total_seconds()
 
             return ImportResult(
-                success=load_result["success"],
-                total_records=len(parsed_data),
-                successful_records=load_result["successful_count"],
-                failed_records=load_result["failed_count"],
-                quality_score=quality_report["overall_score"],
-                quality_level=quality_report["quality_level"],
-                errors=validation_result["errors"],
-                warnings=quality_report["warnings"],
+                success=False,
+                total_records=0,
+                successful_records=0,
+                failed_records=0,
+                quality_score=0.0,
+                quality_level=DataQualityLevel.POOR,
+                errors=[str(e)],
+                warnings=[],
                 processing_time=processing_time,
                 import_id=import_id,
                 timestamp=datetime.now(),
+                spill_path=spill_path,
             )
 
+    async def _spill_for_resume(
+        self,
+        file_path: str,
+        source_type: DataSourceType,
+        document_format: DocumentFormat,
+        field_mappings: List[FieldMapping],
+        target_table: str,
+        import_config: Dict[str, Any],
+        import_id: str,
+        raw_data: Any,
+        loaded_batches: int,
+        state: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        导入中断后重新读取数据源并溢写为Parquet，返回溢写目录
+
+        前 loaded_batches 个数据块记为已加载，导入统计随进度保存；数据行数
+        不超过 spill_threshold 时不保留溢写（重新导入即可），返回None。
+        """
+        chunk_size = import_config.get("chunk_size", self.chunk_size)
+        spill_threshold = import_config.get("spill_threshold", self.spill_threshold)
+
+        spill = ParquetSpill.create(
+            import_config.get("spill_dir", self.spill_dir),
+            import_id,
+            {
+                "import_id": import_id,
+                "file_path": file_path,
+                "source_type": source_type.value,
+                "document_format": document_format.value,
+                "field_mappings": [asdict(mapping) for mapping in field_mappings],
+                "target_table": target_table,
+                "import_config": import_config,
+            },
+        )
+        try:
+            async for parsed_data in self._iter_parsed_chunks(
+                file_path, source_type, document_format, chunk_size, raw_data
+            ):
+                for batch in ColumnarBatch.from_parsed(parsed_data):
+                    spill.write(batch)
+            spill.finish()
+
+            if spill.total_rows <= spill_threshold:
+                spill.remove()
+                return None
+
+            positions = [
+                (part_index, row_group_index)
+                for part_index, part in enumerate(spill.manifest["parts"])
+                for row_group_index in range(len(part["row_groups"]))
+            ]
+            if loaded_batches:
+                spill.mark_loaded(positions[loaded_batches - 1], state)
+            return spill.directory
+
         except Exception as e:
-            logger.error(f"Data import failed: {str(e)}")
+            logger.error(f"Failed to spill import for resume: {str(e)}")
+            spill.remove()
+            return None
+
+    async def resume_data_import(self, spill_path: str) -> ImportResult:
+        """从溢写目录续传中断的导入，跳过已加载的数据块"""
+        start_time = datetime.now()
+        spill = ParquetSpill.open(spill_path)
+        import_info = spill.import_info
+        import_id = import_info["import_id"]
+
+        try:
+            field_mappings = [
+                FieldMapping(**mapping) for mapping in import_info["field_mappings"]
+            ]
+            state = spill.restore_state(self._new_import_state())
+
+            await self._process_spill(
+                spill,
+                field_mappings,
+                import_info["target_table"],
+                import_info["import_config"],
+                state,
+            )
+            spill.remove()
+
+            return self._build_import_result(state, import_id, start_time)
+
+        except Exception as e:
+            logger.error(f"Data import resume failed: {str(e)}")
             processing_time = (datetime.now() - start_time).total_seconds()
 
             return ImportResult(
@@ -189,8 +360,131 @@ class DataImportETL:
                 processing_time=processing_time,
                 import_id=import_id,
                 timestamp=datetime.now(),
+                spill_path=spill_path,
             )
 
+    @staticmethod
+    def _new_import_state() -> Dict[str, Any]:
+        """导入过程的累计统计（溢写时随进度保存）"""
+        return {
+            "total_records": 0,
+            "successful_records": 0,
+            "failed_records": 0,
+            "load_success": True,
+            "quality_issue_count": 0,
+            "validation_error_count": 0,
+            "violation_counts": {},
+            "warnings": [],
+            "errors": [],
+        }
+
+    async def _process_batch(
+        self,
+        batch: ColumnarBatch,
+        field_mappings: List[FieldMapping],
+        target_table: str,
+        import_config: Dict[str, Any],
+        state: Dict[str, Any],
+        seen_rows: Dict[Any, set],
+    ):
+        """
+        对一个数据块执行质量检查、字段映射、验证、清洗和加载
+
+        导入统计在数据块加载完成后才更新，加载中断时state只包含已加载的数据块。
+        """
+        # 4. 数据质量检查（重复行跨数据块检测）
+        quality_report = await self._check_data_quality(batch, seen_rows)
+
+        # 5. 字段映射和转换
+        mapped_data = await self._apply_field_mappings(batch, field_mappings)
+
+        # 6. 数据验证（错误消息总数不超过 max_error_messages，其余只统计违规行数）
+        max_errors = import_config.get("max_error_messages", self.max_error_messages)
+        if max_errors is not None:
+            max_errors = max(0, max_errors - len(state["errors"]))
+        validation_result = await self._validate_data(
+            mapped_data, field_mappings, max_errors
+        )
+
+        # 7. 数据清洗
+        cleaned_data = await self._clean_data(mapped_data, validation_result)
+
+        # 8. 数据加载
+        load_result = await self._load_data_to_target(
+            cleaned_data, target_table, import_config
+        )
+
+        state["total_records"] += batch.num_rows
+        state["quality_issue_count"] += len(quality_report["issues"])
+        state["warnings"].extend(quality_report["warnings"])
+        state["warnings"].extend(mapped_data.meta.get("warnings", []))
+        state["errors"].extend(validation_result["errors"])
+        state["validation_error_count"] += validation_result.get(
+            "violation_count", len(validation_result["errors"])
+        )
+        violation_counts = state["violation_counts"]
+        for violation in validation_result.get("violations", []):
+            key = f"{violation['field']}:{violation['rule_type']}"
+            violation_counts[key] = violation_counts.get(key, 0) + violation["count"]
+        state["load_success"] = state["load_success"] and load_result["success"]
+        state["successful_records"] += load_result["successful_count"]
+        state["failed_records"] += load_result["failed_count"]
+
+    async def _process_spill(
+        self,
+        spill: ParquetSpill,
+        field_mappings: List[FieldMapping],
+        target_table: str,
+        import_config: Dict[str, Any],
+        state: Dict[str, Any],
+    ):
+        """逐个行组处理溢写文件，每加载一个数据块记录一次进度"""
+        loaded = tuple(spill.progress.get("loaded", (0, 0)))
+        seen_rows = {}
+
+        for position, batch in spill.iter_batches(skip_loaded=False):
+            if position < loaded:
+                # 已加载的数据块只恢复重复行检测的状态
+                self.quality_checker.remember_rows(batch, seen_rows)
+                continue
+
+            await self._process_batch(
+                batch, field_mappings, target_table, import_config, state, seen_rows
+            )
+            spill.mark_loaded(position, state)
+
+    def _build_import_result(
+        self, state: Dict[str, Any], import_id: str, start_time: datetime
+    ) -> ImportResult:
+        processing_time = (datetime.now() - start_time).total_seconds()
+        quality_score, quality_level = self.quality_checker.score_quality(
+            state["quality_issue_count"]
+        )
+
+        errors = state["errors"]
+        if state["validation_error_count"] > len(errors):
+            counts = "，".join(
+                f"{key} {count} 行" for key, count in state["violation_counts"].items()
+            )
+            errors = errors + [
+                f"共 {state['validation_error_count']} 条验证错误，"
+                f"仅列出前 {len(errors)} 条（{counts}）"
+            ]
+
+        return ImportResult(
+            success=state["load_success"],
+            total_records=state["total_records"],
+            successful_records=state["successful_records"],
+            failed_records=state["failed_records"],
+            quality_score=quality_score,
+            quality_level=quality_level,
+            errors=errors,
+            warnings=state["warnings"],
+            processing_time=processing_time,
+            import_id=import_id,
+            timestamp=datetime.now(),
+        )
+
     async def _read_source_data(
         self, file_path: str, source_type: DataSourceType
     ) -> Any:
@@ -215,26 +509,63 @@ class DataImportETL:
             logger.error(f"Failed to read source data: {str(e)}")
             raise
 
+    async def _read_source_sample(
+        self, file_path: str, source_type: DataSourceType, sample_rows: int = 5
+    ) -> Dict[str, Any]:
+        """读取数据源样本（第一个工作表或CSV的前几行），用于检测文档格式"""
+        try:
+            if source_type == DataSourceType.EXCEL:
+                sheets_data = {}
+                excel_rows = self._iter_excel_rows(file_path)
+                try:
+                    for sheet_name, rows in groupby(excel_rows, key=itemgetter(0)):
+                        data = [row for _, row in islice(rows, sample_rows)]
+                        sheets_data[sheet_name] = {"data": data}
+                        break
+                finally:
+                    excel_rows.close()
+                return {"type": "excel", "file_path": file_path, "sheets": sheets_data}
+
+            elif source_type == DataSourceType.CSV:
+                with open(file_path, "r", encoding="utf-8") as file:
+                    separator = self._sniff_csv_separator(file)
+                    reader = csv.reader(file, delimiter=separator)
+                    data = list(islice(reader, sample_rows))
+
+                return {
+                    "type": "csv",
+                    "file_path": file_path,
+                    "data": data,
+                    "separator": separator,
+                }
+
+            else:
+                return await self._read_source_data(file_path, source_type)
+
+        except Exception as e:
+            logger.error(f"Failed to read source sample: {str(e)}")
+            raise
+
     async def _read_excel_file(self, file_path: str) -> Dict[str, Any]:
         """读取Excel文件"""
         try:
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            sheets_data = {}
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheets_data = {}
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
+                for sheet_name in workbook.sheetnames:
+                    sheet = workbook[sheet_name]
 
-                # 读取所有数据
-                data = []
-                for row in sheet.iter_rows(values_only=True):
-                    if any(cell is not None for cell in row):  # 跳过空行
-                        data.append(list(row))
+                    # 读取所有数据
+                    data = [row for _, row in self._iter_sheet_rows(sheet_name, sheet)]
 
-                sheets_data[sheet_name] = {
-                    "data": data,
-                    "max_row": sheet.max_row,
-                    "max_column": sheet.max_column,
-                }
+                    sheets_data[sheet_name] = {
+                        "data": data,
+                        "max_row": sheet.max_row,
+                        "max_column": sheet.max_column,
+                    }
+            finally:
+                workbook.close()
 
             return {"type": "excel", "file_path": file_path, "sheets": sheets_data}
 
@@ -242,23 +573,27 @@ class DataImportETL:
             logger.error(f"Failed to read Excel file: {str(e)}")
             raise
 
+    def _iter_excel_rows(self, file_path: str) -> Iterator[Tuple[str, List[Any]]]:
+        """以只读模式流式读取Excel所有工作表的非空行，产出 (工作表名, 行)"""
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet_name in workbook.sheetnames:
+                yield from self._iter_sheet_rows(sheet_name, workbook[sheet_name])
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _iter_sheet_rows(sheet_name: str, sheet) -> Iterator[Tuple[str, List[Any]]]:
+        """逐行读取工作表，跳过空行"""
+        for row in sheet.iter_rows(values_only=True):
+            if any(cell is not None for cell in row):  # 跳过空行
+                yield sheet_name, list(row)
+
     async def _read_csv_file(self, file_path: str) -> Dict[str, Any]:
         """读取CSV文件"""
         try:
             with open(file_path, "r", encoding="utf-8") as file:
-                # 检测编码
-                content = file.read()
-
-                # 尝试不同的分隔符
-                separators = [",", ";", "\t", "|"]
-                detected_separator = ","
-
-                for sep in separators:
-                    if content.count(sep) > content.count(detected_separator):
-                        detected_separator = sep
-
-                # 重新读取文件
-                file.seek(0)
+                detected_separator = self._sniff_csv_separator(file)
                 reader = csv.reader(file, delimiter=detected_separator)
                 data = list(reader)
 
@@ -273,6 +608,27 @@ class DataImportETL:
             logger.error(f"Failed to read CSV file: {str(e)}")
             raise
 
+    def _iter_csv_rows(self, file_path: str) -> Iterator[List[str]]:
+        """流式读取CSV行"""
+        with open(file_path, "r", encoding="utf-8") as file:
+            separator = self._sniff_csv_separator(file)
+            yield from csv.reader(file, delimiter=separator)
+
+    def _sniff_csv_separator(self, file) -> str:
+        """根据文件开头的样本检测分隔符，检测后文件指针回到开头"""
+        sample = file.read(self.csv_sample_size)
+        file.seek(0)
+
+        # 尝试不同的分隔符
+        separators = [",", ";", "\t", "|"]
+        detected_separator = ","
+
+        for sep in separators:
+            if sample.count(sep) > sample.count(detected_separator):
+                detected_separator = sep
+
+        return detected_separator
+
     async def _read_json_file(self, file_path: str) -> Dict[str, Any]:
         """读取JSON文件"""
         try:
@@ -471,6 +827,90 @@ class DataImportETL:
             logger.error(f"Failed to parse document structure: {str(e)}")
             raise
 
+    async def _iter_parsed_chunks(
+        self,
+        file_path: str,
+        source_type: DataSourceType,
+        document_format: DocumentFormat,
+        chunk_size: int,
+        raw_data: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        按块产出解析后的数据
+
+        每个数据块与 _parse_document_structure 的结果结构相同，只包含一部分数据行，
+        并以 row_offset 记录首行在原数据中的位置。Excel/CSV边读边解析，
+        内存占用只与数据块大小有关；其他数据源整体读取后再分块。
+        """
+        if source_type == DataSourceType.EXCEL:
+            for sheet_name, sheet_rows in groupby(
+                self._iter_excel_rows(file_path), key=itemgetter(0)
+            ):
+                rows = (row for _, row in sheet_rows)
+
+                # 根据工作表开头几行解析表头
+                head = list(islice(rows, 5))
+                parsed_head = await self._parse_excel_structure(
+                    {"sheets": {sheet_name: {"data": head}}}, document_format
+                )
+                sheet_head = parsed_head["sheets"].get(sheet_name)
+                if sheet_head is None:
+                    continue
+
+                body = [] if document_format == DocumentFormat.HEADER_ONLY else rows
+                for row_offset, chunk in _iter_row_chunks(
+                    chain(sheet_head["rows"], body), chunk_size
+                ):
+                    yield {
+                        "type": "parsed_excel",
+                        "sheets": {
+                            sheet_name: dict(
+                                sheet_head, rows=chunk, row_offset=row_offset
+                            )
+                        },
+                        "original_format": document_format,
+                    }
+
+        elif source_type == DataSourceType.CSV:
+            rows = self._iter_csv_rows(file_path)
+
+            # 根据第一行解析表头
+            parsed_head = await self._parse_csv_structure(
+                {"data": list(islice(rows, 1))}, document_format
+            )
+
+            body = [] if document_format == DocumentFormat.HEADER_ONLY else rows
+            for row_offset, chunk in _iter_row_chunks(
+                chain(parsed_head["rows"], body), chunk_size
+            ):
+                yield dict(parsed_head, rows=chunk, row_offset=row_offset)
+
+        else:
+            if raw_data is None:
+                raw_data = await self._read_source_data(file_path, source_type)
+            parsed_data = await self._parse_document_structure(
+                raw_data, document_format
+            )
+
+            if "rows" not in parsed_data:
+                yield parsed_data
+                return
+
+            for row_offset, chunk in _iter_row_chunks(parsed_data["rows"], chunk_size):
+                yield dict(parsed_data, rows=chunk, row_offset=row_offset)
+
+    @staticmethod
+    def _count_rows(parsed_data: Union[Dict[str, Any], ColumnarBatch]) -> int:
+        """统计解析后数据的行数"""
+        if isinstance(parsed_data, ColumnarBatch):
+            return parsed_data.num_rows
+        if "sheets" in parsed_data:
+            return sum(
+                len(sheet_data.get("rows", []))
+                for sheet_data in parsed_data["sheets"].values()
+            )
+        return len(parsed_data.get("rows", []))
+
     async def _parse_excel_structure(
         self, excel_data: Dict[str, Any], document_format: DocumentFormat
     ) -> Dict[str, Any]:
@@ -700,10 +1140,14 @@ class DataImportETL:
 
         return merged_headers
 
-    async def _check_data_quality(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _check_data_quality(
+        self,
+        parsed_data: Dict[str, Any],
+        seen_rows: Optional[Dict[Any, set]] = None,
+    ) -> Dict[str, Any]:
         """检查数据质量"""
         try:
-            return await self.quality_checker.check_quality(parsed_data)
+            return await self.quality_checker.check_quality(parsed_data, seen_rows)
         except Exception as e:
             logger.error(f"Failed to check data quality: {str(e)}")
             return {
@@ -724,91 +1168,140 @@ class DataImportETL:
             raise
 
     async def _validate_data(
-        self, mapped_data: Dict[str, Any], field_mappings: List[FieldMapping]
+        self,
+        mapped_data: Union[Dict[str, Any], ColumnarBatch],
+        field_mappings: List[FieldMapping],
+        max_errors: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """验证数据"""
-        try:
-            validation_result = {"valid": True, "errors": [], "warnings": []}
+        """
+        验证数据
 
-            # 应用验证规则
+        应用字段映射上的必填、验证规则以及加载的默认验证规则。结果中 violations
+        按规则列出违规行号（列式数据为全局行号），errors 最多生成 max_errors 条。
+        """
+        try:
+            rules = []
             for mapping in field_mappings:
+                if mapping.is_required:
+                    rules.append(
+                        DataValidationRule(mapping.target_field, "required", None)
+                    )
                 if mapping.validation_rule:
-                    field_validation = await self._validate_field(
-                        mapped_data, mapping.target_field, mapping.validation_rule
+                    rules.append(
+                        ValidationRuleCompiler.parse_rule(
+                            mapping.target_field, mapping.validation_rule
+                        )
                     )
+            rules.extend(self.validation_rules)
 
-                    if not field_validation["valid"]:
-                        validation_result["valid"] = False
-                        validation_result["errors"].extend(field_validation["errors"])
-
-                    validation_result["warnings"].extend(field_validation["warnings"])
-
-            return validation_result
+            return self._apply_validation_rules(mapped_data, rules, max_errors)
 
         except Exception as e:
             logger.error(f"Failed to validate data: {str(e)}")
             return {"valid": False, "errors": [str(e)], "warnings": []}
 
     async def _validate_field(
-        self, data: Dict[str, Any], field_name: str, validation_rule: str
+        self,
+        data: Union[Dict[str, Any], ColumnarBatch],
+        field_name: str,
+        validation_rule: str,
+        max_errors: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """验证单个字段"""
+        """验证单个字段（规则格式为 "类型:值"，支持范围、格式、枚举、必填和类型验证）"""
         try:
-            # 这里实现具体的字段验证逻辑
-            # 支持范围验证、格式验证、枚举验证等
-
-            result = {"valid": True, "errors": [], "warnings": []}
-
-            # 解析验证规则
-            rule_parts = validation_rule.split(":")
-            rule_type = rule_parts[0]
-            rule_value = rule_parts[1] if len(rule_parts) > 1 else None
-
-            # 获取字段数据
-            field_data = self._extract_field_data(data, field_name)
-
-            if rule_type == "range":
-                # 范围验证
-                min_val, max_val = map(float, rule_value.split(","))
-                for value in field_data:
-                    if isinstance(value, (int, float)) and not (
-                        min_val <= value <= max_val
-                    ):
-                        result["valid"] = False
-                        result["errors"].append(
-                            f"字段 {field_name} 的值 {value} 超出范围 [{min_val}, {max_val}]"
-                        )
-
-            elif rule_type == "format":
-                # 格式验证
-                pattern = re.compile(rule_value)
-                for value in field_data:
-                    if isinstance(value, str) and not pattern.match(value):
-                        result["valid"] = False
-                        result["errors"].append(
-                            f"字段 {field_name} 的值 {value} 不符合格式 {rule_value}"
-                        )
-
-            elif rule_type == "enum":
-                # 枚举验证
-                allowed_values = rule_value.split(",")
-                for value in field_data:
-                    if str(value) not in allowed_values:
-                        result["valid"] = False
-                        result["errors"].append(
-                            f"字段 {field_name} 的值 {value} 不在允许的枚举值中: {allowed_values}"
-                        )
-
-            return result
+            rule = ValidationRuleCompiler.parse_rule(field_name, validation_rule)
+            return self._apply_validation_rules(data, [rule], max_errors)
 
         except Exception as e:
             logger.error(f"Failed to validate field: {str(e)}")
             return {"valid": False, "errors": [str(e)], "warnings": []}
 
-    def _extract_field_data(self, data: Dict[str, Any], field_name: str) -> List[Any]:
+    def _apply_validation_rules(
+        self,
+        data: Union[Dict[str, Any], ColumnarBatch],
+        rules: List[DataValidationRule],
+        max_errors: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """按列执行编译后的验证规则，只为前 max_errors 个违规值生成错误消息"""
+        result = {
+            "valid": True,
+            "errors": [],
+            "warnings": [],
+            "violations": [],
+            "violation_count": 0,
+        }
+        row_offset = data.row_offset if isinstance(data, ColumnarBatch) else 0
+        columns = {}
+
+        for compiled in self.rule_compiler.compile(rules):
+            field_name = compiled.rule.field_name
+            if field_name not in columns:
+                columns[field_name] = self._extract_field_column(data, field_name)
+            if columns[field_name] is None:
+                continue
+
+            values, null = columns[field_name]
+            rows = np.flatnonzero(compiled.predicate(values, null))
+            if len(rows) == 0:
+                continue
+
+            result["valid"] = False
+            result["violation_count"] += len(rows)
+            result["violations"].append(
+                {
+                    "field": field_name,
+                    "rule_type": compiled.rule.rule_type,
+                    "rule_value": compiled.rule.rule_value,
+                    "rows": rows + row_offset,
+                    "count": len(rows),
+                }
+            )
+
+            if max_errors is not None:
+                rows = rows[: max(0, max_errors - len(result["errors"]))]
+            result["errors"].extend(
+                compiled.message(None if null[row] else values.iat[row]) for row in rows
+            )
+
+        return result
+
+    def _extract_field_column(
+        self, data: Union[Dict[str, Any], ColumnarBatch], field_name: str
+    ) -> Optional[Tuple[pd.Series, np.ndarray]]:
+        """提取字段数据为 (值Series, 空值掩码)，字段不存在时返回None"""
+        if isinstance(data, ColumnarBatch):
+            field_index = data.field_index(field_name)
+            if field_index is None or field_index >= data.num_columns:
+                return None
+            column = data.column(field_index)
+            values = column.to_pandas(
+                integer_object_nulls=True, timestamp_as_object=True
+            )
+            null = column.is_null().to_numpy(zero_copy_only=False)
+            return values.reset_index(drop=True), null
+
+        field_data = self._extract_field_data(data, field_name)
+        if not field_data:
+            return None
+        values = pd.Series(field_data, dtype=object)
+        null = np.fromiter(
+            (value is None for value in field_data), bool, len(field_data)
+        )
+        return values, null
+
+    def _extract_field_data(
+        self, data: Union[Dict[str, Any], ColumnarBatch], field_name: str
+    ) -> List[Any]:
         """提取字段数据"""
         try:
-            if "sheets" in data:
+            if isinstance(data, ColumnarBatch):
+                # 列式数据直接读取整列
+                field_index = data.field_index(field_name)
+                if field_index is None or field_index >= data.num_columns:
+                    return []
+                return data.column(field_index).to_pylist()
+
+            elif "sheets" in data:
                 # Excel数据
                 field_data = []
                 for sheet_name, sheet_data in data["sheets"].items():
@@ -970,14 +1463,242 @@ class DataImportETL:
         ]
 
 
+def _iter_row_chunks(
+    rows: Iterable[Any], chunk_size: int
+) -> Iterator[Tuple[int, List[Any]]]:
+    """按块切分行，产出 (块首行偏移, 数据行)；没有数据行时产出一个空块"""
+    rows = iter(rows)
+    chunk_size = max(1, chunk_size)
+    row_offset = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if chunk or row_offset == 0:
+            yield row_offset, chunk
+        if len(chunk) < chunk_size:
+            return
+        row_offset += len(chunk)
+
+
 # ==================== 辅助类 ====================
 
 
+class CompiledValidationRule:
+    """
+    编译后的验证规则
+
+    predicate 接收 (值Series, 空值掩码)，返回违反规则的行掩码；
+    message 为单个违规值生成错误消息。
+    """
+
+    def __init__(
+        self,
+        rule: DataValidationRule,
+        predicate: Callable[[pd.Series, np.ndarray], np.ndarray],
+        message: Callable[[Any], str],
+    ):
+        self.rule = rule
+        self.predicate = predicate
+        self.message = message
+
+
+class ValidationRuleCompiler:
+    """
+    验证规则编译器
+
+    把 DataValidationRule 编译为整列执行的谓词（pandas/NumPy掩码运算，格式规则预编译
+    正则后通过 str.match 匹配），代替逐个值的Python循环。编译结果按规则缓存。
+    """
+
+    # 类型规则的数据类型 -> (允许的Python类型, 排除的Python类型)
+    TYPE_CHECKS = {
+        "integer": ((int,), (bool,)),
+        "float": ((int, float), (bool,)),
+        "string": ((str,), ()),
+        "boolean": ((bool,), ()),
+        "date": ((date,), ()),
+    }
+
+    # numpy dtype.kind -> 该类列中值对应的Python类型
+    KIND_TYPES = {"b": bool, "i": int, "u": int, "f": float, "M": datetime}
+
+    def __init__(self):
+        self._compiled: Dict[Tuple[str, str, str, Optional[str]], Any] = {}
+
+    @staticmethod
+    def parse_rule(
+        field_name: str, validation_rule: str, error_message: Optional[str] = None
+    ) -> DataValidationRule:
+        """解析字段映射中 "类型:值" 形式的验证规则（值中可以包含冒号）"""
+        rule_type, _, rule_value = validation_rule.partition(":")
+        return DataValidationRule(
+            field_name, rule_type.strip(), rule_value or None, error_message
+        )
+
+    def compile(self, rules: List[DataValidationRule]) -> List[CompiledValidationRule]:
+        """编译规则列表，不支持的规则类型记录警告后跳过"""
+        compiled_rules = []
+        for rule in rules:
+            key = (
+                rule.field_name,
+                rule.rule_type,
+                str(rule.rule_value),
+                rule.error_message,
+            )
+            if key not in self._compiled:
+                self._compiled[key] = self._compile_rule(rule)
+            if self._compiled[key] is not None:
+                compiled_rules.append(self._compiled[key])
+        return compiled_rules
+
+    def _compile_rule(
+        self, rule: DataValidationRule
+    ) -> Optional[CompiledValidationRule]:
+        field_name = rule.field_name
+        rule_value = rule.rule_value
+
+        if rule.rule_type == "range":
+            # 范围验证（只检查数值）
+            if isinstance(rule_value, str):
+                min_val, max_val = map(float, rule_value.split(","))
+            else:
+                min_val, max_val = map(float, rule_value)
+            predicate = self._range_predicate(min_val, max_val)
+            template = f"字段 {field_name} 的值 {{}} 超出范围 [{min_val}, {max_val}]"
+
+        elif rule.rule_type == "format":
+            # 格式验证（只检查字符串）
+            predicate = self._format_predicate(re.compile(rule_value))
+            template = f"字段 {field_name} 的值 {{}} 不符合格式 {rule_value}"
+
+        elif rule.rule_type == "enum":
+            # 枚举验证（按字符串形式比较）
+            if isinstance(rule_value, str):
+                allowed_values = rule_value.split(",")
+            else:
+                allowed_values = [str(value) for value in rule_value]
+            predicate = self._enum_predicate(allowed_values)
+            template = (
+                f"字段 {field_name} 的值 {{}} 不在允许的枚举值中: {allowed_values}"
+            )
+
+        elif rule.rule_type == "required":
+            # 必填验证（空值或空白字符串）
+            predicate = self._required_predicate
+            template = f"字段 {field_name} 为必填字段，值 {{}} 为空"
+
+        elif rule.rule_type == "type" and rule_value in self.TYPE_CHECKS:
+            # 类型验证（空值不检查）
+            predicate = self._type_predicate(*self.TYPE_CHECKS[rule_value])
+            template = f"字段 {field_name} 的值 {{}} 不是 {rule_value} 类型"
+
+        else:
+            logger.warning(
+                f"不支持的验证规则: {field_name} {rule.rule_type}:{rule_value}"
+            )
+            return None
+
+        if rule.error_message:
+            template = f"字段 {field_name} 的值 {{}}：{rule.error_message}"
+        return CompiledValidationRule(rule, predicate, template.format)
+
+    @classmethod
+    def type_mask(
+        cls,
+        values: pd.Series,
+        null: np.ndarray,
+        types: Tuple[type, ...],
+        exclude: Tuple[type, ...] = (),
+    ) -> np.ndarray:
+        """值属于指定Python类型的行（与逐个 isinstance 判断一致）"""
+        if values.dtype != object:
+            # 类型一致的列按dtype整体判断
+            if isinstance(values.dtype, pd.StringDtype):
+                value_type = str
+            else:
+                value_type = cls.KIND_TYPES.get(values.dtype.kind)
+            if (
+                value_type is not None
+                and issubclass(value_type, types)
+                and not issubclass(value_type, exclude)
+            ):
+                return ~null
+            return np.zeros(len(values), dtype=bool)
+
+        return np.fromiter(
+            (
+                isinstance(value, types) and not isinstance(value, exclude)
+                for value in values
+            ),
+            bool,
+            len(values),
+        )
+
+    @classmethod
+    def _range_predicate(cls, min_val: float, max_val: float) -> Callable:
+        def predicate(values: pd.Series, null: np.ndarray) -> np.ndarray:
+            numeric = cls.type_mask(values, null, (int, float))
+            if not numeric.any():
+                return numeric
+            numbers = np.asarray(values.where(numeric, 0), dtype=float)
+            # NaN与任何边界比较都为False，按超出范围处理
+            return numeric & ~((numbers >= min_val) & (numbers <= max_val))
+
+        return predicate
+
+    @classmethod
+    def _format_predicate(cls, pattern: "re.Pattern") -> Callable:
+        def predicate(values: pd.Series, null: np.ndarray) -> np.ndarray:
+            is_str = cls.type_mask(values, null, (str,))
+            violation = np.zeros(len(values), dtype=bool)
+            if is_str.any():
+                matched = values[is_str].str.match(pattern)
+                violation[is_str] = ~matched.to_numpy(dtype=bool)
+            return violation
+
+        return predicate
+
+    @staticmethod
+    def _enum_predicate(allowed_values: List[str]) -> Callable:
+        def predicate(values: pd.Series, null: np.ndarray) -> np.ndarray:
+            strings = values.astype(str).to_numpy(dtype=object, na_value=None)
+            # 与 str(value) 保持一致：空值为"None"，NaN为"nan"
+            strings[null] = "None"
+            strings[pd.isna(strings)] = "nan"
+            return ~pd.Series(strings).isin(allowed_values).to_numpy()
+
+        return predicate
+
+    @classmethod
+    def _required_predicate(cls, values: pd.Series, null: np.ndarray) -> np.ndarray:
+        violation = null.copy()
+        is_str = cls.type_mask(values, null, (str,))
+        if is_str.any():
+            violation[is_str] = (values[is_str].str.strip() == "").to_numpy(dtype=bool)
+        return violation
+
+    @classmethod
+    def _type_predicate(
+        cls, types: Tuple[type, ...], exclude: Tuple[type, ...]
+    ) -> Callable:
+        def predicate(values: pd.Series, null: np.ndarray) -> np.ndarray:
+            return ~null & ~cls.type_mask(values, null, types, exclude)
+
+        return predicate
+
+
 class DataQualityChecker:
     """数据质量检查器"""
 
-    async def check_quality(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """检查数据质量"""
+    async def check_quality(
+        self, data: Dict[str, Any], seen_rows: Optional[Dict[Any, set]] = None
+    ) -> Dict[str, Any]:
+        """
+        检查数据质量
+
+        Args:
+            data: 解析后的数据（或其中一个数据块）
+            seen_rows: 已出现行的哈希（按工作表），分块检查时传入同一个字典以跨块检测重复行
+        """
         try:
             issues = []
             warnings = []
@@ -987,7 +1708,7 @@ class DataQualityChecker:
             issues.extend(missing_issues)
 
             # 检查重复值
-            duplicate_issues = await self._check_duplicates(data)
+            duplicate_issues = await self._check_duplicates(data, seen_rows)
             issues.extend(duplicate_issues)
 
             # 检查数据一致性
@@ -998,20 +1719,8 @@ class DataQualityChecker:
             format_issues = await self._check_formats(data)
             warnings.extend(format_issues)
 
-            # 计算质量分数
-            total_checks = 4
-            failed_checks = len(issues)
-            quality_score = max(0, (total_checks - failed_checks) / total_checks)
-
-            # 确定质量等级
-            if quality_score >= 0.95:
-                quality_level = DataQualityLevel.EXCELLENT
-            elif quality_score >= 0.85:
-                quality_level = DataQualityLevel.GOOD
-            elif quality_score >= 0.70:
-                quality_level = DataQualityLevel.FAIR
-            else:
-                quality_level = DataQualityLevel.POOR
+            # 计算质量分数和等级
+            quality_score, quality_level = self.score_quality(len(issues))
 
             return {
                 "overall_score": quality_score,
@@ -1029,17 +1738,72 @@ class DataQualityChecker:
                 "warnings": [],
             }
 
-    async def _check_missing_values(self, data: Dict[str, Any]) -> List[str]:
+    def score_quality(self, issue_count: int) -> Tuple[float, DataQualityLevel]:
+        """根据问题数计算质量分数和质量等级"""
+        total_checks = 4
+        quality_score = max(0, (total_checks - issue_count) / total_checks)
+
+        # 确定质量等级
+        if quality_score >= 0.95:
+            quality_level = DataQualityLevel.EXCELLENT
+        elif quality_score >= 0.85:
+            quality_level = DataQualityLevel.GOOD
+        elif quality_score >= 0.70:
+            quality_level = DataQualityLevel.FAIR
+        else:
+            quality_level = DataQualityLevel.POOR
+
+        return quality_score, quality_level
+
+    def remember_rows(self, batch: ColumnarBatch, seen_rows: Dict[Any, set]):
+        """只记录数据块中行的哈希（续传时恢复已加载数据块的重复行检测状态）"""
+        seen_rows.setdefault(batch.sheet_name, set()).update(
+            self._row_hashes(batch).tolist()
+        )
+
+    @staticmethod
+    def _row_hashes(batch: ColumnarBatch) -> np.ndarray:
+        """按列计算每行的哈希"""
+        if batch.num_columns == 0:
+            return np.zeros(batch.num_rows, dtype=np.uint64)
+        return pd.util.hash_pandas_object(
+            batch.to_pandas(zero_copy=False), index=False
+        ).to_numpy()
+
+    async def _check_missing_values(
+        self, data: Union[Dict[str, Any], ColumnarBatch]
+    ) -> List[str]:
         """检查缺失值"""
         issues = []
 
         try:
-            if "sheets" in data:
+            if isinstance(data, ColumnarBatch):
+                # 按列计算缺失掩码，按行优先顺序生成问题
+                headers = data.headers
+                width = min(len(headers), data.num_columns)
+                if width == 0 or data.num_rows == 0:
+                    return issues
+
+                missing = np.column_stack(
+                    [
+                        blank_mask(data.column(j)).to_numpy(zero_copy_only=False)
+                        for j in range(width)
+                    ]
+                )
+                prefix = (
+                    f"工作表 {data.sheet_name} " if data.sheet_name is not None else ""
+                )
+                for i, j in np.argwhere(missing):
+                    issues.append(
+                        f"{prefix}第 {data.row_offset + i + 1} 行字段 {headers[j]} 存在缺失值"
+                    )
+
+            elif "sheets" in data:
                 for sheet_name, sheet_data in data["sheets"].items():
                     rows = sheet_data.get("rows", [])
                     headers = sheet_data.get("headers", [])
 
-                    for i, row in enumerate(rows):
+                    for i, row in enumerate(rows, sheet_data.get("row_offset", 0)):
                         for j, cell in enumerate(row):
                             if cell is None or (
                                 isinstance(cell, str) and not cell.strip()
@@ -1053,7 +1817,7 @@ class DataQualityChecker:
                 rows = data["rows"]
                 headers = data.get("headers", [])
 
-                for i, row in enumerate(rows):
+                for i, row in enumerate(rows, data.get("row_offset", 0)):
                     for j, cell in enumerate(row):
                         if cell is None or (isinstance(cell, str) and not cell.strip()):
                             if j < len(headers):
@@ -1067,37 +1831,57 @@ class DataQualityChecker:
             logger.error(f"Failed to check missing values: {str(e)}")
             return [str(e)]
 
-    async def _check_duplicates(self, data: Dict[str, Any]) -> List[str]:
-        """检查重复值"""
+    async def _check_duplicates(
+        self,
+        data: Union[Dict[str, Any], ColumnarBatch],
+        seen_rows: Optional[Dict[Any, set]] = None,
+    ) -> List[str]:
+        """检查重复值（只保存行的哈希，分块检查时内存与行数而非数据量相关）"""
         issues = []
+        if seen_rows is None:
+            seen_rows = {}
 
         try:
-            if "sheets" in data:
+            if isinstance(data, ColumnarBatch):
+                # 按列计算行哈希，再依次与之前出现过的行比较
+                data_seen = seen_rows.setdefault(data.sheet_name, set())
+                prefix = (
+                    f"工作表 {data.sheet_name} " if data.sheet_name is not None else ""
+                )
+                for i, row_hash in enumerate(
+                    self._row_hashes(data).tolist(), data.row_offset
+                ):
+                    if row_hash in data_seen:
+                        issues.append(f"{prefix}第 {i+1} 行与之前的行完全重复")
+                    else:
+                        data_seen.add(row_hash)
+
+            elif "sheets" in data:
                 for sheet_name, sheet_data in data["sheets"].items():
                     rows = sheet_data.get("rows", [])
+                    sheet_seen = seen_rows.setdefault(sheet_name, set())
 
                     # 检查完全重复的行
-                    seen_rows = set()
-                    for i, row in enumerate(rows):
-                        row_tuple = tuple(row)
-                        if row_tuple in seen_rows:
+                    for i, row in enumerate(rows, sheet_data.get("row_offset", 0)):
+                        row_hash = hash(tuple(row))
+                        if row_hash in sheet_seen:
                             issues.append(
                                 f"工作表 {sheet_name} 第 {i+1} 行与之前的行完全重复"
                             )
                         else:
-                            seen_rows.add(row_tuple)
+                            sheet_seen.add(row_hash)
 
             elif "rows" in data:
                 rows = data["rows"]
+                data_seen = seen_rows.setdefault(None, set())
 
                 # 检查完全重复的行
-                seen_rows = set()
-                for i, row in enumerate(rows):
-                    row_tuple = tuple(row)
-                    if row_tuple in seen_rows:
+                for i, row in enumerate(rows, data.get("row_offset", 0)):
+                    row_hash = hash(tuple(row))
+                    if row_hash in data_seen:
                         issues.append(f"第 {i+1} 行与之前的行完全重复")
                     else:
-                        seen_rows.add(row_tuple)
+                        data_seen.add(row_hash)
 
             return issues
 
@@ -1142,11 +1926,14 @@ class FieldMapper:
     ) -> Dict[str, Any]:
         """应用字段映射"""
         try:
-            mapped_data = parsed_data.copy()
-
             # 创建映射字典
             mapping_dict = {mapping.source_field: mapping for mapping in field_mappings}
 
+            if isinstance(parsed_data, ColumnarBatch):
+                return await self._apply_mappings_columnar(parsed_data, mapping_dict)
+
+            mapped_data = parsed_data.copy()
+
             # 应用映射
             if "sheets" in mapped_data:
                 for sheet_name, sheet_data in mapped_data["sheets"].items():
@@ -1213,6 +2000,94 @@ class FieldMapper:
             logger.error(f"Failed to apply field mappings: {str(e)}")
             raise
 
+    async def _apply_mappings_columnar(
+        self, batch: ColumnarBatch, mapping_dict: Dict[str, FieldMapping]
+    ) -> ColumnarBatch:
+        """按列应用字段映射"""
+        headers = batch.headers
+
+        # 映射表头
+        mapped_headers = [
+            mapping_dict[header].target_field if header in mapping_dict else header
+            for header in headers
+        ]
+
+        # 按列转换数据
+        columns = list(batch.table.columns)
+        warnings = []
+        for i, header in enumerate(headers[: batch.num_columns]):
+            if header not in mapping_dict:
+                continue
+            mapping = mapping_dict[header]
+            columns[i], failed_count = await self._transform_column(columns[i], mapping)
+            if failed_count:
+                warnings.append(
+                    f"字段 {header} 有 {failed_count} 个值无法转换为 {mapping.data_type}，已置为空"
+                )
+
+        table = pa.Table.from_arrays(columns, names=batch.table.column_names)
+        return batch.replace(table, headers=mapped_headers, warnings=warnings)
+
+    async def _transform_column(
+        self, column: pa.ChunkedArray, mapping: FieldMapping
+    ) -> Tuple[pa.Array, int]:
+        """
+        转换一列数据
+
+        Returns:
+            (转换后的列, 无法转换的值个数)；文本和数值之间的基本类型转换按列计算，
+            转换规则和其他类型逐个单元格转换
+        """
+        if not mapping.transformation_rule:
+            if mapping.data_type == "string" and is_string_type(column.type):
+                return pc.fill_null(column, ""), 0
+            if mapping.data_type in ("integer", "float") and (
+                is_string_type(column.type)
+                or pa.types.is_integer(column.type)
+                or pa.types.is_floating(column.type)
+                or pa.types.is_null(column.type)
+            ):
+                return self._convert_numeric_column(column, mapping.data_type)
+
+        values = [
+            await self._transform_cell(cell, mapping) for cell in column.to_pylist()
+        ]
+        return to_arrow_array(values), 0
+
+    @staticmethod
+    def _convert_numeric_column(
+        column: pa.ChunkedArray, data_type: str
+    ) -> Tuple[pa.Array, int]:
+        """文本或数值列转换为整数/浮点数列，空值和空白文本转换为空"""
+        if is_string_type(column.type):
+            text = pd.Series(pc.utf8_trim_whitespace(column).to_pandas(), dtype=object)
+            blank = (text.isna() | (text == "")).to_numpy()
+            numbers = pd.to_numeric(text.where(~blank), errors="coerce").to_numpy(
+                dtype=float
+            )
+        elif pa.types.is_integer(column.type) and data_type == "integer":
+            return pc.cast(column, pa.int64()), 0
+        else:
+            numbers = (
+                pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+                if column.num_chunks
+                else np.array([], dtype=float)
+            )
+            blank = pc.is_null(column).to_numpy(zero_copy_only=False)
+            if data_type == "float":
+                # 数值列中的NaN原样保留
+                return pa.array(numbers, mask=blank), 0
+
+        if data_type == "integer":
+            valid = np.isfinite(numbers) & (np.abs(numbers) < 2**63)
+            values = np.where(valid, np.trunc(numbers), 0).astype(np.int64)
+        else:
+            valid = ~np.isnan(numbers)
+            values = numbers
+
+        failed_count = int((~valid & ~blank).sum())
+        return pa.array(values, mask=~valid), failed_count
+
     async def _transform_cell(self, cell: Any, mapping: FieldMapping) -> Any:
         """转换单元格数据"""
         try:
@@ -1309,7 +2184,10 @@ class DataTransformer:
     ) -> Dict[str, Any]:
         """清洗数据"""
         try:
-            cleaned_data = mapped_data.copy()
+            if isinstance(mapped_data, ColumnarBatch):
+                cleaned_data = mapped_data
+            else:
+                cleaned_data = mapped_data.copy()
 
             # 处理缺失值
             cleaned_data = await self._handle_missing_values(cleaned_data)
@@ -1329,7 +2207,14 @@ class DataTransformer:
     async def _handle_missing_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """处理缺失值"""
         try:
-            if "sheets" in data:
+            if isinstance(data, ColumnarBatch):
+                # 删除完全空的行
+                keep = np.zeros(data.num_rows, dtype=bool)
+                for column in data.table.columns:
+                    keep |= ~blank_mask(column).to_numpy(zero_copy_only=False)
+                return data.replace(data.table.filter(pa.array(keep)))
+
+            elif "sheets" in data:
                 for sheet_name, sheet_data in data["sheets"].items():
                     rows = sheet_data.get("rows", [])
 
@@ -1376,7 +2261,20 @@ class DataTransformer:
             # 这里可以实现数据标准化
             # 例如：字符串去空格、数字格式化等
 
-            if "sheets" in data:
+            if isinstance(data, ColumnarBatch):
+                columns = [
+                    (
+                        pc.utf8_trim_whitespace(column)
+                        if is_string_type(column.type)
+                        else column
+                    )
+                    for column in data.table.columns
+                ]
+                return data.replace(
+                    pa.Table.from_arrays(columns, names=data.table.column_names)
+                )
+
+            elif "sheets" in data:
                 for sheet_name, sheet_data in data["sheets"].items():
                     rows = sheet_data.get("rows", [])
 
@@ -4,21 +4,28 @@
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import Dict, List, Any, Optional, Set, Union, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
 import uuid
 import traceback
 from croniter import croniter
-import schedule
-import threading
 import time
 
+from ..tasks.leader_election import LeaderElection
+from ..tasks.task_queue import TaskManager, TaskQueue
+from ..tasks.task_queue import TaskPriority as QueuePriority
+
 logger = logging.getLogger(__name__)
 
+# 派发到共享任务队列时使用的任务名称
+SCHEDULED_TASK = "scheduled_task"
+
 
 class TaskStatus(Enum):
     """任务状态枚举"""
@@ -103,11 +110,25 @@ class TaskSchedule:
 
 
 class TaskScheduler:
-    """任务调度器"""
+    """
+    任务调度器
+
+    多副本部署时传入leader_election，只有主节点派发到期任务；
+    传入task_queue时到期任务投递到共享队列，由任意副本的工作者通过run_dispatched_task执行，
+    执行失败后的重试同样延迟投递到共享队列，不依赖执行的副本是否为主节点。
+    """
 
-    def __init__(self, db_service, cache_service):
+    def __init__(
+        self,
+        db_service,
+        cache_service,
+        leader_election: Optional[LeaderElection] = None,
+        task_queue: Optional[TaskQueue] = None,
+    ):
         self.db_service = db_service
         self.cache_service = cache_service
+        self.leader_election = leader_election
+        self.dispatch_queue = task_queue
 
         # 任务注册表
         self.task_functions = {}
@@ -120,7 +141,19 @@ class TaskScheduler:
 
         # 调度器状态
         self.is_running = False
-        self.scheduler_thread = None
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._executor_task: Optional[asyncio.Task] = None
+
+        # 调度索引：按下次执行时间排序的最小堆，条目为(时间戳, 版本号, 任务ID)
+        # 每次调度取新的版本号，堆中旧条目在弹出时丢弃（惰性删除）；
+        # 版本号全局单调递增且从不重置，取消调度后旧条目也不会再次生效
+        self._schedule_heap: List[tuple] = []
+        self._scheduled_tasks: Dict[str, Task] = {}
+        self._schedule_versions: Dict[str, int] = {}
+        self._version_counter = itertools.count(1)
+        self._schedule_changed: Optional[asyncio.Event] = None
+        # 失败重试条目的版本号：未能派发时保留重试时间，不以常规触发时间覆盖
+        self._retry_versions: Set[int] = set()
 
         # 任务统计
         self.task_stats = {
@@ -142,14 +175,20 @@ class TaskScheduler:
             return
 
         self.is_running = True
+        self._schedule_changed = asyncio.Event()
+
+        # 从存储加载一次活跃任务，之后仅在调度变更时更新索引
+        await self.reload_schedule()
+
+        # 参与主节点选举
+        if self.leader_election:
+            await self.leader_election.start()
 
         # 启动任务执行器
-        asyncio.create_task(self._task_executor())
+        self._executor_task = asyncio.create_task(self._task_executor())
 
-        # 启动调度器线程
-        self.scheduler_thread = threading.Thread(target=self._scheduler_loop)
-        self.scheduler_thread.daemon = True
-        self.scheduler_thread.start()
+        # 在当前事件循环中启动调度循环
+        self._scheduler_task = asyncio.create_task(self._scheduler_loop())
 
         logger.info("Task scheduler started")
 
@@ -161,16 +200,67 @@ class TaskScheduler:
 
         self.is_running = False
 
+        # 唤醒并停止调度循环
+        if self._schedule_changed:
+            self._schedule_changed.set()
+        if self._scheduler_task:
+            self._scheduler_task.cancel()
+            self._scheduler_task = None
+
         # 等待所有任务完成
         while self.running_tasks:
             await asyncio.sleep(1)
 
-        # 停止调度器线程
-        if self.scheduler_thread:
-            self.scheduler_thread.join(timeout=5)
+        if self._executor_task:
+            self._executor_task.cancel()
+            self._executor_task = None
+
+        # 释放租约，其他副本无需等待租约过期即可接管
+        if self.leader_election:
+            await self.leader_election.stop()
 
         logger.info("Task scheduler stopped")
 
+    async def register_queue_handler(self, task_manager: TaskManager):
+        """在共享任务队列上注册执行入口"""
+        if self.dispatch_queue is None:
+            return
+        await task_manager.register_handler(
+            self.dispatch_queue.queue_name, SCHEDULED_TASK, self.run_dispatched_task
+        )
+
+    async def run_dispatched_task(self, task_data: Dict[str, Any]) -> Any:
+        """执行从共享队列领取的任务（队列处理器）"""
+        task = await self._get_task(task_data["task_id"])
+        if not task:
+            raise ValueError(f"Task not found: {task_data['task_id']}")
+        if task.function_name not in self.task_functions:
+            raise ValueError(f"Task function '{task.function_name}' not found")
+
+        # 重试次数随队列消息传递，各副本的本地任务副本可能不是最新的
+        task.retry_count = task_data.get("retry_count", 0)
+
+        execution = TaskExecution(
+            id=str(uuid.uuid4()),
+            task_id=task.id,
+            started_at=datetime.now(),
+            status=TaskStatus.RUNNING,
+        )
+        await self._save_execution(execution)
+        await self._execute_task_async(task, execution)
+        return execution.result
+
+    async def reload_schedule(self):
+        """从存储重建调度索引（启动时或外部修改存储后调用）"""
+        self._schedule_heap.clear()
+        self._scheduled_tasks.clear()
+        self._schedule_versions.clear()
+
+        for task in await self._get_active_tasks():
+            self._schedule(task)
+
+        logger.info(f"Loaded {len(self._scheduled_tasks)} scheduled tasks")
+
     async def create_task(
         self,
         name: str,
@@ -230,6 +320,8 @@ class TaskScheduler:
 
             await self._save_schedule(schedule_config_obj)
 
+            self._schedule(task)
+
             logger.info(f"Created task: {task_id} - {name}")
             return task_id
 
@@ -241,7 +333,7 @@ class TaskScheduler:
         """更新任务"""
         try:
             # 获取任务
-            task = await self._get_task_by_id(task_id)
+            task = await self._get_task(task_id)
             if not task:
                 return False
 
@@ -260,6 +352,7 @@ class TaskScheduler:
 
             # 保存更新
             await self._update_task(task)
+            self._schedule(task)
 
             logger.info(f"Updated task: {task_id}")
             return True
@@ -280,6 +373,7 @@ class TaskScheduler:
             success = await self._delete_task(task_id)
 
             if success:
+                self._unschedule(task_id)
                 logger.info(f"Deleted task: {task_id}")
 
             return success
@@ -292,10 +386,20 @@ class TaskScheduler:
         """立即执行任务"""
         try:
             # 获取任务
-            task = await self._get_task_by_id(task_id)
+            task = await self._get_task(task_id)
             if not task:
                 return False
 
+            return await self._enqueue_execution(task)
+
+        except Exception as e:
+            logger.error(f"Failed to execute task: {str(e)}")
+            return False
+
+    async def _enqueue_execution(self, task: Task) -> bool:
+        """创建执行记录并加入执行队列"""
+        task_id = task.id
+        try:
             # 检查任务函数是否存在
             if task.function_name not in self.task_functions:
                 logger.error(f"Task function '{task.function_name}' not found")
@@ -334,12 +438,14 @@ class TaskScheduler:
                 del self.running_tasks[task_id]
 
             # 更新任务状态
-            task = await self._get_task_by_id(task_id)
+            task = await self._get_task(task_id)
             if task:
                 task.status = TaskStatus.CANCELLED
                 task.updated_at = datetime.now()
                 await self._update_task(task)
 
+            self._unschedule(task_id)
+
             logger.info(f"Cancelled task: {task_id}")
             return True
 
@@ -350,7 +456,7 @@ class TaskScheduler:
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务状态"""
         try:
-            task = await self._get_task_by_id(task_id)
+            task = await self._get_task(task_id)
             if not task:
                 return None
 
@@ -435,6 +541,7 @@ class TaskScheduler:
             # 更新统计信息
             await self._update_task_stats()
 
+            next_due = self._next_due()
             return {
                 "is_running": self.is_running,
                 "total_tasks": self.task_stats["total_tasks"],
@@ -443,6 +550,11 @@ class TaskScheduler:
                 "running_tasks": len(self.running_tasks),
                 "queue_size": self.task_queue.qsize(),
                 "registered_functions": len(self.task_functions),
+                "scheduled_tasks": len(self._scheduled_tasks),
+                "next_due": next_due.isoformat() if next_due else None,
+                "leader": (
+                    self.leader_election.get_stats() if self.leader_election else None
+                ),
             }
 
         except Exception as e:
@@ -451,46 +563,144 @@ class TaskScheduler:
 
     # ==================== 私有方法 ====================
 
-    def _scheduler_loop(self):
-        """调度器循环"""
+    async def _get_task(self, task_id: str) -> Optional[Task]:
+        """优先从调度索引获取任务，未命中时查询存储"""
+        task = self._scheduled_tasks.get(task_id)
+        if task is not None:
+            return task
+        return await self._get_task_by_id(task_id)
+
+    def _schedule(self, task: Task, at: Optional[float] = None, retry: bool = False):
+        """
+        将任务按next_run加入调度索引，O(log n)
+
+        Args:
+            at: 条目的触发时间戳，默认取next_run
+            retry: 是否为失败重试条目
+        """
+        if task.next_run is None or task.status == TaskStatus.CANCELLED:
+            self._unschedule(task.id)
+            return
+
+        version = next(self._version_counter)
+        self._schedule_versions[task.id] = version
+        self._scheduled_tasks[task.id] = task
+        if retry:
+            self._retry_versions.add(version)
+        heapq.heappush(
+            self._schedule_heap,
+            (task.next_run.timestamp() if at is None else at, version, task.id),
+        )
+
+        # 新任务可能早于当前等待的时间点，唤醒调度循环重新计算
+        if self._schedule_changed is not None:
+            self._schedule_changed.set()
+
+    def _unschedule(self, task_id: str):
+        """从调度索引移除任务，堆中条目惰性丢弃"""
+        self._scheduled_tasks.pop(task_id, None)
+        self._schedule_versions.pop(task_id, None)
+
+    def _is_current(self, entry: tuple) -> bool:
+        """堆条目是否仍对应任务的最新调度"""
+        _, version, task_id = entry
+        return self._schedule_versions.get(task_id) == version
+
+    def _next_due(self) -> Optional[datetime]:
+        """下一个到期时间"""
+        while self._schedule_heap and not self._is_current(self._schedule_heap[0]):
+            self._retry_versions.discard(heapq.heappop(self._schedule_heap)[1])
+        if not self._schedule_heap:
+            return None
+        return datetime.fromtimestamp(self._schedule_heap[0][0])
+
+    async def _scheduler_loop(self):
+        """调度循环：在下一个到期时间精确唤醒，调度变更时提前唤醒"""
         while self.is_running:
             try:
-                # 检查需要执行的任务
-                asyncio.run(self._check_scheduled_tasks())
+                await self._dispatch_due_tasks()
 
-                # 等待1秒
-                time.sleep(1)
+                next_due = self._next_due()
+                timeout = (
+                    max(0.0, next_due.timestamp() - time.time()) if next_due else None
+                )
 
+                self._schedule_changed.clear()
+                try:
+                    await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Scheduler loop error: {str(e)}")
-                time.sleep(5)
-
-    async def _check_scheduled_tasks(self):
-        """检查需要执行的任务"""
-        try:
-            # 获取所有活跃的任务
-            active_tasks = await self._get_active_tasks()
-
-            current_time = datetime.now()
-
-            for task in active_tasks:
-                # 检查是否到了执行时间
-                if task.next_run and task.next_run <= current_time:
-                    # 检查任务是否正在运行
-                    if task.id not in self.running_tasks:
-                        # 执行任务
-                        await self.execute_task(task.id)
+                await asyncio.sleep(1)
 
-                        # 更新下次执行时间
-                        task.next_run = self._calculate_next_run(
-                            task.schedule_type, task.schedule_config
-                        )
-                        task.updated_at = datetime.now()
+    async def _dispatch_due_tasks(self):
+        """弹出并执行所有到期任务，每个任务O(log n)"""
+        now = time.time()
+        while self._schedule_heap and self._schedule_heap[0][0] <= now:
+            entry = heapq.heappop(self._schedule_heap)
+            is_retry = entry[1] in self._retry_versions
+            self._retry_versions.discard(entry[1])
+            if not self._is_current(entry):
+                continue
+
+            task = self._scheduled_tasks[entry[2]]
+            self._unschedule(task.id)
+
+            # 检查任务是否正在运行；重试条目按记录的重试时间认领
+            dispatched = False
+            if task.id not in self.running_tasks:
+                due_at = task.next_run.timestamp() if is_retry else entry[0]
+                dispatched = await self._dispatch(task, due_at)
+
+            if is_retry and not dispatched:
+                # 重试未能派发（非主节点或仍在运行）：保留重试时间，稍后再次尝试
+                self._schedule(task, at=now + self._retry_recheck_interval, retry=True)
+                continue
+
+            # 更新下次执行时间
+            task.next_run = self._calculate_next_run(
+                task.schedule_type, task.schedule_config
+            )
+            task.updated_at = datetime.now()
+            await self._update_task(task)
+            self._schedule(task)
+
+    @property
+    def _retry_recheck_interval(self) -> float:
+        """未能派发的重试条目再次尝试的间隔（秒）"""
+        if self.leader_election is not None:
+            return self.leader_election.renew_interval
+        return 1.0
+
+    async def _dispatch(self, task: Task, due_at: float) -> bool:
+        """派发一次到期触发：多副本时仅主节点以fencing令牌认领后派发"""
+        if self.leader_election is not None and not await self.leader_election.claim(
+            f"{task.id}:{int(due_at * 1000)}"
+        ):
+            return False
 
-                        await self._update_task(task)
+        if self.dispatch_queue is None:
+            return await self._enqueue_execution(task)
 
-        except Exception as e:
-            logger.error(f"Failed to check scheduled tasks: {str(e)}")
+        await self.dispatch_queue.enqueue(
+            task_name=SCHEDULED_TASK,
+            task_data={
+                "task_id": task.id,
+                "due_at": due_at,
+                "fencing_token": (
+                    self.leader_election.fencing_token if self.leader_election else None
+                ),
+            },
+            priority=QueuePriority(task.priority.value),
+            max_retries=0,
+            timeout=task.timeout,
+        )
+        logger.info(f"Dispatched task to queue: {task.id}")
+        return True
 
     async def _task_executor(self):
         """任务执行器"""
@@ -614,9 +824,24 @@ class TaskScheduler:
                 task.status = TaskStatus.RETRYING
                 task.error_message = execution.error_message
 
-                # 安排重试
+                # 安排重试：队列模式下延迟投递到共享队列，由任意副本的工作者执行
                 retry_time = datetime.now() + timedelta(seconds=task.retry_delay)
-                task.next_run = retry_time
+                if self.dispatch_queue is not None:
+                    await self.dispatch_queue.enqueue(
+                        task_name=SCHEDULED_TASK,
+                        task_data={
+                            "task_id": task.id,
+                            "due_at": retry_time.timestamp(),
+                            "retry_count": task.retry_count,
+                        },
+                        priority=QueuePriority(task.priority.value),
+                        max_retries=0,
+                        timeout=task.timeout,
+                        delay=task.retry_delay,
+                    )
+                else:
+                    task.next_run = retry_time
+                    self._schedule(task, retry=True)
 
                 logger.info(f"Task {task.id} will retry at {retry_time}")
 
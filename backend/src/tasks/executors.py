@@ -0,0 +1,301 @@
+"""
+任务处理器执行器
+按处理器声明的策略在事件循环、线程池或进程池中执行任务
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from ..error_handling.unified import BusinessError
+from ..logging_config import get_logger
+
+logger = get_logger("task_executors")
+
+
+class ExecutorPolicy(Enum):
+    """处理器执行策略"""
+
+    INLINE = "inline"  # 直接在事件循环中执行（IO密集型协程）
+    THREAD = "thread"  # 线程池执行（阻塞IO或释放GIL的计算）
+    PROCESS = "process"  # 进程池执行（CPU密集型计算，如模型训练）
+
+
+def get_handler_policy(handler: Callable) -> ExecutorPolicy:
+    """读取task_handler装饰器声明的执行策略"""
+    return getattr(handler, "_executor_policy", ExecutorPolicy.INLINE)
+
+
+def ensure_picklable(handler: Callable):
+    """进程池处理器必须可按引用序列化（模块级函数）"""
+    try:
+        pickle.dumps(handler)
+    except Exception as e:
+        raise BusinessError(
+            f"进程池处理器必须是模块级函数: {getattr(handler, '__qualname__', handler)}",
+            details={"error": str(e)},
+        )
+
+
+def _invoke(handler: Callable, task_data: Dict[str, Any]) -> Any:
+    """在线程或子进程中调用处理器，协程处理器使用独立事件循环"""
+    if asyncio.iscoroutinefunction(handler):
+        return asyncio.run(handler(task_data))
+    return handler(task_data)
+
+
+def _worker_main(connection):
+    """常驻子进程入口：循环接收 (处理器, 任务数据)，通过管道回传 (状态, 结果或异常)"""
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+
+        handler, task_data = job
+        try:
+            outcome = ("result", _invoke(handler, task_data))
+        except Exception as e:
+            outcome = ("error", e)
+
+        try:
+            connection.send(outcome)
+        except Exception as e:
+            # 结果或异常无法序列化；序列化失败时管道中没有写入任何数据
+            connection.send(("error", RuntimeError(f"处理器结果无法回传: {e}")))
+
+
+class _ProcessWorker:
+    """可复用的子进程：一次执行一个任务，超时或取消时整体终止"""
+
+    def __init__(self):
+        context = multiprocessing.get_context("spawn")
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def terminate(self):
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def close(self, graceful: bool = False):
+        """回收子进程；graceful时通知子进程退出，否则直接终止"""
+        if graceful and self.process.is_alive():
+            try:
+                self.connection.send(None)
+                self.process.join(1)
+            except Exception:
+                pass
+        self.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class HandlerExecutor:
+    """
+    处理器执行器
+
+    线程池按需创建；进程任务在最多max_processes个常驻子进程中执行，子进程使用spawn方式启动，
+    避免复制父进程的事件循环与连接，执行完毕后放回空闲列表供后续任务复用。
+    任务超时或被取消时只终止执行它的子进程，下一个任务按需启动新的子进程，
+    不会影响其他子进程中的任务。等待子进程结果占用专用线程，数量同样不超过max_processes。
+    """
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        max_processes: Optional[int] = None,
+    ):
+        self.max_threads = max_threads or min(32, (os.cpu_count() or 1) + 4)
+        self.max_processes = max_processes or (os.cpu_count() or 1)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._wait_pool: Optional[ThreadPoolExecutor] = None
+        self._workers: Set[_ProcessWorker] = set()
+        self._idle_workers: List[_ProcessWorker] = []
+        # 进程槽位与事件循环绑定，换用新的事件循环时重建
+        self._process_slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.active = {policy: 0 for policy in ExecutorPolicy}
+        self.completed = {policy: 0 for policy in ExecutorPolicy}
+        self.timeouts = 0
+        self.cancelled = 0
+        self.processes_started = 0
+        self.processes_terminated = 0
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_threads, thread_name_prefix="task_handler"
+            )
+        return self._thread_pool
+
+    @property
+    def wait_pool(self) -> ThreadPoolExecutor:
+        if self._wait_pool is None:
+            self._wait_pool = ThreadPoolExecutor(
+                max_workers=self.max_processes, thread_name_prefix="process_wait"
+            )
+        return self._wait_pool
+
+    def _slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._process_slots is None or self._slots_loop is not loop:
+            self._process_slots = asyncio.Semaphore(self.max_processes)
+            self._slots_loop = loop
+        return self._process_slots
+
+    def _checkout_worker(self) -> _ProcessWorker:
+        while self._idle_workers:
+            worker = self._idle_workers.pop()
+            if worker.alive:
+                return worker
+            self._retire(worker)
+        worker = _ProcessWorker()
+        self._workers.add(worker)
+        self.processes_started += 1
+        return worker
+
+    def _retire(self, worker: _ProcessWorker):
+        self._workers.discard(worker)
+        worker.close()
+
+    async def run(
+        self,
+        handler: Callable,
+        task_data: Dict[str, Any],
+        policy: Optional[ExecutorPolicy] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        按策略执行处理器
+
+        Args:
+            handler: 任务处理器
+            task_data: 任务数据
+            policy: 执行策略，为None时使用处理器声明的策略
+            timeout: 超时时间（秒），超时抛出asyncio.TimeoutError
+        """
+        policy = policy or get_handler_policy(handler)
+        self.active[policy] += 1
+        try:
+            if policy == ExecutorPolicy.PROCESS:
+                result = await self._run_in_process(handler, task_data, timeout)
+            elif policy == ExecutorPolicy.THREAD:
+                loop = asyncio.get_running_loop()
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self.thread_pool, _invoke, handler, task_data),
+                    timeout,
+                )
+            elif asyncio.iscoroutinefunction(handler):
+                result = await asyncio.wait_for(handler(task_data), timeout)
+            else:
+                result = handler(task_data)
+
+            self.completed[policy] += 1
+            return result
+
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.error(f"任务处理器执行超时({timeout}s): {handler.__name__}")
+            raise
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active[policy] -= 1
+
+    async def _run_in_process(
+        self, handler: Callable, task_data: Dict[str, Any], timeout: Optional[float]
+    ) -> Any:
+        """占用一个进程槽位，在空闲子进程中执行，超时或取消时只终止该子进程"""
+        async with self._slots():
+            worker = self._checkout_worker()
+            try:
+                worker.connection.send((handler, task_data))
+                waiting = self.wait_pool.submit(worker.connection.recv)
+                try:
+                    status, value = await asyncio.wait_for(
+                        asyncio.wrap_future(waiting), timeout
+                    )
+                except EOFError:
+                    worker.process.join(1)
+                    raise BusinessError(
+                        f"任务处理器子进程异常退出: {handler.__name__}",
+                        details={"exitcode": worker.process.exitcode},
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    # 子进程退出后管道关闭，等待中的recv随之结束，再回收子进程
+                    worker.terminate()
+                    self.processes_terminated += 1
+                    self._workers.discard(worker)
+                    waiting.add_done_callback(lambda _, w=worker: w.close())
+                    worker = None
+                    raise
+
+                if status == "error":
+                    raise value
+                return value
+            finally:
+                # 已终止的子进程不再复用；其余子进程仍存活时放回空闲列表
+                if worker is not None:
+                    if worker.alive:
+                        self._idle_workers.append(worker)
+                    else:
+                        self._retire(worker)
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池并回收子进程：空闲子进程按wait通知退出或直接终止，执行中的子进程直接终止"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait, cancel_futures=True)
+            self._thread_pool = None
+
+        idle, self._idle_workers = self._idle_workers, []
+        for worker in idle:
+            self._workers.discard(worker)
+            worker.close(graceful=wait)
+        for worker in list(self._workers):
+            # 等待结果的协程随之收到EOFError并回收子进程
+            worker.terminate()
+        if self._wait_pool is not None:
+            self._wait_pool.shutdown(wait=wait)
+            self._wait_pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取执行器统计"""
+        return {
+            "thread_pool": {
+                "max_workers": self.max_threads,
+                "started": self._thread_pool is not None,
+                "active": self.active[ExecutorPolicy.THREAD],
+                "completed": self.completed[ExecutorPolicy.THREAD],
+            },
+            "process_pool": {
+                "max_workers": self.max_processes,
+                "started": bool(self._workers),
+                "workers": len(self._workers),
+                "idle": len(self._idle_workers),
+                "active": self.active[ExecutorPolicy.PROCESS],
+                "completed": self.completed[ExecutorPolicy.PROCESS],
+                "spawned": self.processes_started,
+                "terminated": self.processes_terminated,
+            },
+            "inline": {
+                "active": self.active[ExecutorPolicy.INLINE],
+                "completed": self.completed[ExecutorPolicy.INLINE],
+            },
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+        }
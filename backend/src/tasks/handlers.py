@@ -5,16 +5,117 @@ BMOS系统 - 任务处理器示例
 
 import asyncio
 import logging
+import time
 from typing import Dict, Any
 from datetime import datetime
 
 from ..logging_config import get_logger
-from ..tasks.task_queue import TaskManager, Task, TaskPriority
+from ..tasks.executors import ExecutorPolicy
+from ..tasks.task_queue import TaskManager, Task, TaskPriority, task_handler
 from ..tasks.scheduler import SchedulerService, JobType
 
 logger = get_logger("task_handlers")
 
 
+# CPU密集型处理器：模块级函数，在进程池中执行，避免阻塞事件循环
+@task_handler(executor=ExecutorPolicy.PROCESS)
+def train_model_job(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    模型训练任务处理器
+    训练机器学习模型
+    """
+    logger.info(f"开始模型训练任务: {task_data}")
+
+    try:
+        model_type = task_data.get("model_type", "marginal_analysis")
+        training_data_size = task_data.get("training_data_size", 10000)
+
+        # 模拟模型训练
+        time.sleep(5)
+
+        result = {
+            "status": "completed",
+            "model_id": f"model_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            "model_type": model_type,
+            "training_data_size": training_data_size,
+            "accuracy": 0.87,
+            "training_time": datetime.now().isoformat(),
+            "model_version": "1.0.0",
+        }
+
+        logger.info(f"模型训练任务完成: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"模型训练任务失败: {e}")
+        raise
+
+
+@task_handler(executor=ExecutorPolicy.PROCESS)
+def batch_predictions_job(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    批量预测任务处理器
+    对大量数据进行批量预测
+    """
+    logger.info(f"开始批量预测任务: {task_data}")
+
+    try:
+        model_id = task_data.get("model_id", "default_model")
+        batch_size = task_data.get("batch_size", 1000)
+
+        # 模拟批量预测
+        time.sleep(3)
+
+        result = {
+            "status": "completed",
+            "model_id": model_id,
+            "batch_size": batch_size,
+            "predictions_count": batch_size,
+            "processing_time": datetime.now().isoformat(),
+            "average_confidence": 0.82,
+        }
+
+        logger.info(f"批量预测任务完成: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"批量预测任务失败: {e}")
+        raise
+
+
+@task_handler(executor=ExecutorPolicy.PROCESS)
+def check_data_quality_job(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    数据质量检查任务处理器
+    检查数据质量和完整性
+    """
+    logger.info(f"开始数据质量检查任务: {task_data}")
+
+    try:
+        data_source = task_data.get("data_source", "unknown")
+        check_type = task_data.get("check_type", "comprehensive")
+
+        # 模拟质量检查
+        time.sleep(2)
+
+        result = {
+            "status": "completed",
+            "data_source": data_source,
+            "check_type": check_type,
+            "quality_score": 0.92,
+            "issues_found": 3,
+            "issues_resolved": 2,
+            "check_time": datetime.now().isoformat(),
+        }
+
+        logger.info(f"数据质量检查任务完成: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"数据质量检查任务失败: {e}")
+        raise
+
+
 class BMOSTaskHandlers:
     """BMOS系统任务处理器"""
 
@@ -33,12 +134,12 @@ class BMOSTaskHandlers:
         )
         asyncio.create_task(
             self.task_manager.register_handler(
-                "default", "model_training", self.train_model
+                "default", "model_training", train_model_job
             )
         )
         asyncio.create_task(
             self.task_manager.register_handler(
-                "default", "prediction_batch", self.batch_predictions
+                "default", "prediction_batch", batch_predictions_job
             )
         )
         asyncio.create_task(
@@ -48,7 +149,7 @@ class BMOSTaskHandlers:
         )
         asyncio.create_task(
             self.task_manager.register_handler(
-                "default", "data_quality_check", self.check_data_quality
+                "default", "data_quality_check", check_data_quality_job
             )
         )
         asyncio.create_task(
@@ -74,6 +175,11 @@ class BMOSTaskHandlers:
             )
         )
 
+        # 定时任务由主节点派发到共享队列，任意副本的工作者均可执行
+        asyncio.create_task(
+            self.scheduler_service.register_queue_handler(self.task_manager)
+        )
+
         logger.info("BMOS任务处理器注册完成")
 
     async def process_data(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -108,65 +214,16 @@ class BMOSTaskHandlers:
             raise
 
     async def train_model(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        模型训练任务处理器
-        训练机器学习模型
-        """
-        logger.info(f"开始模型训练任务: {task_data}")
-
-        try:
-            model_type = task_data.get("model_type", "marginal_analysis")
-            training_data_size = task_data.get("training_data_size", 10000)
-
-            # 模拟模型训练
-            await asyncio.sleep(5)
-
-            result = {
-                "status": "completed",
-                "model_id": f"model_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                "model_type": model_type,
-                "training_data_size": training_data_size,
-                "accuracy": 0.87,
-                "training_time": datetime.now().isoformat(),
-                "model_version": "1.0.0",
-            }
-
-            logger.info(f"模型训练任务完成: {result}")
-            return result
-
-        except Exception as e:
-            logger.error(f"模型训练任务失败: {e}")
-            raise
+        """模型训练任务处理器（进程池执行）"""
+        return await self.task_manager.executor.run(train_model_job, task_data)
 
     async def batch_predictions(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        批量预测任务处理器
-        对大量数据进行批量预测
-        """
-        logger.info(f"开始批量预测任务: {task_data}")
-
-        try:
-            model_id = task_data.get("model_id", "default_model")
-            batch_size = task_data.get("batch_size", 1000)
-
-            # 模拟批量预测
-            await asyncio.sleep(3)
+        """批量预测任务处理器（进程池执行）"""
+        return await self.task_manager.executor.run(batch_predictions_job, task_data)
 
-            result = {
-                "status": "completed",
-                "model_id": model_id,
-                "batch_size": batch_size,
-                "predictions_count": batch_size,
-                "processing_time": datetime.now().isoformat(),
-                "average_confidence": 0.82,
-            }
-
-            logger.info(f"批量预测任务完成: {result}")
-            return result
-
-        except Exception as e:
-            logger.error(f"批量预测任务失败: {e}")
-            raise
+    async def check_data_quality(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """数据质量检查任务处理器（进程池执行）"""
+        return await self.task_manager.executor.run(check_data_quality_job, task_data)
 
     async def extract_memory(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -198,37 +255,6 @@ class BMOSTaskHandlers:
             logger.error(f"企业记忆提取任务失败: {e}")
             raise
 
-    async def check_data_quality(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        数据质量检查任务处理器
-        检查数据质量和完整性
-        """
-        logger.info(f"开始数据质量检查任务: {task_data}")
-
-        try:
-            data_source = task_data.get("data_source", "unknown")
-            check_type = task_data.get("check_type", "comprehensive")
-
-            # 模拟质量检查
-            await asyncio.sleep(2)
-
-            result = {
-                "status": "completed",
-                "data_source": data_source,
-                "check_type": check_type,
-                "quality_score": 0.92,
-                "issues_found": 3,
-                "issues_resolved": 2,
-                "check_time": datetime.now().isoformat(),
-            }
-
-            logger.info(f"数据质量检查任务完成: {result}")
-            return result
-
-        except Exception as e:
-            logger.error(f"数据质量检查任务失败: {e}")
-            raise
-
     async def system_cleanup(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         系统清理任务处理器
@@ -270,19 +296,23 @@ class BMOSTaskHandlers:
             # 获取需要重训练的模型
             models_to_retrain = ["marginal_analysis", "prediction_model"]
 
-            for model_type in models_to_retrain:
-                # 添加重训练任务到队列
-                task_id = await self.task_manager.enqueue_task(
-                    queue_name="default",
-                    task_name="model_training",
-                    task_data={
-                        "model_type": model_type,
-                        "training_data_size": 50000,
-                        "retrain": True,
-                    },
-                    priority=TaskPriority.HIGH,
-                )
-                logger.info(f"添加模型重训练任务: {task_id}")
+            # 批量添加重训练任务到队列
+            task_ids = await self.task_manager.enqueue_many(
+                "default",
+                [
+                    {
+                        "task_name": "model_training",
+                        "task_data": {
+                            "model_type": model_type,
+                            "training_data_size": 50000,
+                            "retrain": True,
+                        },
+                        "priority": TaskPriority.HIGH,
+                    }
+                    for model_type in models_to_retrain
+                ],
+            )
+            logger.info(f"添加模型重训练任务: {task_ids}")
 
             result = {
                 "status": "completed",
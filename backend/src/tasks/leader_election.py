@@ -0,0 +1,244 @@
+"""
+调度器主节点选举
+基于Redis租约选出唯一的调度主节点，并用单调递增的fencing令牌防止过期主节点重复派发
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..logging_config import get_logger
+
+logger = get_logger("leader_election")
+
+# 获取或续约租约：租约空闲时递增fencing计数器并写入"节点|令牌"，
+# 已由本节点持有时仅续期；返回令牌，被其他节点持有时返回0
+_ACQUIRE_SCRIPT = """
+local current = redis.call('get', KEYS[1])
+if current then
+    local sep = string.find(current, '|', 1, true)
+    if sep and string.sub(current, 1, sep - 1) == ARGV[1] then
+        redis.call('pexpire', KEYS[1], ARGV[2])
+        return tonumber(string.sub(current, sep + 1))
+    end
+    return 0
+end
+local token = redis.call('incr', KEYS[2])
+redis.call('set', KEYS[1], ARGV[1] .. '|' .. token, 'PX', ARGV[2])
+return token
+"""
+
+# 仅当租约仍由自己持有时才释放
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+else
+    return 0
+end
+"""
+
+# 派发前校验：令牌必须是最新的fencing令牌（期间没有新主节点当选），
+# 且该次触发尚未被派发；返回1允许派发，0已派发，-1令牌过期
+_CLAIM_SCRIPT = """
+if tonumber(redis.call('get', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return -1
+end
+if redis.call('set', KEYS[2], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Redis租约选主
+
+    每个节点每隔renew_interval尝试获取或续约租约，持有者失联后租约在lease_ttl内过期，
+    其他节点随即接管，因此故障切换时间不超过lease_ttl + renew_interval。
+    每次新当选都会得到更大的fencing令牌；派发任务前通过claim原子校验令牌，
+    暂停后恢复的旧主节点即使仍认为自己是主节点也无法派发。
+    """
+
+    def __init__(
+        self,
+        redis_client: Any,
+        name: str = "scheduler",
+        lease_ttl: float = 15.0,
+        renew_interval: Optional[float] = None,
+        node_id: Optional[str] = None,
+        key_prefix: str = "leader:",
+    ):
+        if lease_ttl <= 0:
+            raise ValueError("lease_ttl必须大于0")
+
+        self.redis_client = redis_client
+        self.name = name
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval or lease_ttl / 3
+        self.node_id = node_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.lease_key = f"{key_prefix}{name}"
+        self.fence_key = f"{key_prefix}{name}:fence"
+        self.occurrence_prefix = f"{key_prefix}{name}:occurrence:"
+
+        self.fencing_token: Optional[int] = None
+        self._lease_deadline = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._acquire_script = None
+        self._release_script = None
+        self._claim_script = None
+
+        self.on_elected: Optional[Callable[[int], Awaitable[Any]]] = None
+        self.on_revoked: Optional[Callable[[], Awaitable[Any]]] = None
+
+        self.elections = 0
+        self.claims = 0
+        self.duplicate_claims = 0
+        self.stale_claims = 0
+
+    @property
+    def is_leader(self) -> bool:
+        """本地判断是否为主节点：租约按本地时钟提前视为过期"""
+        return (
+            self.fencing_token is not None and time.monotonic() < self._lease_deadline
+        )
+
+    async def acquire(self) -> bool:
+        """获取或续约租约"""
+        if self._acquire_script is None:
+            self._acquire_script = self.redis_client.register_script(_ACQUIRE_SCRIPT)
+
+        started = time.monotonic()
+        token = int(
+            await self._acquire_script(
+                keys=[self.lease_key, self.fence_key],
+                args=[self.node_id, int(self.lease_ttl * 1000)],
+            )
+        )
+
+        if token:
+            if token != self.fencing_token:
+                self.elections += 1
+                logger.info(f"当选调度主节点: {self.node_id} (token={token})")
+                self.fencing_token = token
+                await self._notify(self.on_elected, token)
+            # 以发起请求的时刻计算本地租约截止时间，保守估计
+            self._lease_deadline = started + self.lease_ttl
+            return True
+
+        await self._step_down()
+        return False
+
+    async def release(self):
+        """主动释放租约，便于其他节点立即接管"""
+        token = self.fencing_token
+        await self._step_down()
+        if token is None:
+            return
+
+        if self._release_script is None:
+            self._release_script = self.redis_client.register_script(_RELEASE_SCRIPT)
+        try:
+            await self._release_script(
+                keys=[self.lease_key], args=[f"{self.node_id}|{token}"]
+            )
+        except Exception as e:
+            logger.warning(f"释放主节点租约失败: {e}")
+
+    async def claim(self, occurrence: str, ttl: Optional[float] = None) -> bool:
+        """
+        认领一次触发的派发权
+
+        Args:
+            occurrence: 触发标识（任务+计划触发时间）
+            ttl: 去重记录保留时间（秒），默认取租约时长的10倍
+        """
+        if not self.is_leader:
+            return False
+
+        if self._claim_script is None:
+            self._claim_script = self.redis_client.register_script(_CLAIM_SCRIPT)
+
+        ttl = ttl or self.lease_ttl * 10
+        result = int(
+            await self._claim_script(
+                keys=[self.fence_key, f"{self.occurrence_prefix}{occurrence}"],
+                args=[self.fencing_token, int(ttl * 1000)],
+            )
+        )
+
+        if result == 1:
+            self.claims += 1
+            return True
+        if result == 0:
+            self.duplicate_claims += 1
+            logger.info(f"触发已被派发，跳过: {occurrence}")
+        else:
+            self.stale_claims += 1
+            logger.warning(f"fencing令牌已过期，放弃派发: {occurrence}")
+            await self._step_down()
+        return False
+
+    async def start(self):
+        """启动后台续约循环"""
+        if self._task is not None:
+            return
+        await self._try_acquire()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止续约并释放租约"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.release()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            await self._try_acquire()
+
+    async def _try_acquire(self):
+        try:
+            await self.acquire()
+        except Exception as e:
+            # Redis不可用时无法续约，本地租约到期后自然失去主节点身份
+            logger.error(f"主节点租约续约失败: {e}")
+
+    async def _step_down(self):
+        if self.fencing_token is None:
+            return
+        logger.info(f"失去调度主节点身份: {self.node_id}")
+        self.fencing_token = None
+        self._lease_deadline = 0.0
+        await self._notify(self.on_revoked)
+
+    async def _notify(self, callback: Optional[Callable], *args):
+        if callback is None:
+            return
+        try:
+            await callback(*args)
+        except Exception as e:
+            logger.error(f"主节点状态回调失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取选主统计"""
+        return {
+            "node_id": self.node_id,
+            "is_leader": self.is_leader,
+            "fencing_token": self.fencing_token,
+            "lease_ttl": self.lease_ttl,
+            "elections": self.elections,
+            "claims": self.claims,
+            "duplicate_claims": self.duplicate_claims,
+            "stale_claims": self.stale_claims,
+        }
@@ -1,6 +1,6 @@
 """
 定时任务调度器
-基于APScheduler实现定时任务调度
+基于APScheduler实现定时任务调度，多副本部署时仅由选举出的主节点派发任务
 """
 
 import asyncio
@@ -19,9 +19,14 @@ from apscheduler.executors.asyncio import AsyncIOExecutor
 from ..cache.redis_cache import RedisCache
 from ..error_handling.unified import handle_errors, BusinessError
 from ..logging_config import get_logger
+from .leader_election import LeaderElection
+from .task_queue import TaskManager, TaskQueue
 
 logger = get_logger("scheduler")
 
+# 派发到共享任务队列时使用的任务名称
+SCHEDULED_JOB_TASK = "scheduled_job"
+
 
 class JobStatus(Enum):
     """任务状态枚举"""
@@ -126,15 +131,36 @@ class ScheduledJob:
 
 
 class SchedulerService:
-    """调度器服务"""
+    """
+    调度器服务
+
+    每个副本都运行APScheduler，但只有持有主节点租约的副本派发触发；
+    派发时以fencing令牌原子认领该次触发，再投递到共享任务队列，由任意副本的工作者执行。
+    dispatch_queue为None时退化为在本进程内执行。
+    """
 
-    def __init__(self, redis_cache: RedisCache):
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        dispatch_queue: Optional[str] = "scheduled",
+        leader_election: Optional[LeaderElection] = None,
+        lease_ttl: float = 15.0,
+    ):
         self.redis_cache = redis_cache
         self.scheduler: Optional[AsyncIOScheduler] = None
         self.job_functions: Dict[str, Callable] = {}
         self.jobs: Dict[str, ScheduledJob] = {}
         self.is_running = False
 
+        self.dispatch_queue = dispatch_queue
+        self.task_queue: Optional[TaskQueue] = (
+            TaskQueue(redis_cache, dispatch_queue) if dispatch_queue else None
+        )
+        self.leader_election = leader_election
+        self.lease_ttl = lease_ttl
+        self.dispatched_count = 0
+        self.skipped_count = 0
+
     @handle_errors
     async def initialize(self):
         """初始化调度器"""
@@ -151,6 +177,13 @@ class SchedulerService:
             jobstores=jobstores, executors=executors, timezone="Asia/Shanghai"
         )
 
+        # 参与主节点选举
+        if self.leader_election is None:
+            self.leader_election = LeaderElection(
+                self.redis_cache.redis_client, "scheduler", lease_ttl=self.lease_ttl
+            )
+        await self.leader_election.start()
+
         # 启动调度器
         self.scheduler.start()
         self.is_running = True
@@ -165,6 +198,19 @@ class SchedulerService:
             self.is_running = False
             logger.info("调度器已关闭")
 
+        # 释放租约，其他副本无需等待租约过期即可接管
+        if self.leader_election:
+            await self.leader_election.stop()
+
+    @handle_errors
+    async def register_queue_handler(self, task_manager: TaskManager):
+        """在共享任务队列上注册执行入口，使本副本的工作者可以执行派发的任务"""
+        if not self.dispatch_queue:
+            return
+        await task_manager.register_handler(
+            self.dispatch_queue, SCHEDULED_JOB_TASK, self.run_dispatched_job
+        )
+
     @handle_errors
     async def register_function(self, function_name: str, function: Callable):
         """注册任务函数"""
@@ -214,6 +260,7 @@ class SchedulerService:
         )
 
         # 存储任务信息
+        job.next_run = self._scheduled_next_run(job_id)
         self.jobs[job_id] = job
         await self.redis_cache.set(f"scheduled_job:{job_id}", job.to_dict(), ttl=86400)
 
@@ -263,6 +310,7 @@ class SchedulerService:
         )
 
         # 存储任务信息
+        job.next_run = self._scheduled_next_run(job_id)
         self.jobs[job_id] = job
         await self.redis_cache.set(f"scheduled_job:{job_id}", job.to_dict(), ttl=86400)
 
@@ -312,6 +360,7 @@ class SchedulerService:
         )
 
         # 存储任务信息
+        job.next_run = self._scheduled_next_run(job_id)
         self.jobs[job_id] = job
         await self.redis_cache.set(f"scheduled_job:{job_id}", job.to_dict(), ttl=86400)
 
@@ -410,39 +459,90 @@ class SchedulerService:
 
         return jobs
 
+    def _scheduled_next_run(self, job_id: str) -> Optional[datetime]:
+        """读取APScheduler中该任务的下次触发时间"""
+        aps_job = self.scheduler.get_job(job_id) if self.scheduler else None
+        return getattr(aps_job, "next_run_time", None) if aps_job else None
+
     @handle_errors
     async def _execute_job(self, job_id: str):
-        """执行任务"""
-        try:
-            # 获取任务信息
-            job = await self.get_job(job_id)
-            if not job:
-                logger.error(f"任务不存在: {job_id}")
-                return
+        """触发任务：仅主节点派发，每次触发只派发一次"""
+        job = await self.get_job(job_id)
+        if not job:
+            logger.error(f"任务不存在: {job_id}")
+            return
+
+        # 本次触发的计划时间：上次记录的下次触发时间，缺失时取当前时间
+        occurrence_time = job.next_run or datetime.now()
+        job.next_run = self._scheduled_next_run(job_id)
+        self.jobs[job_id] = job
+
+        # 各副本的任务ID不同，按任务名称+计划时间标识同一次触发
+        occurrence = f"{job.job_name}:{int(occurrence_time.timestamp())}"
+        if not self.leader_election or not await self.leader_election.claim(
+            occurrence, ttl=max(job.misfire_grace_time, self.lease_ttl) * 2
+        ):
+            self.skipped_count += 1
+            logger.debug(f"非主节点或触发已派发，跳过: {job.job_name} ({job_id})")
+            return
+
+        self.dispatched_count += 1
+        task_data = {
+            "job_id": job_id,
+            "job_function": job.job_function,
+            "job_args": job.job_args,
+            "job_kwargs": job.job_kwargs,
+            "occurrence": occurrence_time.isoformat(),
+            "fencing_token": self.leader_election.fencing_token,
+        }
 
+        if self.task_queue is None:
+            try:
+                await self.run_dispatched_job(task_data)
+            except Exception:
+                # 失败已记录在任务状态中
+                pass
+            return
+
+        task_id = await self.task_queue.enqueue(
+            task_name=SCHEDULED_JOB_TASK,
+            task_data=task_data,
+            max_retries=0,
+        )
+        logger.info(f"任务已派发到队列: {job.job_name} ({job_id}) -> {task_id}")
+
+    @handle_errors
+    async def run_dispatched_job(self, task_data: Dict[str, Any]) -> Any:
+        """执行派发的任务（共享队列处理器）"""
+        job_id = task_data["job_id"]
+        job = await self.get_job(job_id)
+        try:
             # 更新任务状态
-            job.status = JobStatus.RUNNING
-            job.last_run = datetime.now()
-            job.run_count += 1
+            if job:
+                job.status = JobStatus.RUNNING
+                job.last_run = datetime.now()
+                job.run_count += 1
 
             # 获取任务函数
-            function = self.job_functions.get(job.job_function)
+            function = self.job_functions.get(task_data["job_function"])
             if not function:
                 raise BusinessError(
                     code="JOB_FUNCTION_NOT_FOUND",
-                    message=f"任务函数不存在: {job.job_function}",
+                    message=f"任务函数不存在: {task_data['job_function']}",
                 )
 
             # 执行任务
-            logger.info(f"开始执行任务: {job.job_name} ({job_id})")
-            result = await function(*job.job_args, **job.job_kwargs)
+            logger.info(f"开始执行任务: {task_data['job_function']} ({job_id})")
+            result = await function(*task_data["job_args"], **task_data["job_kwargs"])
 
             # 更新任务状态
-            job.status = JobStatus.COMPLETED
-            job.success_count += 1
-            job.last_error = None
+            if job:
+                job.status = JobStatus.COMPLETED
+                job.success_count += 1
+                job.last_error = None
 
-            logger.info(f"任务执行成功: {job.job_name} ({job_id})")
+            logger.info(f"任务执行成功: {task_data['job_function']} ({job_id})")
+            return result
 
         except Exception as e:
             # 更新任务状态
@@ -452,11 +552,13 @@ class SchedulerService:
                 job.last_error = str(e)
 
             logger.error(f"任务执行失败: {job_id} - {e}")
+            raise
 
         finally:
             # 保存任务状态
             if job:
-                self.jobs[job_id] = job
+                if job_id in self.jobs:
+                    self.jobs[job_id] = job
                 await self.redis_cache.set(
                     f"scheduled_job:{job_id}", job.to_dict(), ttl=86400
                 )
@@ -485,6 +587,11 @@ class SchedulerService:
             "total_failures": total_failures,
             "success_rate": total_successes / total_runs if total_runs > 0 else 0,
             "is_running": self.is_running,
+            "dispatched": self.dispatched_count,
+            "skipped": self.skipped_count,
+            "leader": (
+                self.leader_election.get_stats() if self.leader_election else None
+            ),
         }
 
 
@@ -5,13 +5,20 @@
 
 import asyncio
 import json
+import math
 import uuid
 import time
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Dict, List, Optional, Callable, Tuple, Union
 from datetime import datetime, timedelta
 from enum import Enum
 import traceback
 
+from .executors import (
+    ExecutorPolicy,
+    HandlerExecutor,
+    ensure_picklable,
+    get_handler_policy,
+)
 from ..cache.redis_cache import RedisCache
 from ..error_handling.unified import handle_errors, BusinessError
 from ..logging_config import get_logger
@@ -90,6 +97,20 @@ class Task:
             "progress": self.progress,
         }
 
+    def to_redis_hash(self) -> Dict[str, str]:
+        """转换为Redis哈希字段，字段值为JSON编码"""
+        return {
+            field: json.dumps(value, ensure_ascii=False, default=str)
+            for field, value in self.to_dict().items()
+        }
+
+    @classmethod
+    def from_redis_hash(cls, mapping: Dict[str, str]) -> "Task":
+        """从Redis哈希字段创建任务"""
+        return cls.from_dict(
+            {field: json.loads(value) for field, value in mapping.items()}
+        )
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Task":
         """从字典创建任务"""
@@ -119,21 +140,269 @@ class Task:
         return task
 
 
+# 任务记录保留时间（秒）
+TASK_RECORD_TTL = 86400
+
+# 可见性超时在任务超时基础上的宽限时间（秒）
+VISIBILITY_GRACE = 30
+
+# 领取任务：提升到期的延迟重试任务，按优先级从高到低将至多ARGV[3]个任务原子地移入
+# 处理中列表、登记可见性截止时间并将任务记录标记为运行中，返回任务记录；
+# 记录缺失或已取消的任务直接丢弃。随后按剩余待处理数裁剪唤醒信号。
+# KEYS: processing, deadlines, delayed, meta, signal, 各优先级队列（从高到低）
+# ARGV: now, 可见性宽限, limit, 任务记录键前缀, 任务ID中队列名前缀的长度,
+#       已取消状态, 运行中状态, 开始时间（均为JSON编码）, 各优先级队列对应的优先级值
+# 任务记录键由前缀与任务ID拼接，与队列键共享哈希标签，Redis Cluster下落在同一槽位
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local grace = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local skip = tonumber(ARGV[5]) + 1
+local queue_keys = {}
+for i = 6, #KEYS do
+    queue_keys[ARGV[i + 3]] = KEYS[i]
+end
+local claimed = {}
+
+local due = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, 100)
+for _, id in ipairs(due) do
+    redis.call('ZREM', KEYS[3], id)
+    local meta = redis.call('HGET', KEYS[4], id)
+    if meta then
+        local priority = string.match(meta, '^([^:]+)')
+        if queue_keys[priority] then
+            redis.call('LPUSH', queue_keys[priority], id)
+        end
+    end
+end
+
+for i = 6, #KEYS do
+    while #claimed < limit do
+        local id = redis.call('RPOPLPUSH', KEYS[i], KEYS[1])
+        if not id then
+            break
+        end
+        local meta = redis.call('HGET', KEYS[4], id)
+        local record = ARGV[4] .. string.sub(id, skip)
+        local status = redis.call('HGET', record, 'status')
+        if meta and status and status ~= ARGV[6] then
+            local timeout = tonumber(string.match(meta, '^[^:]+:([^:]+)')) or 0
+            redis.call('ZADD', KEYS[2], now + timeout + grace, id)
+            redis.call('HSET', record, 'status', ARGV[7], 'started_at', ARGV[8])
+            table.insert(claimed, redis.call('HGETALL', record))
+        else
+            -- 任务已取消、已结束或记录已过期，直接丢弃
+            redis.call('LREM', KEYS[1], 1, id)
+            redis.call('HDEL', KEYS[4], id)
+        end
+    end
+    if #claimed >= limit then
+        break
+    end
+end
+
+local pending = 0
+for i = 6, #KEYS do
+    pending = pending + redis.call('LLEN', KEYS[i])
+end
+if pending == 0 then
+    redis.call('DEL', KEYS[5])
+else
+    redis.call('LTRIM', KEYS[5], 0, pending - 1)
+end
+return claimed
+"""
+
+# 回收超过可见性截止时间仍未确认的任务：未超过重试次数的放回原优先级队列并将记录标记为
+# 待处理，否则移除并将记录标记为失败；已取消的任务记录保持不变。
+# KEYS: processing, deadlines, meta, 各优先级队列（从高到低）
+# ARGV: now, limit, 任务记录键前缀, 任务ID中队列名前缀的长度, 已取消状态, 待处理状态,
+#       失败状态, 失败原因, 结束时间（均为JSON编码）, 各优先级队列对应的优先级值
+# 返回{重投的任务数, 失败的任务数}
+_RECLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local skip = tonumber(ARGV[4]) + 1
+local queue_keys = {}
+for i = 4, #KEYS do
+    queue_keys[ARGV[i + 6]] = KEYS[i]
+end
+local reclaimed = 0
+local failed = 0
+
+local function update(id, ...)
+    local record = ARGV[3] .. string.sub(id, skip)
+    local status = redis.call('HGET', record, 'status')
+    if status and status ~= ARGV[5] then
+        redis.call('HSET', record, ...)
+    end
+end
+
+local stalled = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, tonumber(ARGV[2]))
+for _, id in ipairs(stalled) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('LREM', KEYS[1], 1, id)
+    local meta = redis.call('HGET', KEYS[3], id)
+    if meta then
+        local priority, timeout, max_retries, retries =
+            string.match(meta, '^([^:]+):([^:]+):([^:]+):([^:]+)$')
+        retries = tonumber(retries)
+        if retries < tonumber(max_retries) and queue_keys[priority] then
+            retries = retries + 1
+            redis.call('HSET', KEYS[3], id,
+                priority .. ':' .. timeout .. ':' .. max_retries .. ':' .. retries)
+            redis.call('LPUSH', queue_keys[priority], id)
+            update(id, 'status', ARGV[6], 'retry_count', tostring(retries))
+            reclaimed = reclaimed + 1
+        else
+            redis.call('HDEL', KEYS[3], id)
+            update(id, 'status', ARGV[7], 'error_message', ARGV[8], 'completed_at', ARGV[9])
+            failed = failed + 1
+        end
+    end
+end
+return {reclaimed, failed}
+"""
+
+
+def task_record_key(task_id: str) -> str:
+    """
+    任务记录键
+
+    任务ID形如"队列名:UUID"，记录存放在queue:{队列名}:task:UUID，
+    与所属队列的键共享哈希标签，只凭任务ID即可定位记录。
+    """
+    queue_name, _, local_id = task_id.rpartition(":")
+    return f"queue:{{{queue_name}}}:task:{local_id}"
+
+
 class TaskQueue:
-    """任务队列"""
+    """
+    任务队列
+
+    Redis数据结构（队列键以{name}为哈希标签，Redis Cluster下位于同一槽位）:
+    - queue:{name}:p{priority}: 各优先级的待处理列表
+    - queue:{name}:processing: 已领取未确认的任务列表
+    - queue:{name}:deadlines: 处理中任务的可见性截止时间（有序集合）
+    - queue:{name}:delayed: 等待重试的任务及其就绪时间（有序集合）
+    - queue:{name}:meta: 未结束任务的调度信息（哈希，值为"优先级:超时:最大重试:已重试"）
+    - queue:{name}:signal: 新任务唤醒信号，空闲工作者在其上阻塞等待
+    - queue:{name}:task:{uuid}: 任务记录（哈希，字段值为JSON），任务ID为"{name}:{uuid}"
+
+    所有键位于同一槽位，事务与脚本在Redis Cluster下同样可用；
+    领取与回收脚本在同一次调用中更新任务记录，各一次往返。
+    """
 
-    def __init__(self, redis_cache: RedisCache, queue_name: str = "default"):
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        queue_name: str = "default",
+        block_timeout: int = 1,
+    ):
         self.redis_cache = redis_cache
         self.queue_name = queue_name
+        self.block_timeout = block_timeout
         self.task_handlers: Dict[str, Callable] = {}
+        self.handler_policies: Dict[str, ExecutorPolicy] = {}
         self.is_running = False
         self.workers: List[asyncio.Task] = []
+        self._claim_script = None
+        self._reclaim_script = None
+
+    @property
+    def _client(self):
+        return self.redis_cache.redis_client
+
+    def _key(self, suffix: str) -> str:
+        """队列键，以队列名为哈希标签"""
+        return f"queue:{{{self.queue_name}}}:{suffix}"
+
+    def _priority_key(self, priority: TaskPriority) -> str:
+        return self._key(f"p{priority.value}")
+
+    @property
+    def _priorities(self) -> List[TaskPriority]:
+        """按从高到低排列的优先级"""
+        return sorted(TaskPriority, key=lambda p: p.value, reverse=True)
+
+    @property
+    def _priority_keys(self) -> List[str]:
+        """按优先级从高到低排列的队列键"""
+        return [self._priority_key(priority) for priority in self._priorities]
+
+    @property
+    def _processing_key(self) -> str:
+        return self._key("processing")
+
+    @property
+    def _deadlines_key(self) -> str:
+        return self._key("deadlines")
+
+    @property
+    def _delayed_key(self) -> str:
+        return self._key("delayed")
+
+    @property
+    def _meta_key(self) -> str:
+        return self._key("meta")
+
+    @property
+    def _signal_key(self) -> str:
+        return self._key("signal")
+
+    @staticmethod
+    def _task_key(task_id: str) -> str:
+        return task_record_key(task_id)
+
+    def _new_task_id(self) -> str:
+        return f"{self.queue_name}:{uuid.uuid4()}"
+
+    def _record_args(self) -> List[Any]:
+        """脚本拼接任务记录键所需的参数：记录键前缀与任务ID中队列名前缀的长度"""
+        return [self._key("task:"), len(self.queue_name) + 1]
+
+    def _write_task(self, pipe, task: Task):
+        """在流水线中写入完整任务记录"""
+        task_key = self._task_key(task.task_id)
+        pipe.hset(task_key, mapping=task.to_redis_hash())
+        pipe.expire(task_key, TASK_RECORD_TTL)
+
+    def _write_meta(self, pipe, task: Task):
+        """在流水线中写入领取与回收脚本使用的调度信息"""
+        pipe.hset(
+            self._meta_key,
+            task.task_id,
+            f"{task.priority.value}:{task.timeout}:{task.max_retries}:{task.retry_count}",
+        )
+
+    def _ack(self, pipe, task_id: str, finished: bool = True):
+        """在流水线中确认任务，移出处理中列表；任务结束时一并删除调度信息"""
+        pipe.lrem(self._processing_key, 1, task_id)
+        pipe.zrem(self._deadlines_key, task_id)
+        if finished:
+            pipe.hdel(self._meta_key, task_id)
 
     @handle_errors
-    async def register_handler(self, task_name: str, handler: Callable):
-        """注册任务处理器"""
+    async def register_handler(
+        self,
+        task_name: str,
+        handler: Callable,
+        executor: Optional[ExecutorPolicy] = None,
+    ):
+        """
+        注册任务处理器
+
+        Args:
+            task_name: 任务名称
+            handler: 任务处理器
+            executor: 执行策略，为None时使用task_handler装饰器声明的策略
+        """
+        policy = executor or get_handler_policy(handler)
+        if policy == ExecutorPolicy.PROCESS:
+            ensure_picklable(handler)
+
         self.task_handlers[task_name] = handler
-        logger.info(f"注册任务处理器: {task_name}")
+        self.handler_policies[task_name] = policy
+        logger.info(f"注册任务处理器: {task_name} ({policy.value})")
 
     @handle_errors
     async def enqueue(
@@ -144,9 +413,15 @@ class TaskQueue:
         max_retries: int = 3,
         retry_delay: int = 60,
         timeout: int = 300,
+        delay: float = 0,
     ) -> str:
-        """添加任务到队列"""
-        task_id = str(uuid.uuid4())
+        """
+        添加任务到队列
+
+        Args:
+            delay: 延迟执行（秒），大于0时先进入延迟集合，到期后由领取脚本放回优先级队列
+        """
+        task_id = self._new_task_id()
         task = Task(
             task_id=task_id,
             task_name=task_name,
@@ -157,149 +432,375 @@ class TaskQueue:
             timeout=timeout,
         )
 
-        # 存储任务信息
-        await self.redis_cache.set(
-            f"task:{task_id}", task.to_dict(), ttl=86400  # 24小时
-        )
-
-        # 添加到队列
-        queue_key = f"queue:{self.queue_name}"
-        await self.redis_cache.lpush(queue_key, task_id)
+        # 存储任务信息并加入对应优先级队列，一次往返
+        async with self._client.pipeline(transaction=True) as pipe:
+            self._write_task(pipe, task)
+            self._write_meta(pipe, task)
+            if delay > 0:
+                pipe.zadd(self._delayed_key, {task_id: time.time() + delay})
+            else:
+                pipe.lpush(self._priority_key(priority), task_id)
+                pipe.lpush(self._signal_key, 1)
+                pipe.ltrim(self._signal_key, 0, 999)
+            await pipe.execute()
 
         logger.info(f"任务已添加到队列: {task_id} ({task_name})")
         return task_id
 
     @handle_errors
-    async def dequeue(self) -> Optional[Task]:
-        """从队列获取任务"""
-        queue_key = f"queue:{self.queue_name}"
+    async def enqueue_many(
+        self, tasks: List[Dict[str, Any]], chunk_size: int = 500
+    ) -> List[str]:
+        """
+        批量添加任务到队列
+
+        Args:
+            tasks: 任务定义列表，每项包含task_name、task_data，
+                可选priority、max_retries、retry_delay、timeout
+            chunk_size: 每次流水线提交的任务数量
+
+        Returns:
+            任务ID列表，与输入顺序一致
+        """
+        task_ids: List[str] = []
+
+        for start in range(0, len(tasks), chunk_size):
+            chunk = [
+                Task(
+                    task_id=self._new_task_id(),
+                    task_name=spec["task_name"],
+                    task_data=spec.get("task_data", {}),
+                    priority=spec.get("priority", TaskPriority.NORMAL),
+                    max_retries=spec.get("max_retries", 3),
+                    retry_delay=spec.get("retry_delay", 60),
+                    timeout=spec.get("timeout", 300),
+                )
+                for spec in tasks[start : start + chunk_size]
+            ]
+
+            # 同优先级的任务ID合并为一次LPUSH
+            by_priority: Dict[TaskPriority, List[str]] = {}
+            for task in chunk:
+                by_priority.setdefault(task.priority, []).append(task.task_id)
+
+            async with self._client.pipeline(transaction=True) as pipe:
+                for task in chunk:
+                    self._write_task(pipe, task)
+                    self._write_meta(pipe, task)
+                for priority, ids in by_priority.items():
+                    pipe.lpush(self._priority_key(priority), *ids)
+                pipe.lpush(self._signal_key, *([1] * min(len(chunk), 1000)))
+                pipe.ltrim(self._signal_key, 0, 999)
+                await pipe.execute()
+
+            task_ids.extend(task.task_id for task in chunk)
+
+        logger.info(f"批量添加任务到队列 {self.queue_name}: {len(task_ids)} 个")
+        return task_ids
+
+    async def _claim(self, count: int = 1) -> List[Task]:
+        """按优先级原子领取至多count个任务并将任务记录标记为运行中，一次往返"""
+        if self._claim_script is None:
+            self._claim_script = self._client.register_script(_CLAIM_SCRIPT)
+
+        records = await self._claim_script(
+            keys=[
+                self._processing_key,
+                self._deadlines_key,
+                self._delayed_key,
+                self._meta_key,
+                self._signal_key,
+                *self._priority_keys,
+            ],
+            args=[
+                time.time(),
+                VISIBILITY_GRACE,
+                count,
+                *self._record_args(),
+                json.dumps(TaskStatus.CANCELLED.value),
+                json.dumps(TaskStatus.RUNNING.value),
+                json.dumps(datetime.now().isoformat()),
+                *[priority.value for priority in self._priorities],
+            ],
+        )
+        return [
+            Task.from_redis_hash(dict(zip(flat[::2], flat[1::2]))) for flat in records
+        ]
+
+    async def _claim_blocking(self, count: int, block_timeout: int) -> List[Task]:
+        """领取任务，队列为空时在唤醒信号上阻塞等待，最长block_timeout秒"""
+        tasks = await self._claim(count)
+        deadline = time.monotonic() + block_timeout
+        while not tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # 阻塞等待新任务信号，被唤醒后再次领取；信号可能是已被其他工作者领取的任务遗留
+            await self._client.brpop(
+                self._signal_key, timeout=max(1, math.ceil(remaining))
+            )
+            tasks = await self._claim(count)
+        return tasks
+
+    @handle_errors
+    async def dequeue(self, block_timeout: Optional[int] = None) -> Optional[Task]:
+        """
+        从队列获取任务
+
+        按优先级从高到低领取；队列为空时在唤醒信号上阻塞等待，最长block_timeout秒。
+        领取的任务进入处理中列表，超过可见性截止时间未确认将被回收重投。
+        """
+        block_timeout = self.block_timeout if block_timeout is None else block_timeout
 
-        # 使用阻塞式弹出，超时1秒
         try:
-            task_id = await self.redis_cache.rpop(queue_key)
-            if not task_id:
-                return None
+            tasks = await self._claim_blocking(1, block_timeout)
+            return tasks[0] if tasks else None
 
-            # 获取任务信息
-            task_data = await self.redis_cache.get(f"task:{task_id}")
-            if not task_data:
-                logger.warning(f"任务信息不存在: {task_id}")
-                return None
+        except Exception as e:
+            logger.error(f"获取任务失败: {e}")
+            return None
 
-            task = Task.from_dict(task_data)
-            task.status = TaskStatus.RUNNING
-            task.started_at = datetime.now()
+    @handle_errors
+    async def dequeue_batch(
+        self, n: int, block_timeout: Optional[int] = None
+    ) -> List[Task]:
+        """
+        批量获取任务
 
-            # 更新任务状态
-            await self.redis_cache.set(f"task:{task_id}", task.to_dict(), ttl=86400)
+        一次脚本调用按优先级领取至多n个任务；队列为空时阻塞等待，
+        有任务时立即返回当前可领取的部分，不等待凑满n个。
+        """
+        block_timeout = self.block_timeout if block_timeout is None else block_timeout
 
-            return task
+        try:
+            return await self._claim_blocking(n, block_timeout)
 
         except Exception as e:
-            logger.error(f"获取任务失败: {e}")
-            return None
+            logger.error(f"批量获取任务失败: {e}")
+            return []
+
+    @handle_errors
+    async def reclaim_stalled(self, limit: int = 100) -> Dict[str, int]:
+        """回收超过可见性截止时间的任务（工作者崩溃或处理超时）"""
+        if self._reclaim_script is None:
+            self._reclaim_script = self._client.register_script(_RECLAIM_SCRIPT)
+
+        reclaimed, failed = await self._reclaim_script(
+            keys=[self._processing_key, self._deadlines_key, self._meta_key]
+            + self._priority_keys,
+            args=[
+                time.time(),
+                limit,
+                *self._record_args(),
+                json.dumps(TaskStatus.CANCELLED.value),
+                json.dumps(TaskStatus.PENDING.value),
+                json.dumps(TaskStatus.FAILED.value),
+                json.dumps("任务处理超时，超过可见性截止时间", ensure_ascii=False),
+                json.dumps(datetime.now().isoformat()),
+                *[priority.value for priority in self._priorities],
+            ],
+        )
+
+        result = {"reclaimed": reclaimed, "failed": failed}
+        if reclaimed or failed:
+            logger.warning(
+                f"回收停滞任务: 队列 {self.queue_name}, "
+                f"重投 {result['reclaimed']}, 失败 {result['failed']}"
+            )
+        return result
 
     @handle_errors
     async def get_task(self, task_id: str) -> Optional[Task]:
         """获取任务信息"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+        mapping = await self._client.hgetall(self._task_key(task_id))
+        if not mapping:
             return None
 
-        return Task.from_dict(task_data)
+        return Task.from_redis_hash(mapping)
 
     @handle_errors
     async def update_task(self, task: Task):
         """更新任务信息"""
-        await self.redis_cache.set(f"task:{task.task_id}", task.to_dict(), ttl=86400)
+        async with self._client.pipeline(transaction=False) as pipe:
+            self._write_task(pipe, task)
+            await pipe.execute()
+
+    def _stage_completion(self, pipe, task_id: str, result: Any):
+        """在流水线中写入完成状态并确认任务"""
+        completed = {
+            "status": TaskStatus.COMPLETED.value,
+            "completed_at": datetime.now().isoformat(),
+            "result": result,
+            "progress": 100.0,
+        }
+        task_key = self._task_key(task_id)
+        pipe.hset(
+            task_key,
+            mapping={
+                field: json.dumps(value, ensure_ascii=False, default=str)
+                for field, value in completed.items()
+            },
+        )
+        pipe.expire(task_key, TASK_RECORD_TTL)
+        self._ack(pipe, task_id)
+
+    def _stage_failure(self, pipe, task: Task, error_message: str):
+        """在流水线中写入失败状态，未超过重试次数时进入延迟重试集合"""
+        task.error_message = error_message
+
+        # 检查是否需要重试
+        retrying = task.retry_count < task.max_retries
+        if retrying:
+            task.status = TaskStatus.RETRYING
+            task.retry_count += 1
+            self._write_meta(pipe, task)
+            pipe.zadd(self._delayed_key, {task.task_id: time.time() + task.retry_delay})
+            logger.info(f"任务重试: {task.task_id} (第{task.retry_count}次)")
+        else:
+            task.status = TaskStatus.FAILED
+            task.completed_at = datetime.now()
+            logger.error(f"任务失败: {task.task_id} - {error_message}")
+
+        self._write_task(pipe, task)
+        self._ack(pipe, task.task_id, finished=not retrying)
 
     @handle_errors
     async def complete_task(self, task_id: str, result: Any = None):
-        """完成任务"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+        """完成任务：写入结果并确认，一次往返"""
+        task_key = self._task_key(task_id)
+
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.exists(task_key)
+            self._stage_completion(pipe, task_id, result)
+            existed = (await pipe.execute())[0]
+
+        if not existed:
             logger.warning(f"任务不存在: {task_id}")
+            await self._client.delete(task_key)
             return
 
-        task = Task.from_dict(task_data)
-        task.status = TaskStatus.COMPLETED
-        task.completed_at = datetime.now()
-        task.result = result
-        task.progress = 100.0
-
-        await self.redis_cache.set(f"task:{task_id}", task.to_dict(), ttl=86400)
         logger.info(f"任务完成: {task_id}")
 
     @handle_errors
-    async def fail_task(self, task_id: str, error_message: str):
-        """标记任务失败"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+    async def fail_task(
+        self, task_id: str, error_message: str, task: Optional[Task] = None
+    ):
+        """
+        标记任务失败
+
+        未超过最大重试次数时进入延迟重试集合，retry_delay秒后由领取脚本放回队列，
+        不阻塞工作者。传入task可省去读取任务记录的往返。
+        """
+        if task is None:
+            task = await self.get_task(task_id)
+        if task is None:
             logger.warning(f"任务不存在: {task_id}")
             return
 
-        task = Task.from_dict(task_data)
-        task.error_message = error_message
+        async with self._client.pipeline(transaction=True) as pipe:
+            self._stage_failure(pipe, task, error_message)
+            await pipe.execute()
 
-        # 检查是否需要重试
-        if task.retry_count < task.max_retries:
-            task.status = TaskStatus.RETRYING
-            task.retry_count += 1
-
-            # 延迟重试
-            await asyncio.sleep(task.retry_delay)
-
-            # 重新加入队列
-            queue_key = f"queue:{self.queue_name}"
-            await self.redis_cache.lpush(queue_key, task_id)
+    @handle_errors
+    async def ack_batch(
+        self,
+        completed: Dict[str, Any],
+        failed: Optional[List[Tuple[Task, str]]] = None,
+    ):
+        """
+        批量确认任务，一次往返写入整批结果
+
+        Args:
+            completed: 成功任务ID到结果的映射
+            failed: 失败任务及错误信息列表
+        """
+        failed = failed or []
+        if not completed and not failed:
+            return
 
-            logger.info(f"任务重试: {task_id} (第{task.retry_count}次)")
-        else:
-            task.status = TaskStatus.FAILED
-            task.completed_at = datetime.now()
-            logger.error(f"任务失败: {task_id} - {error_message}")
+        async with self._client.pipeline(transaction=True) as pipe:
+            for task_id, result in completed.items():
+                self._stage_completion(pipe, task_id, result)
+            for task, error_message in failed:
+                self._stage_failure(pipe, task, error_message)
+            await pipe.execute()
 
-        await self.redis_cache.set(f"task:{task_id}", task.to_dict(), ttl=86400)
+        logger.info(f"批量确认任务: 成功 {len(completed)}, 失败 {len(failed)}")
 
     @handle_errors
     async def cancel_task(self, task_id: str):
-        """取消任务"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+        """取消任务，队列中的已取消任务在领取时被丢弃"""
+        task = await self.get_task(task_id)
+        if task is None:
             logger.warning(f"任务不存在: {task_id}")
             return
 
-        task = Task.from_dict(task_data)
         task.status = TaskStatus.CANCELLED
         task.completed_at = datetime.now()
 
-        await self.redis_cache.set(f"task:{task_id}", task.to_dict(), ttl=86400)
+        async with self._client.pipeline(transaction=True) as pipe:
+            self._write_task(pipe, task)
+            pipe.zrem(self._delayed_key, task_id)
+            pipe.hdel(self._meta_key, task_id)
+            await pipe.execute()
         logger.info(f"任务已取消: {task_id}")
 
     @handle_errors
     async def get_queue_size(self) -> int:
-        """获取队列大小"""
-        queue_key = f"queue:{self.queue_name}"
-        return await self.redis_cache.llen(queue_key)
+        """获取队列大小（所有优先级待处理任务数）"""
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key in self._priority_keys:
+                pipe.llen(key)
+            sizes = await pipe.execute()
+        return sum(sizes)
 
     @handle_errors
-    async def get_task_stats(self) -> Dict[str, int]:
+    async def get_task_stats(self) -> Dict[str, Any]:
         """获取任务统计"""
-        # 这里可以实现更复杂的统计逻辑
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key in self._priority_keys:
+                pipe.llen(key)
+            pipe.llen(self._processing_key)
+            pipe.zcard(self._delayed_key)
+            *sizes, processing, delayed = await pipe.execute()
+
         return {
-            "queue_size": await self.get_queue_size(),
+            "queue_size": sum(sizes),
+            "queue_size_by_priority": {
+                priority.name.lower(): size
+                for priority, size in zip(self._priorities, sizes)
+            },
+            "processing": processing,
+            "delayed": delayed,
             "total_tasks": len(self.task_handlers),
         }
 
 
 class TaskWorker:
-    """任务工作者"""
+    """
+    任务工作者
+
+    batch_size大于1时每次领取至多batch_size个任务并发执行，整批结果一次确认。
+    处理器按注册的执行策略在事件循环、线程池或进程池中运行，并受任务timeout约束。
+    """
 
-    def __init__(self, task_queue: TaskQueue, worker_id: str):
+    def __init__(
+        self,
+        task_queue: TaskQueue,
+        worker_id: str,
+        reclaim_interval: int = 30,
+        batch_size: int = 1,
+        executor: Optional[HandlerExecutor] = None,
+    ):
         self.task_queue = task_queue
         self.worker_id = worker_id
+        self.executor = executor or HandlerExecutor()
+        self.reclaim_interval = reclaim_interval
+        self.batch_size = max(1, batch_size)
         self.is_running = False
         self.current_task: Optional[Task] = None
+        self.current_tasks: List[Task] = []
+        self._last_reclaim = 0.0
 
     @handle_errors
     async def start(self):
@@ -309,25 +810,25 @@ class TaskWorker:
 
         while self.is_running:
             try:
-                # 获取任务
-                task = await self.task_queue.dequeue()
-                if not task:
-                    await asyncio.sleep(1)  # 没有任务时等待
-                    continue
+                # 定期回收停滞任务
+                if time.monotonic() - self._last_reclaim >= self.reclaim_interval:
+                    self._last_reclaim = time.monotonic()
+                    await self.task_queue.reclaim_stalled()
 
-                self.current_task = task
-                logger.info(f"工作者 {self.worker_id} 开始处理任务: {task.task_id}")
+                if self.batch_size > 1:
+                    processed = await self._process_batch()
+                else:
+                    processed = await self._process_one()
 
-                # 执行任务
-                await self._execute_task(task)
+                if not processed and not self.task_queue.redis_cache.is_connected:
+                    await asyncio.sleep(1)  # Redis不可用时退避
 
             except Exception as e:
                 logger.error(f"工作者 {self.worker_id} 处理任务时发生错误: {e}")
-                if self.current_task:
-                    await self.task_queue.fail_task(self.current_task.task_id, str(e))
 
             finally:
                 self.current_task = None
+                self.current_tasks = []
 
     @handle_errors
     async def stop(self):
@@ -335,38 +836,95 @@ class TaskWorker:
         self.is_running = False
         logger.info(f"任务工作者停止: {self.worker_id}")
 
+    async def _process_one(self) -> bool:
+        """领取并执行单个任务（队列为空时阻塞等待）"""
+        task = await self.task_queue.dequeue()
+        if not task:
+            return False
+
+        self.current_task = task
+        logger.info(f"工作者 {self.worker_id} 开始处理任务: {task.task_id}")
+
+        # 执行任务，失败已在_execute_task中记录
+        try:
+            await self._execute_task(task)
+        except Exception:
+            pass
+        return True
+
+    async def _process_batch(self) -> bool:
+        """领取一批任务并发执行，整批结果一次确认"""
+        tasks = await self.task_queue.dequeue_batch(self.batch_size)
+        if not tasks:
+            return False
+
+        self.current_tasks = tasks
+        logger.info(f"工作者 {self.worker_id} 开始处理批量任务: {len(tasks)} 个")
+
+        results = await asyncio.gather(
+            *[self._run_handler(task) for task in tasks], return_exceptions=True
+        )
+
+        completed: Dict[str, Any] = {}
+        failed: List[Tuple[Task, str]] = []
+        for task, result in zip(tasks, results):
+            if isinstance(result, BaseException):
+                failed.append((task, str(result)))
+            else:
+                completed[task.task_id] = result
+
+        await self.task_queue.ack_batch(completed, failed)
+        return True
+
+    async def _run_handler(self, task: Task) -> Any:
+        """查找并调用任务处理器"""
+        handler = self.task_queue.task_handlers.get(task.task_name)
+        if not handler:
+            raise BusinessError(f"任务处理器不存在: {task.task_name}")
+
+        try:
+            return await self.executor.run(
+                handler,
+                task.task_data,
+                self.task_queue.handler_policies.get(task.task_name),
+                timeout=task.timeout,
+            )
+        except asyncio.TimeoutError:
+            raise BusinessError(f"任务执行超时: {task.task_name} ({task.timeout}s)")
+
     @handle_errors
     async def _execute_task(self, task: Task):
         """执行任务"""
         try:
-            # 获取任务处理器
-            handler = self.task_queue.task_handlers.get(task.task_name)
-            if not handler:
-                raise BusinessError(
-                    code="TASK_HANDLER_NOT_FOUND",
-                    message=f"任务处理器不存在: {task.task_name}",
-                )
-
             # 执行任务
-            result = await handler(task.task_data)
+            result = await self._run_handler(task)
 
             # 标记任务完成
             await self.task_queue.complete_task(task.task_id, result)
 
         except Exception as e:
             # 标记任务失败
-            await self.task_queue.fail_task(task.task_id, str(e))
+            await self.task_queue.fail_task(task.task_id, str(e), task)
             raise
 
 
 class TaskManager:
     """任务管理器"""
 
-    def __init__(self, redis_cache: RedisCache):
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        max_threads: Optional[int] = None,
+        max_processes: Optional[int] = None,
+    ):
         self.redis_cache = redis_cache
         self.queues: Dict[str, TaskQueue] = {}
         self.workers: List[TaskWorker] = []
         self.is_running = False
+        # 所有工作者共享的线程池/进程池
+        self.executor = HandlerExecutor(
+            max_threads=max_threads, max_processes=max_processes
+        )
 
     @handle_errors
     async def create_queue(self, queue_name: str) -> TaskQueue:
@@ -383,14 +941,18 @@ class TaskManager:
 
     @handle_errors
     async def register_handler(
-        self, queue_name: str, task_name: str, handler: Callable
+        self,
+        queue_name: str,
+        task_name: str,
+        handler: Callable,
+        executor: Optional[ExecutorPolicy] = None,
     ):
         """注册任务处理器"""
         queue = self.queues.get(queue_name)
         if not queue:
             queue = await self.create_queue(queue_name)
 
-        await queue.register_handler(task_name, handler)
+        await queue.register_handler(task_name, handler, executor)
 
     @handle_errors
     async def enqueue_task(
@@ -417,18 +979,42 @@ class TaskManager:
             timeout=timeout,
         )
 
+    @handle_errors
+    async def enqueue_many(
+        self, queue_name: str, tasks: List[Dict[str, Any]], chunk_size: int = 500
+    ) -> List[str]:
+        """批量添加任务到队列，参数见TaskQueue.enqueue_many"""
+        queue = self.queues.get(queue_name)
+        if not queue:
+            queue = await self.create_queue(queue_name)
+
+        return await queue.enqueue_many(tasks, chunk_size=chunk_size)
+
+    @handle_errors
+    async def dequeue_batch(
+        self, queue_name: str, n: int, block_timeout: Optional[int] = None
+    ) -> List[Task]:
+        """从队列批量获取任务"""
+        queue = self.queues.get(queue_name)
+        if not queue:
+            return []
+
+        return await queue.dequeue_batch(n, block_timeout=block_timeout)
+
     @handle_errors
     async def get_task(self, task_id: str) -> Optional[Task]:
         """获取任务信息"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+        mapping = await self.redis_cache.redis_client.hgetall(task_record_key(task_id))
+        if not mapping:
             return None
 
-        return Task.from_dict(task_data)
+        return Task.from_redis_hash(mapping)
 
     @handle_errors
-    async def start_workers(self, queue_name: str, worker_count: int = 1):
-        """启动工作者"""
+    async def start_workers(
+        self, queue_name: str, worker_count: int = 1, batch_size: int = 1
+    ):
+        """启动工作者，batch_size大于1时每个工作者批量领取并发执行"""
         queue = self.queues.get(queue_name)
         if not queue:
             logger.error(f"队列不存在: {queue_name}")
@@ -436,7 +1022,9 @@ class TaskManager:
 
         for i in range(worker_count):
             worker_id = f"{queue_name}_worker_{i}"
-            worker = TaskWorker(queue, worker_id)
+            worker = TaskWorker(
+                queue, worker_id, batch_size=batch_size, executor=self.executor
+            )
             self.workers.append(worker)
 
             # 启动工作者
@@ -451,6 +1039,7 @@ class TaskManager:
             await worker.stop()
 
         self.workers.clear()
+        self.executor.shutdown(wait=False)
         logger.info("所有工作者已停止")
 
     @handle_errors
@@ -458,28 +1047,30 @@ class TaskManager:
         """获取所有任务"""
         tasks = []
 
-        # 从Redis获取所有任务键
-        task_keys = await self.redis_cache.keys("task:*")
-        for key in task_keys:
-            task_data = await self.redis_cache.get(key)
-            if task_data:
-                tasks.append(Task.from_dict(task_data))
+        # 通过SCAN分批获取任务键，每批流水线读取任务记录
+        client = self.redis_cache.redis_client
+        async for task_keys in self.redis_cache.iter_keys("queue:*:task:*"):
+            async with client.pipeline(transaction=False) as pipe:
+                for key in task_keys:
+                    pipe.hgetall(key)
+                mappings = await pipe.execute()
+            for mapping in mappings:
+                if mapping:
+                    tasks.append(Task.from_redis_hash(mapping))
 
         return tasks
 
     @handle_errors
     async def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
-        task_data = await self.redis_cache.get(f"task:{task_id}")
-        if not task_data:
+        task = await self.get_task(task_id)
+        if task is None:
             return False
 
-        task = Task.from_dict(task_data)
-        task.status = TaskStatus.CANCELLED
-        task.completed_at = datetime.now()
-
-        await self.redis_cache.set(f"task:{task_id}", task.to_dict(), ttl=86400)
-        logger.info(f"任务已取消: {task_id}")
+        # 任务ID以队列名开头，由所属队列取消，同时移出延迟集合与调度信息
+        queue_name = task_id.rpartition(":")[0]
+        queue = self.queues.get(queue_name) or TaskQueue(self.redis_cache, queue_name)
+        await queue.cancel_task(task_id)
         return True
 
     @handle_errors
@@ -526,6 +1117,7 @@ class TaskManager:
             "queues": {},
             "workers": len(self.workers),
             "is_running": self.is_running,
+            "executors": self.executor.get_stats(),
         }
 
         for queue_name, queue in self.queues.items():
@@ -539,24 +1131,26 @@ class TaskManager:
 
 
 # 任务装饰器
-def task_handler(queue_name: str = "default"):
+def task_handler(
+    queue_name: str = "default",
+    executor: ExecutorPolicy = ExecutorPolicy.INLINE,
+):
     """
     任务处理器装饰器
 
     Args:
         queue_name: 队列名称
+        executor: 执行策略，CPU密集型处理器使用PROCESS，需为模块级函数
     """
 
     def decorator(func: Callable):
-        async def wrapper(*args, **kwargs):
-            return await func(*args, **kwargs)
+        # 直接标记原函数，保证进程池执行时可按引用序列化
+        func._is_task_handler = True
+        func._queue_name = queue_name
+        func._task_name = func.__name__
+        func._executor_policy = executor
 
-        # 标记为任务处理器
-        wrapper._is_task_handler = True
-        wrapper._queue_name = queue_name
-        wrapper._task_name = func.__name__
-
-        return wrapper
+        return func
 
     return decorator
 
@@ -0,0 +1,186 @@
+"""
+Shapley归因服务测试
+"""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.services.attribution_service import ShapleyAttributionService
+
+
+def permutation_shapley(touchpoints, conversion_value, value_function):
+    """按全部排列枚举的参考实现"""
+    n = len(touchpoints)
+    phi = np.zeros(n)
+    for permutation in itertools.permutations(range(n)):
+        coalition = set()
+        for i in permutation:
+            before = value_function(coalition, touchpoints, conversion_value)
+            coalition = coalition | {i}
+            phi[i] += value_function(coalition, touchpoints, conversion_value) - before
+    phi /= math.factorial(n)
+    return phi / phi.sum()
+
+
+def interaction_value(coalition, touchpoints, conversion_value):
+    """含交互项的非可加价值函数"""
+    value = sum(touchpoints[i]["cost"] for i in coalition)
+    if {0, 2} <= coalition:
+        value += 0.3 * conversion_value
+    if len(coalition) >= 3:
+        value += 0.1 * conversion_value * len(coalition) ** 0.5
+    return value
+
+
+class TestShapleyAttributionService:
+    """Shapley归因服务测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.touchpoints = [
+            {"id": f"tp{i}", "cost": cost}
+            for i, cost in enumerate([100, 50, 0, 25, 75, 10])
+        ]
+
+    def test_additive_closed_form(self):
+        """测试内置价值函数的闭式解与排列枚举一致"""
+        service = ShapleyAttributionService(random_seed=0)
+        expected = permutation_shapley(self.touchpoints, 1000, service._coalition_value)
+
+        for method in ["exact", "monte_carlo"]:
+            result = service.calculate_shapley_attribution(
+                self.touchpoints, 1000, method=method
+            )
+            np.testing.assert_allclose(list(result.values()), expected)
+
+    def test_exact_general_value_function(self):
+        """测试一般价值函数按子集精确计算"""
+        service = ShapleyAttributionService(value_function=interaction_value)
+        result = service.calculate_shapley_attribution(
+            self.touchpoints, 1000, method="exact"
+        )
+
+        expected = permutation_shapley(self.touchpoints, 1000, interaction_value)
+        np.testing.assert_allclose(list(result.values()), expected)
+
+    def test_monte_carlo_converges(self):
+        """测试采样估计在容差内收敛并提前停止"""
+        calls = []
+
+        def counted_value(coalition, touchpoints, conversion_value):
+            calls.append(1)
+            return interaction_value(coalition, touchpoints, conversion_value)
+
+        service = ShapleyAttributionService(
+            random_seed=0, value_function=counted_value, value_function_type="general"
+        )
+        result = service.calculate_shapley_attribution(self.touchpoints, 1000)
+
+        expected = permutation_shapley(self.touchpoints, 1000, interaction_value)
+        np.testing.assert_allclose(list(result.values()), expected, atol=0.01)
+        # 每个联盟只求值一次
+        assert len(calls) <= 2 ** len(self.touchpoints)
+
+    def test_symmetric_value_function(self):
+        """测试对称价值函数平均分配"""
+        service = ShapleyAttributionService(
+            value_function=lambda coalition, tps, value: value * len(coalition) ** 0.5
+        )
+        result = service.calculate_shapley_attribution(self.touchpoints, 1000)
+
+        assert result == {tp["id"]: pytest.approx(1 / 6) for tp in self.touchpoints}
+
+
+class TestBatchAttribution:
+    """批量与流式归因测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        rng = np.random.default_rng(0)
+        channels = ["search", "social", "email"]
+        self.journeys = [
+            {
+                "order_id": f"o{k}",
+                "amount": float(rng.choice([100, 250, 0])),
+                "touchpoints": [
+                    {
+                        "id": f"o{k}-{j}",
+                        "type": str(rng.choice(channels)),
+                        "cost": float(rng.choice([0, 10, 30])),
+                    }
+                    for j in range(rng.integers(1, 5))
+                ],
+            }
+            for k in range(300)
+        ]
+
+    def test_batch_matches_single_orders(self):
+        """测试按签名分组的批量结果与逐单计算一致"""
+        service = ShapleyAttributionService()
+        orders = [
+            {"order_id": j["order_id"], "amount": j["amount"]} for j in self.journeys
+        ]
+        journey_map = {j["order_id"]: j["touchpoints"] for j in self.journeys}
+
+        results = service.batch_calculate_attribution(orders, journey_map)
+
+        for order in orders:
+            expected = ShapleyAttributionService().calculate_shapley_attribution(
+                journey_map[order["order_id"]], order["amount"]
+            )
+            assert results[order["order_id"]] == pytest.approx(expected)
+        multi_touch = sum(len(j["touchpoints"]) > 1 for j in self.journeys)
+        assert service.signature_hits + service.signature_misses == multi_touch
+        signatures = {
+            tuple(sorted((tp["type"], tp["cost"]) for tp in j["touchpoints"]))
+            for j in self.journeys
+            if len(j["touchpoints"]) > 1
+        }
+        assert service.signature_misses == len(signatures)
+
+    def test_streaming_parallel_and_parquet(self, tmp_path):
+        """测试分块、多进程与Parquet输入的渠道汇总一致"""
+        pd = pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+        service = ShapleyAttributionService()
+
+        snapshots = list(service.iter_channel_attribution(self.journeys, chunk_size=70))
+        serial = snapshots[-1]
+        parallel = service.calculate_channel_attribution(
+            iter(self.journeys), chunk_size=70, n_jobs=2
+        )
+
+        path = tmp_path / "journeys.parquet"
+        pd.DataFrame(
+            [
+                {
+                    "order_id": j["order_id"],
+                    "amount": j["amount"],
+                    "touchpoint_id": tp["id"],
+                    "type": tp["type"],
+                    "cost": tp["cost"],
+                }
+                for j in self.journeys
+                for tp in j["touchpoints"]
+            ]
+        ).to_parquet(path)
+        from_parquet = service.calculate_channel_attribution(str(path), chunk_size=70)
+
+        assert len(snapshots) == 5
+        assert serial["journeys"] == 300
+        attributed = sum(
+            stats["attributed_value"] for stats in serial["channels"].values()
+        )
+        assert attributed == pytest.approx(serial["conversion_value"])
+        for result in [parallel, from_parquet]:
+            assert result["journeys"] == serial["journeys"]
+            for channel, stats in serial["channels"].items():
+                assert result["channels"][channel] == pytest.approx(stats)
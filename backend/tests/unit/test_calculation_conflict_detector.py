@@ -0,0 +1,403 @@
+"""
+计算冲突检测测试
+"""
+
+import math
+import random
+import re
+import sys
+import os
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.services.data_enhancement.calculation_conflict_detector import (
+    CalculationConflictDetector,
+    CalculationConflictError,
+)
+
+CENT = Decimal("0.01")
+
+_REFERENCE_FIELD = re.compile(r"\[([^\]]+)\]|(?<![\w.])([^\W\d]\w*)")
+
+
+def _reference_expected(expression: str, record: dict) -> Decimal:
+    """逐行求值：字段代入浮点数后计算，Decimal(str(结果))舍入到分，失败时为0"""
+
+    def substitute(match):
+        field = (match.group(1) or match.group(2)).strip()
+        try:
+            value = float(record.get(field, 0))
+        except (ValueError, TypeError):
+            value = 0.0
+        return f"({value!r})"
+
+    numeric = _REFERENCE_FIELD.sub(substitute, expression)
+    numeric = numeric.replace("×", "*").replace("÷", "/")
+    try:
+        result = eval(numeric, {"__builtins__": {}})
+        return Decimal(str(result)).quantize(CENT, rounding=ROUND_HALF_UP)
+    except Exception:
+        return Decimal("0")
+
+
+def _reference_conflicts(records: list, rules: list, tolerance: Decimal) -> list:
+    """逐行逐规则按Decimal比较，返回 (行, 字段, 期望值, 实际值)"""
+    found = []
+    for record in records:
+        for rule in rules:
+            target, expression = [
+                part.strip() for part in rule["formula"].split("=", 1)
+            ]
+            value = record.get(target)
+            if value is None or isinstance(value, bool):
+                continue
+            try:
+                if not math.isfinite(float(value)):
+                    continue
+            except (ValueError, TypeError):
+                continue
+            try:
+                actual = Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                continue
+            expected = _reference_expected(expression, record)
+            if abs(expected - actual) > tolerance:
+                found.append((record["row_index"], target, expected, actual))
+    return sorted(found)
+
+
+class TestFormulaParsing:
+    """公式解析测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.detector = CalculationConflictDetector(None)
+
+    def _ast(self, expression: str) -> tuple:
+        return self.detector.parse_formula(f"x = {expression}")["ast"]
+
+    def test_precedence_and_associativity(self):
+        """测试乘除优先于加减，同级运算左结合，括号改变优先级"""
+        a, b, c = ("field", "a"), ("field", "b"), ("field", "c")
+
+        assert self._ast("a + b × c") == ("op", "+", a, ("op", "*", b, c))
+        assert self._ast("(a + b) × c") == ("op", "*", ("op", "+", a, b), c)
+        assert self._ast("a - b - c") == ("op", "-", ("op", "-", a, b), c)
+        assert self._ast("a ÷ b * c") == ("op", "*", ("op", "/", a, b), c)
+
+    def test_unary_minus_and_constants(self):
+        """测试一元负号与数值常量"""
+        assert self._ast("-a × 1.13") == (
+            "op",
+            "*",
+            ("neg", ("field", "a")),
+            ("number", 1.13),
+        )
+        assert self._ast("a - -2") == (
+            "op",
+            "-",
+            ("field", "a"),
+            ("neg", ("number", 2.0)),
+        )
+        assert self._ast("+a") == ("field", "a")
+
+    def test_bracketed_fields(self):
+        """测试方括号字段名可包含空格与括号"""
+        parsed = self.detector.parse_formula("金额 = [单价 (含税)] × [数量] - 折扣")
+
+        assert parsed["target_field"] == "金额"
+        assert parsed["referenced_fields"] == ["单价 (含税)", "数量", "折扣"]
+        assert parsed["operators"] == ["×", "-"]
+
+    def test_invalid_formula(self):
+        """测试无效公式抛出解析错误"""
+        for formula in ["金额 数量 × 单价", "x = a ×", "x = (a + b", "x = a $ b"]:
+            try:
+                self.detector.parse_formula(formula)
+            except CalculationConflictError:
+                continue
+            raise AssertionError(f"未拒绝无效公式: {formula}")
+
+
+class TestExpressionEvaluation:
+    """表达式求值测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.detector = CalculationConflictDetector(None)
+
+    def test_evaluate_expression(self):
+        """测试求值遵循运算优先级、一元负号与常量"""
+        record = {"a": 1, "b": 2, "c": "3", "单价 (含税)": 4}
+
+        assert self.detector.evaluate_expression("a + b × c", record) == Decimal("7.00")
+        assert self.detector.evaluate_expression("(a + b) ÷ 4", record) == Decimal(
+            "0.75"
+        )
+        assert self.detector.evaluate_expression("-a × b + 10", record) == Decimal(
+            "8.00"
+        )
+        assert self.detector.evaluate_expression(
+            "[单价 (含税)] × 1.13", record
+        ) == Decimal("4.52")
+        # 缺失字段按0处理
+        assert self.detector.evaluate_expression("a + missing", record) == Decimal(
+            "1.00"
+        )
+
+    def test_invalid_rows_expect_zero(self):
+        """测试除数为0、NaN或无穷的行期望值为0"""
+        evaluate = self.detector.evaluate_expression
+
+        assert evaluate("a ÷ b", {"a": 1, "b": 0}) == Decimal("0")
+        assert evaluate("a ÷ (b - 1)", {"a": 1, "b": 1}) == Decimal("0")
+        assert evaluate("a × b", {"a": float("nan"), "b": 2}) == Decimal("0")
+        assert evaluate("a + b", {"a": float("inf"), "b": 2}) == Decimal("0")
+
+    def test_invalid_rows_reported_against_zero(self):
+        """测试计算失败的行以期望值0与实际值比较"""
+        rules = [{"formula": "单价 = 金额 ÷ 数量"}]
+        records = [
+            {"row_index": 0, "金额": 10, "数量": 0, "单价": 5},
+            {"row_index": 1, "金额": float("nan"), "数量": 2, "单价": 3},
+            {"row_index": 2, "金额": 10, "数量": 0, "单价": 0},
+            {"row_index": 3, "金额": 10, "数量": 4, "单价": 2.5},
+            # 超出Decimal精度的期望值按0处理，不影响其他行
+            {"row_index": 4, "金额": 1e30, "数量": 1, "单价": 7},
+        ]
+
+        conflicts = self.detector.detect_conflicts_in_records(
+            records, rules, Decimal("0.01")
+        )
+
+        assert [c["row_index"] for c in conflicts] == [0, 1, 4]
+        assert all(c["expected_value"] == 0.0 for c in conflicts)
+        assert [c["actual_value"] for c in conflicts] == [5.0, 3.0, 7.0]
+
+
+class TestRounding:
+    """半分舍入边界与大数值精确比较测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.detector = CalculationConflictDetector(None)
+        self.rules = [{"formula": "金额 = 数量 × 单价"}]
+
+    def _conflicts(self, rows: list, tolerance: str = "0") -> list:
+        records = [
+            {"row_index": i, "数量": quantity, "单价": price, "金额": amount}
+            for i, (quantity, price, amount) in enumerate(rows)
+        ]
+        return self.detector.detect_conflicts_in_records(
+            records, self.rules, Decimal(tolerance)
+        )
+
+    def test_half_cent_boundaries(self):
+        """测试半分边界按Decimal(str(值))的ROUND_HALF_UP舍入"""
+        rows = [
+            # 1.005、2.675的二进制表示略小于半分，Decimal(str())仍向上舍入
+            (1.005, 1, 1.01),
+            (2.675, 1, 2.68),
+            (0.125, 1, 0.13),
+            # 负数远离零舍入
+            (-1.005, 1, -1.01),
+            (-2.675, 1, -2.68),
+            # 实际值同样按半分舍入
+            (1, 1.01, 1.005),
+        ]
+
+        assert self._conflicts(rows) == []
+
+        wrong = [(1.005, 1, 1.00), (-2.675, 1, -2.67), (0.125, 1, 0.12)]
+        conflicts = self._conflicts(wrong)
+        assert [c["expected_value"] for c in conflicts] == [1.01, -2.68, 0.13]
+        assert all(c["difference"] == 0.01 for c in conflicts)
+
+    def test_large_values_exact(self):
+        """测试超过1e7的数值按Decimal精确舍入比较"""
+        rows = [
+            (12345678.905, 1, 12345678.91),
+            (1, 98765432.125, 98765432.13),
+            (3, 33333333.335, 100000000.005),
+            # 浮点乘100后远离半分（...47.496），只有Decimal舍入得到.48
+            (327520963022.475, 1, 327520963022.48),
+        ]
+
+        assert self._conflicts(rows) == []
+
+        conflicts = self._conflicts(
+            [(12345678.905, 1, 12345678.90), (327520963022.475, 1, 327520963022.47)]
+        )
+        assert [c["expected_value"] for c in conflicts] == [
+            12345678.91,
+            327520963022.48,
+        ]
+        assert all(c["difference"] == 0.01 for c in conflicts)
+
+    def test_tolerance_boundary(self):
+        """测试差值等于容差时不算冲突"""
+        assert self._conflicts([(1, 10, 10.01)], tolerance="0.01") == []
+        assert len(self._conflicts([(1, 10, 10.02)], tolerance="0.01")) == 1
+
+
+class TestDecimalEquivalence:
+    """按列检测与逐行Decimal求值一致性测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.detector = CalculationConflictDetector(None)
+        self.rnd = random.Random(11)
+        self.rules = [
+            {"formula": "金额 = 数量 × 单价"},
+            {"formula": "税额 = 金额 × 0.13"},
+            {"formula": "合计 = 金额 + 税额 - [折扣 金额]"},
+            {"formula": "均价 = (金额 - [折扣 金额]) ÷ 数量"},
+            {"formula": "差额 = -合计 + 金额 × (1 + 税率)"},
+        ]
+
+    def _value(self):
+        roll = self.rnd.random()
+        if roll < 0.04:
+            return None
+        if roll < 0.07:
+            return "abc"
+        if roll < 0.1:
+            return float("nan")
+        if roll < 0.15:
+            return 0
+        if roll < 0.2:
+            return str(round(self.rnd.uniform(-100, 100), 3))
+        if roll < 0.25:
+            return 1
+        if roll < 0.35:
+            # 半分边界，含浮点乘100后偏离半分的大数值
+            sign = self.rnd.choice(["", "-"])
+            whole = self.rnd.choice([10**3, 10**8, 10**13])
+            cents = self.rnd.randint(0, 99)
+            return float(f"{sign}{self.rnd.randint(0, whole)}.{cents:02d}5")
+        return round(self.rnd.uniform(-1000, 1000), self.rnd.choice([0, 1, 2, 3]))
+
+    def _records(self, size: int) -> list:
+        records = []
+        for i in range(size):
+            record = {
+                "row_index": i,
+                "数量": self._value(),
+                "单价": self._value(),
+                "折扣 金额": self._value(),
+                "税率": self.rnd.choice([0.13, 0.06, self._value()]),
+            }
+            expected = {
+                "金额": _reference_expected("数量 × 单价", record),
+            }
+            record["金额"] = (
+                float(expected["金额"]) if self.rnd.random() < 0.6 else self._value()
+            )
+            for field in ["税额", "合计", "均价", "差额"]:
+                if self.rnd.random() < 0.1:
+                    continue
+                record[field] = self._value()
+            records.append(record)
+        return records
+
+    def test_matches_decimal_evaluation(self):
+        """测试按列检测的冲突与逐行Decimal求值完全一致"""
+        records = self._records(3000)
+
+        for tolerance in [Decimal("0"), Decimal("0.01"), Decimal("0.5")]:
+            conflicts = self.detector.detect_conflicts_in_records(
+                records, self.rules, tolerance
+            )
+            found = sorted(
+                (
+                    c["row_index"],
+                    c["field"],
+                    Decimal(str(c["expected_value"])),
+                    Decimal(str(c["actual_value"])),
+                )
+                for c in conflicts
+            )
+
+            assert found == _reference_conflicts(records, self.rules, tolerance)
+            assert len(found) > 1000
+
+
+class TestDependencyIndex:
+    """字段依赖索引测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.detector = CalculationConflictDetector(None)
+
+    def test_closure_and_rule_order(self):
+        """测试多级依赖的传递闭包与规则拓扑顺序"""
+        rules = [
+            {"formula": "C = B + 1"},
+            {"formula": "B = A × 2"},
+            {"formula": "A = x + y"},
+            {"formula": "D = x - 1"},
+        ]
+        index = self.detector.get_dependency_index(rules)
+
+        # 按拓扑顺序排列：D只依赖x，先于同时依赖x、y的A就绪
+        assert index.closure["x"] == ["D", "A", "B", "C"]
+        assert index.closure["A"] == ["B", "C"]
+        assert index.closure["B"] == ["C"]
+        assert "C" not in index.closure
+        assert index.cycles == []
+        # 上游规则先于依赖它的规则
+        assert index.rule_order == [3, 2, 1, 0]
+        assert self.detector.get_dependency_index(rules) is index
+
+    def test_cascade_reports_every_level(self):
+        """测试A→B→C链上A冲突时B与C都记为级联影响字段"""
+        rules = [
+            {"formula": "C = B + 1"},
+            {"formula": "B = A × 2"},
+            {"formula": "A = x + y"},
+        ]
+        records = [
+            {"row_index": 0, "x": 1, "y": 2, "A": 3, "B": 6, "C": 7},
+            {"row_index": 1, "x": 1, "y": 2, "A": 4, "B": 8, "C": 9},
+            {"row_index": 2, "x": 1, "y": 2, "A": 3, "B": 6, "C": 8},
+        ]
+
+        cascades = self.detector.detect_cascade_conflicts(
+            records, rules, Decimal("0.01")
+        )
+
+        by_row = {(c["row_index"], c["field"]): c for c in cascades}
+        assert set(by_row) == {(1, "A"), (2, "C")}
+        assert by_row[(1, "A")]["cascade_fields"] == ["B", "C"]
+        assert by_row[(1, "A")]["cascade_impact"] == 2
+        # 链末端字段没有下游
+        assert "cascade_fields" not in by_row[(2, "C")]
+
+    def test_cycle(self):
+        """测试循环依赖不会死循环，循环中的规则排在最后且仍被检测"""
+        rules = [
+            {"formula": "X = Y + 1"},
+            {"formula": "Y = X - 1"},
+            {"formula": "Z = X × 2"},
+            {"formula": "W = v × 3"},
+            {"formula": "无效公式"},
+        ]
+        index = self.detector.get_dependency_index(rules)
+
+        assert index.cycles == ["Y", "X", "Z"]
+        assert index.closure["X"] == ["Y", "Z"]
+        assert index.closure["Y"] == ["X", "Z"]
+        # 无循环的规则在前，循环中的规则按字段出现顺序，无法解析的规则最后
+        assert index.rule_order == [3, 1, 0, 2, 4]
+
+        records = [{"row_index": 0, "v": 1, "W": 3, "X": 5, "Y": 5, "Z": 10}]
+        cascades = self.detector.detect_cascade_conflicts(
+            records, rules, Decimal("0.01")
+        )
+
+        assert [(c["field"], c["cascade_fields"]) for c in cascades] == [
+            ("X", ["Y", "Z"]),
+            ("Y", ["X", "Z"]),
+        ]
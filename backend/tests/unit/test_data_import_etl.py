@@ -0,0 +1,385 @@
+"""
+数据导入ETL流式分块测试
+"""
+
+import asyncio
+import csv
+import sys
+import os
+
+import openpyxl
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.services.columnar_batch import ColumnarBatch
+from backend.src.services.data_import_etl import (
+    DataImportETL,
+    DataSourceType,
+    DocumentFormat,
+    FieldMapping,
+)
+
+
+class TestStreamingImport:
+    """流式分块导入测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.rows = [["订单号", "金额", "状态"]] + [
+            [f"A{i % 40}", str(i % 60), "active" if i % 7 else "unknown"]
+            for i in range(95)
+        ]
+        self.mappings = [
+            FieldMapping("金额", "amount", "integer", validation_rule="range:0,50"),
+            FieldMapping("状态", "status", "string"),
+        ]
+        # 金额超出映射规则范围的行，加上状态不在默认枚举规则中的行
+        self.error_count = sum(1 for i in range(95) if i % 60 > 50) + sum(
+            1 for i in range(95) if i % 7 == 0
+        )
+
+    def _run_import(
+        self,
+        file_path,
+        source_type,
+        document_format,
+        chunk_size,
+        fail_after=None,
+        **import_config,
+    ):
+        etl = DataImportETL(None, None)
+        loaded = []
+
+        async def load(data, target_table, import_config):
+            if fail_after is not None and len(loaded) == fail_after:
+                raise ConnectionError("数据库连接中断")
+            loaded.append(data)
+            count = DataImportETL._count_rows(data)
+            return {"success": True, "successful_count": count, "failed_count": 0}
+
+        etl._load_data_to_target = load
+        result = asyncio.run(
+            etl.process_data_import(
+                str(file_path),
+                source_type,
+                document_format,
+                self.mappings,
+                "orders",
+                dict(import_config, chunk_size=chunk_size),
+            )
+        )
+        return etl, result, loaded
+
+    def test_csv_chunks(self, tmp_path):
+        """测试CSV按块处理且结果与整体解析一致"""
+        file_path = tmp_path / "orders.csv"
+        with open(file_path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file, delimiter=";").writerows(self.rows)
+
+        etl, result, loaded = self._run_import(
+            file_path,
+            DataSourceType.CSV,
+            DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+            chunk_size=20,
+        )
+
+        assert [batch.num_rows for batch in loaded] == [20, 20, 20, 20, 15]
+        assert [batch.row_offset for batch in loaded] == [0, 20, 40, 60, 80]
+        assert loaded[0].headers == ["订单号", "amount", "status"]
+        assert [value for batch in loaded for value in batch.column(1).to_pylist()] == [
+            i % 60 for i in range(95)
+        ]
+        assert result.success
+        assert result.total_records == 95
+        assert result.successful_records == 95
+        assert len(result.errors) == self.error_count
+
+        raw_data = asyncio.run(etl._read_csv_file(str(file_path)))
+        assert raw_data["separator"] == ";"
+        assert raw_data["data"] == self.rows
+
+    def test_loads_interleave_with_reads(self, tmp_path):
+        """测试默认配置下每个数据块读取后即加载，不等整个文件读完"""
+        file_path = tmp_path / "orders.csv"
+        with open(file_path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(self.rows)
+
+        etl = DataImportETL(None, None)
+        events = []
+        iter_parsed_chunks = etl._iter_parsed_chunks
+
+        async def read_chunks(*args, **kwargs):
+            async for chunk in iter_parsed_chunks(*args, **kwargs):
+                events.append("read")
+                yield chunk
+
+        async def load(data, target_table, import_config):
+            events.append("load")
+            return {
+                "success": True,
+                "successful_count": data.num_rows,
+                "failed_count": 0,
+            }
+
+        etl._iter_parsed_chunks = read_chunks
+        etl._load_data_to_target = load
+        result = asyncio.run(
+            etl.process_data_import(
+                str(file_path),
+                DataSourceType.CSV,
+                DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+                self.mappings,
+                "orders",
+                {"chunk_size": 20},
+            )
+        )
+
+        assert result.success
+        assert result.spill_path is None
+        assert events == ["read", "load"] * 5
+
+    def test_excel_chunks(self, tmp_path):
+        """测试Excel按工作表分块且重复行跨数据块检测"""
+        file_path = tmp_path / "orders.xlsx"
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "订单"
+        # 末尾10行与开头的数据行重复
+        for row in self.rows + self.rows[1:11]:
+            sheet.append(row)
+        sheet.append([None, None, None])
+        other = workbook.create_sheet("汇总")
+        other.append(["订单号", "金额"])
+        other.append(["B1", "5"])
+        workbook.save(file_path)
+
+        etl, result, loaded = self._run_import(
+            file_path,
+            DataSourceType.EXCEL,
+            DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+            chunk_size=30,
+        )
+
+        sheet_chunks = [(batch.sheet_name, batch.num_rows) for batch in loaded]
+        assert sheet_chunks == [
+            ("订单", 30),
+            ("订单", 30),
+            ("订单", 30),
+            ("订单", 15),
+            ("汇总", 1),
+        ]
+        assert result.total_records == 106
+
+        seen_rows = {}
+        issues = []
+        for chunk in self._iter_chunks(etl, file_path, 30):
+            for batch in ColumnarBatch.from_parsed(chunk):
+                report = asyncio.run(
+                    etl.quality_checker.check_quality(batch, seen_rows)
+                )
+                issues.extend(report["issues"])
+        assert issues == [
+            f"工作表 订单 第 {i} 行与之前的行完全重复" for i in range(96, 106)
+        ]
+
+    def test_error_message_cap(self, tmp_path):
+        """测试错误消息数量受限且末尾给出违规总数"""
+        file_path = tmp_path / "orders.csv"
+        with open(file_path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(self.rows)
+
+        _, result, _ = self._run_import(
+            file_path,
+            DataSourceType.CSV,
+            DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+            chunk_size=20,
+            max_error_messages=5,
+        )
+
+        assert len(result.errors) == 6
+        assert result.errors[0] == "字段 status 的值 unknown：状态值不在允许范围内"
+        assert result.errors[-1] == (
+            f"共 {self.error_count} 条验证错误，仅列出前 5 条"
+            "（status:enum 14 行，amount:range 9 行）"
+        )
+
+    def test_resume_from_spill(self, tmp_path):
+        """测试溢写后加载中断可从下一个数据块续传"""
+        file_path = tmp_path / "orders.csv"
+        with open(file_path, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file).writerows(self.rows)
+
+        _, failed, loaded = self._run_import(
+            file_path,
+            DataSourceType.CSV,
+            DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+            chunk_size=20,
+            fail_after=2,
+            spill_threshold=30,
+            spill_dir=str(tmp_path / "spill"),
+        )
+        assert not failed.success
+        assert os.path.isdir(failed.spill_path)
+        assert [batch.row_offset for batch in loaded] == [0, 20]
+
+        etl = DataImportETL(None, None)
+        resumed = []
+
+        async def load(data, target_table, import_config):
+            resumed.append(data)
+            return {
+                "success": True,
+                "successful_count": data.num_rows,
+                "failed_count": 0,
+            }
+
+        etl._load_data_to_target = load
+        result = asyncio.run(etl.resume_data_import(failed.spill_path))
+
+        assert [batch.row_offset for batch in resumed] == [40, 60, 80]
+        assert result.success
+        assert result.import_id == failed.import_id
+        assert result.total_records == 95
+        assert result.successful_records == 95
+        assert len(result.errors) == self.error_count
+        assert not os.path.exists(failed.spill_path)
+
+        # 数据行数不超过溢写阈值时不保留溢写，重新导入即可
+        _, small, _ = self._run_import(
+            file_path,
+            DataSourceType.CSV,
+            DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+            chunk_size=20,
+            fail_after=2,
+            spill_threshold=100,
+            spill_dir=str(tmp_path / "spill"),
+        )
+        assert not small.success
+        assert small.spill_path is None
+        assert os.listdir(tmp_path / "spill") == []
+
+    def _iter_chunks(self, etl, file_path, chunk_size):
+        async def collect():
+            return [
+                chunk
+                async for chunk in etl._iter_parsed_chunks(
+                    str(file_path),
+                    DataSourceType.EXCEL,
+                    DocumentFormat.SINGLE_HEADER_MULTI_ROWS,
+                    chunk_size,
+                )
+            ]
+
+        return asyncio.run(collect())
+
+
+class TestValidationRules:
+    """验证规则编译测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.etl = DataImportETL(None, None)
+        self.etl.validation_rules = []
+        self.batch = ColumnarBatch.from_rows(
+            [
+                [5, "a@example.com", "active", " x "],
+                [120, "bad", "closed", " "],
+                [None, None, None, None],
+                [-1, "b@example.com", "pending", "y"],
+            ],
+            {"headers": ["amount", "email", "status", "备注"], "row_offset": 100},
+        )
+
+    def test_violation_rows(self):
+        """测试每条规则输出全局违规行号且消息与逐值验证一致"""
+        mappings = [
+            FieldMapping("amount", "amount", "integer", validation_rule="range:0,100"),
+            FieldMapping(
+                "email", "email", "string", validation_rule=r"format:^\S+@\S+\.\w+$"
+            ),
+            FieldMapping(
+                "status", "status", "string", validation_rule="enum:active,pending"
+            ),
+            FieldMapping("备注", "备注", "string", is_required=True),
+        ]
+        result = asyncio.run(self.etl._validate_data(self.batch, mappings))
+
+        assert not result["valid"]
+        violations = {
+            violation["rule_type"]: violation["rows"].tolist()
+            for violation in result["violations"]
+        }
+        assert violations == {
+            "range": [101, 103],
+            "format": [101],
+            "enum": [101, 102],
+            "required": [101, 102],
+        }
+        assert result["errors"][:4] == [
+            "字段 amount 的值 120 超出范围 [0.0, 100.0]",
+            "字段 amount 的值 -1 超出范围 [0.0, 100.0]",
+            r"字段 email 的值 bad 不符合格式 ^\S+@\S+\.\w+$",
+            "字段 status 的值 closed 不在允许的枚举值中: ['active', 'pending']",
+        ]
+        assert result["errors"][4] == (
+            "字段 status 的值 None 不在允许的枚举值中: ['active', 'pending']"
+        )
+
+        # 行式数据与列式数据结果一致
+        row_result = asyncio.run(
+            self.etl._validate_data(self.batch.to_parsed(), mappings)
+        )
+        assert row_result["errors"] == result["errors"]
+
+    def test_max_errors(self):
+        """测试只生成前max_errors条消息，违规计数不受影响"""
+        result = asyncio.run(
+            self.etl._validate_field(self.batch, "amount", "type:string", 1)
+        )
+
+        assert result["errors"] == ["字段 amount 的值 5 不是 string 类型"]
+        assert result["violation_count"] == 3
+        assert result["violations"][0]["rows"].tolist() == [100, 101, 103]
+
+
+class TestColumnarBatch:
+    """列式数据块测试类"""
+
+    def test_column_conversion(self):
+        """测试按列类型转换、缺失值和清洗"""
+        batch = ColumnarBatch.from_rows(
+            [["A1", " 12.7 ", " x "], ["A2", "", None], ["A3", "abc"], [None, " "]],
+            {"headers": ["订单号", "金额", "备注"]},
+        )
+        mappings = [FieldMapping("金额", "amount", "integer")]
+        etl = DataImportETL(None, None)
+
+        mapped = asyncio.run(etl._apply_field_mappings(batch, mappings))
+        assert mapped.headers == ["订单号", "amount", "备注"]
+        assert mapped.column(1).to_pylist() == [12, None, None, None]
+        assert mapped.meta["warnings"] == [
+            "字段 金额 有 1 个值无法转换为 integer，已置为空"
+        ]
+
+        issues = asyncio.run(etl.quality_checker._check_missing_values(batch))
+        assert issues == [
+            "第 2 行字段 金额 存在缺失值",
+            "第 2 行字段 备注 存在缺失值",
+            "第 3 行字段 备注 存在缺失值",
+            "第 4 行字段 订单号 存在缺失值",
+            "第 4 行字段 金额 存在缺失值",
+            "第 4 行字段 备注 存在缺失值",
+        ]
+
+        cleaned = asyncio.run(etl._clean_data(batch, {}))
+        assert cleaned.to_rows() == [
+            ["A1", "12.7", "x"],
+            ["A2", "", None],
+            ["A3", "abc", None],
+        ]
+
+        df = batch.to_pandas()
+        assert list(df.columns) == ["订单号", "金额", "备注"]
+        assert isinstance(df["金额"].dtype, pd.ArrowDtype)
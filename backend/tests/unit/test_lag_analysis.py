@@ -2,6 +2,7 @@
 时间滞后分析测试
 """
 
+import json
 import pytest
 import pandas as pd
 import numpy as np
@@ -12,7 +13,11 @@ import os
 # 添加项目根目录到路径
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 
-from backend.src.algorithms.lag_analysis import LagAnalysis
+from backend.src.algorithms.lag_analysis import (
+    IncrementalLagStatistics,
+    LagAnalysis,
+    LagMatrix,
+)
 
 
 class TestLagAnalysis:
@@ -308,3 +313,50 @@ class TestLagAnalysis:
         assert "overall_score" in result
         # 多重滞后数据应该检测到滞后效应
         assert result["overall_score"] > 0
+
+    def test_lag_matrix_matches_sliced_statistics(self):
+        """测试滞后矩阵与逐滞后切片计算一致（含FFT路径）"""
+        for max_lag in (5, 60):
+            matrix = LagMatrix(self.X, self.y, max_lag)
+            correlation = matrix.correlation()
+            regression = matrix.regression()
+
+            for lag in (0, 3, max_lag):
+                x = self.X["feature1"].values[: len(self.X) - lag]
+                y = self.y.values[lag:]
+                coef, intercept = np.polyfit(x, y, 1)
+
+                assert correlation[lag, 0] == pytest.approx(np.corrcoef(x, y)[0, 1])
+                assert regression["coefficient"][lag, 0] == pytest.approx(coef)
+                assert regression["intercept"][lag, 0] == pytest.approx(intercept)
+
+    def test_granger_detects_lagged_cause(self):
+        """测试格兰杰检验识别滞后原因"""
+        result = self.lag_analysis._analyze_granger_causality(self.X, self.y, 3)
+
+        assert result["feature1"]["causality"]
+        assert result["feature1"]["best_lag"] == 1
+        assert set(result["feature1"]["causality_tests"]) == {1, 2, 3}
+
+    def test_incremental_statistics_match_batch(self):
+        """测试在线统计与批量分析一致"""
+        statistics = IncrementalLagStatistics(max_lag=5)
+        statistics.extend(self.X["feature1"][:60], self.y[:60])
+
+        # 模拟重启：从序列化状态恢复后继续追加
+        statistics = IncrementalLagStatistics.from_dict(
+            json.loads(json.dumps(statistics.to_dict()))
+        )
+        statistics.extend(self.X["feature1"][60:], self.y[60:])
+
+        X = self.X[["feature1"]]
+        batch_granger = self.lag_analysis._analyze_granger_causality(X, self.y, 5)
+        online_granger = statistics.granger_causality()
+        for lag, test in batch_granger["feature1"]["causality_tests"].items():
+            assert online_granger["causality_tests"][lag][
+                "f_statistic"
+            ] == pytest.approx(test["f_statistic"])
+
+        batch_lags = self.lag_analysis._select_optimal_lags(X, self.y, 5)
+        assert statistics.lag_statistics()["optimal_lag"] == batch_lags["feature1"]
+        assert online_granger["best_lag"] == 1
@@ -0,0 +1,209 @@
+"""
+调度器主节点选举测试
+"""
+
+import asyncio
+import sys
+import os
+import time
+from datetime import datetime
+
+import fakeredis
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.redis_cache import RedisCache
+from backend.src.tasks.leader_election import LeaderElection
+from backend.src.tasks.scheduler import JobType, ScheduledJob, SchedulerService
+
+LEASE_TTL = 0.3
+RENEW_INTERVAL = 0.05
+
+
+def _connected_cache() -> RedisCache:
+    cache = RedisCache("redis://localhost:6379/0")
+    cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache.is_connected = True
+    return cache
+
+
+def _elector(client, node_id: str) -> LeaderElection:
+    return LeaderElection(
+        client, lease_ttl=LEASE_TTL, renew_interval=RENEW_INTERVAL, node_id=node_id
+    )
+
+
+async def _crash(elector: LeaderElection):
+    """模拟节点失联：停止续约但不释放租约"""
+    elector._task.cancel()
+    try:
+        await elector._task
+    except asyncio.CancelledError:
+        pass
+    elector._task = None
+
+
+class TestLeaderElection:
+    """两个节点共享Redis时的选主测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        self.a = _elector(self.client, "a")
+        self.b = _elector(self.client, "b")
+
+    def test_single_leader_claims_once(self):
+        """测试只有一个节点当选，同一次触发只能认领一次"""
+
+        async def run():
+            await self.a.start()
+            await self.b.start()
+            await asyncio.sleep(RENEW_INTERVAL * 3)
+            leaders = [self.a.is_leader, self.b.is_leader]
+            claims = [await e.claim("job:1") for e in (self.a, self.b)]
+            again = await self.a.claim("job:1")
+            await self.a.stop()
+            await self.b.stop()
+            return leaders, claims, again
+
+        leaders, claims, again = asyncio.run(run())
+
+        assert leaders == [True, False]
+        assert claims == [True, False]
+        assert again is False
+        assert self.a.fencing_token is None
+        assert self.a.claims == 1
+        assert self.a.duplicate_claims == 1
+        assert self.a.elections == 1
+        assert self.b.elections == 0
+
+    def test_failover_within_lease(self):
+        """测试主节点失联后从节点在租约时长加一个续约间隔内接管，令牌递增"""
+
+        async def run():
+            await self.a.start()
+            await self.b.start()
+            old_token = self.a.fencing_token
+            await _crash(self.a)
+            crashed = time.monotonic()
+            while not self.b.is_leader:
+                await asyncio.sleep(0.01)
+            elapsed = time.monotonic() - crashed
+            await self.b.stop()
+            return old_token, elapsed
+
+        old_token, elapsed = asyncio.run(run())
+
+        assert elapsed <= LEASE_TTL + RENEW_INTERVAL * 2
+        assert self.b.elections == 1
+        assert self.b.fencing_token is None
+        assert old_token == 1
+
+    def test_release_hands_over_immediately(self):
+        """测试主动释放后其他节点无需等待租约过期即可当选"""
+
+        async def run():
+            assert await self.a.acquire()
+            assert not await self.b.acquire()
+            await self.a.release()
+            return await self.b.acquire(), self.b.fencing_token
+
+        acquired, token = asyncio.run(run())
+
+        assert acquired
+        assert token == 2
+
+    def test_stale_token_rejected(self):
+        """测试暂停后恢复的旧主节点以过期令牌认领被拒绝并退位"""
+        revoked = []
+
+        async def on_revoked():
+            revoked.append(True)
+
+        self.a.on_revoked = on_revoked
+
+        async def run():
+            await self.a.acquire()
+            # 旧主节点暂停，租约过期后由b当选
+            await asyncio.sleep(LEASE_TTL + 0.05)
+            await self.b.acquire()
+            # 旧主节点恢复时本地仍认为租约有效
+            self.a._lease_deadline = time.monotonic() + LEASE_TTL
+            stale = await self.a.claim("job:1")
+            fresh = await self.b.claim("job:1")
+            return stale, fresh
+
+        stale, fresh = asyncio.run(run())
+
+        assert stale is False
+        assert fresh is True
+        assert self.a.stale_claims == 1
+        assert self.a.fencing_token is None
+        assert not self.a.is_leader
+        assert revoked == [True]
+        assert self.b.fencing_token == 2
+
+
+class TestSchedulerLeaderDispatch:
+    """多副本调度器派发测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.cache = _connected_cache()
+        self.occurrence = datetime(2024, 1, 1, 8, 0)
+        self.schedulers = []
+        for node_id in ["a", "b"]:
+            scheduler = SchedulerService(
+                self.cache,
+                leader_election=_elector(self.cache.redis_client, node_id),
+                lease_ttl=LEASE_TTL,
+            )
+            self.schedulers.append(scheduler)
+
+    def _trigger(self, scheduler: SchedulerService, job_id: str, occurrence=None):
+        # 各副本的任务ID不同，任务名称与计划时间相同
+        job = ScheduledJob(job_id, "report", JobType.CRON, "build_report")
+        job.next_run = occurrence or self.occurrence
+        scheduler.jobs[job_id] = job
+        return scheduler._execute_job(job_id)
+
+    def test_only_leader_dispatches(self):
+        """测试同一次触发在两个副本上只由主节点派发一次"""
+        a, b = self.schedulers
+
+        async def run():
+            await a.leader_election.acquire()
+            await b.leader_election.acquire()
+            await self._trigger(a, "a-job")
+            await self._trigger(b, "b-job")
+            # 主节点重复触发同一次计划时间
+            await self._trigger(a, "a-job")
+            return await a.task_queue.dequeue_batch(10)
+
+        tasks = asyncio.run(run())
+
+        assert [s.dispatched_count for s in self.schedulers] == [1, 0]
+        assert [s.skipped_count for s in self.schedulers] == [1, 1]
+        assert len(tasks) == 1
+        assert tasks[0].task_data["job_id"] == "a-job"
+        assert tasks[0].task_data["fencing_token"] == 1
+
+    def test_stale_leader_cannot_dispatch(self):
+        """测试故障切换后旧主节点的触发被拒绝，由新主节点派发"""
+        a, b = self.schedulers
+
+        async def run():
+            await a.leader_election.acquire()
+            await asyncio.sleep(LEASE_TTL + 0.05)
+            await b.leader_election.acquire()
+            a.leader_election._lease_deadline = time.monotonic() + LEASE_TTL
+            await self._trigger(a, "a-job")
+            await self._trigger(b, "b-job")
+            return await b.task_queue.dequeue_batch(10)
+
+        tasks = asyncio.run(run())
+
+        assert [s.dispatched_count for s in self.schedulers] == [0, 1]
+        assert a.leader_election.stale_claims == 1
+        assert [task.task_data["fencing_token"] for task in tasks] == [2]
@@ -0,0 +1,195 @@
+"""
+主数据匹配候选索引测试
+"""
+
+import math
+import random
+import sys
+import os
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.services.data_enhancement.master_data_matcher import (
+    MasterDataIndex,
+    MasterDataMatcher,
+)
+
+# 名称用字取自常用汉字区间，避免随机名称之间大量偶然相似
+CHARS = "".join(chr(0x4E00 + 53 * i) for i in range(300))
+CODE_CHARS = "0123456789ABCDEFGHJKLMNPQRTUWXY"
+SUFFIXES = ["有限公司", "股份有限公司", "集团", ""]
+BRANCHES = ["上海分公司", "广州分公司", "北京办事处"]
+SPECIFICATIONS = ["A-100", "B-200", "C-300", None]
+
+
+class TestMasterDataIndex:
+    """候选索引与逐条扫描一致性测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.rnd = random.Random(7)
+        self.matcher = MasterDataMatcher(None)
+
+    def _company(self) -> str:
+        base = "".join(self.rnd.choice(CHARS) for _ in range(self.rnd.randint(3, 6)))
+        return base + self.rnd.choice(SUFFIXES)
+
+    def _code(self) -> str:
+        return "".join(self.rnd.choice(CODE_CHARS) for _ in range(18))
+
+    def _mutate_code(self, code: str, edits: int) -> str:
+        for position in self.rnd.sample(range(len(code)), edits):
+            replacement = self.rnd.choice(CODE_CHARS.replace(code[position], ""))
+            code = code[:position] + replacement + code[position + 1 :]
+        return code
+
+    def _mutate_name(self, name: str) -> str:
+        position = self.rnd.randrange(len(name) - 2)
+        return name[:position] + self.rnd.choice(CHARS) + name[position + 1 :]
+
+    def _master_data(self, size: int, product: bool = False) -> pd.DataFrame:
+        rows = []
+        for i in range(size):
+            name = self._company()
+            if i % 7 == 0:
+                # 同一总公司的分支机构
+                rows.append(
+                    {
+                        "id": f"m{i}-hq",
+                        "name": name,
+                        "credit_code": self._code(),
+                        "alias_name": None,
+                    }
+                )
+                name = name + self.rnd.choice(BRANCHES)
+            row = {
+                "id": f"m{i}",
+                "name": name,
+                "credit_code": self._code() if self.rnd.random() < 0.8 else None,
+                "alias_name": self._company() if self.rnd.random() < 0.15 else None,
+            }
+            if product:
+                row["specification"] = self.rnd.choice(SPECIFICATIONS)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def _records(self, master_data: pd.DataFrame, product: bool = False) -> list:
+        rows = master_data.to_dict("records")
+        records = []
+        for row in self.rnd.sample(rows, 40):
+            start = len(records)
+            code = row["credit_code"]
+            if isinstance(code, str):
+                # 信用代码一致、细微差异与较大差异
+                records.append(
+                    {"name": self._mutate_name(row["name"]), "credit_code": code}
+                )
+                records.append(
+                    {"name": row["name"], "credit_code": self._mutate_code(code, 1)}
+                )
+                records.append(
+                    {
+                        "name": self._mutate_name(row["name"]),
+                        "credit_code": self._mutate_code(code, 2),
+                    }
+                )
+                records.append({"name": "", "credit_code": self._mutate_code(code, 4)})
+            if isinstance(row["alias_name"], str):
+                records.append({"name": row["alias_name"], "credit_code": None})
+            if any(branch in row["name"] for branch in BRANCHES):
+                headquarter = row["name"][:-5]
+                records.append(
+                    {
+                        "name": headquarter + self.rnd.choice(BRANCHES),
+                        "credit_code": None,
+                    }
+                )
+            records.append(
+                {"name": self._mutate_name(row["name"]), "credit_code": None}
+            )
+            if product:
+                # 多数记录与来源主数据规格型号一致，其余随机
+                for record in records[start:]:
+                    record["specification"] = (
+                        row["specification"]
+                        if self.rnd.random() < 0.8
+                        else self.rnd.choice(SPECIFICATIONS)
+                    )
+        for _ in range(10):
+            records.append(
+                {
+                    "name": self._company(),
+                    "credit_code": self._code(),
+                    "specification": self.rnd.choice(SPECIFICATIONS),
+                }
+            )
+
+        for i, record in enumerate(records):
+            record["row_index"] = i
+        return records
+
+    def _assert_same_as_full_scan(self, data_type: str, product: bool = False):
+        master_data = self._master_data(1200, product=product)
+        records = self._records(master_data, product=product)
+
+        index = MasterDataIndex(self.matcher, master_data, data_type)
+        full_scan = MasterDataIndex(
+            self.matcher, master_data, data_type, full_scan_threshold=math.inf
+        )
+        assert not index.full_scan
+        assert full_scan.full_scan
+
+        suggested = 0
+        for record in records:
+            indexed = self.matcher.match_single_record(
+                record, master_data, data_type, index
+            )
+            scanned = self.matcher.match_single_record(
+                record, master_data, data_type, full_scan
+            )
+            assert indexed["suggested_master_id"] == scanned["suggested_master_id"]
+            # 候选是全部记录的子集，未达阈值的噪声匹配只可能更低
+            assert indexed["confidence"] <= scanned["confidence"]
+            if scanned["suggested_master_id"] is not None:
+                suggested += 1
+                assert indexed["confidence"] == scanned["confidence"]
+                assert indexed["match_reason"] == scanned["match_reason"]
+            assert self._confident(indexed) == self._confident(scanned)
+
+        return records, suggested
+
+    def _confident(self, result: dict) -> list:
+        threshold = self.matcher.confidence_threshold
+        return [
+            (match["master_id"], match["confidence"])
+            for match in result["alternatives"]
+            if match["confidence"] >= threshold
+        ]
+
+    def test_index_matches_full_scan(self):
+        """测试超过1000条主数据时索引匹配与全量扫描结果一致"""
+        records, suggested = self._assert_same_as_full_scan("order")
+
+        assert len(records) > 150
+        assert suggested > 20
+
+    def test_product_index_matches_full_scan(self):
+        """测试产品匹配按规格型号分块时与全量扫描结果一致"""
+        records, suggested = self._assert_same_as_full_scan("product", product=True)
+
+        assert suggested > 30
+
+    def test_code_near_miss_is_candidate(self):
+        """测试信用代码有细微差异的主数据进入候选"""
+        master_data = self._master_data(1500)
+        index = MasterDataIndex(self.matcher, master_data, "order")
+        rows = master_data.to_dict("records")
+
+        for position, row in enumerate(rows[:200]):
+            if not isinstance(row["credit_code"], str):
+                continue
+            code = self._mutate_code(row["credit_code"], 2)
+            assert position in index.candidates("", code)
@@ -0,0 +1,109 @@
+"""
+主数据快照缓存测试
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.services.data_enhancement.master_data_snapshot import (
+    MasterDataSnapshot,
+    MasterDataSnapshotCache,
+)
+
+
+class TestMasterDataSnapshotCache:
+    """主数据快照缓存测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.cache = MasterDataSnapshotCache(max_snapshots=8)
+        self.loads = 0
+
+    async def _refresh(self, snapshot, tenant_id="t1", table="dim_customer"):
+        self.loads += 1
+        await asyncio.sleep(0.01)
+        if snapshot is None:
+            snapshot = MasterDataSnapshot(tenant_id, table)
+            snapshot.replace([{"id": 1, "name": "甲公司"}])
+        return snapshot
+
+    def test_concurrent_loads_are_coalesced(self):
+        """测试同一快照的并发加载只执行一次"""
+
+        async def run():
+            return await asyncio.gather(
+                *[self.cache.get("t1", "dim_customer", self._refresh) for _ in range(5)]
+            )
+
+        snapshots = asyncio.run(run())
+
+        assert self.loads == 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+        assert snapshots[0].master_data["name"].tolist() == ["甲公司"]
+
+    def test_upsert_resets_derived_state(self):
+        """测试合并变更后重建DataFrame与索引"""
+        snapshot = MasterDataSnapshot("t1", "dim_customer")
+        snapshot.replace([{"id": 1, "name": "甲公司"}, {"id": 2, "name": "乙公司"}])
+        snapshot.indexes["order"] = object()
+        first = snapshot.master_data
+
+        assert snapshot.upsert([{"id": 2, "name": "丙公司"}]) == 1
+        assert snapshot.indexes == {}
+        assert snapshot.master_data is not first
+        assert snapshot.master_data["name"].tolist() == ["甲公司", "丙公司"]
+
+    def test_invalidate_by_tenant_and_table(self):
+        """测试按租户和表（忽略schema前缀）失效快照"""
+
+        async def load(tenant_id, table):
+            await self.cache.get(
+                tenant_id,
+                table,
+                lambda snapshot: self._refresh(snapshot, tenant_id, table),
+            )
+
+        async def run():
+            await load("t1", "dim_customer")
+            await load("t1", "dim_supplier")
+            await load("t2", "dim_customer")
+
+        asyncio.run(run())
+
+        assert self.cache.invalidate("t1", "public.dim_customer") == 1
+        assert self.cache.invalidate("t1") == 1
+        assert self.cache.get_stats()["snapshots"] == 1
+
+        asyncio.run(load("t1", "dim_customer"))
+        assert self.loads == 4
+
+    def test_reused_snapshot_expires(self):
+        """测试持续复用的快照不续期，到期后整体重新加载"""
+        now = [0.0]
+        cache = MasterDataSnapshotCache(max_snapshots=8, ttl=10, clock=lambda: now[0])
+        received = []
+
+        async def refresh(snapshot):
+            received.append(snapshot)
+            return await self._refresh(snapshot)
+
+        async def get():
+            return await cache.get("t1", "dim_customer", refresh)
+
+        first = asyncio.run(get())
+        for _ in range(3):
+            now[0] += 3
+            assert asyncio.run(get()) is first
+
+        now[0] += 3
+        reloaded = asyncio.run(get())
+
+        assert received[:4] == [None, first, first, first]
+        assert received[4] is None
+        assert reloaded is not first
+        assert self.loads == 5
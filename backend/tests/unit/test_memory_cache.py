@@ -0,0 +1,180 @@
+"""
+内存缓存存储测试
+"""
+
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.memory_cache import MemoryCache, MISSING
+
+
+class FakeClock:
+    """可控时钟"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestMemoryCache:
+    """内存缓存测试类"""
+
+    def test_lru_evicts_least_recently_used(self):
+        """测试LRU淘汰最近最少使用的键"""
+        cache = MemoryCache(max_size=2, strategy="lru")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_lfu_evicts_least_frequently_used(self):
+        """测试LFU淘汰访问频率最低的键"""
+        cache = MemoryCache(max_size=2, strategy="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_lfu_new_key_is_not_evicted_immediately(self):
+        """测试LFU下新写入的键不会被立即淘汰"""
+        cache = MemoryCache(max_size=1, strategy="lfu")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.set("b", 2)
+
+        assert "b" in cache
+        assert "a" not in cache
+
+    def test_ttl_strategy_evicts_oldest_write(self):
+        """测试TTL策略按写入顺序淘汰"""
+        cache = MemoryCache(max_size=2, strategy="ttl")
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        assert "a" not in cache
+        assert "b" in cache
+
+    def test_entries_expire(self):
+        """测试条目按TTL过期"""
+        clock = FakeClock()
+        cache = MemoryCache(max_size=10, clock=clock)
+        cache.set("short", 1, ttl=5)
+        cache.set("forever", 2)
+
+        clock.now += 4
+        assert cache.get("short") == 1
+
+        clock.now += 2
+        assert cache.get("short", MISSING) is MISSING
+        assert cache.get("forever") == 2
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_timer_wheel_purges_expired_entries(self):
+        """测试时间轮批量清理过期条目"""
+        clock = FakeClock()
+        cache = MemoryCache(max_size=100, clock=clock)
+        for i in range(10):
+            cache.set(f"k{i}", i, ttl=1 + i)
+
+        clock.now += 5.5
+        purged = cache.purge_expired()
+
+        # 整秒槽位k0-k3被批量清理，k4在当前秒内过期，读取时惰性剔除
+        assert purged == 4
+        assert len(cache) == 6
+        assert sorted(cache.keys()) == ["k5", "k6", "k7", "k8", "k9"]
+
+    def test_reset_ttl_on_overwrite(self):
+        """测试覆盖写入会重置过期时间"""
+        clock = FakeClock()
+        cache = MemoryCache(max_size=10, clock=clock)
+        cache.set("a", 1, ttl=5)
+        clock.now += 4
+        cache.set("a", 2, ttl=5)
+        clock.now += 4
+
+        assert cache.purge_expired() == 0
+        assert cache.get("a") == 2
+
+    def test_byte_accounting_and_limit(self):
+        """测试字节统计与字节上限淘汰"""
+        cache = MemoryCache(max_size=100, max_bytes=30, size_estimator=len)
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+        assert cache.get_stats()["bytes"] == 20
+
+        cache.set("c", "z" * 15)
+        stats = cache.get_stats()
+        assert stats["bytes"] == 25
+        assert "a" not in cache
+
+        cache.delete("b")
+        assert cache.get_stats()["bytes"] == 15
+
+    def test_none_value_is_a_hit(self):
+        """测试缓存None值时仍然命中"""
+        cache = MemoryCache()
+        cache.set("a", None)
+
+        assert cache.get("a", MISSING) is None
+        assert cache.get_stats()["hits"] == 1
+
+    def test_hit_miss_counters(self):
+        """测试命中与未命中计数"""
+        cache = MemoryCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_clear_returns_count(self):
+        """测试清空返回清除数量"""
+        cache = MemoryCache(strategy="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.clear() == 2
+        assert len(cache) == 0
+        cache.set("c", 3)
+        assert cache.get("c") == 3
+
+    def test_size_stays_bounded(self):
+        """测试大量写入时容量保持有界"""
+        for strategy in ("lru", "lfu", "ttl"):
+            cache = MemoryCache(max_size=50, strategy=strategy)
+            for i in range(1000):
+                cache.set(f"k{i}", i, ttl=3600)
+                if i % 3 == 0:
+                    cache.get(f"k{i}")
+            assert len(cache) == 50
+            assert cache.get_stats()["evictions"] == 950
+
+    def test_invalid_arguments(self):
+        """测试非法参数"""
+        with pytest.raises(ValueError):
+            MemoryCache(max_size=0)
+        with pytest.raises(ValueError):
+            MemoryCache(strategy="fifo")
@@ -0,0 +1,180 @@
+"""
+Redis缓存批量失效与索引集合测试
+"""
+
+import asyncio
+import sys
+import os
+
+import fakeredis
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.redis_cache import IndexPruner, RedisCache
+from backend.src.services.cache_service import CacheService
+
+
+def _connected_cache() -> RedisCache:
+    cache = RedisCache("redis://localhost:6379/0")
+    cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache.is_connected = True
+    return cache
+
+
+class TestRedisCacheInvalidation:
+    """按模式与标签失效测试类"""
+
+    def test_delete_pattern(self):
+        """测试SCAN分批删除只影响匹配的键"""
+        cache = _connected_cache()
+        batches = []
+
+        async def run():
+            client = cache.redis_client
+            await client.mset({f"user:{i}": i for i in range(1200)})
+            await client.set("order:1", 1)
+            progress = await cache.delete_pattern(
+                "user:*", batch_size=500, on_batch=batches.append
+            )
+            return progress, await client.dbsize()
+
+        progress, remaining = asyncio.run(run())
+
+        assert progress["scanned"] == 1200
+        assert progress["deleted"] == 1200
+        assert progress["batches"] == len(batches) >= 2
+        assert remaining == 1
+
+    def test_tag_index_expiry(self):
+        """测试标签索引的过期时间不短于成员TTL，含不过期成员时不过期"""
+        cache = _connected_cache()
+
+        async def run():
+            client = cache.redis_client
+            await cache.set("a", 1, ttl=100, tags=["t"])
+            first = await client.ttl("cache:tag:t")
+            await cache.set("b", 1, ttl=300, tags=["t"])
+            extended = await client.ttl("cache:tag:t")
+            await cache.set("c", 1, ttl=10, tags=["t"])
+            kept = await client.ttl("cache:tag:t")
+            await cache.set("d", 1, tags=["t"])
+            persistent = await client.ttl("cache:tag:t")
+            return first, extended, kept, persistent
+
+        first, extended, kept, persistent = asyncio.run(run())
+
+        assert 90 < first <= 100
+        assert 290 < extended <= 300
+        assert 290 < kept <= 300
+        assert persistent == -1
+
+    def test_invalidate_tags(self):
+        """测试按标签失效删除成员并清空索引，其他标签的键保留"""
+        cache = _connected_cache()
+
+        async def run():
+            client = cache.redis_client
+            for i in range(30):
+                await cache.set(f"p:{i}", i, ttl=60, tags=["product"])
+            await cache.set("o:1", 1, ttl=60, tags=["order"])
+            # 已过期的成员
+            await client.delete("p:0")
+            progress = await cache.invalidate_tags(["product"], batch_size=10)
+            return (
+                progress,
+                await client.exists("cache:tag:product"),
+                await client.smembers("cache:tag:order"),
+                await client.dbsize(),
+            )
+
+        progress, index_exists, order_members, size = asyncio.run(run())
+
+        assert progress["tags"] == 1
+        assert progress["scanned"] == 30
+        assert progress["deleted"] == 29
+        assert not index_exists
+        assert order_members == {"o:1"}
+        assert size == 2
+
+    def test_delete_and_prune_remove_members(self):
+        """测试删除键时移出索引，已过期的成员可清理"""
+        cache = _connected_cache()
+
+        async def run():
+            client = cache.redis_client
+            for key in ["a", "b", "c"]:
+                await cache.set(key, 1, ttl=60, tags=["t"])
+            await cache.delete("a", tags=["t"])
+            after_delete = await client.smembers("cache:tag:t")
+            await client.delete("b")
+            removed = await cache.prune_tags(["t"])
+            return after_delete, removed, await client.smembers("cache:tag:t")
+
+        after_delete, removed, members = asyncio.run(run())
+
+        assert after_delete == {"b", "c"}
+        assert removed == 1
+        assert members == {"c"}
+
+
+class TestCacheServiceNamespace:
+    """缓存服务命名空间索引测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.service = CacheService()
+        self.service.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    def test_namespace_invalidation(self):
+        """测试按缓存类型失效，索引带过期时间且删除时移出索引"""
+
+        async def run():
+            client = self.service.redis_client
+            for i in range(5):
+                await self.service.set("query_result", {"i": i}, i)
+            await self.service.set("prediction", {"p": 1}, "x")
+            index_ttl = await client.ttl("cache:ns:query_result")
+
+            await self.service.delete("query_result", 0)
+            members = await client.scard("cache:ns:query_result")
+
+            deleted = await self.service.invalidate_namespace(
+                "query_result", batch_size=2
+            )
+            return (
+                index_ttl,
+                members,
+                deleted,
+                await client.exists("cache:ns:query_result"),
+                await self.service.get("prediction", "x"),
+            )
+
+        index_ttl, members, deleted, index_exists, prediction = asyncio.run(run())
+
+        assert 0 < index_ttl <= 60
+        assert members == 4
+        assert deleted == 4
+        assert not index_exists
+        assert prediction == {"p": 1}
+
+    def test_background_prune(self):
+        """测试持续写入的索引在后台清理已失效成员"""
+        self.service._index_pruner = IndexPruner(interval=10, sample=5)
+
+        async def run():
+            client = self.service.redis_client
+            for i in range(200):
+                await self.service.set("query_result", i, i)
+                # 模拟成员过期：只保留最近写入的键
+                if i >= 5:
+                    await client.delete(
+                        self.service._generate_cache_key("query_result", i - 5)
+                    )
+                await asyncio.gather(*self.service._index_pruner._tasks)
+            return await client.scard("cache:ns:query_result")
+
+        size = asyncio.run(run())
+
+        assert size < 40
+        assert self.service._index_pruner.pruned > 150
@@ -0,0 +1,104 @@
+"""
+Shapley值计算引擎测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from backend.src.algorithms.shapley import (
+    ShapleyEngine,
+    tree_shap_r2_attribution,
+    tree_shap_values,
+)
+from backend.src.algorithms.synergy_analysis import SynergyAnalysis
+
+
+class TestShapleyEngine:
+    """Shapley引擎测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        rng = np.random.default_rng(42)
+        self.X = pd.DataFrame(
+            rng.normal(size=(200, 5)), columns=[f"feature{i}" for i in range(5)]
+        )
+        self.y = pd.Series(
+            self.X["feature0"] * 2
+            + self.X["feature1"] * self.X["feature2"]
+            + rng.normal(size=200) * 0.3
+        )
+
+    def test_exact_fits_each_coalition_once(self):
+        """测试精确计算每个联盟只训练一次且满足效率性"""
+        engine = ShapleyEngine(self.X, self.y, LinearRegression(), n_jobs=1)
+        result = engine.exact()
+
+        assert result["model_fits"] == 2**5 - 1
+        full_r2 = LinearRegression().fit(self.X, self.y).score(self.X, self.y)
+        assert sum(result["shapley_values"].values()) == pytest.approx(full_r2)
+
+        # 再次计算全部命中缓存
+        engine.exact()
+        assert engine.fits == 2**5 - 1
+
+    def test_sampling_estimators_converge_to_exact(self):
+        """测试置换采样与KernelSHAP逼近精确值"""
+        exact = ShapleyEngine(self.X, self.y, LinearRegression(), n_jobs=1).exact()
+        permutation = ShapleyEngine(
+            self.X, self.y, LinearRegression(), n_jobs=1
+        ).permutation(tolerance=0.002)
+        kernel = ShapleyEngine(self.X, self.y, LinearRegression(), n_jobs=1).kernel(
+            max_samples=20
+        )
+
+        for feature, value in exact["shapley_values"].items():
+            assert permutation["shapley_values"][feature] == pytest.approx(
+                value, abs=0.02
+            )
+            assert kernel["shapley_values"][feature] == pytest.approx(value, abs=0.05)
+
+    def test_tree_shap_local_accuracy(self):
+        """测试TreeSHAP满足局部准确性"""
+        for model in (
+            RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0),
+            GradientBoostingRegressor(n_estimators=20, random_state=0),
+        ):
+            model.fit(self.X, self.y)
+            shap = tree_shap_values(model, self.X.iloc[:50])
+            reconstructed = shap["expected_value"] + shap["values"].sum(axis=1)
+            np.testing.assert_allclose(
+                reconstructed, model.predict(self.X.iloc[:50]), atol=1e-8
+            )
+
+    def test_tree_shap_r2_attribution(self):
+        """测试TreeSHAP的R²分解识别主要特征"""
+        model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+        model.fit(self.X, self.y)
+        result = tree_shap_r2_attribution(model, self.X, self.y)
+
+        values = result["shapley_values"]
+        assert max(values, key=values.get) == "feature0"
+        assert result["model_fits"] == 0
+
+    def test_synergy_analysis_methods(self):
+        """测试协同分析中的Shapley方法选择"""
+        analysis = SynergyAnalysis()
+        X = self.X[["feature0", "feature1", "feature2"]]
+
+        exact = analysis.calculate_shapley_values(X, self.y, n_jobs=1)
+        tree = analysis.calculate_shapley_values(X, self.y, method="tree")
+
+        assert exact["method"] == "exact"
+        assert exact["model_fits"] == 7
+        assert tree["method"] == "tree"
+        assert exact["feature_ranking"][0][0] == "feature0"
+        assert analysis.calculate_shapley_values(X, self.y, method="bogus") == {}
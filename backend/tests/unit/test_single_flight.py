@@ -0,0 +1,180 @@
+"""
+缓存击穿防护测试
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.single_flight import (
+    SingleFlight,
+    StampedeGuard,
+    should_refresh_early,
+)
+
+
+class TestSingleFlight:
+    """请求合并测试类"""
+
+    def test_concurrent_calls_are_coalesced(self):
+        """测试同一键的并发调用只执行一次"""
+        single_flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def run():
+            return await asyncio.gather(
+                *[single_flight.do("key", compute) for _ in range(20)]
+            )
+
+        results = asyncio.run(run())
+
+        assert results == [42] * 20
+        assert len(calls) == 1
+        assert single_flight.coalesced == 19
+
+    def test_different_keys_run_independently(self):
+        """测试不同键互不合并"""
+        single_flight = SingleFlight()
+
+        async def run():
+            return await asyncio.gather(
+                single_flight.do("a", _value("a")),
+                single_flight.do("b", _value("b")),
+            )
+
+        assert asyncio.run(run()) == ["a", "b"]
+        assert single_flight.executions == 2
+
+    def test_exception_is_shared_and_key_released(self):
+        """测试异常传递给所有等待者且键随后可重新执行"""
+        single_flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            results = await asyncio.gather(
+                *[single_flight.do("key", failing) for _ in range(3)],
+                return_exceptions=True,
+            )
+            retry = await single_flight.do("key", _value("ok"))
+            return results, retry
+
+        results, retry = asyncio.run(run())
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert retry == "ok"
+        assert not single_flight.in_flight("key")
+
+    def test_cancelled_leader_does_not_cancel_waiters(self):
+        """测试发起者被取消时其余等待者仍获得结果"""
+        single_flight = SingleFlight()
+
+        async def run():
+            leader = asyncio.ensure_future(
+                single_flight.do("key", _value(5, delay=0.02))
+            )
+            await asyncio.sleep(0)
+            waiters = [
+                asyncio.ensure_future(single_flight.do("key", _value(0)))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*waiters)
+            return leader, results
+
+        leader, results = asyncio.run(run())
+
+        assert leader.cancelled()
+        assert results == [5, 5, 5]
+        assert single_flight.executions == 1
+        assert not single_flight.in_flight("key")
+
+
+class TestStampedeGuard:
+    """击穿防护测试类"""
+
+    def test_load_stores_once(self):
+        """测试合并加载只写入一次缓存"""
+        guard = StampedeGuard()
+        stored = []
+
+        async def store(value):
+            stored.append(value)
+
+        async def run():
+            return await asyncio.gather(
+                *[guard.load("key", _value(7, delay=0.01), store, 60) for _ in range(5)]
+            )
+
+        assert asyncio.run(run()) == [7] * 5
+        assert stored == [7]
+
+    def test_background_refresh(self):
+        """测试临近过期时后台刷新"""
+        guard = StampedeGuard()
+        stored = []
+
+        async def store(value):
+            stored.append(value)
+
+        async def run():
+            await guard.load("key", _value(1), store, 60)
+            # 强制重算耗时远大于剩余TTL，触发提前刷新
+            guard._metadata.set("key", (1e6, 0.0), 60)
+            assert guard.should_refresh("key", beta=1.0)
+            guard.refresh_in_background("key", _value(2), store, 60)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+
+        assert stored == [1, 2]
+        assert guard.get_stats()["early_refreshes"] == 1
+
+    def test_no_refresh_without_metadata_or_beta(self):
+        """测试无元数据或beta为0时不提前刷新"""
+        guard = StampedeGuard()
+        assert not guard.should_refresh("missing", beta=1.0)
+        guard._metadata.set("key", (1e6, 0.0), 60)
+        assert not guard.should_refresh("key", beta=0.0)
+
+
+class TestShouldRefreshEarly:
+    """提前刷新判断测试类"""
+
+    def test_far_from_expiry(self):
+        """测试远离过期时不刷新"""
+        assert not should_refresh_early(
+            expires_at=10_000.0, delta=0.001, beta=1.0, now=0.0
+        )
+
+    def test_already_expired(self):
+        """测试已过期时必然刷新"""
+        assert should_refresh_early(expires_at=10.0, delta=0.001, beta=1.0, now=11.0)
+
+    def test_disabled(self):
+        """测试关闭时不刷新"""
+        assert not should_refresh_early(expires_at=10.0, delta=1.0, beta=0.0, now=11.0)
+        assert not should_refresh_early(expires_at=None, delta=1.0, beta=1.0)
+
+
+def _value(value, delay: float = 0.0):
+    """构造返回固定值的协程函数"""
+
+    async def compute():
+        if delay:
+            await asyncio.sleep(delay)
+        return value
+
+    return compute
@@ -0,0 +1,206 @@
+"""
+暂存表COPY批量写入测试
+"""
+
+import asyncio
+import sys
+import os
+from contextlib import asynccontextmanager
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.exceptions import DatabaseError
+from backend.src.security.database import SecureDatabaseService
+from backend.src.services.data_enhancement.staging_table_manager import (
+    StagingTableManager,
+)
+
+
+class _FakeConnection:
+    """记录COPY分块与事务结果的连接"""
+
+    def __init__(self, fail_on_copy=None):
+        self.fail_on_copy = fail_on_copy
+        self.copies = []
+        self.executed = []
+        self.transactions = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        try:
+            yield
+        except BaseException:
+            self.transactions.append("rollback")
+            raise
+        self.transactions.append("commit")
+
+    async def copy_records_to_table(
+        self, table, records=None, columns=None, schema_name=None
+    ):
+        if self.fail_on_copy is not None and len(self.copies) == self.fail_on_copy:
+            raise RuntimeError("COPY不可用")
+        self.copies.append(
+            {
+                "table": table,
+                "schema_name": schema_name,
+                "columns": columns,
+                "records": list(records),
+            }
+        )
+
+    async def execute(self, query, *params):
+        self.executed.append((query, params))
+        return "INSERT 0 1"
+
+
+class _FakePool:
+    """每次获取同一个连接的连接池"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.acquired += 1
+        yield self.connection
+
+
+def _database(connection) -> SecureDatabaseService:
+    database = SecureDatabaseService("postgresql://localhost/test")
+    database.pool = _FakePool(connection)
+    return database
+
+
+class TestCopyRecords:
+    """COPY批量写入测试类"""
+
+    def test_chunks_in_one_transaction(self):
+        """测试按块COPY且全部分块在同一连接、同一事务中"""
+        connection = _FakeConnection()
+        database = _database(connection)
+        consumed = []
+
+        def rows():
+            for i in range(25):
+                consumed.append(i)
+                yield (i, f"r{i}")
+
+        total = asyncio.run(
+            database.copy_records(
+                "stg_order", ["id", "name"], rows(), schema_name="t1", chunk_size=10
+            )
+        )
+
+        assert total == 25
+        assert [len(copy["records"]) for copy in connection.copies] == [10, 10, 5]
+        assert all(copy["schema_name"] == "t1" for copy in connection.copies)
+        assert connection.copies[2]["records"][-1] == (24, "r24")
+        assert database.pool.acquired == 1
+        assert connection.transactions == ["commit"]
+        assert len(consumed) == 25
+
+    def test_failed_chunk_rolls_back(self):
+        """测试任一分块失败时整体回滚并抛出DatabaseError"""
+        connection = _FakeConnection(fail_on_copy=1)
+        database = _database(connection)
+
+        try:
+            asyncio.run(
+                database.copy_records(
+                    "stg_order", ["id"], [(i,) for i in range(25)], chunk_size=10
+                )
+            )
+        except DatabaseError:
+            pass
+        else:
+            raise AssertionError("COPY失败未抛出DatabaseError")
+
+        assert len(connection.copies) == 1
+        assert connection.transactions == ["rollback"]
+
+    def test_requires_pool(self):
+        """测试连接池未初始化时抛出DatabaseError"""
+        database = SecureDatabaseService("postgresql://localhost/test")
+
+        try:
+            asyncio.run(database.copy_records("stg_order", ["id"], [(1,)]))
+        except DatabaseError:
+            return
+        raise AssertionError("未初始化连接池时未抛出DatabaseError")
+
+
+class TestInsertToStaging:
+    """写入暂存表测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.records = [
+            {"order_no": "A1", "quantity": 1, "amount": 10.5},
+            {"order_no": "A2", "quantity": None, "amount": None},
+            {"order_no": None, "quantity": 3, "amount": 7.25},
+            {"order_no": "A4", "quantity": 4, "amount": 1.0},
+            {"order_no": "A5", "quantity": None, "amount": 2.0},
+        ]
+
+    def test_copy_path(self):
+        """测试COPY写入：分块同一事务，可空整数列保持整数，缺失值为None"""
+        connection = _FakeConnection()
+        manager = StagingTableManager(_database(connection))
+
+        result = asyncio.run(
+            manager.insert_to_staging(
+                "stg_order", "t1", self.records, "tenant-1", chunk_size=2
+            )
+        )
+
+        assert result["method"] == "copy"
+        assert result["row_count"] == 5
+        assert result["status"] == "success"
+        assert result["rows_per_second"] > 0
+        assert [len(copy["records"]) for copy in connection.copies] == [2, 2, 1]
+        assert connection.transactions == ["commit"]
+        assert connection.executed == []
+
+        columns = connection.copies[0]["columns"]
+        assert columns[:3] == ["order_no", "quantity", "amount"]
+        assert columns[3:] == ["tenant_id", "created_at", "status"]
+
+        rows = [row for copy in connection.copies for row in copy["records"]]
+        quantities = [row[1] for row in rows]
+        assert quantities == [1, None, 3, 4, None]
+        assert all(type(q) is int for q in quantities if q is not None)
+        assert [row[2] for row in rows] == [10.5, None, 7.25, 1.0, 2.0]
+        assert rows[2][0] is None
+        assert all(row[3] == "tenant-1" and row[5] == "pending" for row in rows)
+
+    def test_falls_back_to_insert(self):
+        """测试COPY失败时回滚并回退为逐行INSERT"""
+        connection = _FakeConnection(fail_on_copy=1)
+        manager = StagingTableManager(_database(connection))
+
+        result = asyncio.run(
+            manager.insert_to_staging(
+                "stg_order", "t1", self.records, "tenant-1", chunk_size=2
+            )
+        )
+
+        assert result["method"] == "insert"
+        assert result["row_count"] == 5
+        assert result["rows_per_second"] > 0
+        assert connection.transactions == ["rollback"]
+        assert len(connection.executed) == 5
+        query, params = connection.executed[0]
+        assert "INSERT INTO t1.stg_order" in query
+        assert params[:3] == ("A1", 1, 10.5)
+
+    def test_empty_records(self):
+        """测试空记录不访问数据库"""
+        connection = _FakeConnection()
+        manager = StagingTableManager(_database(connection))
+
+        result = asyncio.run(manager.insert_to_staging("stg_order", "t1", [], "t"))
+
+        assert result == {"row_count": 0, "status": "success"}
+        assert connection.copies == [] and connection.executed == []
@@ -0,0 +1,181 @@
+"""
+任务处理器执行器测试
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.error_handling.unified import BusinessError
+from backend.src.tasks.executors import (
+    ExecutorPolicy,
+    HandlerExecutor,
+    ensure_picklable,
+    get_handler_policy,
+)
+from backend.src.tasks.task_queue import task_handler
+
+
+@task_handler(executor=ExecutorPolicy.PROCESS)
+def cpu_job(task_data):
+    """进程池处理器：返回子进程ID与计算结果"""
+    return {"pid": os.getpid(), "value": sum(i * i for i in range(task_data["n"]))}
+
+
+def slow_job(task_data):
+    """长时间运行的处理器"""
+    time.sleep(task_data["seconds"])
+    return "done"
+
+
+async def async_job(task_data):
+    """协程处理器"""
+    await asyncio.sleep(0)
+    return task_data["value"]
+
+
+class TestHandlerExecutor:
+    """执行器测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.executor = HandlerExecutor(max_threads=2, max_processes=2)
+
+    def teardown_method(self):
+        """测试后清理"""
+        self.executor.shutdown(wait=False)
+
+    def test_decorator_declares_policy(self):
+        """测试装饰器声明执行策略且保持函数可序列化"""
+        assert get_handler_policy(cpu_job) == ExecutorPolicy.PROCESS
+        assert get_handler_policy(async_job) == ExecutorPolicy.INLINE
+        ensure_picklable(cpu_job)
+
+    def test_closure_is_rejected_for_process_pool(self):
+        """测试闭包不能注册为进程池处理器"""
+
+        def local_job(task_data):
+            return task_data
+
+        with pytest.raises(BusinessError):
+            ensure_picklable(local_job)
+
+    def test_inline_execution(self):
+        """测试事件循环内执行"""
+        result = asyncio.run(self.executor.run(async_job, {"value": 3}))
+        assert result == 3
+        assert self.executor.get_stats()["inline"]["completed"] == 1
+
+    def test_thread_execution(self):
+        """测试线程池执行"""
+        result = asyncio.run(
+            self.executor.run(async_job, {"value": 5}, ExecutorPolicy.THREAD)
+        )
+        assert result == 5
+        assert self.executor.get_stats()["thread_pool"]["completed"] == 1
+
+    def test_process_execution(self):
+        """测试进程池执行"""
+        result = asyncio.run(self.executor.run(cpu_job, {"n": 1000}))
+
+        assert result["value"] == sum(i * i for i in range(1000))
+        assert result["pid"] != os.getpid()
+        stats = self.executor.get_stats()["process_pool"]
+        assert stats["completed"] == 1
+        assert stats["active"] == 0
+
+    def test_timeout(self):
+        """测试超时控制"""
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(
+                self.executor.run(
+                    slow_job, {"seconds": 1}, ExecutorPolicy.THREAD, timeout=0.05
+                )
+            )
+        assert self.executor.get_stats()["timeouts"] == 1
+
+    def test_process_timeout_isolated(self):
+        """测试进程任务超时只终止自身子进程，其他子进程中的任务不受影响"""
+
+        async def run():
+            pooled = asyncio.ensure_future(
+                self.executor.run(slow_job, {"seconds": 1}, ExecutorPolicy.PROCESS)
+            )
+            with pytest.raises(asyncio.TimeoutError):
+                await self.executor.run(
+                    slow_job, {"seconds": 30}, ExecutorPolicy.PROCESS, timeout=0.5
+                )
+            return await pooled
+
+        assert asyncio.run(run()) == "done"
+        stats = self.executor.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["process_pool"]["terminated"] == 1
+        assert stats["process_pool"]["completed"] == 1
+
+    def test_process_error_with_timeout(self):
+        """测试子进程中的异常回传给调用方，子进程继续复用"""
+        with pytest.raises(KeyError):
+            asyncio.run(
+                self.executor.run(cpu_job, {}, ExecutorPolicy.PROCESS, timeout=30)
+            )
+        stats = self.executor.get_stats()["process_pool"]
+        assert stats["workers"] == stats["idle"] == 1
+
+    def test_timed_jobs_bounded_and_reused(self):
+        """测试并发的限时进程任务不超过max_processes个子进程，子进程被复用"""
+        peak = []
+
+        async def sample(tasks):
+            while not all(task.done() for task in tasks):
+                peak.append(len(multiprocessing.active_children()))
+                await asyncio.sleep(0.01)
+
+        async def run():
+            tasks = [
+                asyncio.ensure_future(
+                    self.executor.run(cpu_job, {"n": 200000}, timeout=30)
+                )
+                for _ in range(8)
+            ]
+            await sample(tasks)
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(run())
+
+        assert max(peak) <= 2
+        assert len({result["pid"] for result in results}) == 2
+        stats = self.executor.get_stats()["process_pool"]
+        assert stats["spawned"] == 2
+        assert stats["completed"] == 8
+        assert stats["workers"] == stats["idle"] == 2
+
+    def test_timeout_replaces_only_that_worker(self):
+        """测试超时终止的子进程被替换，槽位释放后排队的任务继续执行"""
+
+        async def run():
+            timed_out = [
+                self.executor.run(
+                    slow_job, {"seconds": 30}, ExecutorPolicy.PROCESS, timeout=0.5
+                )
+                for _ in range(2)
+            ]
+            queued = self.executor.run(cpu_job, {"n": 10}, timeout=30)
+            return await asyncio.gather(*timed_out, queued, return_exceptions=True)
+
+        first, second, queued = asyncio.run(run())
+
+        assert isinstance(first, asyncio.TimeoutError)
+        assert isinstance(second, asyncio.TimeoutError)
+        assert queued["value"] == sum(i * i for i in range(10))
+        stats = self.executor.get_stats()["process_pool"]
+        assert stats["terminated"] == 2
+        assert stats["spawned"] == 3
+        assert stats["workers"] == 1
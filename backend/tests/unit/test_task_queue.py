@@ -0,0 +1,400 @@
+"""
+Redis任务队列测试
+"""
+
+import asyncio
+import sys
+import os
+
+import fakeredis
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.redis_cache import RedisCache
+from backend.src.tasks import task_queue as task_queue_module
+from backend.src.tasks.task_queue import (
+    TaskManager,
+    TaskPriority,
+    TaskQueue,
+    TaskStatus,
+    TaskWorker,
+    task_record_key,
+)
+
+
+def _connected_cache() -> RedisCache:
+    cache = RedisCache("redis://localhost:6379/0")
+    cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    cache.is_connected = True
+    return cache
+
+
+class TestTaskQueue:
+    """任务队列领取、回收与确认测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.cache = _connected_cache()
+        self.queue = TaskQueue(self.cache, "jobs", block_timeout=0)
+
+    def test_keys_share_hash_tag(self):
+        """测试队列键共享哈希标签"""
+        keys = [
+            self.queue._processing_key,
+            self.queue._deadlines_key,
+            self.queue._delayed_key,
+            self.queue._meta_key,
+            self.queue._signal_key,
+            *self.queue._priority_keys,
+            self.queue._task_key(self.queue._new_task_id()),
+        ]
+        assert all(key.startswith("queue:{jobs}:") for key in keys)
+
+    def test_claim_is_one_round_trip(self):
+        """测试领取与标记运行中在一次脚本调用中完成"""
+
+        async def run():
+            client = self.cache.redis_client
+            await self.queue.enqueue_many([{"task_name": "t"} for _ in range(3)])
+            # 预先加载脚本，避免首次调用时的SCRIPT LOAD
+            await self.queue.dequeue_batch(1)
+
+            calls = []
+            execute_command = client.execute_command
+            pipeline = client.pipeline
+
+            async def counting_execute(*args, **kwargs):
+                calls.append(args[0])
+                return await execute_command(*args, **kwargs)
+
+            def counting_pipeline(*args, **kwargs):
+                calls.append("pipeline")
+                return pipeline(*args, **kwargs)
+
+            client.execute_command = counting_execute
+            client.pipeline = counting_pipeline
+            tasks = await self.queue.dequeue_batch(10)
+            claim_calls = list(calls)
+            return claim_calls, tasks, await self.queue.get_task(tasks[0].task_id)
+
+        calls, tasks, stored = asyncio.run(run())
+
+        assert calls == ["EVALSHA"]
+        assert len(tasks) == 2
+        assert all(task.status == TaskStatus.RUNNING for task in tasks)
+        assert stored.status == TaskStatus.RUNNING
+        assert stored.started_at is not None
+
+    def test_manager_finds_task_by_id(self):
+        """测试只凭任务ID即可查询与取消任务"""
+        manager = TaskManager(self.cache)
+
+        async def run():
+            task_id = await self.queue.enqueue("t", {}, retry_delay=0)
+            found = await manager.get_task(task_id)
+            listed = [task.task_id for task in await manager.get_all_tasks()]
+            cancelled = await manager.cancel_task(task_id)
+            return (
+                task_id,
+                found,
+                listed,
+                cancelled,
+                await self.queue.get_task(task_id),
+                await self.queue.dequeue(),
+            )
+
+        task_id, found, listed, cancelled, stored, claimed = asyncio.run(run())
+
+        assert task_id.startswith("jobs:")
+        assert task_record_key(task_id).startswith("queue:{jobs}:task:")
+        assert found.task_id == task_id
+        assert listed == [task_id]
+        assert cancelled
+        assert stored.status == TaskStatus.CANCELLED
+        assert claimed is None
+
+    def test_priority_ordering(self):
+        """测试按优先级从高到低领取，同优先级先进先出"""
+
+        async def run():
+            await self.queue.enqueue("t", {"n": 1}, priority=TaskPriority.LOW)
+            await self.queue.enqueue("t", {"n": 2}, priority=TaskPriority.NORMAL)
+            await self.queue.enqueue("t", {"n": 3}, priority=TaskPriority.CRITICAL)
+            await self.queue.enqueue("t", {"n": 4}, priority=TaskPriority.NORMAL)
+            await self.queue.enqueue("t", {"n": 5}, priority=TaskPriority.HIGH)
+            first = await self.queue.dequeue()
+            rest = await self.queue.dequeue_batch(10)
+            return [first] + rest
+
+        tasks = asyncio.run(run())
+
+        assert [task.task_data["n"] for task in tasks] == [3, 5, 2, 4, 1]
+        assert all(task.status == TaskStatus.RUNNING for task in tasks)
+        assert all(task.started_at is not None for task in tasks)
+
+    def test_claim_trims_signal(self):
+        """测试领取后唤醒信号不超过剩余待处理任务数"""
+
+        async def run():
+            client = self.cache.redis_client
+            await self.queue.enqueue_many([{"task_name": "t"} for _ in range(5)])
+            before = await client.llen(self.queue._signal_key)
+            await self.queue.dequeue_batch(3)
+            partial = await client.llen(self.queue._signal_key)
+            await self.queue.dequeue_batch(10)
+            drained = await client.exists(self.queue._signal_key)
+            return before, partial, drained
+
+        before, partial, drained = asyncio.run(run())
+
+        assert before == 5
+        assert partial == 2
+        assert not drained
+
+    def test_ack_removes_from_processing(self):
+        """测试确认后任务移出处理中列表与调度信息"""
+
+        async def run():
+            client = self.cache.redis_client
+            task_id = await self.queue.enqueue("t", {})
+            task = await self.queue.dequeue()
+            processing = await client.lrange(self.queue._processing_key, 0, -1)
+            await self.queue.complete_task(task.task_id, {"ok": True})
+            return (
+                task_id,
+                processing,
+                await client.llen(self.queue._processing_key),
+                await client.zcard(self.queue._deadlines_key),
+                await client.hlen(self.queue._meta_key),
+                await self.queue.get_task(task_id),
+            )
+
+        task_id, processing, after, deadlines, meta, stored = asyncio.run(run())
+
+        assert processing == [task_id]
+        assert after == 0
+        assert deadlines == 0
+        assert meta == 0
+        assert stored.status == TaskStatus.COMPLETED
+        assert stored.result == {"ok": True}
+
+    def test_visibility_timeout_reclaim(self):
+        """测试超过可见性截止时间的任务被重投，重试耗尽后标记失败"""
+        task_queue_module.VISIBILITY_GRACE = -10
+        try:
+
+            async def run():
+                task_id = await self.queue.enqueue("t", {}, max_retries=1, timeout=0)
+                await self.queue.dequeue()
+                first = await self.queue.reclaim_stalled()
+                requeued = await self.queue.get_task(task_id)
+                claimed = await self.queue.dequeue()
+                second = await self.queue.reclaim_stalled()
+                failed = await self.queue.get_task(task_id)
+                return first, requeued, claimed, second, failed
+
+            first, requeued, claimed, second, failed = asyncio.run(run())
+        finally:
+            task_queue_module.VISIBILITY_GRACE = 30
+
+        assert first == {"reclaimed": 1, "failed": 0}
+        assert requeued.status == TaskStatus.PENDING
+        assert requeued.retry_count == 1
+        assert claimed.task_id == requeued.task_id
+        assert second == {"reclaimed": 0, "failed": 1}
+        assert failed.status == TaskStatus.FAILED
+        assert failed.completed_at is not None
+
+    def test_reclaim_skips_unexpired(self):
+        """测试未到可见性截止时间的任务不被回收"""
+
+        async def run():
+            await self.queue.enqueue("t", {}, timeout=300)
+            await self.queue.dequeue()
+            return await self.queue.reclaim_stalled()
+
+        assert asyncio.run(run()) == {"reclaimed": 0, "failed": 0}
+
+    def test_cancelled_task_discarded(self):
+        """测试已取消的任务在领取时被丢弃"""
+
+        async def run():
+            client = self.cache.redis_client
+            cancelled_id = await self.queue.enqueue("t", {"n": 1})
+            await self.queue.enqueue("t", {"n": 2})
+            await self.queue.cancel_task(cancelled_id)
+            tasks = await self.queue.dequeue_batch(10)
+            return tasks, await client.llen(self.queue._processing_key)
+
+        tasks, processing = asyncio.run(run())
+
+        assert [task.task_data["n"] for task in tasks] == [2]
+        assert processing == 1
+
+    def test_failed_task_retried_after_delay(self):
+        """测试失败任务经延迟集合放回原优先级队列"""
+
+        async def run():
+            task_id = await self.queue.enqueue(
+                "t", {}, priority=TaskPriority.HIGH, retry_delay=0
+            )
+            task = await self.queue.dequeue()
+            await self.queue.fail_task(task.task_id, "boom", task)
+            retried = await self.queue.dequeue()
+            meta = await self.cache.redis_client.hget(self.queue._meta_key, task_id)
+            return task_id, retried, meta
+
+        task_id, retried, meta = asyncio.run(run())
+
+        assert retried.task_id == task_id
+        assert retried.retry_count == 1
+        assert meta == f"{TaskPriority.HIGH.value}:300:3:1"
+
+
+class TestTaskQueueBatch:
+    """批量入队、批量领取与批量确认测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.cache = _connected_cache()
+        self.queue = TaskQueue(self.cache, "jobs", block_timeout=0)
+        self.pipelines = 0
+
+        client = self.cache.redis_client
+        pipeline = client.pipeline
+
+        def counting_pipeline(*args, **kwargs):
+            self.pipelines += 1
+            return pipeline(*args, **kwargs)
+
+        client.pipeline = counting_pipeline
+
+    def test_enqueue_many_pipelined(self):
+        """测试批量入队按块流水线提交，任务ID与输入顺序一致"""
+        specs = [
+            {
+                "task_name": "t",
+                "task_data": {"n": i},
+                "priority": TaskPriority.HIGH if i % 3 == 0 else TaskPriority.LOW,
+            }
+            for i in range(7)
+        ]
+
+        async def run():
+            task_ids = await self.queue.enqueue_many(specs, chunk_size=3)
+            pipelines = self.pipelines
+            tasks = [await self.queue.get_task(task_id) for task_id in task_ids]
+            stats = await self.queue.get_task_stats()
+            return task_ids, pipelines, tasks, stats
+
+        task_ids, pipelines, tasks, stats = asyncio.run(run())
+
+        assert pipelines == 3
+        assert len(set(task_ids)) == 7
+        assert [task.task_data["n"] for task in tasks] == list(range(7))
+        assert stats["queue_size_by_priority"]["high"] == 3
+        assert stats["queue_size_by_priority"]["low"] == 4
+
+    def test_dequeue_batch_bounded(self):
+        """测试批量领取不超过n个，有任务时不等待凑满"""
+
+        async def run():
+            client = self.cache.redis_client
+            await self.queue.enqueue_many([{"task_name": "t"} for _ in range(10)])
+            first = await self.queue.dequeue_batch(4)
+            processing = await client.llen(self.queue._processing_key)
+            second = await self.queue.dequeue_batch(100, block_timeout=5)
+            empty = await self.queue.dequeue_batch(4)
+            return first, processing, second, empty
+
+        first, processing, second, empty = asyncio.run(run())
+
+        assert len(first) == 4
+        assert processing == 4
+        assert len(second) == 6
+        assert empty == []
+        assert not {t.task_id for t in first} & {t.task_id for t in second}
+
+    def _worker(self, batch_size: int) -> TaskWorker:
+        async def handler(data):
+            if data.get("fail"):
+                raise ValueError(f"失败 {data['n']}")
+            return data["n"] * 2
+
+        asyncio.run(self.queue.register_handler("t", handler))
+        return TaskWorker(self.queue, "w0", batch_size=batch_size)
+
+    def test_worker_acks_whole_batch_once(self):
+        """测试批量工作者整批结果一次确认"""
+        worker = self._worker(batch_size=4)
+        acks = []
+        ack_batch = self.queue.ack_batch
+
+        async def recording_ack_batch(completed, failed=None):
+            acks.append((dict(completed), list(failed or [])))
+            await ack_batch(completed, failed)
+
+        self.queue.ack_batch = recording_ack_batch
+
+        async def run():
+            client = self.cache.redis_client
+            task_ids = await self.queue.enqueue_many(
+                [{"task_name": "t", "task_data": {"n": i}} for i in range(6)]
+            )
+            processed = [await worker._process_batch() for _ in range(3)]
+            tasks = [await self.queue.get_task(task_id) for task_id in task_ids]
+            return processed, tasks, await client.llen(self.queue._processing_key)
+
+        processed, tasks, processing = asyncio.run(run())
+
+        assert processed == [True, True, False]
+        assert [len(completed) for completed, _ in acks] == [4, 2]
+        assert all(task.status == TaskStatus.COMPLETED for task in tasks)
+        assert [task.result for task in tasks] == [0, 2, 4, 6, 8, 10]
+        assert processing == 0
+
+    def test_partial_failure_in_batch(self):
+        """测试批内部分任务失败时其余任务仍完成，失败任务按重试次数重试或失败"""
+        worker = self._worker(batch_size=10)
+
+        async def run():
+            client = self.cache.redis_client
+            task_ids = await self.queue.enqueue_many(
+                [
+                    {"task_name": "t", "task_data": {"n": 0}},
+                    {"task_name": "t", "task_data": {"n": 1, "fail": True}},
+                    {
+                        "task_name": "t",
+                        "task_data": {"n": 2, "fail": True},
+                        "max_retries": 0,
+                    },
+                    {"task_name": "t", "task_data": {"n": 3}},
+                    {"task_name": "missing", "task_data": {"n": 4}, "max_retries": 0},
+                ]
+            )
+            await worker._process_batch()
+            tasks = [await self.queue.get_task(task_id) for task_id in task_ids]
+            return (
+                tasks,
+                await client.llen(self.queue._processing_key),
+                await client.zrange(self.queue._delayed_key, 0, -1),
+                await client.hkeys(self.queue._meta_key),
+            )
+
+        tasks, processing, delayed, meta = asyncio.run(run())
+
+        assert [task.status for task in tasks] == [
+            TaskStatus.COMPLETED,
+            TaskStatus.RETRYING,
+            TaskStatus.FAILED,
+            TaskStatus.COMPLETED,
+            TaskStatus.FAILED,
+        ]
+        assert tasks[1].retry_count == 1
+        assert tasks[1].error_message == "失败 1"
+        assert "任务处理器不存在" in tasks[4].error_message
+        assert processing == 0
+        assert delayed == [tasks[1].task_id]
+        # 只有等待重试的任务保留调度信息
+        assert meta == [tasks[1].task_id]
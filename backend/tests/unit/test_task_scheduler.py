@@ -0,0 +1,237 @@
+"""
+定时任务调度器测试
+"""
+
+import asyncio
+import copy
+import sys
+import os
+import time
+
+import fakeredis
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from backend.src.cache.redis_cache import RedisCache
+from backend.src.services.task_scheduler import (
+    ScheduleType,
+    TaskScheduler,
+    TaskStatus,
+)
+from backend.src.tasks.leader_election import LeaderElection
+from backend.src.tasks.task_queue import TaskQueue
+
+
+class TestTaskScheduler:
+    """调度器测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        self.scheduler = TaskScheduler(db_service=None, cache_service=None)
+        self.calls = []
+
+        async def record(**kwargs):
+            self.calls.append(kwargs)
+
+        self.scheduler.register_task_function("record", record)
+
+    def test_interval_task_is_dispatched_on_time(self):
+        """测试间隔任务在到期时触发，无需轮询"""
+
+        async def run():
+            await self.scheduler.start_scheduler()
+            await self.scheduler.create_task(
+                "t", "", "record", {"n": 1}, ScheduleType.INTERVAL, {"interval": 0.05}
+            )
+            await asyncio.sleep(0.18)
+            await self.scheduler.stop_scheduler()
+
+        asyncio.run(run())
+
+        assert 2 <= len(self.calls) <= 4
+        assert self.calls[0] == {"n": 1}
+
+    def test_reschedule_and_delete(self):
+        """测试重新调度覆盖旧条目，删除后不再触发"""
+
+        async def run():
+            task_id = await self.scheduler.create_task(
+                "t", "", "record", {}, ScheduleType.INTERVAL, {"interval": 60}
+            )
+            await self.scheduler.update_task(task_id, schedule_config={"interval": 30})
+            assert len(self.scheduler._schedule_heap) == 2
+            assert len(self.scheduler._scheduled_tasks) == 1
+            first_due = self.scheduler._next_due()
+
+            await self.scheduler.delete_task(task_id)
+            assert self.scheduler._next_due() is None
+            return first_due
+
+        first_due = asyncio.run(run())
+        assert first_due is not None
+
+    def test_one_dispatch_per_occurrence(self):
+        """测试重新调度后遗留的旧条目不会随任务再次调度而重新生效"""
+
+        async def run():
+            task_id = await self.scheduler.create_task(
+                "t", "", "record", {}, ScheduleType.INTERVAL, {"interval": 60}
+            )
+            await self.scheduler.update_task(task_id, schedule_config={"interval": 30})
+
+            # 新旧两个条目都到期：只有最新的一个触发
+            self.scheduler._schedule_heap[:] = [
+                (0.0, version, entry_id)
+                for _, version, entry_id in self.scheduler._schedule_heap
+            ]
+            await self.scheduler._dispatch_due_tasks()
+            assert self.scheduler.task_queue.qsize() == 1
+
+            current = [
+                entry
+                for entry in self.scheduler._schedule_heap
+                if self.scheduler._is_current(entry)
+            ]
+            assert len(current) == 1
+            assert current[0][0] > 0
+
+        asyncio.run(run())
+
+    def test_once_task_is_not_scheduled(self):
+        """测试一次性任务不进入调度索引"""
+
+        async def run():
+            await self.scheduler.create_task(
+                "t", "", "record", {}, ScheduleType.ONCE, {}
+            )
+
+        asyncio.run(run())
+        assert self.scheduler._next_due() is None
+
+
+class TestTaskSchedulerReplicaRetry:
+    """多副本失败重试测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        cache = RedisCache("redis://localhost:6379/0")
+        cache.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        cache.is_connected = True
+        self.queue = TaskQueue(cache, "scheduled", block_timeout=0)
+        self.calls = []
+
+        async def flaky(**kwargs):
+            self.calls.append(kwargs)
+            if len(self.calls) == 1:
+                raise ValueError("首次执行失败")
+            return len(self.calls)
+
+        self.schedulers = []
+        for node_id in ["a", "b"]:
+            election = LeaderElection(
+                cache.redis_client, lease_ttl=5, renew_interval=0.05, node_id=node_id
+            )
+            scheduler = TaskScheduler(
+                db_service=None,
+                cache_service=None,
+                leader_election=election,
+                task_queue=self.queue,
+            )
+            scheduler.register_task_function("flaky", flaky)
+            self.schedulers.append(scheduler)
+
+    async def _create_on_both(self, retry_delay: int) -> str:
+        """在主节点创建任务，从节点从共享存储加载同一任务"""
+        leader, follower = self.schedulers
+        task_id = await leader.create_task(
+            "t",
+            "",
+            "flaky",
+            {"n": 1},
+            ScheduleType.INTERVAL,
+            {"interval": 60},
+            retry_delay=retry_delay,
+        )
+        follower._schedule(copy.deepcopy(leader._scheduled_tasks[task_id]))
+        return task_id
+
+    def _make_due(self, scheduler: TaskScheduler):
+        scheduler._schedule_heap[:] = [
+            (0.0, version, entry_id)
+            for _, version, entry_id in scheduler._schedule_heap
+        ]
+
+    def test_follower_failure_is_retried(self):
+        """测试从节点执行失败后，重试经共享队列延迟投递并被执行"""
+        leader, follower = self.schedulers
+
+        async def run():
+            await leader.leader_election.acquire()
+            await follower.leader_election.acquire()
+            task_id = await self._create_on_both(retry_delay=1)
+
+            for scheduler in self.schedulers:
+                self._make_due(scheduler)
+                await scheduler._dispatch_due_tasks()
+
+            # 从节点的工作者领取并执行失败
+            first = await self.queue.dequeue()
+            await follower.run_dispatched_task(first.task_data)
+            follower_task = follower._scheduled_tasks[task_id]
+            status_after_failure = follower_task.status
+            await self.queue.complete_task(first.task_id)
+
+            # 从节点的常规条目到期时不会吞掉重试
+            self._make_due(follower)
+            await follower._dispatch_due_tasks()
+            early = await self.queue.dequeue()
+
+            await asyncio.sleep(1.05)
+            retry = await self.queue.dequeue()
+            result = await follower.run_dispatched_task(retry.task_data)
+            return status_after_failure, early, retry, result, follower_task
+
+        status, early, retry, result, task = asyncio.run(run())
+
+        assert status == TaskStatus.RETRYING
+        assert early is None
+        assert retry.task_data["retry_count"] == 1
+        assert result == {"success": True, "data": 2}
+        assert len(self.calls) == 2
+        assert task.status == TaskStatus.COMPLETED
+        assert task.retry_count == 0
+
+    def test_undispatched_retry_keeps_retry_time(self):
+        """测试非主节点上的重试条目未能派发时保留重试时间，当选后派发"""
+        leader, follower = self.schedulers
+        for scheduler in self.schedulers:
+            scheduler.dispatch_queue = None
+
+        async def run():
+            await leader.leader_election.acquire()
+            await follower.leader_election.acquire()
+            task_id = await self._create_on_both(retry_delay=0)
+            task = follower._scheduled_tasks[task_id]
+            task.status = TaskStatus.RETRYING
+            task.next_run = task.next_run.replace(year=2000)
+            follower._schedule(task, retry=True)
+            retry_at = task.next_run
+
+            await follower._dispatch_due_tasks()
+            kept = task.next_run
+            recheck = follower._next_due().timestamp() - time.time()
+
+            # 主节点释放租约，从节点当选后派发该重试
+            await leader.leader_election.release()
+            await follower.leader_election.acquire()
+            await asyncio.sleep(follower._retry_recheck_interval)
+            await follower._dispatch_due_tasks()
+            return retry_at, kept, recheck, follower.task_queue.qsize(), task
+
+        retry_at, kept, recheck, queued, task = asyncio.run(run())
+
+        assert kept == retry_at
+        assert 0 < recheck <= 0.05
+        assert queued == 1
+        assert task.next_run > retry_at
@@ -128,6 +128,30 @@ class TestThresholdAnalysis:
                 <= self.X["feature1"].max()
             )
 
+    def test_prefix_sum_search_matches_refitting(self):
+        """测试前缀和搜索与逐个候选拟合结果一致"""
+        X = self.X.copy()
+        X["discrete"] = np.random.randint(0, 5, len(X)).astype(float)
+
+        searches = self.threshold_analysis.find_optimal_thresholds(X, self.y, 10)
+
+        for feature in X.columns:
+            threshold, score = self.threshold_analysis._scan_threshold_candidates(
+                X, self.y, feature, 10, 20
+            )
+            assert searches[feature]["threshold"] == threshold
+            assert searches[feature]["score"] == pytest.approx(score)
+
+    def test_exhaustive_threshold_search(self):
+        """测试以全部样本值为候选的搜索"""
+        searches = self.threshold_analysis.find_optimal_thresholds(
+            self.X, self.y, 10, n_candidates=None
+        )
+        coarse = self.threshold_analysis.find_optimal_thresholds(self.X, self.y, 10)
+
+        assert searches["feature1"]["threshold"] in set(self.X["feature1"])
+        assert searches["feature1"]["score"] >= coarse["feature1"]["score"]
+
     def test_calculate_piecewise_score(self):
         """测试分段模型得分计算"""
         score = self.threshold_analysis._calculate_piecewise_score(
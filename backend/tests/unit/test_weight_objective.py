@@ -0,0 +1,158 @@
+"""
+权重优化目标函数测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from backend.src.algorithms.weight_optimization import (
+    WeightObjective,
+    WeightOptimization,
+)
+
+
+class TestWeightObjective:
+    """目标函数引擎测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        rng = np.random.default_rng(42)
+        self.X = pd.DataFrame(
+            rng.normal(size=(200, 4)), columns=["f1", "f2", "f3", "f4"]
+        )
+        self.y = pd.Series(
+            self.X.values @ np.array([2.0, 1.5, 0.0, 0.5]) + rng.normal(size=200)
+        )
+        self.engine = WeightObjective(self.X, self.y)
+        self.rng = rng
+
+    def _reference(self, weights, objective):
+        """逐次拟合线性回归的参考实现"""
+        X_weighted = self.X * weights
+        y_pred = LinearRegression().fit(X_weighted, self.y).predict(X_weighted)
+        return {
+            "mse": mean_squared_error(self.y, y_pred),
+            "mae": mean_absolute_error(self.y, y_pred),
+            "r2": -r2_score(self.y, y_pred),
+            "custom": mean_squared_error(self.y, y_pred) + 0.1 * np.abs(weights).sum(),
+        }[objective]
+
+    def test_matches_refit(self):
+        """测试闭式目标值与重新拟合结果一致"""
+        for _ in range(20):
+            weights = self.rng.random(4) * (self.rng.random(4) > 0.3)
+            for objective in ["mse", "mae", "r2", "custom"]:
+                assert self.engine.evaluate(weights, objective) == pytest.approx(
+                    self._reference(weights, objective), abs=1e-10
+                )
+
+    def test_population_and_support_cache(self):
+        """测试批量评估与逐个评估一致且相同支撑集只求解一次"""
+        population = self.rng.random((100, 4))
+        population[::2, 2] = 0
+
+        values = self.engine.evaluate_population(population, "custom")
+
+        expected = [self.engine.evaluate(w, "custom") for w in population]
+        np.testing.assert_allclose(values, expected)
+        assert self.engine.solves == 2
+
+    def test_gradient(self):
+        """测试解析梯度与数值梯度一致"""
+        weights = np.array([0.4, 0.3, 0.2, 0.1])
+        gradient = self.engine.gradient(weights, "custom", l2_penalty=0.5)
+
+        eps = 1e-6
+        numeric = [
+            (
+                self.engine.evaluate(weights + eps * e, "custom", l2_penalty=0.5)
+                - self.engine.evaluate(weights - eps * e, "custom", l2_penalty=0.5)
+            )
+            / (2 * eps)
+            for e in np.eye(4)
+        ]
+        np.testing.assert_allclose(gradient, numeric, atol=1e-5)
+
+    def test_optimizer_reuses_engine(self):
+        """测试优化器在同一数据上复用目标函数引擎"""
+        optimizer = WeightOptimization()
+        results = optimizer._grid_search_optimization(self.X, self.y, ["mse"])
+
+        assert results["mse"]["objective_value"] == pytest.approx(
+            self._reference(np.ones(4), "mse")
+        )
+        engine = optimizer._get_objective_engine(self.X, self.y)
+        assert engine is optimizer._objective_engine[2]
+
+
+class TestParallelOptimization:
+    """并行权重优化测试类"""
+
+    def test_parallel_matches_serial(self):
+        """测试并行执行结果与串行一致并逐个回调"""
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(100, 3)), columns=["f1", "f2", "f3"])
+        y = pd.Series(X.values @ np.array([1.0, 2.0, 0.5]) + rng.normal(size=100))
+        methods = ["gradient_descent", "bayesian"]
+        objectives = ["mse", "r2"]
+
+        optimizer = WeightOptimization()
+        serial = optimizer.optimize_weights(X, y, methods, objectives)
+
+        streamed = []
+        parallel = optimizer.optimize_weights(
+            X,
+            y,
+            methods,
+            objectives,
+            n_jobs=2,
+            on_result=lambda method, objective, _: streamed.append((method, objective)),
+        )
+
+        assert sorted(streamed) == sorted(
+            (method, objective) for method in methods for objective in objectives
+        )
+        for method in methods:
+            for objective in objectives:
+                assert parallel[method][objective]["objective_value"] == pytest.approx(
+                    serial[method][objective]["objective_value"]
+                )
+        assert set(parallel["ensemble"]) == set(objectives)
+
+    def test_min_results_ensembles_early(self):
+        """测试完成组合数达到min_results即集成，其余组合被放弃"""
+        rng = np.random.default_rng(1)
+        X = pd.DataFrame(rng.normal(size=(100, 3)), columns=["f1", "f2", "f3"])
+        y = pd.Series(X.values @ np.array([1.0, 2.0, 0.5]) + rng.normal(size=100))
+        methods = ["gradient_descent", "bayesian", "grid_search"]
+        objectives = ["mse", "r2"]
+
+        streamed = []
+        optimizer = WeightOptimization()
+        results = optimizer.optimize_weights(
+            X,
+            y,
+            methods,
+            objectives,
+            n_jobs=2,
+            on_result=lambda method, objective, _: streamed.append((method, objective)),
+            min_results=2,
+        )
+
+        collected = [
+            (method, objective) for method in methods for objective in results[method]
+        ]
+        assert len(streamed) == 2
+        assert sorted(collected) == sorted(streamed)
+        assert set(results["ensemble"]) == {objective for _, objective in streamed}
+        assert optimizer.optimization_history[-1]["completed_jobs"] == 2
+        assert optimizer.optimization_history[-1]["min_results"] == 2
@@ -0,0 +1,87 @@
+"""
+批量重抽样验证测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import cross_val_score
+
+from backend.src.algorithms.weight_validation import (
+    ResamplingEngine,
+    WeightValidation,
+)
+
+
+class TestResamplingEngine:
+    """重抽样引擎测试类"""
+
+    def setup_method(self):
+        """测试前准备"""
+        rng = np.random.default_rng(7)
+        self.X = pd.DataFrame(rng.normal(size=(120, 3)), columns=["f1", "f2", "f3"])
+        self.y = pd.Series(
+            self.X.values @ np.array([1.0, 2.0, 0.5]) + rng.normal(size=120)
+        )
+        self.weights = {"f1": 0.5, "f2": 0.5, "f3": 0.0}
+        self.weights_array = np.array([0.5, 0.5, 0.0])
+        self.validation = WeightValidation()
+
+    def test_bootstrap_matches_sequential_fits(self):
+        """测试批量Bootstrap与逐次拟合结果一致"""
+        np.random.seed(0)
+        results = self.validation._bootstrap_validation(
+            self.X, self.y, self.weights, n_bootstrap=20
+        )
+
+        np.random.seed(0)
+        expected = []
+        for _ in range(20):
+            indices = np.random.choice(len(self.X), size=len(self.X), replace=True)
+            X_weighted = self.X.iloc[indices] * self.weights_array
+            y_bootstrap = self.y.iloc[indices]
+            model = LinearRegression().fit(X_weighted, y_bootstrap)
+            expected.append(mean_squared_error(y_bootstrap, model.predict(X_weighted)))
+
+        np.testing.assert_allclose(results["bootstrap_scores"], expected)
+        assert results["bootstrap_ci"][0] == pytest.approx(np.percentile(expected, 2.5))
+
+    def test_cross_validation_matches_sklearn(self):
+        """测试批量交叉验证与cross_val_score一致"""
+        results = self.validation._cross_validation_validation(
+            self.X, self.y, self.weights
+        )
+
+        X_weighted = self.X * self.weights_array
+        expected_mse = -cross_val_score(
+            LinearRegression(),
+            X_weighted,
+            self.y,
+            cv=5,
+            scoring="neg_mean_squared_error",
+        )
+        expected_r2 = cross_val_score(
+            LinearRegression(), X_weighted, self.y, cv=5, scoring="r2"
+        )
+
+        np.testing.assert_allclose(results["cv_scores"], expected_mse)
+        np.testing.assert_allclose(results["cv_r2_scores"], expected_r2)
+
+    def test_zero_weight_feature_has_zero_coefficient(self):
+        """测试权重为0的特征系数为0且批次分块不影响结果"""
+        X_weighted = self.X.to_numpy() * self.weights_array
+        engine = ResamplingEngine(X_weighted, self.y, max_batch_elements=1000)
+
+        np.random.seed(1)
+        coef = engine.bootstrap(25)["coef"]
+
+        assert coef.shape == (25, 3)
+        assert np.allclose(coef[:, 2], 0)
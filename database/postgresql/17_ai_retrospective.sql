@@ -172,6 +172,32 @@ CREATE INDEX IF NOT EXISTS idx_retrospective_recommendations_priority ON retrosp
 CREATE INDEX IF NOT EXISTS idx_retrospective_recommendations_status ON retrospective_recommendations(status);
 CREATE INDEX IF NOT EXISTS idx_retrospective_recommendations_insight ON retrospective_recommendations(insight_id) WHERE insight_id IS NOT NULL;
 
+-- ============================================================
+-- 5. 指标滞后统计状态表 (metric_lag_statistics)
+-- 用途: 持久化指标对的在线滞后统计状态，新观测到达时增量更新
+-- ============================================================
+CREATE TABLE IF NOT EXISTS metric_lag_statistics (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    
+    -- 指标对
+    cause_metric_id VARCHAR(255) NOT NULL, -- 原因指标
+    effect_metric_id VARCHAR(255) NOT NULL, -- 结果指标
+    max_lag INTEGER NOT NULL,
+    
+    -- 在线统计状态
+    state JSONB NOT NULL, -- 各滞后的运行均值与离差矩阵
+    watermark TIMESTAMP WITH TIME ZONE, -- 已纳入统计的最新观测时间
+    
+    -- 时间信息
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    UNIQUE (cause_metric_id, effect_metric_id, max_lag)
+);
+
+-- 索引
+CREATE INDEX IF NOT EXISTS idx_metric_lag_statistics_effect ON metric_lag_statistics(effect_metric_id);
+
 -- ============================================================
 -- 注释说明
 -- ============================================================
@@ -179,4 +205,5 @@ COMMENT ON TABLE retrospective_sessions IS '复盘会话表：存储复盘会话
 COMMENT ON TABLE retrospective_data IS '复盘数据表：存储收集的复盘相关数据，包括决策结果、指标变化、异常事件等';
 COMMENT ON TABLE retrospective_insights IS '复盘洞察表：存储AI生成的复盘洞察，包括根因分析、模式识别、成功因素等';
 COMMENT ON TABLE retrospective_recommendations IS '复盘建议表：存储基于复盘生成的改进建议，包括最佳实践、流程优化、风险预警等';
+COMMENT ON TABLE metric_lag_statistics IS '指标滞后统计状态表：存储指标对的在线滞后统计与水位线，避免每次从全部历史重算';
 